@@ -10,6 +10,9 @@ from frappe.utils import now_datetime, cint, add_to_date, get_url, flt, cstr
 from frappe.realtime import publish_realtime
 from imogi_pos.utils.permission_manager import check_branch_access, check_doctype_permission
 from imogi_pos.utils.decorators import require_permission, require_role
+from imogi_pos.utils.item_master import get_item_details
+from imogi_pos.utils.modifier_index import get_modifier_index, lookup_option
+from imogi_pos.utils.deferred import defer
 
 try:
     from erpnext.stock.stock_ledger import NegativeStockError
@@ -74,15 +77,11 @@ def validate_pos_session(pos_profile, enforce_session=None):
     return active_session
 
 
-def notify_stock_update(invoice_doc, profile_doc):
-    """Publish stock updates for items in a submitted Sales Invoice.
-    
-    For BOM-based items, publishes max_producible_qty (from raw materials)
-    instead of actual_qty from Stock Ledger.
-    """
+def _get_stock_update_targets(invoice_doc, profile_doc):
+    """Return ``(item_codes, warehouse)`` whose stock a submitted invoice changed."""
 
     if not invoice_doc or not profile_doc:
-        return
+        return set(), None
 
     warehouse = None
     profile_get = getattr(profile_doc, "get", None)
@@ -92,7 +91,7 @@ def notify_stock_update(invoice_doc, profile_doc):
         warehouse = getattr(profile_doc, "warehouse", None)
 
     if not warehouse:
-        return
+        return set(), None
 
     def _extract_item_codes(rows):
         for row in rows or []:
@@ -107,9 +106,48 @@ def notify_stock_update(invoice_doc, profile_doc):
     item_codes.update(_extract_item_codes(getattr(invoice_doc, "items", None)))
     item_codes.update(_extract_item_codes(getattr(invoice_doc, "packed_items", None)))
 
+    return item_codes, warehouse
+
+
+def notify_stock_update(invoice_doc, profile_doc):
+    """Publish stock updates for items in a submitted Sales Invoice.
+    
+    For BOM-based items, publishes max_producible_qty (from raw materials)
+    instead of actual_qty from Stock Ledger.
+    """
+
+    item_codes, warehouse = _get_stock_update_targets(invoice_doc, profile_doc)
+    if item_codes:
+        publish_stock_levels(item_codes, warehouse)
+
+
+def defer_stock_update(invoice_doc, profile_doc):
+    """Schedule ``notify_stock_update`` for after the invoice commits.
+
+    Deduplicated per invoice, so ``generate_invoice`` and the ``on_submit``
+    hook publish once.
+    """
+
+    item_codes, warehouse = _get_stock_update_targets(invoice_doc, profile_doc)
     if not item_codes:
         return
 
+    defer(
+        "imogi_pos.api.billing.publish_stock_levels",
+        key=("stock_update", getattr(invoice_doc, "name", None) or warehouse),
+        item_codes=sorted(item_codes),
+        warehouse=warehouse,
+    )
+
+
+def publish_stock_levels(item_codes, warehouse):
+    """Publish the available quantity of each item in a warehouse.
+
+    Args:
+        item_codes: Item codes to publish
+        warehouse: Warehouse the quantities are read from
+    """
+
     realtime = getattr(frappe, "publish_realtime", None) or publish_realtime
     bom_cache = {}
 
@@ -150,7 +188,7 @@ def notify_stock_update(invoice_doc, profile_doc):
 
 
 def on_sales_invoice_submit(invoice_doc, method=None):
-    """Hook handler to publish stock updates when a Sales Invoice is submitted."""
+    """Hook handler to publish stock updates once a Sales Invoice is committed."""
 
     if not invoice_doc:
         return
@@ -160,25 +198,21 @@ def on_sales_invoice_submit(invoice_doc, method=None):
         return
 
     try:
-        profile_doc = frappe.get_doc("POS Profile", pos_profile)
+        profile_doc = frappe.get_cached_doc("POS Profile", pos_profile)
     except Exception:
         return
 
-    notify_stock_update(invoice_doc, profile_doc)
-
-
-def _get_option_price(item_doc, table_name, option_name):
-    for row in getattr(item_doc, table_name, []) or []:
-        if getattr(row, "option_name", None) == option_name:
-            return flt(getattr(row, "additional_price", 0))
-    return 0
+    defer_stock_update(invoice_doc, profile_doc)
 
 
 def compute_customizations(order_item):
     """Compute customization details for a POS Order item.
     
     For fresh deployments using native variants, this function provides
-    backward compatibility for customization processing.
+    backward compatibility for customization processing. Price deltas come
+    from the item's compiled modifier index (shared with
+    ``apply_invoice_modifiers``); options that link to a variant item carry
+    their price on the variant itself and add nothing here.
     """
     options = getattr(order_item, "item_options", None) or {}
     if isinstance(options, str):
@@ -189,6 +223,7 @@ def compute_customizations(order_item):
     customizations = {}
     total_delta = 0
     summary_parts = []
+    modifier_index = None
 
     # For native variants, customization data structure is simpler
     # Just process the basic options without referencing deprecated tables
@@ -218,18 +253,15 @@ def compute_customizations(order_item):
         customizations[group] = names
         summary_parts.append(f"{group.title()}: {', '.join(names)}")
 
-        table = option_tables.get(group)
-        if table:
-            if item_doc is None:
-                try:
-                    item_doc = frappe.get_cached_doc("Item", order_item.item)
-                except Exception:
-                    item_doc = None
-            if item_doc:
-                skip_price_lookup = bool(linked_codes and getattr(order_item, "item", None) in linked_codes)
-                if not skip_price_lookup:
-                    for name in names:
-                        total_delta += _get_option_price(item_doc, table, name)
+        item_code = getattr(order_item, "item", None)
+        if not item_code:
+            continue
+        if modifier_index is None:
+            modifier_index = get_modifier_index(item_code)
+        for entry in entries:
+            option = lookup_option(modifier_index, group, entry)
+            if option and not option.get("linked_item"):
+                total_delta += flt(option.get("additional_price"))
 
     summary = ", ".join(summary_parts)
     return total_delta, customizations, summary
@@ -1132,9 +1164,15 @@ def _consume_bom_raw_materials(invoice_doc, profile_doc):
     if bom_item_codes:
         setattr(invoice_doc, "imogi_bom_item_codes", bom_item_codes)
     
-    # Publish low stock alerts via realtime
+    # Publish low stock alerts via realtime once the invoice is committed
     if low_stock_alerts:
-        _publish_low_stock_alerts(low_stock_alerts, invoice_doc)
+        defer(
+            "imogi_pos.api.billing.publish_low_stock_alerts",
+            key=("low_stock_alert", invoice_name),
+            low_stock_alerts=low_stock_alerts,
+            invoice=invoice_name,
+            owner=getattr(invoice_doc, "owner", None) or frappe.session.user,
+        )
     
     return bom_item_codes
 
@@ -1143,12 +1181,13 @@ def _consume_bom_raw_materials(invoice_doc, profile_doc):
 _create_manufacturing_stock_entries = _consume_bom_raw_materials
 
 
-def _publish_low_stock_alerts(low_stock_alerts, invoice_doc):
-    """Publish realtime alerts for low stock raw materials.
+def publish_low_stock_alerts(low_stock_alerts, invoice=None, owner=None):
+    """Publish low stock alerts to the invoice owner and stock managers.
     
     Args:
         low_stock_alerts: List of dicts with component shortage info
-        invoice_doc: Sales Invoice document for context
+        invoice: Sales Invoice name the alerts came from
+        owner: User who submitted the invoice
     """
     if not low_stock_alerts:
         return
@@ -1205,13 +1244,13 @@ def _publish_low_stock_alerts(low_stock_alerts, invoice_doc):
         full_message = "\n".join(message_parts)
         
         # Publish realtime notification to POS users
-        invoice_user = getattr(invoice_doc, "owner", None) or frappe.session.user
+        invoice_user = owner or frappe.session.user
         publish_realtime(
             "imogi_low_stock_alert",
             {
                 "message": full_message,
                 "items": alert_items,
-                "invoice": getattr(invoice_doc, "name", None),
+                "invoice": invoice,
                 "timestamp": now_datetime().isoformat(),
             },
             user=invoice_user,
@@ -1225,7 +1264,7 @@ def _publish_low_stock_alerts(low_stock_alerts, invoice_doc):
                     {
                         "message": full_message,
                         "items": alert_items,
-                        "invoice": getattr(invoice_doc, "name", None),
+                        "invoice": invoice,
                         "timestamp": now_datetime().isoformat(),
                     },
                     user=user,
@@ -1233,7 +1272,7 @@ def _publish_low_stock_alerts(low_stock_alerts, invoice_doc):
         
         # Log for audit
         frappe.logger().warning(
-            f"Low stock alert triggered from invoice {getattr(invoice_doc, 'name', 'N/A')}: "
+            f"Low stock alert triggered from invoice {invoice or 'N/A'}: "
             f"{len(alert_items)} components below threshold"
         )
         
@@ -1257,25 +1296,20 @@ def build_invoice_items(order_doc, mode):
     """
     invoice_items = []
 
-    # Collect distinct item codes and fetch their names in a single query
+    # Collect distinct item codes and fetch their names in a single cached lookup
     item_codes = list({item.item for item in order_doc.items})
     item_names = {}
     if item_codes:
         if hasattr(frappe, "get_all"):
-            fetched = frappe.get_all(
-                "Item",
-                filters={"name": ["in", item_codes]},
-                fields=["name", "item_name"],
-            )
+            item_names = {
+                code: details.get("item_name")
+                for code, details in get_item_details(item_codes).items()
+            }
         else:
-            fetched = [
-                {
-                    "name": code,
-                    "item_name": frappe.db.get_value("Item", code, "item_name"),
-                }
+            item_names = {
+                code: frappe.db.get_value("Item", code, "item_name")
                 for code in item_codes
-            ]
-        item_names = {d["name"]: d["item_name"] for d in fetched}
+            }
 
     for item in order_doc.items:
         item_code = item.item
@@ -1697,7 +1731,7 @@ Full Traceback:
                 frappe.ValidationError
             )
 
-        notify_stock_update(invoice_doc, profile_doc)
+        defer_stock_update(invoice_doc, profile_doc)
 
         # Link invoice back to POS Order
         frappe.db.set_value("POS Order", pos_order, "sales_invoice", invoice_doc.name)
@@ -1846,25 +1880,26 @@ def list_orders_for_cashier(
         else:
             order["table_name"] = None
             
-        order_items = frappe.get_all(
+        order["items"] = frappe.get_all(
             "POS Order Item",
             filters={"parent": order["name"]},
             fields=["item", "qty", "rate", "amount", "notes"],
             order_by="idx",
         )
-        # Attach item info from Item doctype and ensure required fields exist
-        for item in order_items:
-            details = frappe.db.get_value(
-                "Item", item["item"], ["item_name", "image"], as_dict=True
-            ) or {}
+
+    # Attach item info from the Item master (one cached lookup for the board)
+    items_master = get_item_details(
+        [item.get("item") for order in orders for item in order["items"]]
+    )
+    for order in orders:
+        for item in order["items"]:
+            details = items_master.get(item.get("item")) or {}
 
             # Always include item_name, image, and rate in the payload
             item["item_name"] = details.get("item_name") or item.get("item")
             item["image"] = details.get("image")
             item["rate"] = flt(item.get("rate"))
 
-        order["items"] = order_items
-
     return orders
 
 @frappe.whitelist()
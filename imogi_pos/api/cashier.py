@@ -182,7 +182,11 @@ def get_cashier_context():
     from imogi_pos.utils.operational_context import require_operational_context
 
     ctx = require_operational_context()
-    pos_profile = ctx.get("pos_profile")
+    return _build_cashier_context(ctx.get("pos_profile"))
+
+
+def _build_cashier_context(pos_profile):
+    """Build the ``get_cashier_context`` payload for an already resolved POS Profile."""
     if not pos_profile:
         return {"success": False, "error": _("POS Profile not set in operational context")}
 
@@ -1853,29 +1857,70 @@ def close_pos_opening(opening_name, counted_balances):
 @frappe.whitelist()
 def split_bill(order_name, split_config):
     """
-    Split bill functionality (stub for Counter mode).
+    Split a POS Order into several Sales Invoices (Counter mode).
     
-    TODO: Implement full split bill logic:
-    - Validate order exists and has invoice
-    - Parse split_config (by amount, by item, by percentage, etc.)
-    - Create multiple invoices from single order
-    - Update order references
-    - Handle partial payments
+    REQUIRES active opening (validates before creating invoices).
+    The whole plan is validated before anything is written and all invoices
+    are created in one transaction (see imogi_pos.billing.split_engine).
     
     Args:
         order_name: POS Order name
-        split_config: JSON/dict with split configuration
+        split_config: JSON/dict with split configuration, either a list of
+            parts or {"method": "items", "splits": [...]}. Each part is
+            {"customer": optional, "items": [{"item_id": row name, "qty": qty}]}
         
     Returns:
-        {success, error} - Currently not implemented
+        {success, invoices: [{name, grand_total}], session} or {success, error}
     """
     _require_cashier_role()
-    
-    logger.warning(f"split_bill called for order {order_name} - not implemented yet")
-    
+
+    from imogi_pos.billing.invoice_builder import split_pos_order_to_invoices
+
+    config = _loads_if_str(split_config) or {}
+    if isinstance(config, dict) and config.get("method", "items") != "items":
+        return {"success": False, "error": _("Only item-based bill splits are supported")}
+
+    if not frappe.db.exists("POS Order", order_name):
+        logger.error(f"split_bill: Order {order_name} not found")
+        return {"success": False, "error": _("Order not found")}
+
+    order = frappe.get_doc("POS Order", order_name)
+
+    # KOT served validation (same rule as a single invoice)
+    kots = frappe.get_all("KOT Ticket", filters={"pos_order": order_name}, fields=["workflow_state"])
+    if any(k.get("workflow_state") != "Served" for k in kots):
+        logger.warning(f"split_bill: Order {order_name} has unserved KOTs")
+        return {"success": False, "error": _("Cannot create invoice. Not all items have been served.")}
+
+    try:
+        opening_dict = ensure_active_opening(pos_profile=order.pos_profile, user=frappe.session.user)
+        opening_name = opening_dict.get("name")
+    except frappe.ValidationError as e:
+        logger.error(f"split_bill: Opening validation failed: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+    try:
+        invoice_names = split_pos_order_to_invoices(order, config, pos_opening=opening_name)
+        frappe.db.commit()
+    except Exception as e:
+        frappe.db.rollback()
+        logger.error(f"split_bill failed for order {order_name}: {str(e)}", exc_info=True)
+        return {"success": False, "error": str(e)}
+
+    totals = {
+        row.name: flt(row.grand_total)
+        for row in frappe.get_all(
+            "Sales Invoice",
+            filters={"name": ["in", invoice_names]},
+            fields=["name", "grand_total"],
+        )
+    }
+    logger.info(f"Split order {order_name} into {len(invoice_names)} invoices, session {opening_name}")
+
     return {
-        "success": False,
-        "error": _("Split Bill feature is not yet implemented in Counter mode. Please use single invoice flow.")
+        "success": True,
+        "invoices": [{"name": name, "grand_total": totals.get(name, 0)} for name in invoice_names],
+        "session": opening_name,
     }
 
 
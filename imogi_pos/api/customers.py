@@ -7,6 +7,7 @@ import frappe
 from frappe import _
 import re
 from imogi_pos.utils.permission_manager import check_branch_access, check_doctype_permission
+from imogi_pos.utils.phone_index import get_phone_search_condition, is_phone_index_available
 
 def normalize_phone_number(phone):
     """
@@ -64,6 +65,55 @@ def find_customer_by_phone(phone):
     if not phone or len(phone) < 5:
         return []
     
+    if is_phone_index_available():
+        return _find_customer_by_phone_index(phone)
+    
+    return _find_customer_by_phone_scan(phone)
+
+
+def _find_customer_by_phone_index(phone):
+    """Look up customers through the ``Customer Phone Index`` table.
+
+    Full numbers use an equality match on the E.164 column, partial numbers a
+    prefix match on the reversed digits, so both are served by an index.
+    Customer-level matches come before Contact matches, as in the scan.
+    """
+    condition, value = get_phone_search_condition(phone)
+    if not condition:
+        return []
+    
+    rows = frappe.db.sql(f"""
+        SELECT 
+            c.name as customer,
+            c.customer_name,
+            c.customer_type,
+            c.customer_group,
+            c.territory,
+            idx.phone as phone,
+            IFNULL(co.email_id, c.email_id) as email,
+            c.tax_id,
+            c.customer_primary_address as primary_address,
+            co.name as contact
+        FROM `tabCustomer Phone Index` idx
+        JOIN `tabCustomer` c ON c.name = idx.customer
+        LEFT JOIN `tabContact` co ON co.name = idx.contact
+        WHERE {condition}
+        ORDER BY (co.name IS NULL) DESC, IFNULL(co.modified, c.modified) DESC
+    """, [value], as_dict=1)
+    
+    seen_customers = set()
+    combined_results = []
+    
+    for customer in rows:
+        if customer['customer'] not in seen_customers:
+            seen_customers.add(customer['customer'])
+            combined_results.append(customer)
+    
+    return combined_results
+
+
+def _find_customer_by_phone_scan(phone):
+    """Legacy ``LIKE`` scan, used until the phone index table is migrated."""
     # Normalize phone number to handle different formats
     normalized_phones = normalize_phone_number(phone)
     if not normalized_phones:
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Admin-only diagnostics for IMOGI POS API performance.
+
+Figures are collected by ``imogi_pos.utils.api_metrics`` while the site
+config flag ``imogi_api_instrumentation`` is on. Post-commit work lag comes
+from ``imogi_pos.utils.deferred`` and is always recorded.
+"""
+
+import frappe
+
+from imogi_pos.utils.api_metrics import (
+    get_endpoint_metrics,
+    is_enabled,
+    reset_endpoint_metrics,
+)
+from imogi_pos.utils import deferred
+
+
+@frappe.whitelist()
+def get_api_metrics(endpoint=None, sort_by="avg_queries"):
+    """Return per-endpoint latency, query, cache and payload metrics.
+
+    Args:
+        endpoint (str, optional): One endpoint, e.g. ``cashier.get_pending_orders``
+        sort_by (str): Summary field to order endpoints by, descending
+
+    Returns:
+        dict: ``{"enabled": bool, "endpoints": [{"endpoint": name, ...}]}``
+    """
+    frappe.only_for("System Manager")
+
+    metrics = get_endpoint_metrics(endpoint)
+    rows = [dict(summary, endpoint=name) for name, summary in metrics.items()]
+    rows.sort(key=lambda row: row.get(sort_by) or 0, reverse=True)
+
+    return {"enabled": is_enabled(), "endpoints": rows}
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_api_metrics():
+    """Clear collected API metrics."""
+    frappe.only_for("System Manager")
+    reset_endpoint_metrics()
+    return {"success": True}
+
+
+@frappe.whitelist()
+def get_deferred_metrics():
+    """Return lag and run time of post-commit work per method.
+
+    Returns:
+        dict: ``{"deduplicated": int, "methods": [{"method": name, ...}]}``,
+        slowest average lag first
+    """
+    frappe.only_for("System Manager")
+
+    metrics = deferred.get_deferred_metrics()
+    rows = [dict(summary, method=name) for name, summary in metrics["methods"].items()]
+    rows.sort(key=lambda row: row["avg_lag_ms"], reverse=True)
+
+    return {"deduplicated": metrics["deduplicated"], "methods": rows}
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_deferred_metrics():
+    """Clear collected post-commit work metrics."""
+    frappe.only_for("System Manager")
+    deferred.reset_deferred_metrics()
+    return {"success": True}
@@ -83,12 +83,15 @@ def get_item_options(item, menu_channel=None):
     return {}
 
 
-def get_item_options_native(item, menu_channel=None):
+def get_item_options_native(item, menu_channel=None, raise_on_error=False):
     """Get item options using native Item Variants.
     
     Args:
         item: Item code or name
         menu_channel: Channel context for filtering (optional)
+        raise_on_error: Re-raise lookup failures instead of returning ``{}``,
+            so callers that cache the result can tell "no options" from
+            "could not load options"
         
     Returns:
         dict: Options grouped by attribute with variant details
@@ -98,7 +101,11 @@ def get_item_options_native(item, menu_channel=None):
     
     try:
         item_doc = frappe.get_cached_doc("Item", item)
+    except frappe.DoesNotExistError:
+        return {}
     except Exception:
+        if raise_on_error:
+            raise
         return {}
     
     # Check if item has native variants
@@ -106,11 +113,11 @@ def get_item_options_native(item, menu_channel=None):
         return {}
     
     # Import here to avoid circular dependency
-    from imogi_pos.api.variants import get_item_variants
+    from imogi_pos.api.variants import load_item_variants
     
     try:
         # Get all variants with their attributes
-        variant_data = get_item_variants(
+        variant_data = load_item_variants(
             item_template=item,
             menu_channel=menu_channel
         )
@@ -161,6 +168,8 @@ def get_item_options_native(item, menu_channel=None):
         return result
         
     except Exception as e:
+        if raise_on_error:
+            raise
         frappe.log_error(
             message=f"Error getting native variants for {item}: {str(e)}",
             title="Native Variant Option Error"
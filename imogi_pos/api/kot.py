@@ -7,11 +7,12 @@ import uuid
 import frappe
 from frappe import _
 from frappe.utils import now_datetime, cint
-from frappe.realtime import publish_realtime
+from frappe.realtime import get_doc_room
 from imogi_pos.utils.permission_manager import check_branch_access
 from imogi_pos.utils.decorators import require_permission, require_role
 from imogi_pos.utils.state_manager import StateManager
 from imogi_pos.utils.kot_publisher import KOTPublisher
+from imogi_pos.utils.realtime_outbox import publish
 from imogi_pos.kitchen.kot_service import (
     KOTService,
     update_kot_item_state as service_update_kot_item_state,
@@ -105,7 +106,7 @@ def publish_table_update(pos_order, table, event_type="kot_update"):
         frappe.throw(_("POS Order is required"), frappe.ValidationError)
 
     # Get order details
-    order_doc = frappe.get_doc("POS Order", pos_order)
+    order = frappe.db.get_value("POS Order", pos_order, ["branch", "workflow_state"], as_dict=True) or {}
 
     # Basic payload
     payload = {
@@ -113,17 +114,25 @@ def publish_table_update(pos_order, table, event_type="kot_update"):
         "table": table,
         "floor": frappe.db.get_value("Restaurant Table", table, "floor"),
         "event_type": event_type,
-        "branch": order_doc.branch,
-        "workflow_state": order_doc.workflow_state,
+        "branch": order.get("branch"),
+        "workflow_state": order.get("workflow_state"),
         "timestamp": now_datetime().isoformat()
     }
 
-    # Publish to table channel
-    publish_realtime(f"table:{table}", payload)
+    # Queued after commit; repeated updates for the order merge into one message
+    merge_key = ("POS Order", pos_order)
+    publish(
+        f"table:{table}", payload, room=get_doc_room("Restaurant Table", table), merge_key=merge_key
+    )
 
     # Publish to floor channel if available
     if payload["floor"]:
-        publish_realtime(f"table_display:floor:{payload['floor']}", payload)
+        publish(
+            f"table_display:floor:{payload['floor']}",
+            payload,
+            room=get_doc_room("Restaurant Floor", payload["floor"]),
+            merge_key=merge_key,
+        )
 
 
 @frappe.whitelist()
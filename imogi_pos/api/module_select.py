@@ -3,10 +3,14 @@ IMOGI POS - Module Selection API
 Provides available modules based on user permissions and roles
 """
 
+import hashlib
+import json
+import time
 from typing import Any, Dict, List, Optional
 
 import frappe
 from frappe import _
+from imogi_pos.utils.api_metrics import record_section
 from imogi_pos.utils.auth_helpers import get_user_role_context
 from imogi_pos.utils.operational_context import (
     get_active_operational_context,
@@ -107,6 +111,178 @@ MODULE_CONFIGS = {
 }
 
 
+def _resolve_module_context():
+    """Resolve role and operational context for the module select page.
+
+    Returns:
+        tuple: ``(role_context, resolved_context, pos_profile, branch)``
+    """
+    role_context = get_user_role_context()
+    if role_context.get("is_guest"):
+        frappe.throw(_('Please login to continue'))
+
+    # Get operational context (authoritative source)
+    active_context = get_active_operational_context(
+        user=frappe.session.user,
+        auto_resolve=False
+    )
+    resolved_context = resolve_operational_context(
+        user=frappe.session.user,
+        requested_profile=active_context.get("pos_profile") if active_context else None
+    )
+    pos_profile = active_context.get("pos_profile") if active_context else None
+    branch = active_context.get("branch") if active_context else None
+
+    if not pos_profile:
+        pos_profile = resolved_context.get("current_pos_profile")
+    if not branch:
+        branch = resolved_context.get("current_branch")
+
+    return role_context, resolved_context, pos_profile, branch
+
+
+def _build_available_modules(role_context, resolved_context, pos_profile, branch):
+    """Build the ``get_available_modules`` payload from an already resolved context."""
+    # Get user roles
+    user_roles = role_context.get("roles", [])
+
+    # Administrator or System Manager sees all modules
+    is_admin = role_context.get("is_admin", False)
+
+    # Get POS Profile settings if available
+    pos_profile_doc = None
+    if pos_profile:
+        try:
+            pos_profile_doc = frappe.get_cached_doc("POS Profile", pos_profile)
+        except Exception as e:
+            frappe.log_error(
+                f"Could not fetch POS Profile {pos_profile}: {str(e)}",
+                "Module Select: POS Profile Fetch Error"
+            )
+
+    # Filter modules based on user roles
+    available_modules = []
+    for module_type, config in MODULE_CONFIGS.items():
+        required_roles = config.get('requires_roles', [])
+
+        # Admin bypass: show all modules
+        # Regular users: check if they have any of the required roles
+        if is_admin or any(role in user_roles for role in required_roles):
+            module_url = config['url']
+            requires_pos_profile = config.get('requires_pos_profile', False)
+
+            # Check if module is enabled in POS Profile
+            is_enabled = True
+            has_access = True
+            if pos_profile_doc and requires_pos_profile:
+                # Map module types to POS Profile enable flags
+                enable_field_map = {
+                    'cashier': 'imogi_enable_cashier',
+                    'waiter': 'imogi_enable_waiter',
+                    'kitchen': 'imogi_enable_kot',
+                    'self-order': 'imogi_enable_self_order',
+                    'kiosk': 'imogi_enable_kiosk',
+                    'table-display': 'imogi_use_table_display'
+                }
+                
+                enable_field = enable_field_map.get(module_type)
+                if enable_field:
+                    is_enabled = pos_profile_doc.get(enable_field, 0) == 1
+                    has_access = is_enabled  # Module can't be accessed if not enabled
+
+            # Add module to list (even if disabled, so user can see it exists)
+            available_modules.append({
+                'type': config['type'],
+                'name': config['name'],
+                'description': config['description'],
+                'url': module_url,
+                'base_url': module_url,  # Consistent naming
+                'icon': config['icon'],
+                'requires_session': config.get('requires_session', False),
+                'requires_opening': config.get('requires_opening', False),
+                'requires_pos_profile': requires_pos_profile,
+                'requires_active_cashier': config.get('requires_active_cashier', False),
+                'is_active': is_enabled,  # Module is enabled in POS Profile
+                'has_access': has_access,  # Module can be clicked/accessed
+                'order': config.get('order', 99)
+            })
+
+    # Sort by order
+    available_modules.sort(key=lambda x: x['order'])
+    
+    # Log for debugging when no modules are available
+    if not available_modules:
+        profile_info = ""
+        if pos_profile_doc:
+            profile_info = f"\nPOS Profile: {pos_profile}\n"
+            profile_info += f"  - Cashier: {pos_profile_doc.get('imogi_enable_cashier', 0)}\n"
+            profile_info += f"  - Waiter: {pos_profile_doc.get('imogi_enable_waiter', 0)}\n"
+            profile_info += f"  - Kitchen: {pos_profile_doc.get('imogi_enable_kot', 0)}\n"
+            profile_info += f"  - Self Order: {pos_profile_doc.get('imogi_enable_self_order', 0)}\n"
+            profile_info += f"  - Kiosk: {pos_profile_doc.get('imogi_enable_kiosk', 0)}\n"
+            profile_info += f"  - Table Display: {pos_profile_doc.get('imogi_use_table_display', 0)}"
+        
+        frappe.log_error(
+            f"No modules available for user: {frappe.session.user}\n"
+            f"User roles: {user_roles}\n"
+            f"Is admin: {is_admin}\n"
+            f"{profile_info}\n"
+            f"Required roles per module:\n" + 
+            "\n".join([f"  - {k}: {v.get('requires_roles', [])}" for k, v in MODULE_CONFIGS.items()]),
+            "IMOGI POS: No Modules Available"
+        )
+
+    active_opening = _get_active_pos_opening_for_context(
+        {"current_pos_profile": pos_profile},
+        frappe.session.user
+    )
+    sessions_today = _get_pos_sessions_today_for_context({"current_branch": branch})
+
+    # Return modules with operational context + opening/session info
+    debug_info = {
+        'user_roles': user_roles,
+        'is_admin': is_admin,
+        'total_modules_configured': len(MODULE_CONFIGS),
+        'modules_available': len(available_modules),
+        'pos_profile': pos_profile
+    }
+    
+    # Add POS Profile module flags to debug info
+    if pos_profile_doc:
+        debug_info['pos_profile_modules'] = {
+            'cashier': pos_profile_doc.get('imogi_enable_cashier', 0) == 1,
+            'waiter': pos_profile_doc.get('imogi_enable_waiter', 0) == 1,
+            'kitchen': pos_profile_doc.get('imogi_enable_kot', 0) == 1,
+            'self_order': pos_profile_doc.get('imogi_enable_self_order', 0) == 1,
+            'kiosk': pos_profile_doc.get('imogi_enable_kiosk', 0) == 1,
+            'table_display': pos_profile_doc.get('imogi_use_table_display', 0) == 1
+        }
+    
+    # Preload open cashier sessions to avoid an extra round-trip on initial render.
+    # State is display/prefetch only — decisions use a fresh fetch on click.
+    if pos_profile:
+        open_sessions = list_open_cashier_sessions(pos_profile=pos_profile)
+    else:
+        open_sessions = {'success': True, 'sessions': [], 'total': 0, 'has_sessions': False}
+
+    return {
+        'modules': available_modules,
+        'context': {
+            'current_pos_profile': pos_profile,
+            'current_branch': branch,
+            'available_pos_profiles': resolved_context.get('available_pos_profiles', []),
+            'branches': resolved_context.get('branches', []),
+            'require_selection': resolved_context.get('require_selection', False),
+            'is_privileged': resolved_context.get('is_privileged', False),
+            'roles': user_roles  # Add user roles for frontend filtering if needed
+        },
+        'active_opening': active_opening,
+        'sessions_today': sessions_today,
+        'open_sessions': open_sessions,
+        'debug_info': debug_info
+    }
+
+
 @frappe.whitelist()
 def get_available_modules():
     """Get list of available modules based on user's roles and operational context.
@@ -121,165 +297,8 @@ def get_available_modules():
         dict: Available modules list with operational context metadata
     """
     try:
-        role_context = get_user_role_context()
-        if role_context.get("is_guest"):
-            frappe.throw(_('Please login to continue'))
-
-        # Get operational context (authoritative source)
-        active_context = get_active_operational_context(
-            user=frappe.session.user,
-            auto_resolve=False
-        )
-        resolved_context = resolve_operational_context(
-            user=frappe.session.user,
-            requested_profile=active_context.get("pos_profile") if active_context else None
-        )
-        pos_profile = active_context.get("pos_profile") if active_context else None
-        branch = active_context.get("branch") if active_context else None
-
-        if not pos_profile:
-            pos_profile = resolved_context.get("current_pos_profile")
-        if not branch:
-            branch = resolved_context.get("current_branch")
-
-        # Get user roles
-        user_roles = role_context.get("roles", [])
-
-        # Administrator or System Manager sees all modules
-        is_admin = role_context.get("is_admin", False)
-
-        # Get POS Profile settings if available
-        pos_profile_doc = None
-        if pos_profile:
-            try:
-                pos_profile_doc = frappe.get_cached_doc("POS Profile", pos_profile)
-            except Exception as e:
-                frappe.log_error(
-                    f"Could not fetch POS Profile {pos_profile}: {str(e)}",
-                    "Module Select: POS Profile Fetch Error"
-                )
-
-        # Filter modules based on user roles
-        available_modules = []
-        for module_type, config in MODULE_CONFIGS.items():
-            required_roles = config.get('requires_roles', [])
-
-            # Admin bypass: show all modules
-            # Regular users: check if they have any of the required roles
-            if is_admin or any(role in user_roles for role in required_roles):
-                module_url = config['url']
-                requires_pos_profile = config.get('requires_pos_profile', False)
-
-                # Check if module is enabled in POS Profile
-                is_enabled = True
-                has_access = True
-                if pos_profile_doc and requires_pos_profile:
-                    # Map module types to POS Profile enable flags
-                    enable_field_map = {
-                        'cashier': 'imogi_enable_cashier',
-                        'waiter': 'imogi_enable_waiter',
-                        'kitchen': 'imogi_enable_kot',
-                        'self-order': 'imogi_enable_self_order',
-                        'kiosk': 'imogi_enable_kiosk',
-                        'table-display': 'imogi_use_table_display'
-                    }
-                    
-                    enable_field = enable_field_map.get(module_type)
-                    if enable_field:
-                        is_enabled = pos_profile_doc.get(enable_field, 0) == 1
-                        has_access = is_enabled  # Module can't be accessed if not enabled
-
-                # Add module to list (even if disabled, so user can see it exists)
-                available_modules.append({
-                    'type': config['type'],
-                    'name': config['name'],
-                    'description': config['description'],
-                    'url': module_url,
-                    'base_url': module_url,  # Consistent naming
-                    'icon': config['icon'],
-                    'requires_session': config.get('requires_session', False),
-                    'requires_opening': config.get('requires_opening', False),
-                    'requires_pos_profile': requires_pos_profile,
-                    'requires_active_cashier': config.get('requires_active_cashier', False),
-                    'is_active': is_enabled,  # Module is enabled in POS Profile
-                    'has_access': has_access,  # Module can be clicked/accessed
-                    'order': config.get('order', 99)
-                })
-
-        # Sort by order
-        available_modules.sort(key=lambda x: x['order'])
-        
-        # Log for debugging when no modules are available
-        if not available_modules:
-            profile_info = ""
-            if pos_profile_doc:
-                profile_info = f"\nPOS Profile: {pos_profile}\n"
-                profile_info += f"  - Cashier: {pos_profile_doc.get('imogi_enable_cashier', 0)}\n"
-                profile_info += f"  - Waiter: {pos_profile_doc.get('imogi_enable_waiter', 0)}\n"
-                profile_info += f"  - Kitchen: {pos_profile_doc.get('imogi_enable_kot', 0)}\n"
-                profile_info += f"  - Self Order: {pos_profile_doc.get('imogi_enable_self_order', 0)}\n"
-                profile_info += f"  - Kiosk: {pos_profile_doc.get('imogi_enable_kiosk', 0)}\n"
-                profile_info += f"  - Table Display: {pos_profile_doc.get('imogi_use_table_display', 0)}"
-            
-            frappe.log_error(
-                f"No modules available for user: {frappe.session.user}\n"
-                f"User roles: {user_roles}\n"
-                f"Is admin: {is_admin}\n"
-                f"{profile_info}\n"
-                f"Required roles per module:\n" + 
-                "\n".join([f"  - {k}: {v.get('requires_roles', [])}" for k, v in MODULE_CONFIGS.items()]),
-                "IMOGI POS: No Modules Available"
-            )
-
-        active_opening = _get_active_pos_opening_for_context(
-            {"current_pos_profile": pos_profile},
-            frappe.session.user
-        )
-        sessions_today = _get_pos_sessions_today_for_context({"current_branch": branch})
-
-        # Return modules with operational context + opening/session info
-        debug_info = {
-            'user_roles': user_roles,
-            'is_admin': is_admin,
-            'total_modules_configured': len(MODULE_CONFIGS),
-            'modules_available': len(available_modules),
-            'pos_profile': pos_profile
-        }
-        
-        # Add POS Profile module flags to debug info
-        if pos_profile_doc:
-            debug_info['pos_profile_modules'] = {
-                'cashier': pos_profile_doc.get('imogi_enable_cashier', 0) == 1,
-                'waiter': pos_profile_doc.get('imogi_enable_waiter', 0) == 1,
-                'kitchen': pos_profile_doc.get('imogi_enable_kot', 0) == 1,
-                'self_order': pos_profile_doc.get('imogi_enable_self_order', 0) == 1,
-                'kiosk': pos_profile_doc.get('imogi_enable_kiosk', 0) == 1,
-                'table_display': pos_profile_doc.get('imogi_use_table_display', 0) == 1
-            }
-        
-        # Preload open cashier sessions to avoid an extra round-trip on initial render.
-        # State is display/prefetch only — decisions use a fresh fetch on click.
-        if pos_profile:
-            open_sessions = list_open_cashier_sessions(pos_profile=pos_profile)
-        else:
-            open_sessions = {'success': True, 'sessions': [], 'total': 0, 'has_sessions': False}
-
-        return {
-            'modules': available_modules,
-            'context': {
-                'current_pos_profile': pos_profile,
-                'current_branch': branch,
-                'available_pos_profiles': resolved_context.get('available_pos_profiles', []),
-                'branches': resolved_context.get('branches', []),
-                'require_selection': resolved_context.get('require_selection', False),
-                'is_privileged': resolved_context.get('is_privileged', False),
-                'roles': user_roles  # Add user roles for frontend filtering if needed
-            },
-            'active_opening': active_opening,
-            'sessions_today': sessions_today,
-            'open_sessions': open_sessions,
-            'debug_info': debug_info
-        }
+        role_context, resolved_context, pos_profile, branch = _resolve_module_context()
+        return _build_available_modules(role_context, resolved_context, pos_profile, branch)
 
     except frappe.DoesNotExistError as e:
         # Specific error for missing DocType/Record
@@ -335,6 +354,84 @@ Traceback:
         )
 
 
+@frappe.whitelist()
+def bootstrap(if_version=None):
+    """Return everything Module Select and the cashier console need at start-up.
+
+    Covers what the start-up burst of ``get_available_modules``,
+    ``get_user_branch_info``, ``get_active_pos_opening``,
+    ``get_pos_sessions_today``, ``check_active_cashiers``,
+    ``get_cashier_context`` and ``get_payment_methods`` returns, in one call.
+    The operational context is resolved once and shared by every section;
+    ``branch_info`` lists the branches of the user's POS Profiles. The
+    Module Select and cashier apps still make the individual calls until
+    they are moved to this endpoint (``API.BOOTSTRAP``).
+
+    Args:
+        if_version (str, optional): ``version`` of the payload the client
+            already holds. When it still matches, only the version and
+            timings are returned with ``not_modified`` set.
+
+    Returns:
+        dict: ``modules``/``context``/``active_opening``/``sessions_today``/
+        ``open_sessions`` (as in ``get_available_modules``) plus
+        ``branch_info``, ``active_cashiers``, ``cashier_context``,
+        ``payment_methods``, ``version`` and ``server_timing`` (ms per section)
+    """
+    from imogi_pos.api.cashier import _build_cashier_context, get_payment_methods
+
+    started = time.perf_counter()
+    timings = {}
+
+    def timed(section, fn, *args):
+        section_started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[section] = round((time.perf_counter() - section_started) * 1000, 2)
+            record_section(f"bootstrap-{section}", timings[section])
+
+    role_context, resolved_context, pos_profile, branch = timed("context", _resolve_module_context)
+    payload = timed(
+        "modules", _build_available_modules, role_context, resolved_context, pos_profile, branch
+    )
+    payload.update({
+        'branch_info': timed("branch_info", _build_branch_info, resolved_context, branch),
+        'active_cashiers': timed("active_cashiers", _get_active_cashiers_for_branch, branch),
+        'cashier_context': timed("cashier_context", _build_cashier_context, pos_profile) if pos_profile else None,
+        'payment_methods': timed("payment_methods", get_payment_methods).get('methods', []),
+    })
+
+    version = _bootstrap_version(payload)
+    timings['total'] = round((time.perf_counter() - started) * 1000, 2)
+
+    if if_version and if_version == version:
+        return {'version': version, 'not_modified': True, 'server_timing': timings}
+
+    payload['version'] = version
+    payload['not_modified'] = False
+    payload['server_timing'] = timings
+    return payload
+
+
+def _build_branch_info(resolved_context: Dict[str, Any], branch: Optional[str]) -> Dict[str, Any]:
+    """``get_user_branch_info`` shaped payload from an already resolved context."""
+    branches = list(resolved_context.get("branches") or [])
+    if branch and branch not in branches:
+        branches.insert(0, branch)
+    return {
+        'current_branch': branch or (branches[0] if branches else None),
+        'available_branches': [{'name': name, 'branch': name} for name in branches],
+    }
+
+
+def _bootstrap_version(payload: Dict[str, Any]) -> str:
+    """Stable content hash of a bootstrap payload (debug info excluded)."""
+    content = {key: value for key, value in payload.items() if key != 'debug_info'}
+    serialized = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()[:16]
+
+
 @frappe.whitelist()
 def get_user_branch_info():
     """Get user's current branch and available branches."""
@@ -693,72 +790,8 @@ def check_active_cashiers():
             user=frappe.session.user,
             auto_resolve=True
         )
-        branch = context.get('branch')
-        
-        if not branch:
-            return {
-                'has_active_cashier': False,
-                'active_sessions': [],
-                'total_cashiers': 0,
-                'message': 'No branch configured for user',
-                'branch': None
-            }
-        
-        # Find POS Profiles for this branch
-        pos_profiles = frappe.get_list(
-            'POS Profile',
-            filters={'imogi_branch': branch},
-            fields=['name', 'company'],
-            limit_page_length=0
-        )
-        
-        if not pos_profiles:
-            return {
-                'has_active_cashier': False,
-                'active_sessions': [],
-                'total_cashiers': 0,
-                'message': f'No POS Profiles configured for branch {branch}',
-                'branch': branch
-            }
-        
-        profile_names = [p.get('name') for p in pos_profiles]
-        
-        # Query active POS Opening Entries for Cashier module
-        active_cashier_sessions = frappe.get_list(
-            'POS Opening Entry',
-            filters={
-                'status': 'Open',
-                'docstatus': 1,
-                'pos_profile': ['in', profile_names],
-                'period_start_date': ['>=', frappe.utils.today()]
-            },
-            fields=['name', 'pos_profile', 'user', 'opening_balance', 'creation'],
-            order_by='creation desc'
-        )
-        
-        # Filter to only cashier sessions (check POS Profile has imogi_enable_cashier = 1)
-        cashier_sessions = []
-        for session in active_cashier_sessions:
-            pos_profile = frappe.get_cached_doc('POS Profile', session.get('pos_profile'))
-            if pos_profile.get('imogi_enable_cashier'):
-                cashier_sessions.append({
-                    'pos_opening_entry': session.get('name'),
-                    'pos_profile': session.get('pos_profile'),
-                    'user': session.get('user'),
-                    'opening_balance': session.get('opening_balance', 0),
-                    'timestamp': session.get('creation')
-                })
-        
-        has_active = len(cashier_sessions) > 0
-        
-        return {
-            'has_active_cashier': has_active,
-            'active_sessions': cashier_sessions,
-            'total_cashiers': len(cashier_sessions),
-            'message': 'Active cashier found' if has_active else 'No active cashier sessions. Please ask a cashier to open a POS opening first.',
-            'branch': branch
-        }
-    
+        return _get_active_cashiers_for_branch(context.get('branch'))
+
     except Exception as e:
         frappe.log_error(f'Error in check_active_cashiers: {str(e)}')
         return {
@@ -770,6 +803,73 @@ def check_active_cashiers():
         }
 
 
+def _get_active_cashiers_for_branch(branch):
+    """Return today's open cashier sessions for a branch (``check_active_cashiers`` payload)."""
+    if not branch:
+        return {
+            'has_active_cashier': False,
+            'active_sessions': [],
+            'total_cashiers': 0,
+            'message': 'No branch configured for user',
+            'branch': None
+        }
+    
+    # Find POS Profiles for this branch
+    pos_profiles = frappe.get_list(
+        'POS Profile',
+        filters={'imogi_branch': branch},
+        fields=['name', 'company'],
+        limit_page_length=0
+    )
+    
+    if not pos_profiles:
+        return {
+            'has_active_cashier': False,
+            'active_sessions': [],
+            'total_cashiers': 0,
+            'message': f'No POS Profiles configured for branch {branch}',
+            'branch': branch
+        }
+    
+    profile_names = [p.get('name') for p in pos_profiles]
+    
+    # Query active POS Opening Entries for Cashier module
+    active_cashier_sessions = frappe.get_list(
+        'POS Opening Entry',
+        filters={
+            'status': 'Open',
+            'docstatus': 1,
+            'pos_profile': ['in', profile_names],
+            'period_start_date': ['>=', frappe.utils.today()]
+        },
+        fields=['name', 'pos_profile', 'user', 'opening_balance', 'creation'],
+        order_by='creation desc'
+    )
+    
+    # Filter to only cashier sessions (check POS Profile has imogi_enable_cashier = 1)
+    cashier_sessions = []
+    for session in active_cashier_sessions:
+        pos_profile = frappe.get_cached_doc('POS Profile', session.get('pos_profile'))
+        if pos_profile.get('imogi_enable_cashier'):
+            cashier_sessions.append({
+                'pos_opening_entry': session.get('name'),
+                'pos_profile': session.get('pos_profile'),
+                'user': session.get('user'),
+                'opening_balance': session.get('opening_balance', 0),
+                'timestamp': session.get('creation')
+            })
+    
+    has_active = len(cashier_sessions) > 0
+    
+    return {
+        'has_active_cashier': has_active,
+        'active_sessions': cashier_sessions,
+        'total_cashiers': len(cashier_sessions),
+        'message': 'Active cashier found' if has_active else 'No active cashier sessions. Please ask a cashier to open a POS opening first.',
+        'branch': branch
+    }
+
+
 @frappe.whitelist()
 def get_pos_sessions_today():
     """
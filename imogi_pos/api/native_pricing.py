@@ -6,12 +6,138 @@ Provides wrapper functions to leverage native ERPNext pricing and promotional fe
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import frappe
 from frappe import _
 from frappe.utils import flt, nowdate
 
+from imogi_pos.utils.decorators import require_role
+from imogi_pos.utils.pricing_trace import (
+    get_rule_counters,
+    get_sample_rate,
+    get_trace,
+    reset_trace,
+)
+
+
+def _get_pricing_rule_for_item_fn() -> Optional[Callable[..., Any]]:
+    """Return ERPNext's ``get_pricing_rule_for_item`` or None when unavailable."""
+    try:
+        from erpnext.accounts.doctype.pricing_rule.pricing_rule import (
+            get_pricing_rule_for_item,
+        )
+    except ImportError:
+        return None
+    return get_pricing_rule_for_item
+
+
+def _resolve_pricing_context(
+    price_list: Optional[str] = None,
+    pos_profile: Optional[str] = None,
+    transaction_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Resolve company, currency and date shared by every line of a transaction."""
+    if not transaction_date:
+        transaction_date = nowdate()
+
+    # Get company from POS Profile or default
+    company = frappe.defaults.get_user_default("Company")
+    if pos_profile:
+        company = frappe.db.get_value("POS Profile", pos_profile, "company") or company
+
+    # Get currency from price list or company
+    currency = None
+    if price_list:
+        currency = frappe.db.get_value("Price List", price_list, "currency")
+    if not currency:
+        currency = frappe.db.get_value("Company", company, "default_currency")
+
+    return {
+        "company": company,
+        "currency": currency,
+        "price_list": price_list,
+        "transaction_date": transaction_date,
+    }
+
+
+def _build_pricing_args(
+    context: Dict[str, Any], item_code: str, customer: Optional[str], qty: float
+) -> Dict[str, Any]:
+    return {
+        "item_code": item_code,
+        "customer": customer,
+        "price_list": context["price_list"],
+        "currency": context["currency"],
+        "company": context["company"],
+        "transaction_date": context["transaction_date"],
+        "qty": flt(qty),
+        "doctype": "Sales Invoice",  # POS uses Sales Invoice
+        "transaction_type": "selling",
+    }
+
+
+def _get_applied_rule_names(pricing_rule: Any) -> List[str]:
+    """Names of the rules ERPNext applied, from its ``pricing_rules`` JSON list."""
+    names = pricing_rule.get("pricing_rules")
+    if not names:
+        return []
+    if isinstance(names, str):
+        try:
+            names = json.loads(names)
+        except ValueError:
+            names = [name.strip() for name in names.split(",")]
+    if isinstance(names, str):
+        names = [names]
+    return [name for name in names if name]
+
+
+def _format_pricing_result(pricing_rule: Any) -> Dict[str, Any]:
+    """Shape ERPNext's item pricing details into the IMOGI response."""
+    rule_names = _get_applied_rule_names(pricing_rule) if pricing_rule else []
+    if not rule_names:
+        return {
+            "success": True,
+            "has_rule": False,
+            "pricing_rule": None,
+        }
+
+    return {
+        "success": True,
+        "has_rule": True,
+        "pricing_rule": rule_names[0],
+        "discount_percentage": flt(pricing_rule.get("discount_percentage") or 0),
+        "discount_amount": flt(pricing_rule.get("discount_amount") or 0),
+        "rate": flt(pricing_rule.get("price_or_product_discount") == "Price" and pricing_rule.get("rate") or 0),
+        "free_item": pricing_rule.get("price_or_product_discount") == "Product" and pricing_rule.get("free_item") or None,
+        "free_qty": flt(pricing_rule.get("free_qty") or 0),
+        "apply_multiple_pricing_rules": pricing_rule.get("apply_multiple_pricing_rules") or 0,
+        "priority": pricing_rule.get("priority") or 0,
+    }
+
+
+def _evaluate_item(
+    get_pricing_rule_for_item: Callable[..., Any],
+    context: Dict[str, Any],
+    item_code: str,
+    customer: Optional[str],
+    qty: float,
+) -> Dict[str, Any]:
+    try:
+        pricing_rule = get_pricing_rule_for_item(
+            _build_pricing_args(context, item_code, customer, qty)
+        )
+        return _format_pricing_result(pricing_rule)
+    except Exception as e:
+        frappe.log_error(f"Error getting pricing rule: {str(e)}", "Native Pricing Integration")
+        return {
+            "success": False,
+            "error": str(e),
+            "has_rule": False,
+        }
+
 
 @frappe.whitelist()
 def get_applicable_pricing_rules(
@@ -36,74 +162,16 @@ def get_applicable_pricing_rules(
     Returns:
         dict: Pricing rule details including discount and free items
     """
-    try:
-        from erpnext.accounts.doctype.pricing_rule.pricing_rule import (
-            get_pricing_rule_for_item,
-        )
-    except ImportError:
+    get_pricing_rule_for_item = _get_pricing_rule_for_item_fn()
+    if get_pricing_rule_for_item is None:
         return {
             "success": False,
             "error": "ERPNext pricing module not found",
             "pricing_rules": []
         }
-    
-    if not transaction_date:
-        transaction_date = nowdate()
-    
-    # Get company from POS Profile or default
-    company = frappe.defaults.get_user_default("Company")
-    if pos_profile:
-        company = frappe.db.get_value("POS Profile", pos_profile, "company") or company
-    
-    # Get currency from price list or company
-    currency = None
-    if price_list:
-        currency = frappe.db.get_value("Price List", price_list, "currency")
-    if not currency:
-        currency = frappe.db.get_value("Company", company, "default_currency")
-    
-    try:
-        args = {
-            "item_code": item_code,
-            "customer": customer,
-            "price_list": price_list,
-            "currency": currency,
-            "company": company,
-            "transaction_date": transaction_date,
-            "qty": flt(qty),
-            "doctype": "Sales Invoice",  # POS uses Sales Invoice
-            "transaction_type": "selling",
-        }
-        
-        pricing_rule = get_pricing_rule_for_item(args)
-        
-        if pricing_rule:
-            return {
-                "success": True,
-                "has_rule": True,
-                "pricing_rule": pricing_rule.name,
-                "discount_percentage": flt(pricing_rule.discount_percentage or 0),
-                "discount_amount": flt(pricing_rule.discount_amount or 0),
-                "rate": flt(pricing_rule.price_or_product_discount == "Price" and pricing_rule.rate or 0),
-                "free_item": pricing_rule.price_or_product_discount == "Product" and pricing_rule.free_item or None,
-                "free_qty": flt(pricing_rule.free_qty or 0),
-                "apply_multiple_pricing_rules": pricing_rule.apply_multiple_pricing_rules or 0,
-                "priority": pricing_rule.priority or 0,
-            }
-        else:
-            return {
-                "success": True,
-                "has_rule": False,
-                "pricing_rule": None,
-            }
-            
-    except Exception as e:
-        frappe.log_error(f"Error getting pricing rule: {str(e)}", "Native Pricing Integration")
-        return {
-            "success": False,
-            "error": str(e),
-            "has_rule": False,
-        }
+
+    context = _resolve_pricing_context(price_list, pos_profile, transaction_date)
+    return _evaluate_item(get_pricing_rule_for_item, context, item_code, customer, qty)
 
 
 @frappe.whitelist()
@@ -163,6 +231,161 @@ def get_promotional_schemes(
     return valid_schemes
 
 
+class CartPricingEngine:
+    """Prices every line of a cart against one shared pricing context.
+
+    Company, currency and date are resolved once. Item metadata and the
+    Pricing Rules that could match the cart (by item code or template, item
+    group ancestry or brand) are preloaded in bulk, and lines with no candidate
+    rule are settled in memory without calling ERPNext. The remaining lines
+    go through ERPNext's own rule selection, memoised per (item, qty), so the
+    results match the per-item ``get_applicable_pricing_rules`` path.
+    """
+
+    def __init__(
+        self,
+        customer: Optional[str] = None,
+        price_list: Optional[str] = None,
+        pos_profile: Optional[str] = None,
+        transaction_date: Optional[str] = None,
+        get_pricing_rule_for_item: Optional[Callable[..., Any]] = None,
+    ):
+        self.customer = customer
+        self.context = _resolve_pricing_context(price_list, pos_profile, transaction_date)
+        self.get_pricing_rule_for_item = get_pricing_rule_for_item or _get_pricing_rule_for_item_fn()
+        self._candidates: Optional[Set[str]] = None
+        self._results: Dict[Tuple[str, float], Dict[str, Any]] = {}
+
+    def price(self, item_code: str, qty: float) -> Dict[str, Any]:
+        """Return the pricing result for one line (same shape as the per-item API)."""
+        if self.get_pricing_rule_for_item is None:
+            return {
+                "success": False,
+                "error": "ERPNext pricing module not found",
+                "pricing_rules": []
+            }
+
+        key = (item_code, flt(qty))
+        if key not in self._results:
+            if self._candidates is not None and item_code not in self._candidates:
+                self._results[key] = _format_pricing_result(None)
+            else:
+                self._results[key] = _evaluate_item(
+                    self.get_pricing_rule_for_item, self.context, item_code, self.customer, qty
+                )
+        return self._results[key]
+
+    def preload(self, item_codes: Iterable[str]) -> None:
+        """Find the cart items that have at least one candidate Pricing Rule."""
+        codes = sorted({code for code in item_codes if code})
+        if not codes or self.get_pricing_rule_for_item is None:
+            return
+
+        try:
+            self._candidates = self._load_candidates(codes)
+        except Exception as e:
+            # Fall back to evaluating every line through ERPNext
+            frappe.log_error(f"Error preloading pricing rules: {str(e)}", "Native Pricing Integration")
+            self._candidates = None
+
+    def _load_candidates(self, codes: List[str]) -> Set[str]:
+        items = frappe.get_all(
+            "Item",
+            filters={"name": ["in", codes]},
+            fields=["name", "item_group", "brand", "variant_of"],
+        )
+
+        rule_codes = set(codes)
+        brands = set()
+        for item in items:
+            if item.variant_of:
+                rule_codes.add(item.variant_of)
+            if item.brand:
+                brands.add(item.brand)
+
+        rules = frappe.db.sql(
+            """
+            SELECT pr.name, pr.apply_on, pr.apply_rule_on_other,
+                pic.item_code, pig.item_group, pb.brand
+            FROM `tabPricing Rule` pr
+            LEFT JOIN `tabPricing Rule Item Code` pic
+                ON pic.parent = pr.name AND pr.apply_on = 'Item Code'
+            LEFT JOIN `tabPricing Rule Item Group` pig
+                ON pig.parent = pr.name AND pr.apply_on = 'Item Group'
+            LEFT JOIN `tabPricing Rule Brand` pb
+                ON pb.parent = pr.name AND pr.apply_on = 'Brand'
+            WHERE pr.disabled = 0
+                AND pr.selling = 1
+                AND IFNULL(pr.company, '') IN (%(company)s, '')
+                AND (pr.valid_from IS NULL OR pr.valid_from <= %(date)s)
+                AND (pr.valid_upto IS NULL OR pr.valid_upto >= %(date)s)
+                AND (
+                    pic.item_code IN %(codes)s
+                    OR pig.item_group IS NOT NULL
+                    OR pb.brand IN %(brands)s
+                    OR pr.apply_on = 'Transaction'
+                    OR IFNULL(pr.apply_rule_on_other, '') != ''
+                )
+            """,
+            {
+                "company": self.context["company"] or "",
+                "date": self.context["transaction_date"],
+                "codes": tuple(rule_codes),
+                "brands": tuple(brands) or ("",),
+            },
+            as_dict=True,
+        )
+
+        if any(rule.apply_on == "Transaction" or rule.apply_rule_on_other for rule in rules):
+            # Cross-item rules depend on the whole cart; let ERPNext decide
+            return set(codes)
+
+        matched_codes = {rule.item_code for rule in rules if rule.item_code}
+        matched_brands = {rule.brand for rule in rules if rule.brand}
+        rule_groups = {rule.item_group for rule in rules if rule.item_group}
+        group_bounds = self._load_item_group_bounds(
+            rule_groups | {item.item_group for item in items if item.item_group}
+        ) if rule_groups else {}
+
+        candidates = matched_codes & set(codes)
+        for item in items:
+            if (
+                item.name in matched_codes
+                or (item.variant_of and item.variant_of in matched_codes)
+                or (item.brand and item.brand in matched_brands)
+                or self._in_any_group(item.item_group, rule_groups, group_bounds)
+            ):
+                candidates.add(item.name)
+        return candidates
+
+    @staticmethod
+    def _load_item_group_bounds(groups: Set[str]) -> Dict[str, Tuple[int, int]]:
+        rows = frappe.get_all(
+            "Item Group",
+            filters={"name": ["in", sorted(groups)]},
+            fields=["name", "lft", "rgt"],
+        )
+        return {row.name: (row.lft, row.rgt) for row in rows}
+
+    @staticmethod
+    def _in_any_group(
+        item_group: Optional[str], rule_groups: Set[str], bounds: Dict[str, Tuple[int, int]]
+    ) -> bool:
+        """True if ``item_group`` is one of ``rule_groups`` or nested under one."""
+        if not item_group or not rule_groups:
+            return False
+        if item_group in rule_groups:
+            return True
+        item_bounds = bounds.get(item_group)
+        if not item_bounds:
+            return False
+        for group in rule_groups:
+            group_bounds = bounds.get(group)
+            if group_bounds and group_bounds[0] <= item_bounds[0] and group_bounds[1] >= item_bounds[1]:
+                return True
+        return False
+
+
 @frappe.whitelist()
 def apply_pricing_rules_to_items(
     items: List[Dict[str, Any]],
@@ -173,6 +396,9 @@ def apply_pricing_rules_to_items(
 ) -> Dict[str, Any]:
     """
     Apply native ERPNext pricing rules to multiple items.
+
+    Uses ``CartPricingEngine`` so the pricing context and candidate rules are
+    loaded once per cart rather than once per line.
     
     Args:
         items: List of item dicts with item_code, qty, rate
@@ -198,6 +424,14 @@ def apply_pricing_rules_to_items(
     processed_items = []
     total_discount_amount = 0
     free_items = []
+
+    engine = CartPricingEngine(
+        customer=customer,
+        price_list=price_list,
+        pos_profile=pos_profile,
+        transaction_date=transaction_date,
+    )
+    engine.preload(item.get("item_code") or item.get("item") for item in items)
     
     for item in items:
         item_code = item.get("item_code") or item.get("item")
@@ -208,14 +442,7 @@ def apply_pricing_rules_to_items(
             continue
         
         # Get pricing rule
-        rule_result = get_applicable_pricing_rules(
-            item_code=item_code,
-            customer=customer,
-            price_list=price_list,
-            qty=qty,
-            transaction_date=transaction_date,
-            pos_profile=pos_profile,
-        )
+        rule_result = engine.price(item_code, qty)
         
         if rule_result.get("has_rule"):
             item["pricing_rule"] = rule_result.get("pricing_rule")
@@ -249,6 +476,35 @@ def apply_pricing_rules_to_items(
     }
 
 
+@frappe.whitelist()
+@require_role("Branch Manager")
+def get_pricing_diagnostics(limit: int = 100, reset: int = 0) -> Dict[str, Any]:
+    """
+    Return recent pricing-rule trace events and per-rule application counters.
+
+    Trace events come from the worker that serves this request; counters are
+    shared by all workers.
+
+    Args:
+        limit: Maximum number of trace events to return
+        reset: Clear this worker's trace and the shared counters after reading
+
+    Returns:
+        dict: ``events``, ``rule_counters``, ``sample_rate`` and ``pid``
+    """
+    payload = {
+        "events": get_trace(limit),
+        "rule_counters": get_rule_counters(),
+        "sample_rate": get_sample_rate(),
+        "pid": os.getpid(),
+    }
+
+    if int(reset or 0):
+        reset_trace(counters=True)
+
+    return payload
+
+
 @frappe.whitelist()
 def validate_coupon_code(coupon_code: str, customer: Optional[str] = None) -> Dict[str, Any]:
     """
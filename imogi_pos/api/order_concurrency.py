@@ -5,9 +5,11 @@ Provides atomic claiming mechanism to prevent multiple cashiers from processing
 
 import frappe
 from frappe import _
-from frappe.utils import now, flt
+from frappe.utils import now, flt, cint
 import frappe.utils.logger
 
+from imogi_pos.utils.claim_registry import acquire_claim, get_claims, release_claim
+
 logger = frappe.utils.logger.get_logger(__name__)
 
 
@@ -17,7 +19,8 @@ def claim_order(order_name, opening_entry):
     Atomic claim operation: Lock order to specific cashier session.
     
     Prevents multiple cashiers from claiming same order simultaneously.
-    Uses database-level locking to ensure atomicity.
+    Uses SET NX in the Redis claim registry plus a conditional UPDATE on the
+    order to ensure atomicity.
     
     HARDENED: Validates opening_entry matches user's active opening.
     This prevents cashiers from claiming orders in opening they don't have access to.
@@ -46,8 +49,20 @@ def claim_order(order_name, opening_entry):
         # This ensures user cannot claim orders in opening they don't have access to
         from imogi_pos.api.cashier import ensure_active_opening
         
+        # The opening's profile never changes, so the document cache serves it
+        opening_profile = frappe.get_cached_value('POS Opening Entry', opening_entry, 'pos_profile')
+        if not opening_profile:
+            return {
+                'success': False,
+                'message': f'Opening {opening_entry} not found',
+                'error': 'Opening not found'
+            }
+
         try:
-            active_opening_dict = ensure_active_opening()
+            # Served from the active opening cache (imogi_pos.utils.pos_opening)
+            active_opening_dict = ensure_active_opening(
+                pos_profile=opening_profile, user=frappe.session.user
+            )
             active_opening_name = active_opening_dict.get('name')
             
             if active_opening_name != opening_entry:
@@ -68,39 +83,49 @@ def claim_order(order_name, opening_entry):
                 'error': str(e)
             }
         
-        # Check order exists
-        if not frappe.db.exists('POS Order', order_name):
-            return {
-                'success': False,
-                'message': f'Order {order_name} not found',
-                'error': 'Order not found'
-            }
-        
-        # Check opening exists
-        if not frappe.db.exists('POS Opening Entry', opening_entry):
+        # The order's existence is settled by the claim itself.
+        #
+        # Atomic claim: SET NX in the claim registry, written through to the
+        # order with a conditional UPDATE (also bumps order_version)
+        try:
+            claimed_at = now()
+            acquired, claim = acquire_claim(
+                order_name, frappe.session.user, claimed_at, opening_entry=opening_entry
+            )
+            if acquired:
+                frappe.db.commit()
+
+                logger.info(f'Order {order_name} claimed by {frappe.session.user} for opening {opening_entry}')
+
+                return {
+                    'success': True,
+                    'message': f'Order claimed successfully',
+                    'order': {
+                        'name': order_name,
+                        'claimed_by': frappe.session.user,
+                        'claimed_at': claimed_at,
+                        'opening_entry': opening_entry
+                    }
+                }
+        except Exception as e:
+            frappe.db.rollback()
+            logger.error(f'Failed to claim order {order_name}: {str(e)}')
             return {
                 'success': False,
-                'message': f'Opening {opening_entry} not found',
-                'error': 'Opening not found'
+                'message': f'Failed to claim order: {str(e)}',
+                'error': 'Claim operation failed'
             }
-        
-        # Get order with lock (SELECT FOR UPDATE)
-        order = frappe.get_doc('POS Order', order_name)
-        
-        # Check if already claimed by someone else
-        claimed_by = getattr(order, 'claimed_by', None)
-        claimed_at = getattr(order, 'claimed_at', None)
-        
-        if claimed_by and claimed_by != frappe.session.user:
-            logger.warning(f'Order {order_name} already claimed by {claimed_by}')
+
+        if not claim:
             return {
                 'success': False,
-                'message': f'Order already being processed by another cashier ({claimed_by})',
-                'error': f'Claimed by: {claimed_by}',
-                'claimed_by': claimed_by,
-                'claimed_at': claimed_at
+                'message': f'Order {order_name} not found',
+                'error': 'Order not found'
             }
-        
+
+        claimed_by = claim.get('claimed_by')
+        claimed_at = claim.get('claimed_at')
+
         # If already claimed by current user, return success (idempotent)
         if claimed_by == frappe.session.user:
             logger.info(f'Order {order_name} already claimed by current user')
@@ -108,50 +133,22 @@ def claim_order(order_name, opening_entry):
                 'success': True,
                 'message': 'Order already claimed by you',
                 'order': {
-                    'name': order.name,
-                    'claimed_by': order.claimed_by,
-                    'claimed_at': order.claimed_at,
-                    'opening_entry': opening_entry
+                    'name': order_name,
+                    'claimed_by': claimed_by,
+                    'claimed_at': claimed_at,
+                    'opening_entry': claim.get('opening_entry') or opening_entry
                 },
                 'idempotent': True
             }
-        
-        # Atomic claim operation using database update
-        # Use frappe.db.set_value with conditions to ensure atomicity
-        try:
-            # Set claimed_by and claimed_at using UPDATE with WHERE conditions
-            frappe.db.set_value(
-                'POS Order',
-                order_name,
-                {
-                    'claimed_by': frappe.session.user,
-                    'claimed_at': now()
-                },
-                update_modified=False
-            )
-            frappe.db.commit()
-            
-            logger.info(f'Order {order_name} claimed by {frappe.session.user} for opening {opening_entry}')
-            
-            return {
-                'success': True,
-                'message': f'Order claimed successfully',
-                'order': {
-                    'name': order.name,
-                    'claimed_by': frappe.session.user,
-                    'claimed_at': now(),
-                    'opening_entry': opening_entry
-                }
-            }
-        
-        except Exception as e:
-            frappe.db.rollback()
-            logger.error(f'Failed to claim order {order_name}: {str(e)}')
-            return {
-                'success': False,
-                'message': f'Failed to claim order: {str(e)}',
-                'error': 'Claim operation failed'
-            }
+
+        logger.warning(f'Order {order_name} already claimed by {claimed_by}')
+        return {
+            'success': False,
+            'message': f'Order already being processed by another cashier ({claimed_by})',
+            'error': f'Claimed by: {claimed_by}',
+            'claimed_by': claimed_by,
+            'claimed_at': claimed_at
+        }
     
     except Exception as e:
         logger.error(f'Error in claim_order: {str(e)}', exc_info=True)
@@ -185,35 +182,25 @@ def release_order(order_name, opening_entry=None):
                 'error': 'Missing parameter'
             }
         
-        # Check order exists
-        if not frappe.db.exists('POS Order', order_name):
-            return {
-                'success': False,
-                'message': f'Order {order_name} not found',
-                'error': 'Order not found'
-            }
-        
-        order = frappe.get_doc('POS Order', order_name)
-        claimed_by = getattr(order, 'claimed_by', None)
-        
-        # Only allow release if claimed by current user or if no one has claimed it
-        if claimed_by and claimed_by != frappe.session.user:
-            return {
-                'success': False,
-                'message': f'Cannot release order claimed by {claimed_by}',
-                'error': 'Not authorized to release'
-            }
-        
-        # Release the claim
-        frappe.db.set_value(
-            'POS Order',
-            order_name,
-            {
-                'claimed_by': None,
-                'claimed_at': None
-            },
-            update_modified=False
-        )
+        # Release the claim with a conditional UPDATE (claimed by current user only)
+        if not release_claim(order_name, frappe.session.user):
+            claimed_by = frappe.db.get_value('POS Order', order_name, 'claimed_by')
+
+            if claimed_by is None and not frappe.db.exists('POS Order', order_name):
+                return {
+                    'success': False,
+                    'message': f'Order {order_name} not found',
+                    'error': 'Order not found'
+                }
+
+            # Only allow release if claimed by current user or if no one has claimed it
+            if claimed_by and claimed_by != frappe.session.user:
+                return {
+                    'success': False,
+                    'message': f'Cannot release order claimed by {claimed_by}',
+                    'error': 'Not authorized to release'
+                }
+
         frappe.db.commit()
         
         logger.info(f'Order {order_name} released by {frappe.session.user}')
@@ -248,35 +235,123 @@ def get_order_claim_status(order_name):
             - claimed_at: When it was claimed (or None)
             - can_claim: Boolean - whether current user can claim it
             - is_mine: Boolean - whether claimed by current user
+            - opening_entry: POS Opening Entry of the claim (when known)
+            - order_version: Current version stamp of the order
     """
     try:
-        if not frappe.db.exists('POS Order', order_name):
+        order = frappe.db.get_value('POS Order', order_name, ['name', 'order_version'], as_dict=True)
+        if not order:
             return {
                 'success': False,
                 'error': 'Order not found'
             }
-        
-        order = frappe.get_doc('POS Order', order_name)
-        claimed_by = getattr(order, 'claimed_by', None)
-        claimed_at = getattr(order, 'claimed_at', None)
-        
+
+        # Same registry lookup (and fallback) as get_claim_status_bulk
+        claim = _load_claims([order_name]).get(order_name)
         current_user = frappe.session.user
-        is_claimed = bool(claimed_by)
-        is_mine = claimed_by == current_user if claimed_by else False
-        can_claim = not is_claimed or is_mine
+
+        return {
+            'success': True,
+            **_claim_status(claim, current_user),
+            'current_user': current_user,
+            'order_version': cint(order.order_version)
+        }
+    
+    except Exception as e:
+        logger.error(f'Error in get_order_claim_status: {str(e)}')
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+
+def _load_claims(names):
+    """Claims of ``names`` from the Redis registry, or one query if it is unavailable."""
+    try:
+        return get_claims(names)
+    except Exception as e:
+        logger.warning(f'Claim registry unavailable: {str(e)}')
+
+    claims = {}
+    if names:
+        for row in frappe.get_all(
+            'POS Order',
+            filters={'name': ['in', names]},
+            fields=['name', 'claimed_by', 'claimed_at'],
+        ):
+            if row.claimed_by:
+                claims[row.name] = {
+                    'claimed_by': row.claimed_by,
+                    'claimed_at': row.claimed_at,
+                    'opening_entry': None
+                }
+    return claims
+
+
+def _claim_status(claim, current_user):
+    claim = claim or {}
+    claimed_by = claim.get('claimed_by')
+    is_mine = bool(claimed_by) and claimed_by == current_user
+    return {
+        'claimed': bool(claimed_by),
+        'claimed_by': claimed_by,
+        'claimed_at': claim.get('claimed_at'),
+        'opening_entry': claim.get('opening_entry'),
+        'can_claim': not claimed_by or is_mine,
+        'is_mine': is_mine
+    }
+
+
+# Upper bound on orders per bulk status call (a full cashier board)
+MAX_CLAIM_STATUS_BATCH = 200
+
+
+@frappe.whitelist()
+def get_claim_status_bulk(order_names):
+    """
+    Get claim status of many orders in one call.
+    
+    Served from the Redis claim registry (one MGET for the whole batch), so
+    cashier boards can poll every visible order without database reads.
+    Orders that are not claimed - including unknown names - are reported as
+    unclaimed.
+    
+    Args:
+        order_names (list): POS Order names (JSON list or comma separated)
         
+    Returns:
+        dict with:
+            - statuses: {order_name: {claimed, claimed_by, claimed_at,
+              opening_entry, can_claim, is_mine}}
+            - current_user: Session user
+    """
+    try:
+        if isinstance(order_names, str):
+            order_names = (
+                frappe.parse_json(order_names)
+                if order_names.strip().startswith('[')
+                else order_names.split(',')
+            )
+
+        names = list(dict.fromkeys(str(name).strip() for name in order_names or [] if name))
+        if len(names) > MAX_CLAIM_STATUS_BATCH:
+            return {
+                'success': False,
+                'error': f'At most {MAX_CLAIM_STATUS_BATCH} orders per request'
+            }
+
+        claims = _load_claims(names)
+        current_user = frappe.session.user
+        statuses = {name: _claim_status(claims.get(name), current_user) for name in names}
+
         return {
             'success': True,
-            'claimed': is_claimed,
-            'claimed_by': claimed_by,
-            'claimed_at': claimed_at,
-            'can_claim': can_claim,
-            'is_mine': is_mine,
+            'statuses': statuses,
             'current_user': current_user
         }
     
     except Exception as e:
-        logger.error(f'Error in get_order_claim_status: {str(e)}')
+        logger.error(f'Error in get_claim_status_bulk: {str(e)}')
         return {
             'success': False,
             'error': str(e)
@@ -11,6 +11,16 @@ from imogi_pos.utils.permission_manager import check_branch_access
 from imogi_pos.utils.decorators import require_permission, require_role
 from imogi_pos.api.queue import get_next_queue_number
 from imogi_pos.api.pricing import get_price_list_rate_maps
+from imogi_pos.utils.pricing_trace import record_pricing_event
+from imogi_pos.utils.variant_matrix import resolve_variant_from_options
+from imogi_pos.utils.order_lines import (
+    apply_line_ops,
+    diff_order_lines,
+    get_order_lines,
+    parse_line_ops,
+)
+from imogi_pos.utils.order_version import parse_expected_version
+from imogi_pos.utils.claim_registry import acquire_claim
 from frappe.exceptions import TimestampMismatchError
 
 # Import native pricing integration
@@ -119,17 +129,23 @@ def _apply_native_pricing_rules_to_item(item_dict, customer=None, price_list=Non
                 item_dict["rate"] = pricing_result["rate"]
             
             item_dict["pricing_rule"] = pricing_result.get("pricing_rule")
-            
-            # Log for debugging
-            frappe.log_error(
-                f"Applied native pricing rule: {pricing_result.get('pricing_rule')} to item {item_code}",
-                "Native Pricing Applied"
+
+            record_pricing_event(
+                "applied",
+                item_code=item_code,
+                pricing_rule=pricing_result.get("pricing_rule"),
+                qty=qty,
+                discount_percentage=pricing_result.get("discount_percentage"),
+                discount_amount=pricing_result.get("discount_amount"),
+                rate=pricing_result.get("rate"),
             )
     except Exception as e:
+        item_code = item_dict.get("item_code") or item_dict.get("item")
         error_msg = f"Error applying native pricing rules to item {item_code}: {str(e)}"
         frappe.log_error(error_msg, "Native Pricing Error")
-        # Notify user about the error but still proceed with standard rate
-        return item_dict
+        # Proceed with the standard rate
+
+    return item_dict
 
 
 def _apply_customer_metadata(customer, details):
@@ -194,44 +210,23 @@ def validate_item_is_sales_item(doc, method=None):
         )
 
 
-@frappe.whitelist()
-@require_permission("POS Order", "write")
-@require_permission("POS Order Item", "create")
-def add_item_to_order(pos_order, item, qty=1, rate=None, item_options=None):
-    """
-    Append a new item row to an existing POS Order and recalculate totals.
-    
-    PERMISSION REQUIREMENTS:
-    - Requires 'write' permission on POS Order
-    - Requires 'create' permission on POS Order Item
-    - Role 'Cashier' has READ-ONLY access by default (cannot add items)
-    - Use roles: Waiter, Branch Manager, or custom role with write permissions
-    
-    RESTAURANT FLOW:
-    - Cannot edit if order claimed by another cashier
-    - Claimer can still edit (for corrections)
-    - Branch Manager can override lock
-    
+def _prepare_order_item_row(order_doc, item, qty=1, rate=None, item_options=None):
+    """Build the POS Order Item values for an item added to ``order_doc``.
+
+    Resolves variants from the selected options, prices the line from the
+    order's price lists (unless a rate is given) and applies native pricing
+    rules.
+
     Args:
-        pos_order: POS Order name
+        order_doc: POS Order document or header values
         item: Item code or dict with item details
         qty: Quantity (default 1)
         rate: Price override (optional)
         item_options: Additional options like variant selection
-    """
 
-    order_doc = frappe.get_doc("POS Order", pos_order)
-    check_branch_access(order_doc.branch)
-    
-    # RESTAURANT FLOW: Enforce edit lock (centralized helper)
-    assert_order_editable(order_doc, allow_branch_manager_override=True)
-
-    state = getattr(order_doc, "workflow_state", None)
-    if state in WORKFLOW_CLOSED_STATES:
-        frappe.throw(
-            _("Cannot modify order {0} in state {1}").format(order_doc.name, state),
-            frappe.ValidationError,
-        )
+    Returns:
+        dict: Values for the new POS Order Item row
+    """
 
     if item is None:
         frappe.throw(_("Item is required"), frappe.ValidationError)
@@ -298,6 +293,13 @@ def add_item_to_order(pos_order, item, qty=1, rate=None, item_options=None):
                 if replacement_code:
                     break
 
+    # A template with several attributes needs every selection to pick the
+    # variant; the first linked item only reflects one of them.
+    if isinstance(options_value, dict) and frappe.get_cached_value("Item", item_code, "has_variants"):
+        resolved_code = resolve_variant_from_options(item_code, options_value)
+        if resolved_code:
+            replacement_code = resolved_code
+
     if replacement_code:
         item_code = replacement_code
         item_payload["item"] = item_code
@@ -327,11 +329,7 @@ def add_item_to_order(pos_order, item, qty=1, rate=None, item_options=None):
             or getattr(order_doc, "imogi_base_price_list", None)
         )
 
-        # PERFORMANCE NOTE: get_price_list_rate_maps is called for each add_item_to_order request.
-        # If adding items frequently (e.g., quick successive clicks), consider:
-        # 1. Caching price list rates at session level
-        # 2. Batch item additions in frontend before calling API
-        # 3. Pre-loading price lists when order is opened
+        # Served from the shared price list rate cache (imogi_pos.utils.price_cache)
         rate_maps = get_price_list_rate_maps(
             [item_code],
             price_list=order_price_list,
@@ -369,44 +367,74 @@ def add_item_to_order(pos_order, item, qty=1, rate=None, item_options=None):
         if key in item_payload and item_payload.get(key) is not None:
             row_data[key] = item_payload.get(key)
 
-    row = order_doc.append("items", row_data)
+    return row_data
 
-    validate_item_is_sales_item(row)
-
-    order_doc.save()
 
-    row_name = getattr(row, "name", None)
+@frappe.whitelist()
+@require_permission("POS Order", "write")
+@require_permission("POS Order Item", "create")
+def add_item_to_order(pos_order, item, qty=1, rate=None, item_options=None, expected_version=None):
+    """
+    Append a new item row to an existing POS Order and recalculate totals.
+    
+    PERMISSION REQUIREMENTS:
+    - Requires 'write' permission on POS Order
+    - Requires 'create' permission on POS Order Item
+    - Role 'Cashier' has READ-ONLY access by default (cannot add items)
+    - Use roles: Waiter, Branch Manager, or custom role with write permissions
+    
+    RESTAURANT FLOW:
+    - Cannot edit if order claimed by another cashier
+    - Claimer can still edit (for corrections)
+    - Branch Manager can override lock
+    
+    Only the new row and the order header are written (see
+    ``patch_order_items``).
 
-    if hasattr(order_doc, "reload"):
-        try:
-            order_doc.reload()
-        except Exception:
-            pass
+    Args:
+        pos_order: POS Order name
+        item: Item code or dict with item details
+        qty: Quantity (default 1)
+        rate: Price override (optional)
+        item_options: Additional options like variant selection
+        expected_version: ``order_version`` last read by the client (optional);
+            on a conflict nothing is added and the server state is returned
+    """
 
-    added_row = None
-    if row_name:
-        added_row = next(
-            (item_row for item_row in getattr(order_doc, "items", []) if getattr(item_row, "name", None) == row_name),
-            None,
-        )
-    if not added_row:
-        added_row = row
+    expected_version = parse_expected_version(expected_version)
+    order = _get_editable_order_header(pos_order, for_update=expected_version is None)
 
-    summary = {
-        "name": order_doc.name,
-        "workflow_state": order_doc.workflow_state,
-        "subtotal": flt(getattr(order_doc, "subtotal", 0)),
-        "pb1_amount": flt(getattr(order_doc, "pb1_amount", 0)),
-        "totals": flt(getattr(order_doc, "totals", 0)),
-        "item_count": len(getattr(order_doc, "items", []) or []),
-        "total_qty": sum(
-            flt(getattr(child, "qty", 0) or 0) for child in (getattr(order_doc, "items", []) or [])
+    result = apply_line_ops(
+        order,
+        [{"op": "add"}],
+        lambda operation: _build_order_item_row(
+            order, item, qty=qty, rate=rate, item_options=item_options
         ),
-    }
+        expected_version=expected_version,
+    )
+
+    if result.get("conflict"):
+        return dict(result, success=False)
+
+    item_count, total_qty = frappe.db.sql(
+        """
+        SELECT COUNT(*), SUM(qty)
+        FROM `tabPOS Order Item`
+        WHERE parent = %s AND parenttype = 'POS Order' AND parentfield = 'items'
+        """,
+        (order.name,),
+    )[0]
+
+    summary = dict(
+        result["order"],
+        workflow_state=order.workflow_state,
+        item_count=cint(item_count),
+        total_qty=flt(total_qty),
+    )
 
     return {
         "success": True,
-        "item": added_row.as_dict(),
+        "item": result["added"][0],
         "order": summary,
     }
 
@@ -1037,96 +1065,161 @@ def update_order_status(pos_order, status):
 
     return {"name": order_doc.name, "workflow_state": order_doc.workflow_state}
 
+ORDER_HEADER_FIELDS = [
+    "name",
+    "branch",
+    "workflow_state",
+    "customer",
+    "pos_profile",
+    "subtotal",
+    "order_version",
+    "claimed_by",
+]
+
+
+def _get_editable_order_header(pos_order, for_update=True):
+    """Load and lock the POS Order header fields needed for line edits."""
+    order = frappe.db.get_value("POS Order", pos_order, ORDER_HEADER_FIELDS, as_dict=True, for_update=for_update)
+    if not order:
+        frappe.throw(_("POS Order {0} not found").format(pos_order), frappe.DoesNotExistError)
+
+    check_branch_access(order.branch)
+
+    # RESTAURANT FLOW: Enforce edit lock
+    assert_order_editable(order, allow_branch_manager_override=True)
+
+    if order.workflow_state in WORKFLOW_CLOSED_STATES:
+        frappe.throw(
+            _("Cannot modify order {0} in state {1}").format(order.name, order.workflow_state),
+            frappe.ValidationError
+        )
+
+    return order
+
+
+def _build_saved_item_row(item_data):
+    """Row values for an item sent by ``save_order`` (rate taken as given)."""
+    row = frappe._dict(
+        item=item_data.get("item") or item_data.get("item_code"),
+        qty=flt(item_data.get("qty", 1)),
+        rate=flt(item_data.get("rate", 0)),
+        notes=item_data.get("notes", ""),
+        item_options=item_data.get("item_options", {}),
+    )
+    validate_item_is_sales_item(row)
+    return row
+
+
+def _build_order_item_row(order, item, qty=1, rate=None, item_options=None):
+    """Priced and validated row values for an item added to ``order``."""
+    row = frappe._dict(
+        _prepare_order_item_row(order, item, qty=qty, rate=rate, item_options=item_options)
+    )
+    validate_item_is_sales_item(row)
+    return row
+
+
 @frappe.whitelist()
-def save_order(pos_order, items=None, customer=None, guests=None, table=None, **kwargs):
+@require_permission("POS Order", "write")
+def patch_order_items(pos_order, operations, expected_version=None):
+    """
+    Apply add/update/remove operations to the item rows of a POS Order.
+
+    Only the affected POS Order Item rows are written and the totals move by
+    the change in line amounts, so a single tap on a waiter tablet costs one
+    row write instead of a rewrite of the whole order.
+
+    Args:
+        pos_order (str): POS Order name
+        operations (list): ``{"op": "add", "item": ..., "qty": ..., "rate": ...,
+            "item_options": ..., "notes": ...}``, ``{"op": "update", "name": row,
+            "qty"/"rate"/"notes"/"item_options": ...}`` or ``{"op": "remove",
+            "name": row}``
+        expected_version (int): ``order_version`` as last read by the client.
+            When given, the patch is applied without holding the order row
+            lock and is skipped if another terminal changed the order first.
+
+    Returns:
+        dict: ``added`` rows, ``updated`` rows, ``removed`` row names and the
+        new ``order`` totals and ``order_version``. On a version conflict
+        ``conflict`` is true and ``order``/``lines`` hold the server state.
+    """
+    ops = parse_line_ops(operations)
+    expected_version = parse_expected_version(expected_version)
+
+    order = _get_editable_order_header(pos_order, for_update=expected_version is None)
+
+    return apply_line_ops(
+        order,
+        ops,
+        lambda operation: _build_order_item_row(
+            order,
+            operation,
+            qty=operation.get("qty") or 1,
+            rate=operation.get("rate"),
+            item_options=operation.get("item_options"),
+        ),
+        expected_version=expected_version,
+    )
+
+
+@frappe.whitelist()
+def save_order(pos_order, items=None, customer=None, guests=None, table=None, expected_version=None, **kwargs):
     """
     Save order changes without sending to kitchen.
     Updates items, customer, guests, and other order details.
-    
+
+    Item changes are applied as line operations (see ``patch_order_items``),
+    so only rows that actually changed are written. Rows already sent to the
+    kitchen only take note changes.
+
     Args:
         pos_order (str): POS Order name
         items (list): List of items with their details
         customer (str): Customer ID (optional)
         guests (int): Number of guests (optional)
         table (str): Table name (optional)
-    
+        expected_version (int): ``order_version`` last read by the client
+            (optional); on a conflict nothing is saved
+
     Returns:
-        dict: Updated order with item rows
+        dict: Updated order with item rows (``conflict`` set when the order
+        was changed by another terminal and nothing was saved)
     """
     if isinstance(items, str):
         items = frappe.parse_json(items)
-    
-    order_doc = frappe.get_doc("POS Order", pos_order)
-    check_branch_access(order_doc.branch)
-    
-    # RESTAURANT FLOW: Enforce edit lock
-    assert_order_editable(order_doc, allow_branch_manager_override=True)
-    
-    # Check if order is in a closed state
-    if order_doc.workflow_state in WORKFLOW_CLOSED_STATES:
-        frappe.throw(
-            _("Cannot modify order {0} in state {1}").format(order_doc.name, order_doc.workflow_state),
-            frappe.ValidationError
-        )
-    
-    # Update customer if provided
-    if customer:
-        order_doc.customer = customer
-    
-    # Update guests if provided
-    if guests is not None:
-        order_doc.guests = cint(guests)
-    
-    # Update table if provided
-    if table:
-        order_doc.table = table
-    
-    # Get existing items with counters (already sent to kitchen)
-    existing_sent_items = {}
-    for item in order_doc.items:
-        if item.get("counters"):
-            existing_sent_items[item.name] = item
-    
-    # Update items if provided
+
+    expected_version = parse_expected_version(expected_version)
+    order = _get_editable_order_header(pos_order)
+
+    # The header row is locked, so a version check here covers the whole save
+    if expected_version is not None and cint(order.order_version) != expected_version:
+        return dict(frappe.get_doc("POS Order", pos_order).as_dict(), conflict=True)
+
     if items:
-        # Keep track of items to preserve
-        items_to_keep = []
-        
-        for item_data in items:
-            item_name = item_data.get('name')
-            
-            # If item has a name and exists in sent items, update it
-            if item_name and item_name in existing_sent_items:
-                existing_item = existing_sent_items[item_name]
-                # Only update notes for items already sent to kitchen
-                existing_item.notes = item_data.get('notes', existing_item.notes)
-                items_to_keep.append(existing_item)
-            else:
-                # This is a new item, add it
-                items_to_keep.append(item_data)
-        
-        # Clear items and re-add
-        order_doc.items = []
-        
-        for item_data in items_to_keep:
-            if hasattr(item_data, 'as_dict'):
-                # This is an existing item object
-                order_doc.append('items', item_data)
-            else:
-                # This is new item data
-                order_doc.append('items', {
-                    'item': item_data.get('item') or item_data.get('item_code'),
-                    'template_item': item_data.get('template_item'),
-                    'qty': flt(item_data.get('qty', 1)),
-                    'rate': flt(item_data.get('rate', 0)),
-                    'notes': item_data.get('notes', ''),
-                    'item_options': item_data.get('item_options', {})
-                })
-    
-    order_doc.save()
-    order_doc.reload()
-    
-    return order_doc.as_dict()
+        lines = get_order_lines(order.name)
+        ops = diff_order_lines(lines, items)
+        if ops:
+            apply_line_ops(order, ops, _build_saved_item_row, lines=lines)
+
+    # Header changes still go through the document so customer sync and
+    # table status hooks run
+    if customer or guests is not None or table:
+        order_doc = frappe.get_doc("POS Order", pos_order)
+
+        if customer:
+            order_doc.customer = customer
+
+        if guests is not None:
+            order_doc.guests = cint(guests)
+
+        if table:
+            order_doc.table = table
+
+        order_doc.save()
+        return order_doc.as_dict()
+
+    return frappe.get_doc("POS Order", pos_order).as_dict()
 
 
 @frappe.whitelist()
@@ -1820,24 +1913,41 @@ def claim_order(pos_order_name, opening_entry=None):
     if not pos_order_name:
         frappe.throw(_("POS Order name is required"), frappe.ValidationError)
     
-    if not frappe.db.exists("POS Order", pos_order_name):
+    order = frappe.db.get_value(
+        "POS Order",
+        pos_order_name,
+        [
+            "name",
+            "pos_profile",
+            "workflow_state",
+            "table",
+            "customer",
+            "totals",
+            "claimed_by",
+            "claimed_at",
+            "order_version",
+        ],
+        as_dict=True,
+    )
+    if not order:
         frappe.throw(_("POS Order {0} not found").format(pos_order_name), frappe.DoesNotExistError)
-    
-    order = frappe.get_doc("POS Order", pos_order_name)
+
     current_user = frappe.session.user
     
     # ROBUST VALIDATION: POS Opening (if provided)
     if opening_entry:
-        if not frappe.db.exists("POS Opening Entry", opening_entry):
+        # Document cache: cleared when the opening is saved (e.g. on closing)
+        opening = frappe.get_cached_value(
+            "POS Opening Entry", opening_entry, ["status", "pos_profile", "user"], as_dict=True
+        )
+        if not opening:
             frappe.throw(
                 _("POS Opening {0} not found").format(opening_entry),
                 frappe.DoesNotExistError
             )
         
-        opening = frappe.get_doc("POS Opening Entry", opening_entry)
-        
         # Validate opening status = "Open"
-        opening_status = getattr(opening, "status", None)
+        opening_status = opening.get("status")
         if opening_status != "Open":
             frappe.throw(
                 _("POS Opening {0} is not open (status: {1})").format(opening_entry, opening_status),
@@ -1846,7 +1956,7 @@ def claim_order(pos_order_name, opening_entry=None):
         
         # Validate POS Profile match
         order_profile = order.pos_profile
-        opening_profile = getattr(opening, "pos_profile", None)
+        opening_profile = opening.get("pos_profile")
         if opening_profile and opening_profile != order_profile:
             frappe.throw(
                 _("POS Opening profile ({0}) does not match order profile ({1})").format(
@@ -1856,7 +1966,7 @@ def claim_order(pos_order_name, opening_entry=None):
             )
         
         # Validate user match (if scope = "User")
-        opening_user = getattr(opening, "user", None)
+        opening_user = opening.get("user")
         if opening_user and opening_user != current_user:
             frappe.throw(
                 _("POS Opening {0} belongs to user {1}, not {2}").format(
@@ -1865,27 +1975,33 @@ def claim_order(pos_order_name, opening_entry=None):
                 frappe.ValidationError
             )
     
-    # Concurrency guard: Check if already claimed by different user
-    if hasattr(order, "claimed_by") and order.claimed_by:
+    def _claimed_elsewhere(claim):
+        # Concurrency guard: already claimed by a different user
+        claimed_user_name = frappe.db.get_value("User", claim.claimed_by, "full_name") or claim.claimed_by
+        frappe.throw(
+            _("Order already claimed by {0} at {1}").format(
+                claimed_user_name,
+                claim.claimed_at or "unknown time"
+            ),
+            frappe.ValidationError
+        )
+
+    def _already_mine(claim):
+        # Already claimed by current user - return success (idempotent)
+        return {
+            "success": True,
+            "message": _("Order already claimed by you"),
+            "pos_order": pos_order_name,
+            "claimed_by": claim.claimed_by,
+            "claimed_at": claim.claimed_at,
+            "order_version": cint(claim.order_version),
+            "is_reentrant": True
+        }
+
+    if order.claimed_by:
         if order.claimed_by != current_user:
-            claimed_user_name = frappe.db.get_value("User", order.claimed_by, "full_name") or order.claimed_by
-            frappe.throw(
-                _("Order already claimed by {0} at {1}").format(
-                    claimed_user_name,
-                    order.claimed_at if hasattr(order, "claimed_at") else "unknown time"
-                ),
-                frappe.ValidationError
-            )
-        else:
-            # Already claimed by current user - return success (idempotent)
-            return {
-                "success": True,
-                "message": _("Order already claimed by you"),
-                "pos_order": pos_order_name,
-                "claimed_by": order.claimed_by,
-                "claimed_at": order.claimed_at,
-                "is_reentrant": True
-            }
+            _claimed_elsewhere(order)
+        return _already_mine(order)
     
     # Validation: Order should be in valid state for claim
     closed_states = ["Closed", "Cancelled", "Returned"]
@@ -1895,11 +2011,23 @@ def claim_order(pos_order_name, opening_entry=None):
             frappe.ValidationError
         )
     
-    # Set claim fields
+    # Set claim fields through the claim registry (SET NX) and a conditional
+    # UPDATE instead of a full document save
     order.claimed_by = current_user
     order.claimed_at = now_datetime()
-    
-    order.save(ignore_permissions=True)
+
+    acquired, claim = acquire_claim(
+        pos_order_name, current_user, order.claimed_at, opening_entry=opening_entry
+    )
+    if not acquired:
+        if not claim:
+            frappe.throw(_("POS Order {0} not found").format(pos_order_name), frappe.DoesNotExistError)
+        claim = frappe._dict(claim, order_version=order.order_version)
+        if claim.claimed_by == current_user:
+            return _already_mine(claim)
+        _claimed_elsewhere(claim)
+
+    order.order_version = cint(order.order_version) + 1
     frappe.db.commit()
     
     # Publish realtime event
@@ -1920,10 +2048,11 @@ def claim_order(pos_order_name, opening_entry=None):
         "pos_order": pos_order_name,
         "claimed_by": order.claimed_by,
         "claimed_at": order.claimed_at,
-        "table": order.table if hasattr(order, "table") else None,
+        "table": order.table,
         "customer": order.customer,
-        "grand_total": order.grand_total,
-        "workflow_state": order.workflow_state
+        "grand_total": order.totals,
+        "workflow_state": order.workflow_state,
+        "order_version": order.order_version
     }
 
 
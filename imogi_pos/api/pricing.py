@@ -9,6 +9,9 @@ import frappe
 from frappe import _
 from frappe.utils import flt, getdate, now_datetime
 
+from imogi_pos.utils.price_cache import get_cached_rates, invalidate_item_price, load_rates
+from imogi_pos.utils.security import client_rate_limit_key, rate_limit
+
 
 def _extract_doc_value(doc: Any, fieldname: str) -> Any:
     """Safely fetch an attribute from a document or mapping."""
@@ -37,6 +40,11 @@ def publish_item_price_update(doc: Any, event: str | None = None) -> None:
     if not item_code or not price_list:
         return
 
+    try:
+        invalidate_item_price(doc)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), _("Failed to refresh cached rate for {0}").format(item_code))
+
     try:
         is_enabled = frappe.db.get_value("Price List", price_list, "enabled")
     except Exception:
@@ -138,6 +146,7 @@ def _extract_label_from_row(
 
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="catalog", key_func=client_rate_limit_key, ip_policy="catalog_ip")
 def get_allowed_price_lists(pos_profile: str) -> Dict[str, object]:
     """Return the list of selectable price lists for a POS Profile.
 
@@ -280,25 +289,19 @@ def get_price_list_rate_maps(
             return {"rates": {}, "currencies": {}}
 
         try:
-            rows = frappe.get_all(
-                "Item Price",
-                filters={"price_list": list_name, "item_code": ["in", names]},
-                fields=["item_code", "price_list_rate", "currency"],
-            )
+            entries = get_cached_rates(list_name, names)
         except Exception:
-            rows = []
+            try:
+                entries = load_rates(list_name, names)
+            except Exception:
+                entries = {}
 
         rates: Dict[str, object] = {}
         currencies: Dict[str, object] = {}
 
-        for row in rows or []:
-            item_code = getattr(row, "item_code", None)
-            if not item_code:
-                continue
-            if item_code not in names:
-                continue
-            rates[item_code] = getattr(row, "price_list_rate", None)
-            currencies[item_code] = getattr(row, "currency", None)
+        for item_code, (rate, currency) in entries.items():
+            rates[item_code] = rate
+            currencies[item_code] = currency
 
         return {"rates": rates, "currencies": currencies}
 
@@ -373,6 +376,7 @@ __all__ = [
 
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="catalog", key_func=client_rate_limit_key, ip_policy="catalog_ip")
 def get_item_price(
     item_code: Optional[str],
     price_list: Optional[str] = None,
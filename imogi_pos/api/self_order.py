@@ -4,8 +4,31 @@
 import frappe
 from frappe.utils import now_datetime
 from frappe import _
+from imogi_pos.utils.security import rate_limit
+from imogi_pos.utils.self_order_sessions import get_session, record_last_seen
+
+
+def _client_ip():
+    return getattr(frappe.local, "request_ip", None) or "unknown"
+
+
+def _session_rate_limit_key(token=None, slug=None, **kwargs):
+    return f"{_client_ip()}:{token or slug}"
+
+
+def _order_rate_limit_key(session_id=None, *args, **kwargs):
+    return session_id or _client_ip()
+
+
+def _self_order_rate_limit(session_id=None, cart_items=None, pos_profile=None, *args, **kwargs):
+    """Orders per minute allowed by the POS Profile (``imogi_self_order_rate_limit``)."""
+    if not pos_profile:
+        return None
+    return frappe.get_cached_value("POS Profile", pos_profile, "imogi_self_order_rate_limit")
+
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="self_order_verify", key_func=_session_rate_limit_key)
 def verify_session(token=None, slug=None):
     """
     Verify a self-order session token or slug and return session details if valid
@@ -15,25 +38,17 @@ def verify_session(token=None, slug=None):
     if not token and not slug:
         frappe.throw(_("Token or slug is required"))
     
-    # Search by token or slug
-    filters = {"token": token} if token else {"slug": slug}
-    
-    session_name = frappe.db.get_value("Self Order Session", filters, "name")
-    if not session_name:
+    session = get_session(token=token, slug=slug)
+    if not session:
         frappe.throw(_("Invalid token or slug"))
     
-    # Get session document
-    session = frappe.get_doc("Self Order Session", session_name)
-    
     # Check if expired
     if now_datetime() > frappe.utils.get_datetime(session.expires_on):
         frappe.throw(_("Session has expired"))
     
-    # Update IP and user agent
+    # Queue IP and user agent; written in batches by the scheduler
     if frappe.request:
-        session.last_ip = frappe.local.request_ip
-        session.user_agent = frappe.request.headers.get('User-Agent', '')
-        session.save(ignore_permissions=True)
+        record_last_seen(session, frappe.local.request_ip, frappe.request.headers.get('User-Agent', ''))
     
     # Return session details (sanitized for security)
     return {
@@ -47,6 +62,7 @@ def verify_session(token=None, slug=None):
     }
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="self_order_session")
 def create_session(pos_profile, branch, table=None, is_guest=1):
     """
     Create a new self-order session (controlled access via POS Profile settings)
@@ -89,6 +105,7 @@ def create_session(pos_profile, branch, table=None, is_guest=1):
     }
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="self_order_submit", max_requests=_self_order_rate_limit, key_func=_order_rate_limit_key)
 def checkout_takeaway(session_id, cart_items, pos_profile, branch, customer='Walk-in Customer', payment_method='qris'):
     """
     Create order and invoice for takeaway self-order checkout with integrated QRIS payment
@@ -163,6 +180,7 @@ def checkout_takeaway(session_id, cart_items, pos_profile, branch, customer='Wal
     }
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="self_order_submit", max_requests=_self_order_rate_limit, key_func=_order_rate_limit_key)
 def submit_table_order(session_id, cart_items, pos_profile, branch, table, customer='Walk-in Customer'):
     """
     Submit order for dine-in (table) self-order - no payment required
@@ -209,6 +227,7 @@ def submit_table_order(session_id, cart_items, pos_profile, branch, table, custo
     }
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="self_order_payment_qr")
 def regenerate_payment_qr(invoice_name, branch=None):
     """
     Regenerate QRIS QR code for an existing invoice (used when QR expires)
@@ -5,11 +5,17 @@
 from __future__ import unicode_literals
 import frappe
 from frappe import _
-from frappe.utils import cint, flt
+from frappe.utils import flt
 from imogi_pos.api.billing import get_bom_capacity_summary
 from imogi_pos.api.items import _channel_matches
-from imogi_pos.api.pricing import get_price_list_rate_maps
 from imogi_pos.utils.permission_manager import check_branch_access
+from imogi_pos.utils.security import client_rate_limit_key, rate_limit
+from imogi_pos.utils.variant_matrix import (
+    get_matrix_rate_maps,
+    get_missing_attributes,
+    get_variant_matrix,
+    resolve_variant,
+)
 
 def get_order_branch(pos_order):
     """
@@ -46,64 +52,26 @@ def get_variant_picker_config(item_template):
     Raises:
         frappe.ValidationError: If item is not a template
     """
-    # Check if item is a template
-    is_template = frappe.db.get_value("Item", item_template, "has_variants")
-    if not is_template:
-        frappe.throw(_("Item {0} is not a template").format(item_template), frappe.ValidationError)
-    
-    # Get item attributes
-    attributes = []
-    item_doc = frappe.get_doc("Item", item_template)
-    
-    for attr in item_doc.attributes:
-        attribute_doc = frappe.get_doc("Item Attribute", attr.attribute)
-        
-        # Get attribute values
-        values = []
-        if attribute_doc.numeric_values:
-            from_value = cint(attr.from_range)
-            to_value = cint(attr.to_range)
-            increment = cint(attr.increment)
-            
-            for val in range(from_value, to_value + 1, increment):
-                values.append({
-                    "value": val,
-                    "abbr": str(val),
-                    "label": str(val) + " " + (attribute_doc.numeric_values_suffix or "")
-                })
-        else:
-            # Get attribute values from Item Attribute Values
-            for attr_value in attribute_doc.item_attribute_values:
-                values.append({
-                    "value": attr_value.attribute_value,
-                    "abbr": attr_value.abbr,
-                    "label": attr_value.attribute_value
-                })
-        
-        attributes.append({
-            "name": attr.attribute,
-            "label": attribute_doc.attribute_name,
-            "field_name": attr.attribute.lower().replace(" ", "_"),
-            "values": values,
-            "required": 1  # All attributes are required for variant selection
-        })
-    
-    # Get thumbnail image if available
-    thumbnail = item_doc.image or None
-    
+    matrix = get_variant_matrix(item_template)
+    attributes = matrix["attributes"]
+
     return {
         "template": item_template,
-        "template_name": item_doc.item_name,
+        "template_name": matrix["template_name"],
         "attributes": attributes,
-        "thumbnail": thumbnail,
-        "description": item_doc.description,
+        "thumbnail": matrix["thumbnail"],
+        "description": matrix["description"],
         "has_variants": len(attributes) > 0
     }
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="catalog", key_func=client_rate_limit_key, ip_policy="catalog_ip")
 def get_item_variants(item_template=None, price_list=None, base_price_list=None, **kwargs):
     """
     Gets all variants for a template item.
+
+    Rate limited per client; server-side callers use ``load_item_variants``
+    so building an order or invoice never counts against the catalog limit.
     
     Args:
         item_template (str): Item Template code
@@ -111,6 +79,29 @@ def get_item_variants(item_template=None, price_list=None, base_price_list=None,
     Returns:
         list: List of item variants with attributes
     
+    Raises:
+        frappe.ValidationError: If item is not a template
+    """
+    return load_item_variants(
+        item_template=item_template,
+        price_list=price_list,
+        base_price_list=base_price_list,
+        **kwargs
+    )
+
+def load_item_variants(item_template=None, price_list=None, base_price_list=None, **kwargs):
+    """
+    Gets all variants for a template item (not rate limited).
+
+    Served from the cached variant matrix, so repeated taps on the same
+    template do not hit the database.
+    
+    Args:
+        item_template (str): Item Template code
+    
+    Returns:
+        dict: Template, attributes and variants with their rates
+    
     Raises:
         frappe.ValidationError: If item is not a template
     """
@@ -134,34 +125,11 @@ def get_item_variants(item_template=None, price_list=None, base_price_list=None,
     if not item_template:
         frappe.throw(_("Item template is required"), frappe.ValidationError)
 
-    # Check if item is a template
-    is_template = frappe.db.get_value("Item", item_template, "has_variants")
-    if not is_template:
-        frappe.throw(_("Item {0} is not a template").format(item_template), frappe.ValidationError)
-    
-    # Get attribute configuration
-    attr_config = get_variant_picker_config(item_template)
-    attributes = attr_config.get("attributes", [])
-    
-    # Get all variants
-    variants = frappe.get_all(
-        "Item",
-        filters={"variant_of": item_template, "disabled": 0},
-        fields=[
-            "name",
-            "item_name",
-            "image",
-            "item_code",
-            "description",
-            "standard_rate",
-            "stock_uom",
-        ],
-    )
-
-    variant_names = [variant.name for variant in variants]
+    matrix = get_variant_matrix(item_template)
+    attributes = matrix["attributes"]
 
-    rate_maps = get_price_list_rate_maps(
-        variant_names,
+    rate_maps = get_matrix_rate_maps(
+        matrix,
         price_list=price_list,
         base_price_list=base_price_list,
     )
@@ -171,29 +139,13 @@ def get_item_variants(item_template=None, price_list=None, base_price_list=None,
     base_rate_map = rate_maps["base_price_list_rates"]
     base_currency_map = rate_maps["base_price_list_currencies"]
 
-    # Enrich variants with their attribute values
-    for variant in variants:
+    variants = []
+    for cached_variant in matrix["variants"]:
+        # The matrix is shared between requests; never mutate it in place
+        variant = frappe._dict(cached_variant)
+        variant["attributes"] = dict(cached_variant["attributes"])
         item_code = variant["name"]
 
-        # Get attribute values for this variant
-        attr_values = frappe.get_all("Item Variant Attribute", 
-                                   filters={"parent": item_code},
-                                   fields=["attribute", "attribute_value"])
-        
-        # Create a dict of attribute values
-        variant_attrs = {}
-        for attr in attr_values:
-            variant_attrs[attr.attribute] = attr.attribute_value
-        
-        variant["attributes"] = variant_attrs
-        
-        # Check if this variant has menu category, kitchen, etc.
-        routing = frappe.db.get_value("Item", item_code,
-                                   ["menu_category", "default_kitchen", "default_kitchen_station"],
-                                   as_dict=True)
-        if routing:
-            variant.update(routing)
-
         base_standard_rate = flt(variant.get("standard_rate"))
         fallback_currency = None
         if not base_standard_rate and base_rate_map:
@@ -219,6 +171,7 @@ def get_item_variants(item_template=None, price_list=None, base_price_list=None,
 
         # Provide a ``rate`` alias for compatibility with clients expecting this field
         variant["rate"] = variant.get("standard_rate")
+        variants.append(variant)
 
     return {
         "template": item_template,
@@ -291,61 +244,17 @@ def choose_variant_for_order_item(pos_order, order_item_row, selected_attributes
         if not selected_attributes:
             frappe.throw(_("No attributes selected for variant"), frappe.ValidationError)
         
-        # Find the matching variant based on selected attributes
-        template_doc = frappe.get_doc("Item", item_code)
-        
-        # Build candidate variants by intersecting attribute matches
-        candidate_variants = None
-        for attr in template_doc.attributes:
-            attr_name = attr.attribute
-            if attr_name not in selected_attributes:
-                frappe.throw(_("Required attribute {0} not provided").format(attr_name),
-                            frappe.ValidationError)
-
-            attr_value = selected_attributes[attr_name]
-            attr_rows = frappe.get_all(
-                "Item Variant Attribute",
-                filters={
-                    "attribute": attr_name,
-                    "attribute_value": attr_value,
-                },
-                fields=["parent"],
-            )
-
-            matching_variants = {row.parent for row in attr_rows}
-            if not matching_variants:
-                candidate_variants = set()
-                break
-
-            if candidate_variants is None:
-                candidate_variants = matching_variants
-            else:
-                candidate_variants &= matching_variants
-
-            if not candidate_variants:
-                break
-
-        candidate_variants = candidate_variants or set()
+        missing = get_missing_attributes(item_code, selected_attributes)
+        if missing:
+            frappe.throw(_("Required attribute {0} not provided").format(missing[0]),
+                        frappe.ValidationError)
 
-        if not candidate_variants:
+        # Dictionary lookup on the cached variant matrix
+        variant_code = resolve_variant(item_code, selected_attributes)
+        if not variant_code:
             frappe.throw(_("No variant found with the selected attributes"), frappe.ValidationError)
 
-        # Find variant that matches all attributes and belongs to the template
-        variants = frappe.get_all(
-            "Item",
-            filters={
-                "name": ["in", sorted(candidate_variants)],
-                "variant_of": item_code,
-                "disabled": 0,
-            },
-            fields=["name"],
-        )
-
-        if not variants:
-            frappe.throw(_("No variant found with the selected attributes"), frappe.ValidationError)
-        
-        # Use the first matching variant
-        variant = frappe.get_doc("Item", variants[0].name)
+        variant = frappe.get_doc("Item", variant_code)
     
     else:
         frappe.throw(_("Either selected_attributes or variant_item must be provided"), 
@@ -433,6 +342,7 @@ def find_template_for_variant(variant_item):
     }
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(policy="catalog", key_func=client_rate_limit_key, ip_policy="catalog_ip")
 def get_item_groups(pos_profile=None):
     """
     Get item groups that have items available for POS.
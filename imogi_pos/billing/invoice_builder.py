@@ -3,6 +3,8 @@ from frappe import _
 from frappe.utils import nowdate, get_datetime, now_datetime
 from typing import Dict, List, Optional, Union, Any
 
+from imogi_pos.utils.item_master import get_item_details
+
 
 def build_sales_invoice_from_pos_order(
     pos_order: Union[str, Dict, Any],
@@ -38,13 +40,11 @@ def build_sales_invoice_from_pos_order(
         return pos_order.sales_invoice
     
     # Get the POS Profile
-    pos_profile = frappe.get_doc("POS Profile", pos_order.pos_profile)
+    pos_profile = frappe.get_cached_doc("POS Profile", pos_order.pos_profile)
     
     # Get active POS Opening Entry if required
     pos_opening = None
-    if frappe.db.get_value(
-        "POS Profile", pos_order.pos_profile, "imogi_require_pos_session"
-    ):
+    if pos_profile.get("imogi_require_pos_session"):
         pos_opening = get_active_pos_opening(pos_order.pos_profile)
         if not pos_opening:
             frappe.throw(
@@ -109,33 +109,17 @@ def build_sales_invoice_from_pos_order(
     if price_list:
         si.selling_price_list = price_list
     
-    # Add items
+    # Add items (Item master fields for all lines in one cached lookup)
+    items_master = get_item_details([order_item.item for order_item in pos_order.items])
     for order_item in pos_order.items:
-        item_details = frappe.db.get_value(
-            "Item", order_item.item, 
-            ["item_name", "description", "stock_uom"], 
-            as_dict=1
-        )
+        item_details = items_master.get(order_item.item)
         
         if not item_details:
             frappe.throw(_("Item {0} not found").format(order_item.item))
         
-        # Prepare item description (with or without notes)
-        description = item_details.get("description") or item_details.get("item_name") or order_item.item
-        if should_include_notes and order_item.notes:
-            description += f"\n{order_item.notes}"
-        
-        si_item = si.append("items", {
-            "item_code": order_item.item,
-            "item_name": item_details.get("item_name") or order_item.item,
-            "description": description,
-            "qty": order_item.qty,
-            "rate": order_item.rate,
-            "conversion_factor": 1.0,
-            "uom": item_details.get("stock_uom") or "Nos",
-            "stock_uom": item_details.get("stock_uom") or "Nos",
-            "warehouse": pos_profile.warehouse
-        })
+        si.append("items", _build_invoice_item(
+            order_item, item_details, order_item.qty, should_include_notes, pos_profile.warehouse
+        ))
     
     # Save the invoice first to calculate totals
     si.set_missing_values()
@@ -237,6 +221,43 @@ def get_active_pos_opening(pos_profile: str) -> Optional[str]:
     return opening.get("pos_opening_entry")
 
 
+def _build_invoice_item(
+    order_item: Any,
+    item_details: Dict,
+    qty: float,
+    include_notes: bool,
+    warehouse: Optional[str]
+) -> Dict:
+    """
+    Build a Sales Invoice Item row for (part of) a POS Order Item.
+    
+    Args:
+        order_item: POS Order Item row
+        item_details: Item master fields (see ``imogi_pos.utils.item_master``)
+        qty: Quantity to invoice
+        include_notes: Whether to append the line notes to the description
+        warehouse: Warehouse from the POS Profile
+        
+    Returns:
+        Dict for ``si.append("items", ...)``
+    """
+    description = item_details.get("description") or item_details.get("item_name") or order_item.item
+    if include_notes and order_item.notes:
+        description += f"\n{order_item.notes}"
+    
+    return {
+        "item_code": order_item.item,
+        "item_name": item_details.get("item_name") or order_item.item,
+        "description": description,
+        "qty": qty,
+        "rate": order_item.rate,
+        "conversion_factor": 1.0,
+        "uom": item_details.get("stock_uom") or "Nos",
+        "stock_uom": item_details.get("stock_uom") or "Nos",
+        "warehouse": warehouse
+    }
+
+
 def _should_include_notes_in_description(
     pos_profile: Dict, 
     order_type: str,
@@ -268,7 +289,9 @@ def _should_include_notes_in_description(
 
 def split_pos_order_to_invoices(
     pos_order: Union[str, Dict, Any],
-    split_data: List[Dict]
+    split_data: List[Dict],
+    submit: bool = False,
+    pos_opening: Optional[str] = None
 ) -> List[str]:
     """
     Split a POS Order into multiple Sales Invoices based on ``split_data``.
@@ -276,21 +299,24 @@ def split_pos_order_to_invoices(
     Args:
         pos_order: POS Order name or document
         split_data: A list of dictionaries describing how the order should be
-            divided. Each dictionary is expected to include a ``customer`` and
-            an ``items`` list containing ``{"item_id": str, "qty": float}``
-            entries.
+            divided. Each dictionary may include a ``customer`` and must
+            include an ``items`` list of ``{"item_id": str, "qty": float}``
+            entries (``item_id`` is the POS Order Item row; ``qty`` defaults
+            to the whole row).
+        submit: Whether to submit the invoices
+        pos_opening: POS Opening Entry to link (default: resolved from the
+            POS Profile when it requires a session)
 
     Returns:
         List of created Sales Invoice names.
 
-    Intended behaviour:
-        1. Validate the provided split data to ensure item quantities and totals
-           match the original POS Order.
-        2. Create a new Sales Invoice for each split entry using the specified
-           customer and items.
-        3. Mark the original POS Order as split and link the resulting invoices.
-
-    Currently, this function is not implemented and will raise an exception
-    when called to prevent silent failures.
+    The whole plan is validated before anything is written. All invoices are
+    then built from the same order snapshot and inserted in one transaction
+    (see ``imogi_pos.billing.split_engine``).
     """
-    frappe.throw(_("Invoice splitting not implemented"))
+    from imogi_pos.billing.split_engine import split_order
+
+    if isinstance(pos_order, str):
+        pos_order = frappe.get_doc("POS Order", pos_order)
+
+    return split_order(pos_order, split_data, submit=submit, pos_opening=pos_opening)
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Bill splitting for POS Orders.
+
+A split plan assigns every POS Order Item row, or part of its quantity, to
+one of several parts. Each part becomes its own Sales Invoice.
+
+``plan_split`` validates the whole plan in memory in one pass and reports
+every problem at once. A row must be allocated exactly, nothing may be
+over-allocated, and the parts must add up to the order within rounding. A
+quantity left over by rounding each part's share (three thirds of a line) goes
+to the last part that takes the row.
+``split_order`` then reads the shared context once: POS Profile, opening,
+tax template rows, price list, table floor and Item master. It builds every
+invoice from that single order snapshot and inserts them all under one
+savepoint. Tax template rows with a fixed ("Actual") amount are shared out
+across the parts in proportion to their net totals, with the rounding
+remainder on the last part, so the charge is billed once in total rather than
+once per part. The POS Order is linked with a conditional version bump, so a
+concurrent edit rolls the whole split back instead of invoicing a stale
+order.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, nowdate, now_datetime
+
+from imogi_pos.billing.invoice_builder import (
+    _build_invoice_item,
+    _should_include_notes_in_description,
+    get_active_pos_opening,
+)
+from imogi_pos.utils.item_master import get_item_details
+from imogi_pos.utils.order_version import bump_order_version
+
+QTY_PRECISION = 6
+SPLIT_SAVEPOINT = "imogi_pos_split_bill"
+
+
+def parse_split_data(split_data):
+    """Return the list of split parts from a list, JSON string or ``{"splits": [...]}``."""
+    if isinstance(split_data, str):
+        split_data = json.loads(split_data) if split_data else []
+    if isinstance(split_data, dict):
+        split_data = split_data.get("splits")
+    if not isinstance(split_data, list):
+        frappe.throw(_("Split data must be a list of parts"), frappe.ValidationError)
+    return split_data
+
+
+def plan_split(order, split_data, precision=2):
+    """Validate a split plan against an order and return its parts.
+
+    Args:
+        order: POS Order document (with ``items``)
+        split_data: Parts as accepted by ``parse_split_data``
+        precision: Currency precision used for totals
+
+    Returns:
+        list: ``[{"customer", "lines": [{"row", "qty", "amount"}], "net_total"}]``
+    """
+    split_data = parse_split_data(split_data)
+    rows = {row.name: row for row in order.items}
+    allocated = {}
+    last_lines = {}
+    errors = []
+    parts = []
+
+    if len(split_data) < 2:
+        errors.append(_("A split needs at least two parts"))
+
+    for index, part in enumerate(split_data, start=1):
+        part = part or {}
+        lines = []
+        for entry in part.get("items") or []:
+            row_name = entry.get("item_id") or entry.get("name")
+            row = rows.get(row_name)
+            if not row:
+                errors.append(_("Part {0}: {1} is not a line of order {2}").format(index, row_name, order.name))
+                continue
+
+            qty = flt(row.qty) if entry.get("qty") in (None, "") else flt(entry.get("qty"), QTY_PRECISION)
+            if qty <= 0:
+                errors.append(_("Part {0}: quantity for {1} must be positive").format(index, row.item))
+                continue
+
+            allocated[row_name] = flt(allocated.get(row_name, 0) + qty, QTY_PRECISION)
+            line = {"row": row, "qty": qty}
+            last_lines[row_name] = line
+            lines.append(line)
+
+        if not lines:
+            errors.append(_("Part {0} has no items").format(index))
+
+        parts.append({"customer": part.get("customer"), "lines": lines})
+
+    # Every part rounds its share to QTY_PRECISION, e.g. three parts of 0.333333
+    qty_tolerance = len(split_data) * 10 ** -QTY_PRECISION
+    for row in order.items:
+        difference = flt(allocated.get(row.name, 0) - flt(row.qty), QTY_PRECISION)
+        if difference and abs(difference) <= qty_tolerance and row.name in last_lines:
+            # The last part takes the rounding remainder, so the row is invoiced exactly
+            line = last_lines[row.name]
+            line["qty"] = flt(line["qty"] - difference, QTY_PRECISION)
+        elif difference > 0:
+            errors.append(_("{0} is over-allocated by {1}").format(row.item, difference))
+        elif difference < 0:
+            errors.append(_("{0} has {1} left to allocate").format(row.item, -difference))
+
+    for part in parts:
+        for line in part["lines"]:
+            line["amount"] = flt(line["qty"] * flt(line["row"].rate), precision)
+        part["net_total"] = flt(sum(line["amount"] for line in part["lines"]), precision)
+
+    if not errors:
+        order_total = flt(sum(flt(row.qty) * flt(row.rate) for row in order.items), precision)
+        split_total = flt(sum(part["net_total"] for part in parts), precision)
+        # Each part may round its last digit independently
+        tolerance = len(parts) * 0.5 * 10 ** -precision
+        if abs(split_total - order_total) > tolerance:
+            errors.append(
+                _("Split total {0} does not match order total {1}").format(split_total, order_total)
+            )
+
+    if errors:
+        frappe.throw("<br>".join(errors), frappe.ValidationError)
+
+    return parts
+
+
+def split_order(order, split_data, submit=False, pos_opening=None):
+    """Create one Sales Invoice per part of a validated split plan.
+
+    Args:
+        order: POS Order document
+        split_data: Parts as accepted by ``parse_split_data``
+        submit: Whether to submit the invoices
+        pos_opening: POS Opening Entry to link (resolved when None)
+
+    Returns:
+        list: Sales Invoice names, in part order
+    """
+    if order.workflow_state in ["Cancelled", "Returned"]:
+        frappe.throw(_("Cannot create invoice from a cancelled or returned order"))
+    if order.get("sales_invoice"):
+        frappe.throw(_("Order {0} is already invoiced ({1})").format(order.name, order.sales_invoice))
+
+    parts = plan_split(order, split_data)
+    context = _get_split_context(order, pos_opening)
+    _share_part_taxes(parts, context.taxes)
+    invoices = [_build_part_invoice(order, part, context) for part in parts]
+
+    frappe.db.savepoint(SPLIT_SAVEPOINT)
+    try:
+        for invoice in invoices:
+            invoice.insert()
+
+        # Link the order to the first invoice; every part carries imogi_pos_order
+        if bump_order_version(
+            order.name,
+            expected_version=cint(order.get("order_version")),
+            values={"sales_invoice": invoices[0].name},
+        ) is None:
+            frappe.throw(_("Order {0} was changed while it was being split. Please retry.").format(order.name))
+
+        if submit:
+            for invoice in invoices:
+                invoice.submit()
+    except Exception:
+        frappe.db.rollback(save_point=SPLIT_SAVEPOINT)
+        raise
+
+    return [invoice.name for invoice in invoices]
+
+
+def _get_split_context(order, pos_opening=None):
+    """Read everything the parts share once."""
+    profile = frappe.get_cached_doc("POS Profile", order.pos_profile)
+
+    if pos_opening is None and profile.get("imogi_require_pos_session"):
+        pos_opening = get_active_pos_opening(order.pos_profile)
+        if not pos_opening:
+            frappe.throw(
+                _("No active POS Opening Entry found. Please open a session before creating an invoice.")
+            )
+
+    taxes = []
+    if profile.get("taxes_and_charges"):
+        from erpnext.controllers.accounts_controller import get_taxes_and_charges
+
+        taxes = get_taxes_and_charges("Sales Taxes and Charges Template", profile.taxes_and_charges) or []
+
+    items = get_item_details([row.item for row in order.items])
+    missing = [row.item for row in order.items if row.item not in items]
+    if missing:
+        frappe.throw(_("Item {0} not found").format(", ".join(sorted(set(missing)))))
+
+    return frappe._dict(
+        profile=profile,
+        company=profile.get("company") or frappe.defaults.get_user_default("Company"),
+        pos_opening=pos_opening,
+        taxes=taxes,
+        price_list=order.get("selling_price_list") or profile.get("selling_price_list"),
+        floor=frappe.db.get_value("Restaurant Table", order.table, "floor") if order.get("table") else None,
+        item_details=items,
+        include_notes=_should_include_notes_in_description(profile, order.order_type),
+        posting_date=nowdate(),
+        posting_time=now_datetime().strftime("%H:%M:%S"),
+    )
+
+
+def _share_part_taxes(parts, taxes, precision=2):
+    """Give every part its tax rows, splitting fixed amounts by net total.
+
+    Rate-based rows are copied as they are; ERPNext computes them per invoice.
+    An "Actual" row's ``tax_amount`` is divided in proportion to each part's
+    ``net_total`` and the last part takes the rounding remainder.
+    """
+    order_total = sum(part["net_total"] for part in parts)
+    for part in parts:
+        part["taxes"] = [dict(tax) for tax in taxes]
+
+    for index, tax in enumerate(taxes):
+        if tax.get("charge_type") != "Actual":
+            continue
+
+        amount = flt(tax.get("tax_amount"), precision)
+        remaining = amount
+        for part in parts[:-1]:
+            share = flt(amount * part["net_total"] / order_total, precision) if order_total else 0
+            part["taxes"][index]["tax_amount"] = share
+            remaining -= share
+        parts[-1]["taxes"][index]["tax_amount"] = flt(remaining, precision)
+
+
+def _build_part_invoice(order, part, context):
+    """Build (without inserting) the Sales Invoice of one split part."""
+    profile = context.profile
+
+    si = frappe.new_doc("Sales Invoice")
+    si.is_pos = 1
+    si.company = context.company
+    si.posting_date = context.posting_date
+    si.posting_time = context.posting_time
+    si.set_posting_time = 1
+    si.customer = part.get("customer") or order.customer or profile.customer
+
+    si.imogi_pos_order = order.name
+    si.imogi_branch = order.branch
+    if order.get("table"):
+        si.imogi_table = order.table
+        if context.floor:
+            si.imogi_floor = context.floor
+    if context.pos_opening:
+        si.imogi_pos_session = context.pos_opening
+
+    si.pos_profile = order.pos_profile
+    si.update_stock = profile.update_stock
+    si.ignore_pricing_rule = 0
+    if context.price_list:
+        si.selling_price_list = context.price_list
+
+    if profile.get("taxes_and_charges"):
+        si.taxes_and_charges = profile.taxes_and_charges
+        for tax in part.get("taxes", context.taxes):
+            si.append("taxes", dict(tax))
+
+    for line in part["lines"]:
+        row = line["row"]
+        si.append("items", _build_invoice_item(
+            row, context.item_details[row.item], line["qty"], context.include_notes, profile.warehouse
+        ))
+
+    si.set_missing_values()
+    si.calculate_taxes_and_totals()
+    return si
@@ -47,7 +47,11 @@ doctype_list_js = {"Item": "public/js/doctype/item_list.js"}
 doc_events = {
     "POS Order": {
         "before_save": "imogi_pos.utils.audit.sync_last_edited_by",
-        "on_trash": "imogi_pos.utils.audit.log_deletion",
+        "on_update": "imogi_pos.utils.claim_registry.sync_order_claim",
+        "on_trash": [
+            "imogi_pos.utils.audit.log_deletion",
+            "imogi_pos.utils.claim_registry.drop_order_claim",
+        ],
     },
     "POS Order Item": {
         "before_save": [
@@ -74,17 +78,75 @@ doc_events = {
     },
     "Item": {
         "validate": "imogi_pos.api.items.set_item_flags",
+        "on_update": [
+            "imogi_pos.utils.variant_matrix.invalidate_item_variant_matrix",
+            "imogi_pos.utils.item_master.invalidate_item_master",
+        ],
+        "on_trash": [
+            "imogi_pos.utils.variant_matrix.invalidate_item_variant_matrix",
+            "imogi_pos.utils.item_master.invalidate_item_master",
+        ],
+    },
+    "Item Attribute": {
+        "on_update": "imogi_pos.utils.variant_matrix.invalidate_all_variant_matrices",
+        "on_trash": "imogi_pos.utils.variant_matrix.invalidate_all_variant_matrices",
     },
     "Sales Invoice": {
         "before_submit": "imogi_pos.api.invoice_modifiers.apply_invoice_modifiers",
         "on_submit": "imogi_pos.api.billing.on_sales_invoice_submit",
     },
     "POS Opening Entry": {
-        "on_submit": "imogi_pos.overrides.pos_opening_entry.get_custom_redirect_url",
+        "on_submit": [
+            "imogi_pos.overrides.pos_opening_entry.get_custom_redirect_url",
+            "imogi_pos.utils.pos_opening.prime_active_opening",
+        ],
+        "on_cancel": "imogi_pos.utils.pos_opening.invalidate_active_openings",
+    },
+    "POS Closing Entry": {
+        "on_submit": "imogi_pos.utils.pos_opening.invalidate_active_openings",
+        "on_cancel": "imogi_pos.utils.pos_opening.invalidate_active_openings",
+    },
+    "Self Order Session": {
+        "on_update": "imogi_pos.utils.self_order_sessions.invalidate_session",
+        "on_trash": "imogi_pos.utils.self_order_sessions.invalidate_session",
+    },
+    "POS Profile": {
+        "on_update": [
+            "imogi_pos.utils.pos_opening.invalidate_active_openings",
+            "imogi_pos.utils.branding.invalidate_brand_context",
+        ],
+        "on_trash": "imogi_pos.utils.branding.invalidate_brand_context",
+    },
+    "Brand Profile": {
+        "on_update": "imogi_pos.utils.branding.invalidate_brand_context",
+        "on_trash": "imogi_pos.utils.branding.invalidate_brand_context",
     },
     "Item Price": {
-        "on_update": "imogi_pos.api.pricing.publish_item_price_update",
-        "on_trash": "imogi_pos.api.pricing.publish_item_price_update",
+        "on_update": [
+            "imogi_pos.api.pricing.publish_item_price_update",
+            "imogi_pos.utils.variant_matrix.invalidate_item_price_variant_matrix",
+        ],
+        "on_trash": [
+            "imogi_pos.api.pricing.publish_item_price_update",
+            "imogi_pos.utils.variant_matrix.invalidate_item_price_variant_matrix",
+        ],
+    },
+    "Customer": {
+        "on_update": "imogi_pos.utils.phone_index.sync_customer_phone_index",
+        "on_trash": "imogi_pos.utils.phone_index.remove_customer_phone_index",
+    },
+    "Contact": {
+        "on_update": "imogi_pos.utils.phone_index.sync_contact_phone_index",
+        "on_trash": "imogi_pos.utils.phone_index.remove_contact_phone_index",
+    },
+    "Company": {
+        "on_update": [
+            "imogi_pos.utils.escpos_templates.clear_company_header_cache",
+            "imogi_pos.utils.branding.invalidate_brand_context",
+        ],
+    },
+    "Address": {
+        "on_update": "imogi_pos.utils.escpos_templates.clear_company_header_cache",
     },
 }
 
@@ -116,6 +178,11 @@ fixtures = [
 ]
 
 scheduler_events = {
+    "all": [
+        "imogi_pos.utils.audit_log.flush_audit_spool",
+        "imogi_pos.utils.print_spooler.kick_print_spoolers",
+        "imogi_pos.utils.self_order_sessions.flush_session_last_seen"
+    ],
     "hourly": [
         "imogi_pos.kitchen.sla.process_hourly_metrics"
     ],
@@ -144,9 +211,17 @@ override_whitelisted_methods = {
     "frappe.desk.desktop.get_desktop_page": "imogi_pos.utils.desktop.get_desktop_page"
 }
 
-# Security: Add security headers to all responses
+# Opt-in API instrumentation (site config: imogi_api_instrumentation)
+before_request = [
+    "imogi_pos.utils.api_metrics.start_request_probe"
+]
+
+# Security: Add security headers to all responses (plus Server-Timing when instrumented);
+# also send realtime messages queued by requests that never committed
 after_request = [
-    "imogi_pos.utils.security.add_security_headers"
+    "imogi_pos.utils.security.add_security_headers",
+    "imogi_pos.utils.api_metrics.add_server_timing",
+    "imogi_pos.utils.realtime_outbox.flush_pending"
 ]
 
 # Security: Track failed login attempts
@@ -0,0 +1,7 @@
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+class CustomerPhoneIndex(Document):
+    pass
@@ -4,8 +4,9 @@
 import frappe
 from frappe.model.document import Document
 from frappe import _
-from frappe.utils import flt
+from frappe.utils import cint, flt
 from imogi_pos.utils.customer_sync import sync_customer_fields_to_order
+from imogi_pos.utils.order_lines import compute_order_totals
 
 
 class POSOrder(Document):
@@ -17,6 +18,8 @@ class POSOrder(Document):
     
     def before_save(self):
         self.set_last_edited_by()
+        # Every saved change moves the version stamp (see imogi_pos.utils.order_version)
+        self.order_version = cint(self.order_version) + 1
         # Track previous workflow state for KOT creation trigger
         doc_before = self.get_doc_before_save()
         if doc_before:
@@ -58,15 +61,8 @@ class POSOrder(Document):
                 item.amount = (item.qty or 0) * (item.rate or 0)
             subtotal += item.amount
 
-        # store subtotal
-        self.subtotal = subtotal
-
-        # apply PB1 tax (11%)
-        pb1 = subtotal * 0.11
-        self.pb1_amount = pb1
-        
-        # total is subtotal + PB1
-        self.totals = subtotal + pb1
+        # subtotal, PB1 tax (11%) and subtotal + PB1
+        self.update(compute_order_totals(subtotal))
     
     def update_table_status(self):
         """Update table status if applicable"""
@@ -3,7 +3,8 @@ from frappe import _
 from frappe.utils import now_datetime
 from typing import Dict, List, Optional, Union, Any, Tuple
 
-from imogi_pos.utils.kitchen_routing import get_menu_category_kitchen_station
+from imogi_pos.utils.item_master import get_item_details
+from imogi_pos.utils.kitchen_routing import get_menu_category_kitchen_station_by_category
 from imogi_pos.utils.state_manager import StateManager
 from imogi_pos.utils.kot_publisher import KOTPublisher
 
@@ -67,6 +68,7 @@ class KOTService:
         
         # Get items to include
         items_to_process = []
+        items_master = get_item_details([item.item for item in pos_order.items])
         for item in pos_order.items:
             # Skip if specific items were selected and this isn't one of them
             if selected_items and item.name not in selected_items:
@@ -80,7 +82,7 @@ class KOTService:
                 continue
                 
             # Skip if item is a template (variants must be selected)
-            item_has_variants = frappe.db.get_value("Item", item.item, "has_variants")
+            item_has_variants = (items_master.get(item.item) or {}).get("has_variants")
             if item_has_variants:
                 frappe.throw(_(f"Item '{item.item}' is a template. Please select a variant before sending to kitchen."))
                 
@@ -246,6 +248,7 @@ class KOTService:
         
         # Update all items to match
         updated_items = []
+        changed_items = []
         for item in ticket.items:
             if item.workflow_state != new_state:
                 item.workflow_state = new_state
@@ -257,12 +260,12 @@ class KOTService:
                     self._update_pos_item_counter(item.pos_order_item, new_state)
                 
                 updated_items.append(item.name)
+                changed_items.append(item)
         
         # Check if we need to update POS Order state
         self._update_pos_order_state_if_needed(ticket.pos_order)
         
-        # Send realtime updates using KOTPublisher
-        changed_items = [frappe.get_doc("KOT Item", name) for name in updated_items]
+        # Send realtime updates using KOTPublisher (the saved rows are already current)
         KOTPublisher.publish_ticket_update(
             ticket,
             event_type="kot_updated",
@@ -384,6 +387,7 @@ class KOTService:
             Dict mapping station names to lists of items
         """
         grouped = {}
+        items_master = get_item_details([getattr(item, "item", None) for item in items])
         
         for item in items:
             # Get the kitchen station for this item
@@ -392,12 +396,7 @@ class KOTService:
 
             # If no station specified, try to get default from item master
             if not station or not kitchen:
-                item_defaults = frappe.db.get_value(
-                    "Item",
-                    item.item,
-                    ["default_kitchen_station", "default_kitchen"],
-                    as_dict=1
-                ) or {}
+                item_defaults = items_master.get(item.item) or {}
 
                 default_station = (
                     item_defaults.get("default_kitchen_station")
@@ -418,7 +417,9 @@ class KOTService:
 
             # Try to map station/kitchen from menu category when still missing
             if (not station or not kitchen) and getattr(item, "item", None):
-                mapped_kitchen, mapped_station = get_menu_category_kitchen_station(item.item)
+                mapped_kitchen, mapped_station = get_menu_category_kitchen_station_by_category(
+                    (items_master.get(item.item) or {}).get("menu_category")
+                )
 
                 if not kitchen and mapped_kitchen:
                     kitchen = mapped_kitchen
@@ -529,14 +530,10 @@ class KOTService:
         
         # Add items to the ticket before insert
         kot_items = []
+        items_master = get_item_details([item.item for item in station_items])
         for item in station_items:
             # Get item details
-            item_details = frappe.db.get_value(
-                "Item", 
-                item.item, 
-                ["item_name", "description"], 
-                as_dict=1
-            ) or {}
+            item_details = items_master.get(item.item) or {}
             
             kot_ticket.append("items", {
                 "item_code": item.item,
@@ -581,15 +578,11 @@ class KOTService:
             List of created KOT Item documents
         """
         kot_items = []
+        items_master = get_item_details([item.item for item in items])
         
         for item in items:
             # Get item details
-            item_details = frappe.db.get_value(
-                "Item", 
-                item.item, 
-                ["item_name", "description"], 
-                as_dict=1
-            )
+            item_details = items_master.get(item.item) or {}
             
             kot_item = frappe.get_doc({
                 "doctype": "KOT Item",
@@ -0,0 +1 @@
+# v2.2 patches
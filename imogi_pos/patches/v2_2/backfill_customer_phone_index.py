@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Patch: Backfill Customer Phone Index
+
+Populates ``Customer Phone Index`` from existing Customer mobile numbers and
+Customer-linked Contacts (mobile_no, phone and Contact Phone rows). New and
+edited records are kept in sync by the Customer/Contact doc_events.
+"""
+
+import frappe
+
+from imogi_pos.utils.phone_index import (
+    PHONE_INDEX_DOCTYPE,
+    build_index_entry,
+    write_index_entries,
+)
+
+CHUNK_SIZE = 5000
+
+
+def execute():
+    frappe.reload_doc("imogi_pos", "doctype", "customer_phone_index")
+
+    frappe.db.delete(PHONE_INDEX_DOCTYPE)
+
+    customer_count = _backfill_customers()
+    contact_count = _backfill_contacts()
+
+    print(
+        f"Customer Phone Index backfilled: {customer_count} customer numbers, "
+        f"{contact_count} contact numbers"
+    )
+
+
+def _backfill_customers():
+    written = 0
+    last_name = ""
+
+    while True:
+        rows = frappe.db.sql(
+            """
+            SELECT name, mobile_no
+            FROM `tabCustomer`
+            WHERE name > %s AND IFNULL(mobile_no, '') != ''
+            ORDER BY name
+            LIMIT %s
+            """,
+            (last_name, CHUNK_SIZE),
+            as_dict=1,
+        )
+        if not rows:
+            break
+
+        entries = [build_index_entry(row.name, row.mobile_no) for row in rows]
+        entries = [entry for entry in entries if entry]
+        write_index_entries(entries)
+        frappe.db.commit()
+
+        written += len(entries)
+        last_name = rows[-1].name
+
+    return written
+
+
+def _backfill_contacts():
+    written = 0
+    last_name = ""
+
+    while True:
+        contacts = frappe.db.sql(
+            """
+            SELECT DISTINCT co.name, co.mobile_no, co.phone
+            FROM `tabContact` co
+            JOIN `tabDynamic Link` dl
+                ON dl.parent = co.name AND dl.parenttype = 'Contact'
+            WHERE dl.link_doctype = 'Customer' AND co.name > %s
+            ORDER BY co.name
+            LIMIT %s
+            """,
+            (last_name, CHUNK_SIZE),
+            as_dict=1,
+        )
+        if not contacts:
+            break
+
+        names = [contact.name for contact in contacts]
+        links = frappe.db.sql(
+            """
+            SELECT parent, link_name
+            FROM `tabDynamic Link`
+            WHERE parenttype = 'Contact' AND link_doctype = 'Customer' AND parent IN %s
+            """,
+            (names,),
+            as_dict=1,
+        )
+        phone_rows = frappe.db.sql(
+            """
+            SELECT parent, phone
+            FROM `tabContact Phone`
+            WHERE parenttype = 'Contact' AND parent IN %s
+            """,
+            (names,),
+            as_dict=1,
+        )
+
+        customers_by_contact = {}
+        for link in links:
+            customers_by_contact.setdefault(link.parent, []).append(link.link_name)
+
+        numbers_by_contact = {
+            contact.name: [contact.mobile_no, contact.phone] for contact in contacts
+        }
+        for row in phone_rows:
+            numbers_by_contact.setdefault(row.parent, []).append(row.phone)
+
+        entries = []
+        for contact in contacts:
+            seen = set()
+            for customer in customers_by_contact.get(contact.name, []):
+                for phone in numbers_by_contact.get(contact.name, []):
+                    entry = build_index_entry(customer, phone, contact=contact.name)
+                    if not entry:
+                        continue
+                    key = (customer, entry["phone_normalized"])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    entries.append(entry)
+
+        write_index_entries(entries)
+        frappe.db.commit()
+
+        written += len(entries)
+        last_name = contacts[-1].name
+
+    return written
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Opt-in request instrumentation for the whitelisted ``imogi_pos.api.*`` methods.
+
+Enable it with the site config flag ``imogi_api_instrumentation``. When it is
+on, ``start_request_probe`` (a ``before_request`` hook) attaches a probe to
+every request for an ``imogi_pos.api`` method. The probe wraps ``frappe.db.sql``
+to count queries and DB time, and ``VersionedCache`` reports hits and misses
+to it. ``add_server_timing`` (an ``after_request`` hook) then:
+
+- emits the figures as a ``Server-Timing`` header, readable in the browser
+  devtools network panel;
+- adds them to per-endpoint counters and histograms in Redis, which
+  ``imogi_pos.api.diagnostics.get_api_metrics`` reports.
+
+Only paths that resolve to a whitelisted function are recorded, and at most
+``MAX_ENDPOINTS`` endpoints are tracked, so requests for made-up method names
+cannot grow the endpoint set.
+
+With the flag off, each hook costs one config lookup.
+"""
+
+import sys
+import time
+
+import frappe
+
+API_PREFIX = "imogi_pos.api."
+METRICS_PREFIX = "imogi_pos:api_metrics"
+ENDPOINTS_KEY = f"{METRICS_PREFIX}:endpoints"
+MAX_ENDPOINTS = 500
+
+# Upper bounds of the histogram buckets; larger values land in "inf"
+WALL_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 5, 10, 25, 50, 100, 250)
+
+class RequestProbe:
+    """Figures collected for one instrumented request."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.wall_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sections = []
+        self.payload_size = 0
+        self.status = 200
+        self._original_sql = None
+
+    def wrap_db(self, db):
+        """Count queries and DB time of ``db.sql`` for the rest of the request."""
+        original = db.sql
+
+        def sql(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.queries += 1
+                self.db_ms += (time.perf_counter() - started) * 1000
+
+        self._original_sql = original
+        db.sql = sql
+
+    def unwrap_db(self, db):
+        if self._original_sql is not None and db is not None:
+            db.sql = self._original_sql
+            self._original_sql = None
+
+    def finish(self, response=None):
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+        if response is not None:
+            self.status = getattr(response, "status_code", 200) or 200
+            try:
+                self.payload_size = response.calculate_content_length() or 0
+            except Exception:
+                self.payload_size = 0
+
+    def server_timing(self):
+        """Return the ``Server-Timing`` header value."""
+        metrics = [
+            f"total;dur={self.wall_ms:.1f}",
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'cache;desc="{self.cache_hits} hit {self.cache_misses} miss"',
+        ]
+        metrics.extend(f"{name};dur={duration:.1f}" for name, duration in self.sections)
+        return ", ".join(metrics)
+
+
+def is_enabled():
+    """Return whether API instrumentation is switched on for this site."""
+    try:
+        return bool(frappe.conf.get("imogi_api_instrumentation"))
+    except Exception:
+        return False
+
+
+def get_probe():
+    """Return the probe of the current request, or None when not instrumented."""
+    local = getattr(frappe, "local", None)
+    return getattr(local, "imogi_api_probe", None) if local is not None else None
+
+
+def count_cache(hits=0, misses=0):
+    """Add cache lookups to the current request's probe (no-op when off)."""
+    probe = get_probe()
+    if probe is not None:
+        probe.cache_hits += hits
+        probe.cache_misses += misses
+
+
+def record_section(name, duration_ms):
+    """Add a named sub-timing to the ``Server-Timing`` header (no-op when off)."""
+    probe = get_probe()
+    if probe is not None:
+        probe.sections.append((name, duration_ms))
+
+
+def start_request_probe():
+    """before_request hook: start probing ``imogi_pos.api`` method calls."""
+    if not is_enabled():
+        return
+
+    endpoint = _get_request_endpoint()
+    if not endpoint:
+        return
+
+    probe = RequestProbe(endpoint)
+    if getattr(frappe, "db", None) is not None:
+        probe.wrap_db(frappe.db)
+    frappe.local.imogi_api_probe = probe
+
+
+def add_server_timing(response, request=None):
+    """after_request hook: emit ``Server-Timing`` and record the request."""
+    probe = get_probe()
+    if probe is None:
+        return response
+
+    frappe.local.imogi_api_probe = None
+    probe.unwrap_db(getattr(frappe, "db", None))
+    probe.finish(response)
+
+    if response is not None:
+        response.headers["Server-Timing"] = probe.server_timing()
+
+    if _is_whitelisted(probe.endpoint):
+        record_request(probe)
+    return response
+
+
+def record_request(probe):
+    """Add one request to its endpoint's counters and histograms.
+
+    A new endpoint is not tracked once ``MAX_ENDPOINTS`` are.
+    """
+    try:
+        cache = frappe.cache()
+        endpoints_key = cache.make_key(ENDPOINTS_KEY)
+        key = cache.make_key(f"{METRICS_PREFIX}:{probe.endpoint}")
+        pipe = cache.pipeline()
+        pipe.sismember(endpoints_key, probe.endpoint)
+        pipe.scard(endpoints_key)
+        tracked, tracked_count = pipe.execute()
+        if not tracked and tracked_count >= MAX_ENDPOINTS:
+            return
+
+        pipe.sadd(endpoints_key, probe.endpoint)
+        pipe.hincrby(key, "count", 1)
+        if probe.status >= 400:
+            pipe.hincrby(key, "errors", 1)
+        pipe.hincrbyfloat(key, "wall_ms", round(probe.wall_ms, 3))
+        pipe.hincrbyfloat(key, "db_ms", round(probe.db_ms, 3))
+        pipe.hincrby(key, "queries", probe.queries)
+        pipe.hincrby(key, "bytes", probe.payload_size)
+        pipe.hincrby(key, "cache_hits", probe.cache_hits)
+        pipe.hincrby(key, "cache_misses", probe.cache_misses)
+        pipe.hincrby(key, f"wall_le_{_bucket(probe.wall_ms, WALL_BUCKETS_MS)}", 1)
+        pipe.hincrby(key, f"queries_le_{_bucket(probe.queries, QUERY_BUCKETS)}", 1)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def get_endpoint_metrics(endpoint=None):
+    """Return aggregated metrics per endpoint.
+
+    Args:
+        endpoint: Limit the report to one endpoint (without the
+            ``imogi_pos.api.`` prefix)
+
+    Returns:
+        dict: ``{endpoint: {count, errors, avg_wall_ms, avg_db_ms,
+        avg_queries, avg_bytes, cache_hit_ratio, p50_wall_ms, p95_wall_ms,
+        p95_queries, wall_histogram, query_histogram}}``
+    """
+    cache = frappe.cache()
+    if endpoint:
+        endpoints = [endpoint]
+    else:
+        endpoints = sorted(_decode(name) for name in cache.smembers(ENDPOINTS_KEY) or [])
+
+    pipe = cache.pipeline()
+    for name in endpoints:
+        pipe.hgetall(cache.make_key(f"{METRICS_PREFIX}:{name}"))
+
+    report = {}
+    for name, raw in zip(endpoints, pipe.execute()):
+        fields = {_decode(field): float(value) for field, value in (raw or {}).items()}
+        if fields.get("count"):
+            report[name] = _summarize(fields)
+    return report
+
+
+def reset_endpoint_metrics():
+    """Drop every collected endpoint metric."""
+    cache = frappe.cache()
+    keys = [
+        cache.make_key(f"{METRICS_PREFIX}:{_decode(name)}")
+        for name in cache.smembers(ENDPOINTS_KEY) or []
+    ]
+    cache.delete(cache.make_key(ENDPOINTS_KEY), *keys)
+
+
+def _summarize(fields):
+    count = fields["count"]
+    lookups = fields.get("cache_hits", 0) + fields.get("cache_misses", 0)
+    wall_histogram = _histogram(fields, "wall", WALL_BUCKETS_MS)
+    query_histogram = _histogram(fields, "queries", QUERY_BUCKETS)
+    return {
+        "count": int(count),
+        "errors": int(fields.get("errors", 0)),
+        "avg_wall_ms": round(fields.get("wall_ms", 0) / count, 2),
+        "avg_db_ms": round(fields.get("db_ms", 0) / count, 2),
+        "avg_queries": round(fields.get("queries", 0) / count, 2),
+        "avg_bytes": int(fields.get("bytes", 0) / count),
+        "cache_hit_ratio": round(fields.get("cache_hits", 0) / lookups, 3) if lookups else None,
+        "p50_wall_ms": _quantile(wall_histogram, 0.5),
+        "p95_wall_ms": _quantile(wall_histogram, 0.95),
+        "p95_queries": _quantile(query_histogram, 0.95),
+        "wall_histogram": wall_histogram,
+        "query_histogram": query_histogram,
+    }
+
+
+def _histogram(fields, name, bounds):
+    labels = [str(bound) for bound in bounds] + ["inf"]
+    return {label: int(fields.get(f"{name}_le_{label}", 0)) for label in labels}
+
+
+def _quantile(histogram, fraction):
+    """Return the upper bound of the bucket holding the given quantile."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    seen = 0
+    for label, count in histogram.items():
+        seen += count
+        if seen >= total * fraction:
+            return label if label == "inf" else int(label)
+    return "inf"
+
+
+def _bucket(value, bounds):
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return "inf"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _is_whitelisted(endpoint):
+    """Whether ``endpoint`` names a whitelisted function of a loaded module.
+
+    Checked after the request, when the handler has imported the module, so
+    nothing is imported here.
+    """
+    module_name, _, function_name = f"{API_PREFIX}{endpoint}".rpartition(".")
+    module = sys.modules.get(module_name)
+    function = getattr(module, function_name, None) if module is not None else None
+    return function is not None and function in (getattr(frappe, "whitelisted", None) or ())
+
+
+def _get_request_endpoint():
+    """Return the called ``imogi_pos.api`` method (prefix stripped), if any."""
+    request = getattr(frappe.local, "request", None)
+    path = getattr(request, "path", "") or ""
+
+    method = None
+    for marker in ("/api/method/", "/api/v1/method/", "/api/v2/method/"):
+        if path.startswith(marker):
+            method = path[len(marker):].strip("/")
+            break
+    if not method:
+        method = (getattr(frappe.local, "form_dict", None) or {}).get("cmd")
+
+    if method and method.startswith(API_PREFIX):
+        return method[len(API_PREFIX):]
+    return None
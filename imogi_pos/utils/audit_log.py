@@ -18,6 +18,184 @@ from frappe import _
 from frappe.utils import now, get_url
 import json
 
+AUDIT_LOG_DOCTYPE = "Audit Log"
+
+# Redis list used as a crash-safe spool between the request and the writer job.
+AUDIT_SPOOL_KEY = "imogi_pos:audit_log_spool"
+
+# Hard cap on spooled events; the oldest are trimmed once the writer falls behind.
+AUDIT_SPOOL_MAX_LENGTH = 50000
+
+# Lock held by the spool drainer; events are removed only after their rows commit,
+# so two drainers running at once would write the same batch twice.
+AUDIT_FLUSH_LOCK_KEY = "imogi_pos:audit_log_flush_lock"
+AUDIT_FLUSH_LOCK_SECONDS = 300
+
+# Events written per multi-row insert when draining the spool.
+AUDIT_FLUSH_BATCH_SIZE = 500
+
+AUDIT_LOG_FIELDS = (
+    "document_type",
+    "document_name",
+    "action",
+    "user",
+    "timestamp",
+    "branch",
+    "severity",
+    "details",
+    "ip_address",
+)
+
+
+def _get_request_ip():
+    """Return the client IP for the current request or ``Unknown``."""
+    try:
+        request = getattr(frappe.local, "request", None)
+        if request is not None:
+            return (
+                request.headers.get('X-Forwarded-For', '').split(',')[0].strip()
+                or request.remote_addr
+                or 'Unknown'
+            )
+    except Exception:
+        pass
+    return 'Unknown'
+
+
+def _get_request_buffer():
+    """Return the per-request audit buffer, registering commit hooks on first use.
+
+    Returns ``None`` when the database does not expose transaction callbacks
+    (e.g. outside a request), in which case events go straight to the spool.
+    """
+    buffer = getattr(frappe.local, "imogi_audit_buffer", None)
+    if buffer is not None:
+        return buffer
+
+    after_commit = getattr(frappe.db, "after_commit", None)
+    after_rollback = getattr(frappe.db, "after_rollback", None)
+    if after_commit is None or after_rollback is None:
+        return None
+
+    buffer = []
+    frappe.local.imogi_audit_buffer = buffer
+    after_commit.add(_flush_request_buffer)
+    after_rollback.add(_discard_request_buffer)
+    return buffer
+
+
+def _discard_request_buffer():
+    """Drop events of a rolled back transaction."""
+    frappe.local.imogi_audit_buffer = None
+
+
+def _flush_request_buffer():
+    """Move buffered events to the spool once the outer transaction committed."""
+    buffer = getattr(frappe.local, "imogi_audit_buffer", None)
+    frappe.local.imogi_audit_buffer = None
+    if buffer:
+        _spool_events(buffer)
+
+
+def _spool_events(events):
+    """Append events to the Redis spool and schedule the bulk writer."""
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(AUDIT_SPOOL_KEY)
+        pipe = cache.pipeline()
+        pipe.rpush(key, *[json.dumps(event, default=str) for event in events])
+        pipe.ltrim(key, -AUDIT_SPOOL_MAX_LENGTH, -1)
+        pipe.execute()
+        frappe.enqueue(
+            "imogi_pos.utils.audit_log.flush_audit_spool",
+            queue="short",
+            job_id="imogi_pos_audit_log_flush",
+            deduplicate=True,
+            enqueue_after_commit=False,
+        )
+    except Exception as e:
+        frappe.log_error(f"Failed to spool audit events: {str(e)}", "Audit Log Error")
+
+
+def flush_audit_spool(batch_size=AUDIT_FLUSH_BATCH_SIZE):
+    """Drain the audit spool into ``Audit Log`` using multi-row inserts.
+
+    Runs as a background job after each request that produced events and from
+    the scheduler, so events left behind by a crashed worker are picked up.
+
+    Returns:
+        int: Number of audit rows written.
+    """
+    if not frappe.db.exists("DocType", AUDIT_LOG_DOCTYPE):
+        return 0
+
+    cache = frappe.cache()
+    key = cache.make_key(AUDIT_SPOOL_KEY)
+    lock = cache.make_key(AUDIT_FLUSH_LOCK_KEY)
+    if not cache.set(lock, 1, ex=AUDIT_FLUSH_LOCK_SECONDS, nx=True):
+        return 0
+
+    written = 0
+    try:
+        while True:
+            pipe = cache.pipeline()
+            pipe.lrange(key, 0, batch_size - 1)
+            raw_events = pipe.execute()[0] or []
+            if not raw_events:
+                break
+
+            rows = []
+            for raw in raw_events:
+                try:
+                    rows.append(json.loads(raw))
+                except (TypeError, ValueError):
+                    continue
+
+            try:
+                _bulk_insert_audit_rows(rows)
+                frappe.db.commit()
+            except Exception as e:
+                frappe.db.rollback()
+                # The batch is still at the head of the spool; the next run retries it.
+                frappe.log_error(f"Failed to flush audit spool: {str(e)}", "Audit Log Error")
+                break
+
+            # Only drop the batch once its rows are durable.
+            pipe = cache.pipeline()
+            pipe.ltrim(key, len(raw_events), -1)
+            pipe.execute()
+
+            written += len(rows)
+            if len(raw_events) < batch_size:
+                break
+    finally:
+        cache.delete(lock)
+
+    return written
+
+
+def _bulk_insert_audit_rows(rows):
+    """Insert audit event dicts with a single multi-row INSERT."""
+    if not rows:
+        return
+
+    timestamp = now()
+    fields = ("name", "owner", "modified_by", "creation", "modified") + AUDIT_LOG_FIELDS
+    values = []
+    for row in rows:
+        values.append(
+            (
+                frappe.generate_hash(length=10),
+                row.get("user") or "Administrator",
+                row.get("user") or "Administrator",
+                timestamp,
+                timestamp,
+            )
+            + tuple(row.get(field) for field in AUDIT_LOG_FIELDS)
+        )
+
+    frappe.db.bulk_insert(AUDIT_LOG_DOCTYPE, fields, values)
+
 
 def log_operation(
     doctype: str,
@@ -30,7 +208,10 @@ def log_operation(
 ):
     """
     Log critical POS operation for audit trail.
-    
+
+    The event is buffered for the current request and only spooled once the
+    caller's transaction commits; it never commits or writes inline.
+
     Args:
         doctype (str): DocType being accessed (Sales Invoice, POS Order, etc)
         action (str): Action performed (create, update, delete, submit, cancel, print, payment)
@@ -47,36 +228,25 @@ def log_operation(
         branch = frappe.defaults.get_user_default("imogi_branch") or "Unknown"
     
     try:
-        # Check if Audit Log doctype exists
-        if not frappe.db.exists("DocType", "Audit Log"):
-            frappe.log_error("Audit Log doctype not found", "Audit Logging Error")
+        event = {
+            "document_type": doctype,
+            "document_name": doc_name,
+            "action": action,
+            "user": user,
+            "timestamp": now(),
+            "branch": branch,
+            "severity": severity,
+            "details": json.dumps(details, default=str) if details else None,
+            "ip_address": _get_request_ip(),
+        }
+
+        buffer = _get_request_buffer()
+        if buffer is None:
+            _spool_events([event])
             return
-        
-        audit_doc = frappe.new_doc("Audit Log")
-        audit_doc.document_type = doctype
-        audit_doc.document_name = doc_name
-        audit_doc.action = action
-        audit_doc.user = user
-        audit_doc.timestamp = now()
-        audit_doc.branch = branch
-        audit_doc.severity = severity
-        
-        if details:
-            audit_doc.details = json.dumps(details)
-        
-        # Try to get IP address
-        try:
-            if hasattr(frappe, 'local') and hasattr(frappe.local, 'request'):
-                audit_doc.ip_address = (
-                    frappe.local.request.headers.get('X-Forwarded-For', '').split(',')[0].strip()
-                    or frappe.local.request.remote_addr
-                    or 'Unknown'
-                )
-        except:
-            audit_doc.ip_address = 'Unknown'
-        
-        audit_doc.insert(ignore_permissions=True)
-        frappe.db.commit()
+
+        # Spooled only from the after_commit callback, so a rollback drops it.
+        buffer.append(event)
         
     except Exception as e:
         frappe.log_error(f"Failed to log operation: {str(e)}", "Audit Log Error")
@@ -3,6 +3,11 @@
 This module centralises default branding colours used across the
 application so that all components stay in sync.  Import these constants
 instead of hard coding colour values in individual modules.
+
+``get_brand_context`` runs for every rendered page and print, so resolved
+contexts are cached per (POS Profile, company) in a ``VersionedCache`` and
+dropped whenever a POS Profile, Brand Profile or Company is saved. A context
+that fell back to the defaults because a lookup failed is never cached.
 """
 
 from __future__ import annotations
@@ -11,6 +16,8 @@ from typing import Any
 
 import frappe
 
+from imogi_pos.utils.versioned_cache import VersionedCache
+
 
 # Default brand colours
 PRIMARY_COLOR: str = "#4c5a67"
@@ -22,6 +29,8 @@ ACCENT_COLOR: str = "#2490ef"
 HEADER_BG_COLOR: str = "#ffffff"
 """Default background colour for headers when none is provided."""
 
+brand_context_cache = VersionedCache("brand_context", maxsize=256)
+
 
 def get_brand_context(pos_profile: str | None = None) -> dict[str, Any]:
     """Return branding information for templates.
@@ -35,6 +44,51 @@ def get_brand_context(pos_profile: str | None = None) -> dict[str, Any]:
         dict: Branding context with colours, logos, etc.
     """
 
+    company = _get_default_company()
+
+    # Unsaved documents and dict payloads are resolved without the cache
+    if pos_profile is not None and not isinstance(pos_profile, str):
+        return _resolve_brand_context(pos_profile, company)
+
+    key = f"{pos_profile or ''}|{company or ''}"
+    try:
+        branding = brand_context_cache.get(
+            key, lambda: _resolve_brand_context(pos_profile, company, raise_errors=True)
+        )
+    except Exception:
+        # Cache unavailable or a lookup failed: serve this request uncached
+        branding = _resolve_brand_context(pos_profile, company)
+
+    # Callers are free to modify the returned context
+    return dict(branding)
+
+
+def invalidate_brand_context(doc=None, method=None) -> None:
+    """POS Profile / Brand Profile / Company hook: drop every cached context."""
+    try:
+        brand_context_cache.invalidate_on_commit()
+    except Exception:
+        pass
+
+
+def _get_default_company() -> str | None:
+    try:
+        return frappe.defaults.get_user_default("Company") or frappe.defaults.get_global_default(
+            "company"
+        )
+    except Exception:
+        return None
+
+
+def _resolve_brand_context(
+    pos_profile: Any, company: str | None, raise_errors: bool = False
+) -> dict[str, Any]:
+    """Resolve branding from the POS Profile, its Brand Profile and the company.
+
+    Lookup failures are logged and the defaults returned, unless
+    ``raise_errors`` is set (used when the result would be cached).
+    """
+
     branding: dict[str, Any] = {
         "logo": None,
         "logo_dark": None,
@@ -119,9 +173,6 @@ def get_brand_context(pos_profile: str | None = None) -> dict[str, Any]:
 
         # Final fallback to Company
         if not branding["logo"]:
-            company = frappe.defaults.get_user_default("Company") or frappe.defaults.get_global_default(
-                "company"
-            )
             if company:
                 company_doc = frappe.get_cached_doc("Company", company)
                 if company_doc.company_logo:
@@ -129,7 +180,11 @@ def get_brand_context(pos_profile: str | None = None) -> dict[str, Any]:
                 if branding["name"] == "IMOGI POS":
                     branding["name"] = company_doc.company_name
     except Exception:
-        # Failing silently keeps calling code simple and ensures defaults
-        pass
+        if raise_errors:
+            raise
+        # Defaults keep pages rendering; the failure is still recorded
+        frappe.logger("imogi_pos.branding").warning(
+            f"Falling back to default branding for POS Profile {pos_profile!r}", exc_info=True
+        )
 
     return branding
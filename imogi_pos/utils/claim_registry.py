@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Redis mirror of POS Order claims.
+
+Cashier boards poll the claim state of every visible order, so reads must not
+touch the database. Each claimed order has one Redis key holding
+``{"claimed_by", "claimed_at", "opening_entry"}`` with a TTL. An order with no
+key is unclaimed. Claims are taken with ``SET NX`` on that key and written
+through to POS Order with a conditional UPDATE. If the database disagrees
+(e.g. the registry was flushed), the registry is corrected from it.
+
+The registry is authoritative only after it has been loaded from the
+database. ``LOADED_KEY`` records that and expires sooner than the claims, so
+the registry is periodically re-synced with ``POS Order.claimed_by``: every
+reload overwrites the mirrored claims and drops those the database no longer
+has. A claim reserved by a transaction that is rolled back is dropped too.
+"""
+
+import json
+
+import frappe
+
+from imogi_pos.utils.order_version import clear_order_claim, set_order_claim
+
+CLAIM_KEY_PREFIX = "imogi_pos:order_claim:"
+LOADED_KEY = "imogi_pos:order_claims_loaded"
+
+CLAIM_TTL_SECONDS = 12 * 60 * 60
+LOADED_TTL_SECONDS = 60 * 60
+
+
+def get_claims(order_names):
+    """Return ``{order name: claim dict or None}`` in one Redis round trip.
+
+    Args:
+        order_names: POS Order names
+
+    Returns:
+        dict: Claim per order (None when unclaimed)
+    """
+    names = list(dict.fromkeys(name for name in order_names or [] if name))
+    if not names:
+        return {}
+
+    cache = frappe.cache()
+    values = cache.mget([cache.make_key(LOADED_KEY)] + [_claim_key(cache, name) for name in names])
+
+    if not values[0]:
+        _load_registry(cache)
+        values = [True] + cache.mget([_claim_key(cache, name) for name in names])
+
+    return {name: _decode(value) for name, value in zip(names, values[1:])}
+
+
+def acquire_claim(order_name, user, claimed_at, opening_entry=None):
+    """Claim an order for ``user`` (SET NX in Redis, then a conditional UPDATE).
+
+    Returns:
+        tuple: ``(acquired, claim)``; ``claim`` is the current holder's claim
+        when not acquired (None if the order does not exist)
+    """
+    claim = {"claimed_by": user, "claimed_at": str(claimed_at), "opening_entry": opening_entry}
+    cache = frappe.cache()
+    key = _claim_key(cache, order_name)
+
+    try:
+        reserved = cache.set(key, _encode(claim), ex=CLAIM_TTL_SECONDS, nx=True)
+    except Exception:
+        # Registry unavailable: the conditional UPDATE alone decides
+        reserved = True
+
+    if not reserved:
+        current = _decode(cache.get(key))
+        if current:
+            return False, current
+
+    try:
+        claimed = set_order_claim(order_name, user, claimed_at)
+    except Exception:
+        drop_claim(order_name)
+        raise
+
+    if claimed:
+        # The reservation must not outlive a rolled back claim
+        after_rollback = getattr(getattr(frappe, "db", None), "after_rollback", None)
+        if after_rollback is not None:
+            after_rollback.add(lambda: drop_claim(order_name))
+        return True, claim
+
+    # The database disagrees with the registry; it wins
+    return False, sync_claim(order_name)
+
+
+def release_claim(order_name, user):
+    """Release ``user``'s claim on an order in the database and the registry.
+
+    Returns:
+        bool: False when the order is not claimed by ``user``
+    """
+    released = clear_order_claim(order_name, user)
+    if released:
+        drop_claim(order_name)
+    return released
+
+
+def sync_claim(order_name):
+    """Copy an order's claim from the database into the registry and return it."""
+    row = frappe.db.get_value("POS Order", order_name, ["claimed_by", "claimed_at"], as_dict=True)
+    claim = None
+    if row and row.claimed_by:
+        claim = {"claimed_by": row.claimed_by, "claimed_at": str(row.claimed_at), "opening_entry": None}
+
+    try:
+        if claim:
+            store_claim(order_name, claim)
+        else:
+            drop_claim(order_name)
+    except Exception:
+        pass
+
+    return claim
+
+
+def store_claim(order_name, claim):
+    cache = frappe.cache()
+    cache.set(_claim_key(cache, order_name), _encode(claim), ex=CLAIM_TTL_SECONDS)
+
+
+def drop_claim(order_name):
+    try:
+        cache = frappe.cache()
+        cache.delete(_claim_key(cache, order_name))
+    except Exception:
+        pass
+
+
+def sync_order_claim(doc, method=None):
+    """POS Order hook: mirror claim changes made through a document save."""
+    before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+    if before is not None and before.get("claimed_by") == doc.get("claimed_by"):
+        return
+
+    if doc.get("claimed_by"):
+        claim = {
+            "claimed_by": doc.get("claimed_by"),
+            "claimed_at": str(doc.get("claimed_at")),
+            "opening_entry": None,
+        }
+        try:
+            store_claim(doc.name, claim)
+        except Exception:
+            pass
+    else:
+        drop_claim(doc.name)
+
+
+def drop_order_claim(doc, method=None):
+    """POS Order hook: forget the claim of a deleted order."""
+    drop_claim(doc.name)
+
+
+def _load_registry(cache):
+    """Make the registry mirror ``POS Order.claimed_by`` exactly."""
+    rows = frappe.get_all(
+        "POS Order",
+        filters={"claimed_by": ["is", "set"]},
+        fields=["name", "claimed_by", "claimed_at"],
+    ) or []
+
+    stale = {
+        key.decode() if isinstance(key, bytes) else key
+        for key in cache.scan_iter(match=f"{_claim_key(cache, '')}*")
+    }
+    keys = [_claim_key(cache, row.name) for row in rows]
+    current = dict(zip(keys, cache.mget(keys))) if keys else {}
+
+    pipe = cache.pipeline()
+    for key, row in zip(keys, rows):
+        stale.discard(key)
+        previous = _decode(current.get(key)) or {}
+        claim = {"claimed_by": row.claimed_by, "claimed_at": str(row.claimed_at), "opening_entry": None}
+        # Keep the opening entry recorded by acquire_claim for the same holder
+        if previous.get("claimed_by") == row.claimed_by:
+            claim["opening_entry"] = previous.get("opening_entry")
+        pipe.set(key, _encode(claim), ex=CLAIM_TTL_SECONDS)
+    if stale:
+        pipe.delete(*stale)
+    pipe.set(cache.make_key(LOADED_KEY), 1, ex=LOADED_TTL_SECONDS)
+    pipe.execute()
+
+
+def _claim_key(cache, order_name):
+    return cache.make_key(f"{CLAIM_KEY_PREFIX}{order_name}")
+
+
+def _encode(claim):
+    return json.dumps(claim, default=str)
+
+
+def _decode(value):
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode()
+    try:
+        claim = json.loads(value)
+    except ValueError:
+        return None
+    return claim if isinstance(claim, dict) and claim.get("claimed_by") else None
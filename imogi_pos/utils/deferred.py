@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Post-commit side effects for document hooks.
+
+Work that only reads committed data or notifies clients (stock level
+broadcasts, BOM capacity recomputation, low-stock alerts) does not belong
+inside a submit transaction. Hooks call ``defer`` instead; the work item is
+kept on ``frappe.local`` and, once the transaction commits:
+
+- is enqueued to the ``short`` RQ queue (the default), or
+- runs in-process when ``enqueue=False`` or the site config flag
+  ``imogi_deferred_inline`` is set.
+
+Items with the same ``key`` (e.g. one per invoice) are deduplicated, so an
+invoice submitted through ``generate_invoice`` and the ``on_submit`` hook is
+processed once. A rollback drops the pending items.
+
+Every run records its lag (commit to start) and run time per method in
+Redis; ``get_deferred_metrics`` summarizes them.
+"""
+
+import importlib
+import time
+from collections import OrderedDict
+
+import frappe
+
+from imogi_pos.utils.api_metrics import _bucket, _decode, _histogram, _quantile
+
+DEFERRED_ATTR = "imogi_deferred_work"
+DEFERRED_QUEUE = "short"
+METRICS_PREFIX = "imogi_pos:deferred_metrics"
+METHODS_KEY = f"{METRICS_PREFIX}:methods"
+
+LAG_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class DeferredWork:
+    """Work items queued by the current request or job."""
+
+    def __init__(self):
+        self.items = OrderedDict()
+        self.scheduled = False
+        self.deduplicated = 0
+
+    def add(self, method, kwargs, key=None, enqueue=True):
+        # Only keyed items are deduplicated, here and against queued RQ jobs
+        job_id = f"imogi_pos_deferred::{_job_key(key)}" if key else None
+        key = key or (method, len(self.items))
+        if key in self.items:
+            self.deduplicated += 1
+        # The latest arguments win, e.g. after a second save in the same request
+        self.items[key] = {"method": method, "kwargs": kwargs, "enqueue": enqueue, "job_id": job_id}
+
+    def flush(self):
+        """Start every pending item; called once the transaction commits."""
+        items = list(self.items.values())
+        deduplicated = self.deduplicated
+        self.discard()
+
+        committed_at = time.time()
+        inline = _run_inline()
+        for item in items:
+            if item["enqueue"] and not inline:
+                _enqueue(item, committed_at)
+            else:
+                run_deferred(item["method"], item["kwargs"], committed_at)
+
+        if deduplicated:
+            _record_deduplicated(deduplicated)
+
+    def discard(self):
+        self.items = OrderedDict()
+        self.scheduled = False
+        self.deduplicated = 0
+
+
+def defer(method, key=None, enqueue=True, **kwargs):
+    """Run ``method(**kwargs)`` after the current transaction commits.
+
+    Args:
+        method: Dotted path of the function to call
+        key: Deduplication key; a second item with the same key replaces the
+            first, e.g. ``("stock_update", invoice.name)``
+        enqueue: Enqueue to the short RQ queue (True) or run in-process
+        **kwargs: Picklable arguments for ``method``
+    """
+    local = getattr(frappe, "local", None)
+    db = getattr(frappe, "db", None)
+    if local is None or getattr(db, "after_commit", None) is None:
+        run_deferred(method, kwargs, time.time())
+        return
+
+    work = getattr(local, DEFERRED_ATTR, None)
+    if work is None:
+        work = DeferredWork()
+        setattr(local, DEFERRED_ATTR, work)
+
+    work.add(method, kwargs, key=key, enqueue=enqueue)
+    if not work.scheduled:
+        work.scheduled = True
+        db.after_commit.add(work.flush)
+        after_rollback = getattr(db, "after_rollback", None)
+        if after_rollback is not None:
+            after_rollback.add(work.discard)
+
+
+def run_deferred(work_method, work_kwargs=None, committed_at=None):
+    """Run one work item and record its lag and run time.
+
+    This is also the RQ job entry point for enqueued items.
+    """
+    started = time.time()
+    error = False
+    try:
+        _resolve(work_method)(**(work_kwargs or {}))
+    except Exception:
+        error = True
+        frappe.log_error(
+            title=f"Deferred work failed: {work_method}",
+            message=frappe.get_traceback(),
+        )
+    finally:
+        lag_ms = max(started - (committed_at or started), 0) * 1000
+        _record_run(work_method, lag_ms, (time.time() - started) * 1000, error)
+
+
+def get_deferred_metrics():
+    """Return lag and run time figures per deferred method.
+
+    Returns:
+        dict: ``{"deduplicated": int, "methods": {method: {count, errors,
+        avg_lag_ms, avg_run_ms, p50_lag_ms, p95_lag_ms, lag_histogram}}}``
+    """
+    cache = frappe.cache()
+    methods = sorted(_decode(name) for name in cache.smembers(METHODS_KEY) or [])
+
+    pipe = cache.pipeline()
+    pipe.get(cache.make_key(f"{METRICS_PREFIX}:deduplicated"))
+    for method in methods:
+        pipe.hgetall(cache.make_key(f"{METRICS_PREFIX}:{method}"))
+    results = pipe.execute()
+
+    report = {}
+    for method, raw in zip(methods, results[1:]):
+        fields = {_decode(field): float(value) for field, value in (raw or {}).items()}
+        count = fields.get("count")
+        if not count:
+            continue
+        lag_histogram = _histogram(fields, "lag", LAG_BUCKETS_MS)
+        report[method] = {
+            "count": int(count),
+            "errors": int(fields.get("errors", 0)),
+            "avg_lag_ms": round(fields.get("lag_ms", 0) / count, 2),
+            "avg_run_ms": round(fields.get("run_ms", 0) / count, 2),
+            "p50_lag_ms": _quantile(lag_histogram, 0.5),
+            "p95_lag_ms": _quantile(lag_histogram, 0.95),
+            "lag_histogram": lag_histogram,
+        }
+
+    return {"deduplicated": int(_decode(results[0]) or 0), "methods": report}
+
+
+def reset_deferred_metrics():
+    """Drop every collected deferred work metric."""
+    cache = frappe.cache()
+    keys = [
+        cache.make_key(f"{METRICS_PREFIX}:{_decode(name)}")
+        for name in cache.smembers(METHODS_KEY) or []
+    ]
+    cache.delete(
+        cache.make_key(METHODS_KEY), cache.make_key(f"{METRICS_PREFIX}:deduplicated"), *keys
+    )
+
+
+def _resolve(method):
+    module, _dot, attr = method.rpartition(".")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _run_inline():
+    try:
+        return bool(frappe.conf.get("imogi_deferred_inline") or frappe.flags.in_test)
+    except Exception:
+        return False
+
+
+def _enqueue(item, committed_at):
+    try:
+        frappe.enqueue(
+            "imogi_pos.utils.deferred.run_deferred",
+            queue=DEFERRED_QUEUE,
+            job_id=item["job_id"],
+            deduplicate=bool(item["job_id"]),
+            enqueue_after_commit=False,
+            work_method=item["method"],
+            work_kwargs=item["kwargs"],
+            committed_at=committed_at,
+        )
+    except Exception:
+        # Redis or the queue is unavailable; the work still has to happen
+        run_deferred(item["method"], item["kwargs"], committed_at)
+
+
+def _job_key(key):
+    if isinstance(key, (tuple, list)):
+        return ":".join(str(part) for part in key)
+    return str(key)
+
+
+def _record_run(method, lag_ms, run_ms, error):
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(f"{METRICS_PREFIX}:{method}")
+        pipe = cache.pipeline()
+        pipe.sadd(cache.make_key(METHODS_KEY), method)
+        pipe.hincrby(key, "count", 1)
+        if error:
+            pipe.hincrby(key, "errors", 1)
+        pipe.hincrbyfloat(key, "lag_ms", round(lag_ms, 3))
+        pipe.hincrbyfloat(key, "run_ms", round(run_ms, 3))
+        pipe.hincrby(key, f"lag_le_{_bucket(lag_ms, LAG_BUCKETS_MS)}", 1)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def _record_deduplicated(count):
+    try:
+        cache = frappe.cache()
+        cache.incrby(cache.make_key(f"{METRICS_PREFIX}:deduplicated"), count)
+    except Exception:
+        pass
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Precompiled ESC/POS templates for receipts and KOTs.
+
+A template is compiled once per (format, printer width) into a tuple of byte
+segments with the positions of its variable slots. Rendering fills the slots
+with per-document bytes and does a single ``b"".join``. The company header
+block (name, address, phone) is cached in Redis per company and cleared when
+a Company or Address is saved.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+import frappe
+
+# ===== ESC/POS Control Characters =====
+ESC = b'\x1b'
+GS = b'\x1d'
+LF = b'\x0a'
+
+# Printer initialization
+INIT = ESC + b'@'
+
+# Text alignment
+ALIGN_LEFT = ESC + b'a\x00'
+ALIGN_CENTER = ESC + b'a\x01'
+ALIGN_RIGHT = ESC + b'a\x02'
+
+# Text formatting
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+UNDERLINE_ON = ESC + b'-\x01'
+UNDERLINE_OFF = ESC + b'-\x00'
+
+# Font sizes
+FONT_NORMAL = GS + b'!\x00'
+FONT_DOUBLE_HEIGHT = GS + b'!\x01'
+FONT_DOUBLE_WIDTH = GS + b'!\x10'
+FONT_DOUBLE = GS + b'!\x11'
+FONT_TRIPLE = GS + b'!\x22'
+
+# Paper cutting
+CUT_FULL = GS + b'V\x00'
+CUT_PARTIAL = GS + b'V\x01'
+
+# Line feed
+FEED_LINE = LF
+
+COMPANY_HEADER_CACHE_KEY = "imogi_pos:escpos_company_header"
+
+# Printer widths (characters per line) accepted from clients; the compiled
+# templates are cached per width, so out-of-range values are clamped.
+MIN_PRINTER_WIDTH = 16
+MAX_PRINTER_WIDTH = 64
+TEMPLATE_CACHE_SIZE = 16
+
+
+class Slot:
+    """Named placeholder in a template, filled with bytes at render time."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class CompiledTemplate:
+    """Byte segments with slot offsets; ``render`` is a single join."""
+
+    __slots__ = ("segments", "slots")
+
+    def __init__(self, segments, slots):
+        self.segments = segments
+        self.slots = slots
+
+    def render(self, values):
+        parts = list(self.segments)
+        for position, name in self.slots:
+            parts[position] = values.get(name) or b""
+        return b"".join(parts)
+
+
+def compile_template(parts):
+    """Compile literal bytes and ``Slot`` objects, merging adjacent literals."""
+    segments = []
+    slots = []
+    pending = bytearray()
+
+    for part in parts:
+        if isinstance(part, Slot):
+            if pending:
+                segments.append(bytes(pending))
+                pending = bytearray()
+            slots.append((len(segments), part.name))
+            segments.append(b"")
+        else:
+            pending.extend(part)
+
+    if pending:
+        segments.append(bytes(pending))
+
+    return CompiledTemplate(tuple(segments), tuple(slots))
+
+
+def encode_text(text):
+    """Encode text to bytes with proper character handling"""
+    try:
+        return text.encode('utf-8')
+    except Exception:
+        return text.encode('ascii', errors='ignore')
+
+
+def encode_line(text):
+    """Encode a single line of text followed by a line feed."""
+    return encode_text(text) + LF
+
+
+def format_total_line(label, amount, width=32):
+    """Format total line with right-aligned amount"""
+    amount_str = f"{amount:,.0f}"
+    label_width = width - len(amount_str)
+    return f"{label:<{label_width}}{amount_str}"
+
+
+def get_company_details(company_name):
+    """Get company address and phone for receipt header"""
+    try:
+        company = frappe.get_doc('Company', company_name)
+        details = {}
+
+        # Get default address
+        if hasattr(company, 'company_address') and company.company_address:
+            address = frappe.get_doc('Address', company.company_address)
+            address_lines = []
+            if hasattr(address, 'address_line1') and address.address_line1:
+                address_lines.append(address.address_line1)
+            if hasattr(address, 'city') and address.city:
+                address_lines.append(address.city)
+            if address_lines:
+                details['address'] = ', '.join(address_lines)
+
+        # Phone
+        if hasattr(company, 'phone_no') and company.phone_no:
+            details['phone'] = company.phone_no
+
+        return details
+    except Exception:
+        return {}
+
+
+def build_company_header(company):
+    """Build the receipt header block: store name, address and phone."""
+    header = encode_line(company or "IMOGI POS") + FONT_NORMAL
+
+    details = get_company_details(company)
+    if details.get('address'):
+        header += encode_line(details['address'])
+    if details.get('phone'):
+        header += encode_line(f"Tel: {details['phone']}")
+
+    return header
+
+
+def get_company_header(company):
+    """Return the cached header block for a company."""
+    return frappe.cache().hget(
+        COMPANY_HEADER_CACHE_KEY,
+        company or "",
+        generator=lambda: build_company_header(company),
+    )
+
+
+def clear_company_header_cache(doc=None, method=None):
+    """Company/Address ``on_update`` hook: drop cached receipt headers."""
+    frappe.cache().delete_key(COMPANY_HEADER_CACHE_KEY)
+
+
+def clamp_printer_width(printer_width):
+    """Return ``printer_width`` as an int within the supported range."""
+    try:
+        printer_width = int(printer_width)
+    except (TypeError, ValueError):
+        printer_width = 32
+    return min(max(printer_width, MIN_PRINTER_WIDTH), MAX_PRINTER_WIDTH)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_receipt_template(printer_width):
+    """Compiled POS receipt template for a printer width."""
+    double_rule = encode_line('=' * printer_width)
+
+    return compile_template([
+        INIT,
+        ALIGN_CENTER,
+        FONT_DOUBLE,
+        Slot("header"),
+        double_rule,
+        ALIGN_LEFT,
+        FONT_NORMAL,
+        Slot("info"),
+        double_rule,
+        BOLD_ON,
+        encode_line("Item                 Qty   Amount"),
+        BOLD_OFF,
+        encode_line('-' * printer_width),
+        Slot("items"),
+        double_rule,
+        Slot("totals"),
+        double_rule,
+        BOLD_ON,
+        FONT_DOUBLE_HEIGHT,
+        Slot("grand_total"),
+        BOLD_OFF,
+        FONT_NORMAL,
+        double_rule,
+        Slot("payments"),
+        FEED_LINE,
+        ALIGN_CENTER,
+        encode_line("Thank You!"),
+        encode_line("Please Come Again"),
+        FEED_LINE * 4,
+        CUT_PARTIAL,
+    ])
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_kot_template(printer_width):
+    """Compiled Kitchen Order Ticket template for a printer width."""
+    double_rule = encode_line('=' * printer_width)
+
+    return compile_template([
+        INIT,
+        ALIGN_CENTER,
+        FONT_TRIPLE,
+        BOLD_ON,
+        encode_line("KITCHEN ORDER"),
+        BOLD_OFF,
+        FONT_NORMAL,
+        double_rule,
+        ALIGN_LEFT,
+        FONT_DOUBLE_HEIGHT,
+        BOLD_ON,
+        Slot("order_info"),
+        BOLD_OFF,
+        FONT_NORMAL,
+        Slot("time"),
+        double_rule,
+        FEED_LINE,
+        Slot("items"),
+        double_rule,
+        ALIGN_CENTER,
+        FONT_NORMAL,
+        Slot("printed"),
+        FEED_LINE * 2,
+        CUT_PARTIAL,
+    ])
+
+
+def render_receipt(doc, printer_width=32, header=None):
+    """Render a POS receipt from a compiled template."""
+    printer_width = clamp_printer_width(printer_width)
+    if header is None:
+        header = get_company_header(doc.company)
+
+    posting_datetime = str(doc.posting_date)
+    if hasattr(doc, 'posting_time') and doc.posting_time:
+        posting_datetime = f"{doc.posting_date} {doc.posting_time}"
+
+    info = [f"Invoice: {doc.name}", f"Date: {posting_datetime}", f"Cashier: {doc.owner}"]
+    if doc.customer and doc.customer != "Guest":
+        info.append(f"Customer: {doc.customer}")
+    if hasattr(doc, 'table_number') and doc.table_number:
+        info.append(f"Table: {doc.table_number}")
+
+    item_lines = []
+    for item in doc.items:
+        item_lines.append((item.item_name or item.item_code)[:printer_width])
+
+        amount_str = f"{item.amount:,.0f}"
+        item_lines.append(
+            f"  {item.qty:.0f}x @ {item.rate:,.0f}".ljust(printer_width - len(amount_str)) + amount_str
+        )
+
+        if hasattr(item, 'discount_amount') and item.discount_amount and item.discount_amount > 0:
+            discount_str = f"{item.discount_amount:,.0f}"
+            item_lines.append("  Discount".ljust(printer_width - len(discount_str)) + f"-{discount_str}")
+
+    totals = [format_total_line("Subtotal:", doc.net_total, printer_width)]
+    if hasattr(doc, 'discount_amount') and doc.discount_amount and doc.discount_amount > 0:
+        totals.append(format_total_line("Discount:", -doc.discount_amount, printer_width))
+    if hasattr(doc, 'total_taxes_and_charges') and doc.total_taxes_and_charges and doc.total_taxes_and_charges > 0:
+        totals.append(format_total_line("Tax:", doc.total_taxes_and_charges, printer_width))
+
+    payments = b""
+    if hasattr(doc, 'payments') and doc.payments:
+        payments = BOLD_ON + encode_line("PAYMENT") + BOLD_OFF + _join_lines(
+            format_total_line(f"{payment.mode_of_payment}:", payment.amount, printer_width)
+            for payment in doc.payments
+        )
+        if hasattr(doc, 'change_amount') and doc.change_amount and doc.change_amount > 0:
+            payments += (
+                BOLD_ON
+                + encode_line(format_total_line("CHANGE:", doc.change_amount, printer_width))
+                + BOLD_OFF
+            )
+
+    return get_receipt_template(printer_width).render({
+        "header": header,
+        "info": _join_lines(info),
+        "items": _join_lines(item_lines),
+        "totals": _join_lines(totals),
+        "grand_total": encode_line(format_total_line("TOTAL:", doc.grand_total, printer_width)),
+        "payments": payments,
+    })
+
+
+def render_kot(doc, printer_width=32, timestamp=None):
+    """Render a Kitchen Order Ticket from a compiled template."""
+    printer_width = clamp_printer_width(printer_width)
+    time_str = (timestamp or datetime.now()).strftime('%H:%M:%S')
+
+    order_info = [f"Order: {doc.name}"]
+    if hasattr(doc, 'table_number') and doc.table_number:
+        order_info.append(f"Table: {doc.table_number}")
+
+    item_parts = []
+    for item in doc.items:
+        item_parts.append(
+            FONT_TRIPLE + BOLD_ON + encode_line(f"{item.qty:.0f}x") + BOLD_OFF
+            + FONT_DOUBLE + encode_line(item.item_name or item.item_code) + FONT_NORMAL
+        )
+        if hasattr(item, 'notes') and item.notes:
+            item_parts.append(encode_line(f"  ** {item.notes} **"))
+        item_parts.append(FEED_LINE)
+
+    return get_kot_template(printer_width).render({
+        "order_info": _join_lines(order_info),
+        "time": encode_line(f"Time: {time_str}"),
+        "items": b"".join(item_parts),
+        "printed": encode_line(f"Printed: {time_str}"),
+    })
+
+
+def _join_lines(lines):
+    """Encode text lines, each terminated by a line feed, in one pass."""
+    lines = list(lines)
+    if not lines:
+        return b""
+    return encode_text("\n".join(lines)) + LF
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Read-through cache of the Item master fields used by POS flows.
+
+Invoice building, KOT creation and the cashier order board all need the same
+handful of Item fields for every order line. ``get_item_details`` returns
+them for a whole order at once. It reads the process-local/Redis
+``VersionedCache`` first and loads any misses with a single ``get_all``, so a
+40-line bill costs at most one query. Item saves and deletions invalidate
+the affected entry in every worker.
+"""
+
+import frappe
+
+from imogi_pos.utils.versioned_cache import VersionedCache
+
+ITEM_MASTER_FIELDS = (
+    "item_name",
+    "description",
+    "stock_uom",
+    "item_group",
+    "image",
+    "has_variants",
+    "is_sales_item",
+    "menu_category",
+    "default_kitchen",
+    "default_kitchen_station",
+)
+
+item_master_cache = VersionedCache("item_master", maxsize=4096)
+
+
+def get_item_details(item_codes):
+    """Return ``{item_code: dict}`` of cached Item master fields.
+
+    Args:
+        item_codes: Item codes (duplicates and empty values are ignored)
+
+    Returns:
+        dict: Details per existing item; unknown codes are left out
+    """
+    codes = list(dict.fromkeys(code for code in item_codes or [] if code))
+    if not codes:
+        return {}
+
+    try:
+        details = item_master_cache.get_many(codes, _load_items)
+    except Exception:
+        details = _load_items(codes)
+
+    # Copies, so callers cannot mutate the shared entries
+    return {code: dict(values) for code, values in details.items()}
+
+
+def get_item_detail(item_code):
+    """Return cached Item master fields for one item, or None if it does not exist."""
+    return get_item_details([item_code]).get(item_code)
+
+
+def invalidate_item_master(doc, method=None):
+    """Item hook: drop the cached master fields of a saved or deleted item."""
+    try:
+        item_master_cache.invalidate_on_commit(doc.name)
+    except Exception:
+        pass
+
+
+def _load_items(item_codes):
+    rows = frappe.get_all(
+        "Item",
+        filters={"name": ["in", list(item_codes)]},
+        fields=["name", *ITEM_MASTER_FIELDS],
+    )
+    return {row["name"]: {field: row.get(field) for field in ITEM_MASTER_FIELDS} for row in rows or []}
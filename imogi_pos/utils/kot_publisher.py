@@ -7,12 +7,34 @@ KOT realtime event publisher.
 This module centralizes all realtime publishing logic for KOT related events
 to ensure consistent and reliable notifications across kitchen displays,
 table displays, and other realtime clients.
+
+Each event goes to the document room of its station, kitchen, table or floor
+(``doc_subscribe``), so displays only receive traffic of the entity they show
+and Frappe checks read permission on subscription.
+
+Messages go through ``imogi_pos.utils.realtime_outbox``: they are sent after
+commit, and repeated updates to the same station, kitchen, table or floor in
+one request are merged into a single message per channel.
 """
 
 import frappe
 from frappe import _
 from typing import Dict, List, Optional, Union, Any
 
+from frappe.realtime import get_doc_room
+
+from imogi_pos.utils.realtime_outbox import publish
+
+TICKET_FIELDS = ["name", "kitchen", "kitchen_station", "branch", "table", "floor", "workflow_state"]
+ITEM_FIELDS = ["name", "item", "workflow_state", "parent"]
+
+
+def _get_ticket(ticket):
+    """Return the ticket as given, or only the fields publishing needs."""
+    if hasattr(ticket, "name"):
+        return ticket
+    return frappe.db.get_value("KOT Ticket", ticket, TICKET_FIELDS, as_dict=True)
+
 
 class KOTPublisher:
     """
@@ -43,7 +65,9 @@ class KOTPublisher:
             kitchen: Kitchen name (optional, uses ticket's kitchen if not provided)
             station: Kitchen station name (optional, uses ticket's station if not provided)
         """
-        ticket_doc = ticket if hasattr(ticket, 'name') else frappe.get_doc("KOT Ticket", ticket)
+        ticket_doc = _get_ticket(ticket)
+        if not ticket_doc:
+            return
         
         # Publish to kitchen station channel
         KOTPublisher._publish_to_kitchen_station(
@@ -101,11 +125,11 @@ class KOTPublisher:
                 for item in changed_items
             ]
         
-        frappe.publish_realtime(
+        publish(
             f"kitchen:station:{station_name}",
             payload,
-            doctype="KOT Ticket",
-            docname=ticket.name,
+            room=get_doc_room("Kitchen Station", station_name),
+            merge_key=("KOT Ticket", ticket.name),
         )
     
     @staticmethod
@@ -130,11 +154,11 @@ class KOTPublisher:
             "timestamp": frappe.utils.now(),
         }
         
-        frappe.publish_realtime(
+        publish(
             f"kitchen:{kitchen_name}",
             payload,
-            doctype="KOT Ticket",
-            docname=ticket.name,
+            room=get_doc_room("Kitchen", kitchen_name),
+            merge_key=("KOT Ticket", ticket.name),
         )
     
     @staticmethod
@@ -155,11 +179,11 @@ class KOTPublisher:
             "timestamp": frappe.utils.now(),
         }
         
-        frappe.publish_realtime(
+        publish(
             f"table:{ticket.table}",
             payload,
-            doctype="KOT Ticket",
-            docname=ticket.name,
+            room=get_doc_room("Restaurant Table", ticket.table),
+            merge_key=("KOT Ticket", ticket.name),
         )
         
         # Also publish to floor/section display if available
@@ -182,9 +206,11 @@ class KOTPublisher:
             "timestamp": frappe.utils.now(),
         }
         
-        frappe.publish_realtime(
+        publish(
             f"table_display:floor:{ticket.floor}",
             payload,
+            room=get_doc_room("Restaurant Floor", ticket.floor),
+            merge_key=("Restaurant Table", ticket.table),
         )
     
     @staticmethod
@@ -199,15 +225,10 @@ class KOTPublisher:
             item: KOT Item document
             ticket: KOT Ticket document or name (optional, will be fetched if not provided)
         """
-        item_doc = item if hasattr(item, 'name') else frappe.get_doc("KOT Item", item)
-        
-        # Get ticket if not provided
-        if not ticket:
-            ticket_doc = frappe.get_doc("KOT Ticket", item_doc.parent)
-        elif isinstance(ticket, str):
-            ticket_doc = frappe.get_doc("KOT Ticket", ticket)
-        else:
-            ticket_doc = ticket
+        item_doc = item if hasattr(item, 'name') else frappe.db.get_value(
+            "KOT Item", item, ITEM_FIELDS, as_dict=True
+        )
+        ticket_doc = _get_ticket(ticket or item_doc.parent)
         
         payload = {
             "action": "item_updated",
@@ -220,22 +241,24 @@ class KOTPublisher:
             "timestamp": frappe.utils.now(),
         }
         
+        merge_key = ("KOT Item", item_doc.name)
+        
         # Publish to kitchen station
         if ticket_doc.kitchen_station:
-            frappe.publish_realtime(
+            publish(
                 f"kitchen:station:{ticket_doc.kitchen_station}",
                 payload,
-                doctype="KOT Item",
-                docname=item_doc.name,
+                room=get_doc_room("Kitchen Station", ticket_doc.kitchen_station),
+                merge_key=merge_key,
             )
         
         # Publish to kitchen
         if ticket_doc.kitchen:
-            frappe.publish_realtime(
+            publish(
                 f"kitchen:{ticket_doc.kitchen}",
                 payload,
-                doctype="KOT Item",
-                docname=item_doc.name,
+                room=get_doc_room("Kitchen", ticket_doc.kitchen),
+                merge_key=merge_key,
             )
     
     @staticmethod
@@ -252,10 +275,8 @@ class KOTPublisher:
             kitchen: Kitchen name (optional)
             station: Kitchen station name (optional)
         """
-        ticket_doc = ticket if hasattr(ticket, 'name') else frappe.get_doc("KOT Ticket", ticket)
-        
         KOTPublisher.publish_ticket_update(
-            ticket_doc,
+            ticket,
             event_type="kot_created",
             kitchen=kitchen,
             station=station,
@@ -264,9 +285,7 @@ class KOTPublisher:
     @staticmethod
     def publish_ticket_cancelled(ticket) -> None:
         """Publish a ticket cancellation event."""
-        ticket_doc = ticket if hasattr(ticket, 'name') else frappe.get_doc("KOT Ticket", ticket)
-        
         KOTPublisher.publish_ticket_update(
-            ticket_doc,
+            ticket,
             event_type="kot_cancelled",
         )
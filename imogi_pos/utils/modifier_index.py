@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Compiled option/modifier index per item.
+
+``get_item_options_native`` returns option groups as nested entries with optional
+``modifiers``. Compiling turns them into
+``{group: {selection: {"qty_factor", "component_deltas", "additional_price",
+"linked_item"}}}`` with case-folded keys, so resolving a line's
+customisations is a few dictionary lookups. Compiled indexes are cached next
+to the variant matrix and invalidated by the same Item/Item Price/Item
+Attribute hooks.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from frappe.utils import flt
+
+from imogi_pos.utils.versioned_cache import VersionedCache
+
+modifier_index_cache = VersionedCache("modifier_index", maxsize=1024)
+
+
+def get_modifier_index(item_code: str, loader: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Return the compiled modifier index of an item.
+
+    Args:
+        item_code: Item code
+        loader: Returns the item's option groups; defaults to
+            ``get_item_options_native``. It must raise (or return None) when
+            the options cannot be loaded, so the failure is not cached as an
+            item without options.
+
+    Returns:
+        dict: Compiled index (empty when the item has no options)
+    """
+    if loader is None:
+        # Imported here to avoid a circular import through imogi_pos.api
+        from imogi_pos.api.items import get_item_options_native
+
+        loader = lambda: get_item_options_native(item_code, raise_on_error=True)  # noqa: E731
+
+    def build():
+        try:
+            option_groups = loader()
+        except Exception:
+            # Not cached, so a transient failure is retried on the next call
+            return None
+        if option_groups is None:
+            return None
+        return compile_modifier_index(option_groups)
+
+    try:
+        return modifier_index_cache.get(item_code, build) or {}
+    except Exception:
+        # Cache unavailable: compile for this call only
+        return build() or {}
+
+
+def compile_modifier_index(option_groups: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Compile option groups into ``{group: {selection: compiled option}}``.
+
+    Groups are indexed under their own name and lower-cased; selections under
+    the lower-cased ``value``, ``label``, ``name`` and ``option_name``.
+    """
+    index: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    if not isinstance(option_groups, dict):
+        return index
+
+    for group_name, entries in option_groups.items():
+        options: Dict[str, Dict[str, Any]] = {}
+        for entry in entries or []:
+            compiled = None
+            for key_name in ("value", "label", "name", "option_name"):
+                value = get_attr(entry, (key_name,))
+                if value:
+                    if compiled is None:
+                        compiled = _compile_option(entry)
+                    options[str(value).lower()] = compiled
+        if options:
+            index[group_name] = options
+            index[str(group_name).lower()] = options
+
+    return index
+
+
+def _compile_option(option: Any) -> Dict[str, Any]:
+    qty_factor = 1.0
+    component_deltas: Dict[str, float] = {}
+    for modifier in iter_modifiers(option):
+        qty_factor = apply_qty_factor(qty_factor, modifier)
+        merge_component_deltas(component_deltas, modifier)
+
+    return {
+        "qty_factor": qty_factor,
+        "component_deltas": component_deltas,
+        "additional_price": flt(get_attr(option, ("additional_price",)) or 0),
+        "linked_item": get_attr(option, ("linked_item",)),
+    }
+
+
+def lookup_option(index: Dict[str, Any], group_name: Any, selection: Any) -> Optional[Dict[str, Any]]:
+    """Return the compiled option for one selection in a group, if any."""
+    options = index.get(group_name) or index.get(str(group_name).lower())
+    if not options:
+        return None
+    key = normalise_selection(selection)
+    if not key:
+        return None
+    return options.get(key.lower())
+
+
+def iter_selected_options(index: Dict[str, Any], customisations: Dict[str, Any]):
+    """Yield ``(group, compiled option)`` for every recognised selection."""
+    if not index or not isinstance(customisations, dict):
+        return
+
+    for group_name, selections in customisations.items():
+        if selections in (None, "", []):
+            continue
+        for selection in flatten(selections):
+            option = lookup_option(index, group_name, selection)
+            if option:
+                yield group_name, option
+
+
+def resolve_modifiers(index: Dict[str, Any], customisations: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+    """Combine the selected options into ``(qty_factor, component_deltas)``."""
+    qty_factor = 1.0
+    component_deltas: Dict[str, float] = {}
+
+    for _group, option in iter_selected_options(index, customisations):
+        qty_factor *= option["qty_factor"]
+        for code, qty in option["component_deltas"].items():
+            component_deltas[code] = component_deltas.get(code, 0.0) + qty
+
+    return qty_factor, component_deltas
+
+
+def invalidate_modifier_index(item_code: Optional[str] = None) -> None:
+    """Drop one item's compiled index (or all of them) after the transaction."""
+    modifier_index_cache.invalidate_on_commit(item_code)
+
+
+def apply_qty_factor(current: float, modifier: Dict[str, Any]) -> float:
+    for key in ("qty_factor", "factor"):
+        if key in modifier:
+            try:
+                factor = flt(modifier[key])
+            except Exception:
+                continue
+            return current * factor
+    return current
+
+
+def merge_component_deltas(target: Dict[str, float], modifier: Dict[str, Any]) -> None:
+    if not modifier:
+        return
+
+    component_values = None
+    for key in ("component_deltas", "component_delta", "components"):
+        if key in modifier and modifier[key]:
+            component_values = modifier[key]
+            break
+
+    if not component_values:
+        return
+
+    if isinstance(component_values, dict):
+        iterable: Iterable[Tuple[str, Any]] = component_values.items()
+    else:
+        iterable = []
+        for entry in component_values:
+            if isinstance(entry, dict):
+                code = entry.get("item_code") or entry.get("component") or entry.get("code")
+                qty = entry.get("qty") or entry.get("quantity") or entry.get("qty_delta")
+                if code is not None and qty is not None:
+                    iterable.append((code, qty))
+            elif isinstance(entry, (list, tuple)) and len(entry) >= 2:
+                iterable.append((entry[0], entry[1]))
+
+    for code, qty in iterable:
+        if not code:
+            continue
+        try:
+            qty_value = flt(qty)
+        except Exception:
+            continue
+        if not qty_value:
+            continue
+        key = str(code)
+        target[key] = target.get(key, 0.0) + qty_value
+
+
+def iter_modifiers(option: Any) -> Iterable[Dict[str, Any]]:
+    raw = get_attr(option, ("modifiers", "modifier"))
+    if raw:
+        if isinstance(raw, dict):
+            yield raw
+        else:
+            for mod in raw:
+                if isinstance(mod, dict):
+                    yield mod
+
+    derived: Dict[str, Any] = {}
+    qty_factor = get_attr(option, ("qty_factor", "factor"))
+    if qty_factor not in (None, "", 1, 1.0):
+        derived["qty_factor"] = qty_factor
+
+    for key in ("component_deltas", "component_delta", "components"):
+        value = get_attr(option, (key,))
+        if value:
+            derived.setdefault("component_deltas", value)
+            break
+
+    if derived:
+        yield derived
+
+
+def flatten(value: Any) -> Iterable[Any]:
+    if isinstance(value, (list, tuple, set)):
+        for entry in value:
+            yield from flatten(entry)
+    else:
+        yield value
+
+
+def normalise_selection(selection: Any) -> Optional[str]:
+    if isinstance(selection, dict):
+        for key in ("value", "name", "label", "option"):
+            value = selection.get(key)
+            if value not in (None, ""):
+                return str(value)
+        return None
+    if selection in (None, ""):
+        return None
+    return str(selection)
+
+
+def get_attr(source: Any, names: Tuple[str, ...]) -> Any:
+    for name in names:
+        if isinstance(source, dict):
+            if name in source:
+                return source[name]
+        else:
+            if hasattr(source, name):
+                return getattr(source, name)
+    return None
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Patch-style mutations of POS Order item rows.
+
+Saving a POS Order document deletes and re-inserts every child row, so a
+waiter changing one note on a 30-line table order rewrote 30 rows.
+``apply_line_ops`` takes ``add``/``update``/``remove`` operations addressed by
+row name, writes only the affected ``POS Order Item`` rows, moves the order
+totals by the change in line amounts, and returns just what changed. The
+order header is written with a version-conditional UPDATE (see
+``imogi_pos.utils.order_version``), so concurrent terminals do not need to
+hold the order row lock while they prepare a patch.
+
+Operations bypass the POS Order controller: they never change the workflow
+state, customer or table, which are the only inputs of its ``on_update``
+side effects.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+
+from imogi_pos.utils.order_version import VERSION_FIELD, bump_order_version
+
+ORDER_DOCTYPE = "POS Order"
+ORDER_ITEM_DOCTYPE = "POS Order Item"
+
+# Matches the PB1 rate applied by POSOrder.calculate_totals
+PB1_RATE = 0.11
+
+LINE_OPS = ("add", "update", "remove")
+LINE_FIELDS = ["name", "idx", "item", "qty", "rate", "amount", "notes", "item_options", "counters"]
+
+# Rows already sent to the kitchen (they carry KOT counters) only accept notes
+EDITABLE_LINE_FIELDS = ("qty", "rate", "notes", "item_options")
+SENT_LINE_FIELDS = ("notes",)
+
+
+def compute_order_totals(subtotal):
+    """Return ``subtotal``, ``pb1_amount`` and ``totals`` for an order subtotal."""
+    subtotal = flt(subtotal)
+    pb1_amount = subtotal * PB1_RATE
+    return {"subtotal": subtotal, "pb1_amount": pb1_amount, "totals": subtotal + pb1_amount}
+
+
+def parse_line_ops(operations):
+    """Validate and normalise a list of line operations.
+
+    Args:
+        operations: List (or JSON string) of ``{"op": "add"|"update"|"remove", ...}``
+
+    Returns:
+        list: Operations with a lower-cased ``op``
+    """
+    if isinstance(operations, str):
+        operations = frappe.parse_json(operations)
+    if isinstance(operations, dict):
+        operations = [operations]
+
+    parsed = []
+    for operation in operations or []:
+        if not isinstance(operation, dict):
+            frappe.throw(_("Invalid order line operation"), frappe.ValidationError)
+
+        kind = str(operation.get("op") or "").lower()
+        if kind not in LINE_OPS:
+            frappe.throw(
+                _("Unknown order line operation {0}").format(operation.get("op")),
+                frappe.ValidationError,
+            )
+        if kind != "add" and not operation.get("name"):
+            frappe.throw(
+                _("Order line operation {0} requires a row name").format(kind),
+                frappe.ValidationError,
+            )
+
+        parsed.append(dict(operation, op=kind))
+
+    return parsed
+
+
+def get_order_lines(order_name, names=None):
+    """Return ``{row name: row}`` of an order's item rows (optionally only ``names``)."""
+    filters = {"parent": order_name, "parenttype": ORDER_DOCTYPE, "parentfield": "items"}
+    if names is not None:
+        filters["name"] = ["in", list(names)]
+
+    rows = frappe.get_all(
+        ORDER_ITEM_DOCTYPE,
+        filters=filters,
+        fields=LINE_FIELDS,
+        order_by="idx asc",
+    )
+    return {row.name: row for row in rows or []}
+
+
+def diff_order_lines(lines, items):
+    """Translate a full item list (``save_order`` payload) into line operations.
+
+    Rows named in ``items`` are updated in place, entries without a known row
+    name are added, and rows missing from ``items`` are removed.
+    """
+    operations = []
+    seen = set()
+
+    for entry in items or []:
+        name = entry.get("name")
+        row = lines.get(name) if name else None
+        if not row:
+            operations.append(dict(entry, op="add"))
+            continue
+
+        seen.add(name)
+        fields = SENT_LINE_FIELDS if row.get("counters") else EDITABLE_LINE_FIELDS
+        update = {field: entry[field] for field in fields if field in entry}
+        if _line_changes(row, update):
+            operations.append(dict(update, op="update", name=name))
+
+    for name in lines:
+        if name not in seen:
+            operations.append({"op": "remove", "name": name})
+
+    return operations
+
+
+def apply_line_ops(order, operations, build_row, lines=None, expected_version=None):
+    """Apply line operations to an order, writing only the affected rows.
+
+    All changes are planned first. The order header (totals and version) is
+    then written by one UPDATE that is conditional on ``expected_version``,
+    and the rows are written only if that UPDATE went through.
+
+    Args:
+        order: POS Order header values (``name``, ``subtotal``, ``order_version``)
+        operations: Parsed operations (see ``parse_line_ops``)
+        build_row: Returns the new row values for an ``add`` operation
+        lines: Already loaded ``{row name: row}`` (loaded on demand otherwise)
+        expected_version: Order version the client last saw (None: the caller
+            holds the header row lock)
+
+    Returns:
+        dict: ``added`` rows, ``updated`` rows, ``removed`` row names and the
+        new ``order`` totals and version. On a version conflict nothing is
+        written and ``conflict`` is set, with the server's ``order`` and
+        ``lines`` for the client to rebase on.
+    """
+    if expected_version is not None and cint(order.get(VERSION_FIELD)) != expected_version:
+        return get_order_state(order.name, conflict=True)
+
+    names = {operation["name"] for operation in operations if operation["op"] != "add"}
+    if lines is None:
+        lines = get_order_lines(order.name, names) if names else {}
+    else:
+        lines = dict(lines)
+
+    unknown = names - set(lines)
+    if unknown:
+        frappe.throw(
+            _("Row {0} does not belong to order {1}").format(", ".join(sorted(unknown)), order.name),
+            frappe.ValidationError,
+        )
+
+    inserts = []
+    updates = {}
+    removed = []
+    amount_change = 0.0
+    next_idx = None
+
+    for operation in operations:
+        kind = operation["op"]
+
+        if kind == "add":
+            if next_idx is None:
+                next_idx = _get_max_idx(order.name) + 1
+            row = _new_line(order, build_row(operation), next_idx)
+            next_idx += 1
+            amount_change += flt(row.amount)
+            inserts.append(row)
+            continue
+
+        row = lines.get(operation["name"])
+        if row is None:
+            # Removed by an earlier operation in the same patch
+            frappe.throw(
+                _("Row {0} was already removed").format(operation["name"]),
+                frappe.ValidationError,
+            )
+
+        if kind == "remove":
+            amount_change -= flt(row.amount)
+            lines.pop(row.name)
+            updates.pop(row.name, None)
+            removed.append(row.name)
+            continue
+
+        if row.get("counters"):
+            blocked = [field for field in EDITABLE_LINE_FIELDS if field not in SENT_LINE_FIELDS]
+            if _line_changes(row, operation, fields=blocked):
+                frappe.throw(
+                    _("Row {0} was already sent to the kitchen; only notes can be changed").format(row.name),
+                    frappe.ValidationError,
+                )
+
+        changes = _line_changes(row, operation)
+        if not changes:
+            continue
+
+        previous_amount = flt(row.amount)
+        row.update(changes)
+        amount_change += flt(row.amount) - previous_amount
+        updates.setdefault(row.name, {}).update(changes)
+
+    totals = compute_order_totals(flt(order.subtotal) + amount_change)
+    version = cint(order.get(VERSION_FIELD))
+
+    if inserts or updates or removed:
+        version = bump_order_version(
+            order.name,
+            expected_version,
+            values=dict(totals, last_edited_by=frappe.session.user),
+        )
+        if version is None:
+            return get_order_state(order.name, conflict=True)
+
+        for name in removed:
+            frappe.db.delete(ORDER_ITEM_DOCTYPE, {"name": name, "parent": order.name})
+        for name, changes in updates.items():
+            frappe.db.set_value(ORDER_ITEM_DOCTYPE, name, changes, update_modified=False)
+        for row in inserts:
+            row.db_insert()
+
+    return {
+        "conflict": False,
+        "added": [row.as_dict() for row in inserts],
+        "updated": [lines[name] for name in updates],
+        "removed": removed,
+        "order": dict(totals, name=order.name, order_version=version),
+    }
+
+
+def get_order_state(order_name, conflict=False):
+    """Return the server's current header totals, version and lines of an order."""
+    header = frappe.db.get_value(
+        ORDER_DOCTYPE,
+        order_name,
+        ["name", "subtotal", "pb1_amount", "totals", VERSION_FIELD],
+        as_dict=True,
+    ) or {}
+
+    return {
+        "conflict": conflict,
+        "added": [],
+        "updated": [],
+        "removed": [],
+        "order": dict(header, order_version=cint(header.get(VERSION_FIELD))),
+        "lines": list(get_order_lines(order_name).values()),
+    }
+
+
+def _line_changes(row, values, fields=None):
+    if fields is None:
+        fields = SENT_LINE_FIELDS if row.get("counters") else EDITABLE_LINE_FIELDS
+    changes = {}
+
+    for field in fields:
+        if field not in values:
+            continue
+        value = values[field]
+
+        if field == "qty":
+            value = flt(value)
+            if value <= 0:
+                frappe.throw(_("Quantity must be greater than zero"), frappe.ValidationError)
+        elif field == "rate":
+            value = flt(value)
+        elif field == "item_options" and not isinstance(value, str):
+            value = frappe.as_json(value) if value else None
+        elif field == "notes":
+            value = value or ""
+
+        current = row.get(field)
+        if field in ("qty", "rate"):
+            current = flt(current)
+        elif field == "notes":
+            current = current or ""
+
+        if value != current:
+            changes[field] = value
+
+    if "qty" in changes or "rate" in changes:
+        qty = changes.get("qty", flt(row.get("qty")))
+        rate = changes.get("rate", flt(row.get("rate")))
+        changes["amount"] = qty * rate
+
+    return changes
+
+
+def _get_max_idx(order_name):
+    result = frappe.db.sql(
+        """
+        SELECT MAX(idx)
+        FROM `tabPOS Order Item`
+        WHERE parent = %s AND parenttype = %s AND parentfield = 'items'
+        """,
+        (order_name, ORDER_DOCTYPE),
+    )
+    return int((result and result[0][0]) or 0)
+
+
+def _new_line(order, row_data, idx):
+    row = frappe.get_doc(
+        dict(
+            row_data,
+            doctype=ORDER_ITEM_DOCTYPE,
+            parent=order.name,
+            parenttype=ORDER_DOCTYPE,
+            parentfield="items",
+            idx=idx,
+        )
+    )
+    if not flt(row.get("amount")):
+        row.amount = flt(row.get("qty")) * flt(row.get("rate"))
+    row.last_edited_by = frappe.session.user
+    return row
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Version stamps for POS Order.
+
+``order_version`` goes up by one on every change to an order: document
+saves, line patches and claims. Readers get the version along with the order.
+Writers pass back the version they last saw and apply their change with a
+single conditional UPDATE (``... WHERE order_version = %s``) instead of
+loading and locking the whole document. When the UPDATE matches no row,
+another terminal got there first. The caller then returns the current server
+state so the client can rebase, rather than throwing.
+
+Every conditional UPDATE also stamps ``modified``. Whether it matched is read
+back from the row: only our own UPDATE can have left our ``modified`` stamp,
+the same timestamp check Frappe uses to detect concurrent saves.
+"""
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+ORDER_DOCTYPE = "POS Order"
+VERSION_FIELD = "order_version"
+
+
+def get_order_version(order_name):
+    """Return the current version of an order (0 for orders never versioned)."""
+    return cint(frappe.db.get_value(ORDER_DOCTYPE, order_name, VERSION_FIELD))
+
+
+def parse_expected_version(expected_version):
+    """Return the client's expected version as an int, or None when not given."""
+    if expected_version in (None, ""):
+        return None
+    return cint(expected_version)
+
+
+def bump_order_version(order_name, expected_version=None, values=None):
+    """Increment an order's version, optionally only if it still has ``expected_version``.
+
+    Args:
+        order_name: POS Order name
+        expected_version: Version the caller last saw (None: unconditional)
+        values: Extra header columns to set in the same UPDATE
+
+    Returns:
+        int: The new version, or None if the order was changed concurrently
+    """
+    values = dict(values or {})
+    values.setdefault("modified", now_datetime())
+    values.setdefault("modified_by", frappe.session.user)
+
+    assignments = ", ".join(f"`{column}` = %({column})s" for column in values)
+    params = dict(values, order_name=order_name)
+
+    condition = ""
+    if expected_version is not None:
+        condition = f" AND IFNULL(`{VERSION_FIELD}`, 0) = %(expected_version)s"
+        params["expected_version"] = cint(expected_version)
+
+    frappe.db.sql(
+        f"""
+        UPDATE `tabPOS Order`
+        SET `{VERSION_FIELD}` = IFNULL(`{VERSION_FIELD}`, 0) + 1, {assignments}
+        WHERE name = %(order_name)s{condition}
+        """,
+        params,
+    )
+
+    row = _read_stamp(order_name, values["modified"])
+    if not row:
+        return None
+    if expected_version is not None and cint(row[VERSION_FIELD]) != cint(expected_version) + 1:
+        return None
+    return cint(row[VERSION_FIELD])
+
+
+def _read_stamp(order_name, modified, **expected):
+    """Re-read an order after a conditional UPDATE.
+
+    Returns:
+        dict: The version and ``expected`` columns, or None when the row does
+        not carry our ``modified`` stamp or ``expected`` values, i.e. the
+        UPDATE matched nothing
+    """
+    row = frappe.db.get_value(
+        ORDER_DOCTYPE, order_name, [VERSION_FIELD, "modified", *expected], as_dict=True
+    )
+    if not row or row.get("modified") != modified:
+        return None
+    if any(row.get(column) != value for column, value in expected.items()):
+        return None
+    return row
+
+
+def set_order_claim(order_name, user, claimed_at):
+    """Claim an unclaimed order in one conditional UPDATE (bumping its version).
+
+    Returns:
+        bool: False when the order does not exist or is already claimed
+    """
+    modified = now_datetime()
+    frappe.db.sql(
+        f"""
+        UPDATE `tabPOS Order`
+        SET claimed_by = %(user)s, claimed_at = %(claimed_at)s,
+            modified = %(modified)s, modified_by = %(user)s,
+            `{VERSION_FIELD}` = IFNULL(`{VERSION_FIELD}`, 0) + 1
+        WHERE name = %(order_name)s AND IFNULL(claimed_by, '') = ''
+        """,
+        {"order_name": order_name, "user": user, "claimed_at": claimed_at, "modified": modified},
+    )
+    return bool(_read_stamp(order_name, modified, claimed_by=user))
+
+
+def clear_order_claim(order_name, user):
+    """Release an order claimed by ``user`` in one conditional UPDATE.
+
+    Returns:
+        bool: False when the order does not exist or is not claimed by ``user``
+    """
+    modified = now_datetime()
+    frappe.db.sql(
+        f"""
+        UPDATE `tabPOS Order`
+        SET claimed_by = NULL, claimed_at = NULL,
+            modified = %(modified)s, modified_by = %(user)s,
+            `{VERSION_FIELD}` = IFNULL(`{VERSION_FIELD}`, 0) + 1
+        WHERE name = %(order_name)s AND claimed_by = %(user)s
+        """,
+        {"order_name": order_name, "user": user, "modified": modified},
+    )
+    return bool(_read_stamp(order_name, modified, claimed_by=None))
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Normalized phone index for Customer lookups.
+
+``Customer Phone Index`` holds one row per (customer, contact, number) with the
+number in E.164 digits and its national part reversed. Full numbers are found
+with an indexed equality on ``phone_normalized``; partial numbers become an
+indexed prefix search on ``phone_reversed`` (i.e. a suffix search on the
+number) instead of a ``LIKE '%...%'`` table scan.
+"""
+
+import re
+
+import frappe
+from frappe.utils import now
+
+PHONE_INDEX_DOCTYPE = "Customer Phone Index"
+
+DEFAULT_COUNTRY_CODE = "62"
+
+# National numbers shorter than this are treated as partial (suffix) input.
+MIN_FULL_NUMBER_LENGTH = 9
+
+
+def split_phone_number(phone, country_code=DEFAULT_COUNTRY_CODE):
+    """Split a phone number into its national digits and whether it is complete.
+
+    Follows the same rules as ``normalize_phone_number``: ``+62``/``62`` and a
+    trunk ``0`` prefix are stripped.
+
+    Returns:
+        tuple: (national digits, is_full_number) or (None, False) if empty.
+    """
+    if not phone:
+        return None, False
+
+    digits = re.sub(r"\D", "", str(phone))
+    if not digits:
+        return None, False
+
+    has_prefix = False
+    if digits.startswith(country_code) and len(digits) - len(country_code) >= MIN_FULL_NUMBER_LENGTH:
+        digits = digits[len(country_code):]
+        has_prefix = True
+    elif digits.startswith("0"):
+        digits = digits.lstrip("0")
+        has_prefix = True
+
+    if not digits:
+        return None, False
+
+    return digits, has_prefix and len(digits) >= MIN_FULL_NUMBER_LENGTH
+
+
+def normalize_to_e164(phone, country_code=DEFAULT_COUNTRY_CODE):
+    """Return the E.164 digits (without ``+``) for a phone number, or None."""
+    national, _full = split_phone_number(phone, country_code)
+    if not national:
+        return None
+    return f"{country_code}{national}"
+
+
+def build_index_entry(customer, phone, contact=None):
+    """Build a ``Customer Phone Index`` row dict for a single number."""
+    national, _full = split_phone_number(phone)
+    if not national:
+        return None
+
+    return {
+        "customer": customer,
+        "contact": contact,
+        "phone": phone,
+        "phone_normalized": f"{DEFAULT_COUNTRY_CODE}{national}",
+        "phone_reversed": national[::-1],
+    }
+
+
+def get_customer_index_entries(customer_doc):
+    """Return index rows for the numbers stored directly on a Customer."""
+    entries = []
+    seen = set()
+    for phone in (customer_doc.get("mobile_no"),):
+        entry = build_index_entry(customer_doc.name, phone)
+        if entry and entry["phone_normalized"] not in seen:
+            seen.add(entry["phone_normalized"])
+            entries.append(entry)
+    return entries
+
+
+def get_contact_index_entries(contact_doc):
+    """Return index rows for every Customer linked to a Contact."""
+    customers = [
+        link.get("link_name")
+        for link in (contact_doc.get("links") or [])
+        if link.get("link_doctype") == "Customer" and link.get("link_name")
+    ]
+    if not customers:
+        return []
+
+    numbers = [contact_doc.get("mobile_no"), contact_doc.get("phone")]
+    numbers.extend(row.get("phone") for row in (contact_doc.get("phone_nos") or []))
+
+    entries = []
+    seen = set()
+    for customer in customers:
+        for phone in numbers:
+            entry = build_index_entry(customer, phone, contact=contact_doc.name)
+            if not entry:
+                continue
+            key = (customer, entry["phone_normalized"])
+            if key in seen:
+                continue
+            seen.add(key)
+            entries.append(entry)
+    return entries
+
+
+def write_index_entries(entries):
+    """Insert index rows with a single multi-row INSERT."""
+    if not entries:
+        return
+
+    timestamp = now()
+    user = getattr(frappe.session, "user", None) or "Administrator"
+    fields = (
+        "name",
+        "owner",
+        "modified_by",
+        "creation",
+        "modified",
+        "customer",
+        "contact",
+        "phone",
+        "phone_normalized",
+        "phone_reversed",
+    )
+    values = [
+        (
+            frappe.generate_hash(length=10),
+            user,
+            user,
+            timestamp,
+            timestamp,
+            entry["customer"],
+            entry.get("contact"),
+            entry["phone"],
+            entry["phone_normalized"],
+            entry["phone_reversed"],
+        )
+        for entry in entries
+    ]
+    frappe.db.bulk_insert(PHONE_INDEX_DOCTYPE, fields, values)
+
+
+def is_phone_index_available():
+    """Check whether the index table exists (i.e. migrate has run)."""
+    return frappe.db.table_exists(PHONE_INDEX_DOCTYPE)
+
+
+def sync_customer_phone_index(doc, method=None):
+    """Customer ``on_update`` hook: refresh the Customer's own numbers."""
+    if not is_phone_index_available():
+        return
+
+    frappe.db.delete(PHONE_INDEX_DOCTYPE, {"customer": doc.name, "contact": ("is", "not set")})
+    write_index_entries(get_customer_index_entries(doc))
+
+
+def sync_contact_phone_index(doc, method=None):
+    """Contact ``on_update`` hook: refresh numbers for all linked Customers."""
+    if not is_phone_index_available():
+        return
+
+    frappe.db.delete(PHONE_INDEX_DOCTYPE, {"contact": doc.name})
+    write_index_entries(get_contact_index_entries(doc))
+
+
+def remove_customer_phone_index(doc, method=None):
+    """Customer ``on_trash`` hook."""
+    if is_phone_index_available():
+        frappe.db.delete(PHONE_INDEX_DOCTYPE, {"customer": doc.name})
+
+
+def remove_contact_phone_index(doc, method=None):
+    """Contact ``on_trash`` hook."""
+    if is_phone_index_available():
+        frappe.db.delete(PHONE_INDEX_DOCTYPE, {"contact": doc.name})
+
+
+def get_phone_search_condition(phone):
+    """Return the indexed WHERE clause and parameter for a phone search.
+
+    Returns:
+        tuple: (condition, value) or (None, None) if the input has no digits.
+    """
+    national, is_full = split_phone_number(phone)
+    if not national:
+        return None, None
+
+    if is_full:
+        return "idx.phone_normalized = %s", f"{DEFAULT_COUNTRY_CODE}{national}"
+
+    return "idx.phone_reversed LIKE %s", f"{national[::-1]}%"
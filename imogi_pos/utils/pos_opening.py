@@ -4,10 +4,16 @@ IMOGI POS - POS Opening resolver
 Single source of truth for active POS Opening Entry resolution.
 """
 
+import copy
 from typing import Any, Dict, List, Optional
 
 import frappe
 
+from imogi_pos.utils.versioned_cache import VersionedCache
+
+# Resolved openings keyed by "pos_profile|scope|user|device"
+active_opening_cache = VersionedCache("active_pos_opening", maxsize=256)
+
 
 def _resolve_pos_opening_date_field() -> str:
     """Resolve date field name for POS Opening Entry (dynamic compatibility)."""
@@ -330,10 +336,75 @@ def resolve_active_pos_opening(
     - scope=User -> filter by user
     - scope=POS Profile -> no user filter
     - scope=Device -> filter by device_id (required; may raise or return error)
+
+    Results are cached per (pos_profile, scope, user, device) in
+    ``active_opening_cache``. Submitting or cancelling POS Opening/Closing
+    Entries and saving a POS Profile invalidate the cache, and each request
+    checks its validity with a single version read.
     """
     if not user:
         user = frappe.session.user
 
+    if not pos_profile:
+        return _resolve_active_pos_opening(pos_profile, scope, user, device_id, raise_on_device_missing)
+
+    device_key = device_id or _get_request_device_id()
+    key = "|".join([pos_profile, scope or "", user or "", device_key or ""])
+    resolved = {}
+
+    def build():
+        result = resolved["result"] = _resolve_active_pos_opening(
+            pos_profile, scope, user, device_id, raise_on_device_missing
+        )
+        # Error results depend on request state; only cache complete answers
+        return None if result.get("error_code") else result
+
+    try:
+        result = active_opening_cache.get(key, build)
+    except Exception:
+        # Cache unavailable (or a validation error, raised again below)
+        result = None
+
+    if result is None:
+        result = resolved.get("result") or _resolve_active_pos_opening(
+            pos_profile, scope, user, device_id, raise_on_device_missing
+        )
+
+    # Cached values are shared by every request in this worker
+    return copy.deepcopy(result)
+
+
+def invalidate_active_openings(doc=None, method=None):
+    """doc_events hook: drop every cached active opening once the change commits."""
+    active_opening_cache.invalidate_on_commit()
+
+
+def prime_active_opening(doc, method=None):
+    """POS Opening Entry on_submit: invalidate, then cache the new opening for its user."""
+    invalidate_active_openings(doc, method)
+
+    after_commit = getattr(frappe.db, "after_commit", None)
+    if after_commit is not None and doc.get("pos_profile") and doc.get("user"):
+        after_commit.add(
+            lambda: resolve_active_pos_opening(pos_profile=doc.pos_profile, user=doc.user)
+        )
+
+
+def _get_request_device_id() -> Optional[str]:
+    request = getattr(frappe.local, "request", None)
+    headers = getattr(request, "headers", None)
+    return headers.get("X-Device-ID") if headers else None
+
+
+def _resolve_active_pos_opening(
+    pos_profile: Optional[str],
+    scope: Optional[str] = None,
+    user: Optional[str] = None,
+    device_id: Optional[str] = None,
+    raise_on_device_missing: bool = False,
+) -> Dict[str, Any]:
+    """Uncached resolution behind ``resolve_active_pos_opening``."""
+
     if not pos_profile:
         return {
             "pos_opening_entry": None,
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Process-wide cache of Item Price rates keyed by (price_list, item_code).
+
+Each price list has its own Redis hash of ``item_code -> (rate, currency)``
+with a per-worker LRU in front (see ``VersionedCache``). Items without a
+price in the list are cached as ``(None, None)`` so catalog lookups do not
+query Item Price again for them. The Item Price hook drops the changed
+entry, and the next lookup reloads it.
+
+The lookups are reachable by guests, so nothing is cached for names that do
+not exist: only enabled Price Lists get a cache, only existing Items are
+cached as unpriced, at most ``PRICE_LIST_CACHE_COUNT`` lists are kept per
+worker and the shared hashes expire after ``PRICE_CACHE_TTL`` seconds.
+"""
+
+from collections import OrderedDict
+
+import frappe
+
+from imogi_pos.utils.versioned_cache import VersionedCache
+
+PRICE_CACHE_NAMESPACE = "price_list_rates"
+PRICE_CACHE_LOCAL_SIZE = 5000
+PRICE_LIST_CACHE_COUNT = 32
+PRICE_CACHE_TTL = 24 * 60 * 60
+
+MISSING_PRICE = (None, None)
+
+# price list -> VersionedCache, least recently used first
+_price_list_caches = OrderedDict()
+
+
+def get_price_list_cache(price_list):
+    """Return the ``VersionedCache`` holding the rates of one price list."""
+    cache = _price_list_caches.get(price_list)
+    if cache is None:
+        cache = VersionedCache(
+            f"{PRICE_CACHE_NAMESPACE}:{price_list}",
+            maxsize=PRICE_CACHE_LOCAL_SIZE,
+            ttl=PRICE_CACHE_TTL,
+        )
+        _price_list_caches[price_list] = cache
+        while len(_price_list_caches) > PRICE_LIST_CACHE_COUNT:
+            _price_list_caches.popitem(last=False)
+    else:
+        _price_list_caches.move_to_end(price_list)
+    return cache
+
+
+def get_cached_rates(price_list, item_codes):
+    """Return ``{item_code: (rate, currency)}`` for items priced in ``price_list``.
+
+    Items with no Item Price row in the list are left out of the result.
+    """
+    codes = list(dict.fromkeys(code for code in (item_codes or []) if code))
+    if not price_list or not codes:
+        return {}
+
+    enabled = frappe.get_cached_value("Price List", price_list, "enabled")
+    if enabled is None:
+        # Unknown price list: it has no Item Price rows and gets no cache
+        return {}
+    if not enabled:
+        return load_rates(price_list, codes)
+
+    entries = get_price_list_cache(price_list).get_many(
+        codes, lambda missing: _load_rates(price_list, missing)
+    )
+
+    return _priced_only(entries)
+
+
+def load_rates(price_list, item_codes):
+    """Uncached equivalent of ``get_cached_rates`` (used when Redis is unavailable)."""
+    codes = list(dict.fromkeys(code for code in (item_codes or []) if code))
+    if not price_list or not codes:
+        return {}
+    return _priced_only(_load_rates(price_list, codes, mark_unpriced=False))
+
+
+def _priced_only(entries):
+    return {
+        code: entry
+        for code, entry in entries.items()
+        if entry is not None and tuple(entry) != MISSING_PRICE
+    }
+
+
+def _load_rates(price_list, item_codes, mark_unpriced=True):
+    rows = frappe.get_all(
+        "Item Price",
+        filters={"price_list": price_list, "item_code": ["in", item_codes]},
+        fields=["item_code", "price_list_rate", "currency"],
+    )
+
+    wanted = set(item_codes)
+    loaded = {}
+    for row in rows or []:
+        item_code = getattr(row, "item_code", None)
+        if item_code in wanted:
+            loaded[item_code] = (
+                getattr(row, "price_list_rate", None),
+                getattr(row, "currency", None),
+            )
+
+    unpriced = [code for code in item_codes if code not in loaded]
+    if unpriced and mark_unpriced:
+        # Only real Items are remembered as unpriced; unknown codes stay uncached
+        for item_code in frappe.get_all("Item", filters={"name": ["in", unpriced]}, pluck="name"):
+            loaded[item_code] = MISSING_PRICE
+    return loaded
+
+
+def invalidate_item_price(doc):
+    """Drop the cached rate(s) touched by an Item Price save or delete."""
+    keys = {(doc.get("price_list"), doc.get("item_code"))}
+
+    before_save = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+    if before_save:
+        keys.add((before_save.get("price_list"), before_save.get("item_code")))
+
+    for price_list, item_code in keys:
+        if price_list and item_code:
+            get_price_list_cache(price_list).invalidate_on_commit(item_code)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Structured trace of pricing-rule decisions on the order hot path.
+
+Each worker keeps the most recent sampled events in a fixed-size ring buffer.
+Errors are always kept; successful applications are sampled at
+``imogi_pos_pricing_trace_sample_rate`` (site config, default 0.1). Every
+applied rule also bumps a per-rule counter in a Redis hash so totals cover all
+workers. Nothing here writes to the database: the trace replaces per-line
+success logging only, and pricing failures still go to the Error Log.
+"""
+
+import random
+import time
+from collections import deque
+
+import frappe
+
+TRACE_BUFFER_SIZE = 500
+DEFAULT_SAMPLE_RATE = 0.1
+SAMPLE_RATE_CONFIG_KEY = "imogi_pos_pricing_trace_sample_rate"
+RULE_COUNTERS_KEY = "imogi_pos:pricing_rule_counters"
+
+# Per-worker ring buffer of trace events.
+_trace_buffer = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+def get_sample_rate():
+    """Fraction of successful events kept in the ring buffer."""
+    try:
+        rate = float(frappe.conf.get(SAMPLE_RATE_CONFIG_KEY, DEFAULT_SAMPLE_RATE))
+    except (TypeError, ValueError, AttributeError):
+        rate = DEFAULT_SAMPLE_RATE
+    return min(max(rate, 0.0), 1.0)
+
+
+def record_pricing_event(event, item_code=None, pricing_rule=None, **details):
+    """Record a pricing decision.
+
+    Args:
+        event (str): ``"applied"``, ``"error"`` or another short tag
+        item_code (str, optional): Item the rule was evaluated for
+        pricing_rule (str, optional): Applied Pricing Rule name
+        **details: Extra fields kept with the event (discounts, error text)
+    """
+    if pricing_rule and event == "applied":
+        _increment_rule_counter(pricing_rule)
+
+    if event != "error":
+        sample_rate = get_sample_rate()
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return
+
+    entry = {
+        "ts": time.time(),
+        "event": event,
+        "item_code": item_code,
+        "pricing_rule": pricing_rule,
+        "user": getattr(getattr(frappe, "session", None), "user", None),
+    }
+    entry.update(details)
+    _trace_buffer.append(entry)
+
+
+def _increment_rule_counter(pricing_rule):
+    try:
+        cache = frappe.cache()
+        cache.hincrby(cache.make_key(RULE_COUNTERS_KEY), pricing_rule, 1)
+    except Exception:
+        # Counters are diagnostics only; never fail an order over them
+        pass
+
+
+def get_trace(limit=100):
+    """Return the newest ``limit`` events of this worker, newest first."""
+    limit = max(int(limit or 0), 0)
+    events = list(_trace_buffer)[-limit:] if limit else []
+    events.reverse()
+    return events
+
+
+def get_rule_counters():
+    """Return ``{pricing_rule: times applied}`` across all workers."""
+    cache = frappe.cache()
+    # hincrby stores plain integers; RedisWrapper.hgetall would prefix the key
+    # again and try to unpickle them, so read through a raw pipeline
+    pipe = cache.pipeline()
+    pipe.hgetall(cache.make_key(RULE_COUNTERS_KEY))
+    raw = pipe.execute()[0] or {}
+
+    counters = {}
+    for rule, count in raw.items():
+        if isinstance(rule, bytes):
+            rule = rule.decode()
+        counters[rule] = int(count)
+    return counters
+
+
+def reset_trace(counters=False):
+    """Clear this worker's ring buffer and optionally the shared counters."""
+    _trace_buffer.clear()
+    if counters:
+        cache = frappe.cache()
+        cache.delete(cache.make_key(RULE_COUNTERS_KEY))
@@ -13,15 +13,24 @@ Usage:
 - Network Printer: POST /print/network
 - USB Printer: POST /print/usb
 - Bluetooth Printer: POST /print/bluetooth
+
+Async mode (PRINT_BRIDGE_MODE=async or --async, requires aiohttp):
+- Satu antrian + koneksi persisten per printer, printer berbeda dicetak paralel
+- Batch Print: POST /print/batch  {"jobs": [{"interface": "network", ...}, ...]}
+- /health melaporkan queue depth dan latency per printer
 """
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import asyncio
 import socket
 import base64
 import logging
 import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Setup logging
 logging.basicConfig(
@@ -419,8 +428,467 @@ def test_network():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# =============================================================================
+# Async bridge mode
+# =============================================================================
+# Each printer gets its own DeviceQueue: a bounded asyncio queue drained by one
+# worker task that keeps the printer connection open between jobs. Blocking
+# USB/Bluetooth I/O runs on a per-device thread, so a slow Bluetooth printer
+# only delays its own queue.
+
+ASYNC_QUEUE_MAX_JOBS = int(os.environ.get('PRINT_BRIDGE_QUEUE_SIZE', 100))
+ASYNC_CONNECT_TIMEOUT = 10
+ASYNC_IDLE_CLOSE_SECONDS = 30
+# Device queues idle for this long are dropped from the registry
+ASYNC_DEVICE_PRUNE_SECONDS = 600
+LATENCY_SAMPLE_SIZE = 200
+
+
+class BridgeError(Exception):
+    """Print error carrying the HTTP status returned to the browser."""
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_printer_port(value):
+    try:
+        port = int(value if value not in (None, '') else DEFAULT_PRINTER_PORT)
+    except (TypeError, ValueError):
+        raise BridgeError(f'Invalid printer_port: {value}', 400)
+    if not 0 < port < 65536:
+        raise BridgeError(f'Invalid printer_port: {value}', 400)
+    return port
+
+
+def _decode_job_data(print_data):
+    if not print_data:
+        raise BridgeError('data is required', 400)
+    try:
+        payload = base64.b64decode(print_data)
+    except Exception as e:
+        raise BridgeError(f'Invalid base64 data: {str(e)}', 400)
+    if not payload:
+        raise BridgeError('Invalid base64 data: nothing to print', 400)
+    return payload
+
+
+class NetworkConnection:
+    """Persistent TCP connection to a network printer."""
+
+    def __init__(self, printer_ip, printer_port):
+        self.printer_ip = printer_ip
+        self.printer_port = int(printer_port)
+        self.writer = None
+
+    async def send(self, payload):
+        for attempt in (1, 2):
+            if self.writer is None or self.writer.is_closing():
+                try:
+                    _reader, self.writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.printer_ip, self.printer_port),
+                        timeout=ASYNC_CONNECT_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    raise BridgeError(f'Connection timeout to printer {self.printer_ip}')
+                except ConnectionRefusedError:
+                    raise BridgeError(
+                        f'Connection refused by printer {self.printer_ip}. Check if printer is online.'
+                    )
+            try:
+                self.writer.write(payload)
+                await asyncio.wait_for(self.writer.drain(), timeout=ASYNC_CONNECT_TIMEOUT)
+                return {'printer': f"{self.printer_ip}:{self.printer_port}"}
+            except (OSError, asyncio.TimeoutError):
+                # Printer dropped the idle connection; reconnect once
+                await self.close()
+                if attempt == 2:
+                    raise
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.writer = None
+
+
+class BlockingDeviceConnection:
+    """USB device file or Bluetooth RFCOMM socket driven from a private thread."""
+
+    def __init__(self, interface, target, device_name=None):
+        self.interface = interface
+        self.target = target
+        self.device_name = device_name
+        self.handle = None
+        self.service_name = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"bridge-{interface}")
+
+    def _open(self):
+        if self.interface == 'usb':
+            if not os.path.exists(self.target):
+                raise BridgeError(
+                    f'Device {self.target} not found. Check device path and permissions.', 404
+                )
+            try:
+                self.handle = open(self.target, 'wb', buffering=0)
+            except PermissionError:
+                raise BridgeError(f'Permission denied. Run: sudo chmod 666 {self.target}', 403)
+            return
+
+        try:
+            import bluetooth
+        except ImportError:
+            raise BridgeError('Bluetooth support not installed. Run: pip install pybluez', 501)
+
+        address = self.target
+        if not address and self.device_name:
+            for addr, name in bluetooth.discover_devices(lookup_names=True):
+                if self.device_name.lower() in name.lower():
+                    address = addr
+                    break
+            if not address:
+                raise BridgeError(f'Bluetooth device "{self.device_name}" not found.', 404)
+            self.target = address
+
+        services = bluetooth.find_service(address=address)
+        if not services:
+            raise BridgeError(
+                f'No services found for device {address}. Make sure printer is paired.', 404
+            )
+        spp_service = next(
+            (
+                service for service in services
+                if "Serial" in service.get("name", "") or service.get("protocol") == "RFCOMM"
+            ),
+            services[0],
+        )
+        sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
+        sock.connect((spp_service["host"], spp_service["port"]))
+        self.handle = sock
+        self.service_name = spp_service.get('name', 'Unknown')
+
+    def _write(self, payload):
+        if self.handle is None:
+            self._open()
+        try:
+            if self.interface == 'usb':
+                self.handle.write(payload)
+            else:
+                self.handle.send(payload)
+        except OSError:
+            self._close()
+            raise
+        result = {'device': self.target}
+        if self.service_name:
+            result['service'] = self.service_name
+        return result
+
+    def _close(self):
+        if self.handle is not None:
+            try:
+                self.handle.close()
+            except OSError:
+                pass
+        self.handle = None
+
+    async def send(self, payload):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, self._write, payload)
+        except BridgeError:
+            raise
+        except Exception as e:
+            raise BridgeError(f'{self.interface.title()} connection error: {str(e)}')
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._close)
+
+
+class DeviceQueue:
+    """Bounded job queue with a single worker and a reused connection."""
+
+    def __init__(self, key, connection, maxsize=ASYNC_QUEUE_MAX_JOBS):
+        self.key = key
+        self.connection = connection
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.latencies = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self.printed = 0
+        self.failed = 0
+        self.busy = False
+        self.last_used = time.monotonic()
+        self.worker = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, payload):
+        self.last_used = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((payload, future, time.monotonic()))
+        except asyncio.QueueFull:
+            raise BridgeError(f'Print queue for {self.key} is full', 503)
+        return future
+
+    async def _run(self):
+        while True:
+            try:
+                payload, future, queued_at = await asyncio.wait_for(
+                    self.queue.get(), timeout=ASYNC_IDLE_CLOSE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                await self.connection.close()
+                continue
+
+            self.busy = True
+            try:
+                result = await self.connection.send(payload)
+                result['bytes_sent'] = len(payload)
+                self.printed += 1
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e if isinstance(e, BridgeError) else BridgeError(str(e)))
+            finally:
+                self.busy = False
+                self.latencies.append(time.monotonic() - queued_at)
+                self.last_used = time.monotonic()
+                self.queue.task_done()
+
+    def is_idle(self, now, idle_seconds=ASYNC_DEVICE_PRUNE_SECONDS):
+        return not self.busy and self.queue.empty() and now - self.last_used > idle_seconds
+
+    async def shutdown(self):
+        """Stop the worker and release the connection (and its thread, if any)."""
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        try:
+            await self.connection.close()
+        except Exception:
+            pass
+        executor = getattr(self.connection, 'executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self):
+        samples = sorted(self.latencies)
+        return {
+            'queue_depth': self.queue.qsize(),
+            'printed': self.printed,
+            'failed': self.failed,
+            'latency_ms_avg': round(sum(samples) / len(samples) * 1000, 1) if samples else None,
+            'latency_ms_p95': round(samples[int(len(samples) * 0.95) - 1] * 1000, 1) if samples else None,
+        }
+
+
+class AsyncPrintBridge:
+    """Registry of per-printer queues; jobs to different printers run concurrently."""
+
+    def __init__(self):
+        self.devices = {}
+        self.started_at = time.time()
+
+    def _get_queue(self, job):
+        interface = str(job.get('interface') or 'network').lower()
+
+        if interface == 'network':
+            printer_ip = job.get('printer_ip')
+            if not printer_ip:
+                raise BridgeError('printer_ip is required', 400)
+            printer_port = _parse_printer_port(job.get('printer_port'))
+            key = f"network:{printer_ip}:{printer_port}"
+            factory = lambda: NetworkConnection(printer_ip, printer_port)
+        elif interface == 'usb':
+            device_path = job.get('device_path')
+            if not device_path:
+                raise BridgeError('device_path is required', 400)
+            key = f"usb:{device_path}"
+            factory = lambda: BlockingDeviceConnection('usb', device_path)
+        elif interface == 'bluetooth':
+            device_address = job.get('device_address')
+            device_name = job.get('device_name')
+            if not device_address and not device_name:
+                raise BridgeError('device_address or device_name is required', 400)
+            key = f"bluetooth:{device_address or device_name}"
+            factory = lambda: BlockingDeviceConnection('bluetooth', device_address, device_name)
+        else:
+            raise BridgeError(f'Unsupported interface: {interface}', 400)
+
+        self._prune_idle(keep=key)
+        device_queue = self.devices.get(key)
+        if device_queue is None:
+            device_queue = DeviceQueue(key, factory())
+            self.devices[key] = device_queue
+        return device_queue
+
+    def _prune_idle(self, keep=None):
+        """Drop queues of printers that have not been used for a while."""
+        now = time.monotonic()
+        loop = asyncio.get_running_loop()
+        for key, device_queue in list(self.devices.items()):
+            if key != keep and device_queue.is_idle(now):
+                del self.devices[key]
+                loop.create_task(device_queue.shutdown())
+
+    async def print_job(self, job):
+        try:
+            if not isinstance(job, dict):
+                raise BridgeError('Each print job must be an object', 400)
+            payload = _decode_job_data(job.get('data'))
+            device_queue = self._get_queue(job)
+            result = await device_queue.submit(payload)
+        except BridgeError as e:
+            return {'success': False, 'error': str(e)}, e.status
+
+        logger.info(f"Print successful to {device_queue.key}")
+        result.update({'success': True, 'message': 'Print job sent successfully'})
+        return result, 200
+
+    async def print_batch(self, jobs):
+        outcomes = await asyncio.gather(
+            *(self.print_job(job) for job in jobs), return_exceptions=True
+        )
+        # One broken job must not fail the jobs sent alongside it
+        results = [
+            {'success': False, 'error': str(outcome) or type(outcome).__name__}
+            if isinstance(outcome, BaseException) else outcome[0]
+            for outcome in outcomes
+        ]
+        return {
+            'success': all(result['success'] for result in results),
+            'count': len(results),
+            'results': results,
+        }
+
+    def health(self):
+        devices = {key: device_queue.stats() for key, device_queue in self.devices.items()}
+        return {
+            'status': 'ok',
+            'service': 'IMOGI POS Print Bridge',
+            'version': '1.1.0',
+            'mode': 'async',
+            'uptime_seconds': round(time.time() - self.started_at),
+            'queue_depth': sum(stats['queue_depth'] for stats in devices.values()),
+            'devices': devices,
+        }
+
+
+def create_async_app():
+    """Build the aiohttp application for async bridge mode."""
+    from aiohttp import web
+
+    bridge = AsyncPrintBridge()
+
+    @web.middleware
+    async def cors_middleware(req, handler):
+        response = await handler(req)
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+        return response
+
+    async def read_json(req):
+        try:
+            return await req.json()
+        except Exception:
+            return {}
+
+    async def preflight(req):
+        return web.Response()
+
+    async def health(req):
+        return web.json_response(bridge.health())
+
+    async def discover_bluetooth_async(req):
+        try:
+            import bluetooth
+        except ImportError:
+            return web.json_response(
+                {'success': False, 'error': 'Bluetooth support not installed. Run: pip install pybluez'},
+                status=501,
+            )
+        loop = asyncio.get_running_loop()
+        nearby_devices = await loop.run_in_executor(
+            None, lambda: bluetooth.discover_devices(lookup_names=True, duration=8)
+        )
+        devices = [{'address': addr, 'name': name} for addr, name in nearby_devices]
+        return web.json_response({'success': True, 'devices': devices, 'count': len(devices)})
+
+    def print_handler(interface):
+        async def handler(req):
+            job = await read_json(req)
+            if isinstance(job, dict):
+                job['interface'] = interface
+            result, status = await bridge.print_job(job)
+            return web.json_response(result, status=status)
+        return handler
+
+    async def print_batch(req):
+        body = await read_json(req)
+        jobs = body.get('jobs') if isinstance(body, dict) else body
+        if not isinstance(jobs, list) or not jobs:
+            return web.json_response({'success': False, 'error': 'jobs is required'}, status=400)
+        return web.json_response(await bridge.print_batch(jobs))
+
+    async def test_network_async(req):
+        data = await read_json(req)
+        if not isinstance(data, dict):
+            data = {}
+        printer_ip = data.get('printer_ip')
+        try:
+            printer_port = _parse_printer_port(data.get('printer_port'))
+        except BridgeError as e:
+            return web.json_response({'success': False, 'error': str(e)}, status=e.status)
+        if not printer_ip:
+            return web.json_response({'success': False, 'error': 'printer_ip required'}, status=400)
+        try:
+            _reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(printer_ip, printer_port), timeout=5
+            )
+            writer.close()
+        except (OSError, asyncio.TimeoutError):
+            return web.json_response(
+                {'success': False, 'error': f'Cannot connect to {printer_ip}:{printer_port}'},
+                status=500,
+            )
+        return web.json_response(
+            {'success': True, 'message': f'Printer {printer_ip}:{printer_port} is reachable'}
+        )
+
+    app_async = web.Application(middlewares=[cors_middleware])
+    app_async.router.add_get('/health', health)
+    app_async.router.add_post('/print/network', print_handler('network'))
+    app_async.router.add_post('/print/usb', print_handler('usb'))
+    app_async.router.add_post('/print/bluetooth', print_handler('bluetooth'))
+    app_async.router.add_post('/print/batch', print_batch)
+    app_async.router.add_post('/test/network', test_network_async)
+    app_async.router.add_get('/discover/bluetooth', discover_bluetooth_async)
+    app_async.router.add_route('OPTIONS', '/{tail:.*}', preflight)
+    app_async['bridge'] = bridge
+    return app_async
+
+
+def run_async_bridge(port):
+    try:
+        from aiohttp import web
+    except ImportError:
+        logger.error("Async mode requires aiohttp. Run: pip install aiohttp")
+        sys.exit(1)
+
+    logger.info(f"  Batch Print: http://localhost:{port}/print/batch")
+    web.run_app(create_async_app(), host='0.0.0.0', port=port, print=None)
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PRINT_BRIDGE_PORT', DEFAULT_PORT))
+    async_mode = os.environ.get('PRINT_BRIDGE_MODE', 'sync') == 'async' or '--async' in sys.argv
     
     logger.info("=" * 60)
     logger.info("IMOGI POS - Thermal Printer Bridge")
@@ -439,6 +907,14 @@ if __name__ == '__main__':
     logger.info(f"  BT Discovery: http://localhost:{port}/discover/bluetooth")
     logger.info("=" * 60)
     
+    if async_mode:
+        logger.info("Mode: async (per-printer queues, persistent connections)")
+        try:
+            run_async_bridge(port)
+        except KeyboardInterrupt:
+            logger.info("\nShutting down Print Bridge...")
+        sys.exit(0)
+    
     try:
         app.run(
             host='0.0.0.0',  # Allow connections from network
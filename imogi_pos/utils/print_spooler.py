@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+LAN print spooler for IMOGI POS.
+
+Web requests no longer talk to LAN printers directly. ``enqueue_lan_print_job``
+pushes the payload onto a bounded Redis list for the printer endpoint, records
+the job status and returns a job id immediately. A background job per endpoint
+(deduplicated by RQ job id, so at most one drains each printer) sends queued
+jobs over a persistent socket with retry/backoff and updates the status.
+
+Redis keys:
+- ``imogi_pos:print_queue:<host>:<port>``: pending job ids/payloads (list)
+- ``imogi_pos:print_job:<job_id>``: job status dict (expires after a day)
+- ``imogi_pos:print_endpoints``: endpoints that have ever had work (set)
+"""
+
+import base64
+import json
+import socket
+import time
+
+import frappe
+from frappe.utils import now
+
+PRINT_QUEUE_KEY_PREFIX = "imogi_pos:print_queue:"
+PRINT_JOB_KEY_PREFIX = "imogi_pos:print_job:"
+PRINT_ENDPOINTS_KEY = "imogi_pos:print_endpoints"
+
+# Pending jobs allowed per printer before new jobs are rejected.
+MAX_QUEUE_LENGTH = 200
+
+# Job status is kept for a day so clients can poll it.
+JOB_STATUS_TTL = 24 * 60 * 60
+
+SOCKET_TIMEOUT = 5
+
+# Sockets unused for longer than this are reopened before sending.
+CONNECTION_IDLE_TIMEOUT = 10
+
+MAX_SEND_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.5
+
+# How long a drain job waits for more work before exiting.
+DRAIN_IDLE_WAIT = 2.0
+DRAIN_POLL_INTERVAL = 0.1
+
+# Persistent printer sockets, per worker process.
+_connections = {}
+
+
+class PrinterConnection:
+    """Keep-alive TCP connection to a raw (port 9100 style) printer."""
+
+    def __init__(self, host, port, timeout=SOCKET_TIMEOUT, idle_timeout=CONNECTION_IDLE_TIMEOUT):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.sock = None
+        self.last_used = 0.0
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self.sock = sock
+
+    def is_alive(self):
+        """Whether the printer still has its end of the socket open.
+
+        A printer that half-closed the connection still accepts ``sendall``
+        and silently drops the data, so look for EOF with a non-blocking read
+        before reusing the socket.
+        """
+        try:
+            self.sock.setblocking(False)
+            try:
+                data = self.sock.recv(1024)
+            finally:
+                self.sock.settimeout(self.timeout)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        # Status bytes pushed by the printer are discarded; only EOF is fatal
+        return bool(data)
+
+    def send(self, payload):
+        """Send a payload, reopening the socket if it is missing, stale or closed."""
+        if self.sock is not None and (
+            time.monotonic() - self.last_used > self.idle_timeout or not self.is_alive()
+        ):
+            self.close()
+
+        if self.sock is None:
+            self._connect()
+
+        try:
+            self.sock.sendall(payload)
+        except OSError:
+            self.close()
+            raise
+
+        self.last_used = time.monotonic()
+        return len(payload)
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+
+def get_printer_connection(host, port):
+    """Return the pooled connection for a printer endpoint."""
+    key = (host, int(port))
+    connection = _connections.get(key)
+    if connection is None:
+        connection = PrinterConnection(host, port)
+        _connections[key] = connection
+    return connection
+
+
+def close_printer_connections():
+    """Close every pooled printer socket of this process."""
+    for connection in _connections.values():
+        connection.close()
+    _connections.clear()
+
+
+def send_with_retry(
+    host, port, payload, attempts=MAX_SEND_ATTEMPTS, backoff=RETRY_BACKOFF_SECONDS, pooled=True
+):
+    """Send a payload, retrying with exponential backoff.
+
+    Args:
+        pooled: Reuse this process's keep-alive connection. Pass False outside
+            the spooler worker: raw printers usually accept a single connection,
+            so a socket left open by a web worker would block the spooler.
+
+    Returns:
+        dict: ``{"success", "attempts", "bytes_sent"|"error"}``
+    """
+    connection = get_printer_connection(host, port) if pooled else PrinterConnection(host, port)
+    error = None
+
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                bytes_sent = connection.send(payload)
+                return {"success": True, "attempts": attempt, "bytes_sent": bytes_sent}
+            except socket.timeout:
+                error = "Connection to printer timed out"
+            except OSError as e:
+                error = f"Socket error: {str(e)}"
+
+            if attempt < attempts:
+                time.sleep(backoff * (2 ** (attempt - 1)))
+    finally:
+        if not pooled:
+            connection.close()
+
+    return {"success": False, "attempts": attempts, "error": error}
+
+
+def _endpoint(host, port):
+    return f"{host}:{int(port)}"
+
+
+def _queue_key(host, port):
+    return f"{PRINT_QUEUE_KEY_PREFIX}{_endpoint(host, port)}"
+
+
+def _set_job_status(job_id, status):
+    frappe.cache().set_value(
+        f"{PRINT_JOB_KEY_PREFIX}{job_id}", status, expires_in_sec=JOB_STATUS_TTL
+    )
+
+
+def get_print_job_status(job_id):
+    """Return the status dict of a spooled print job, or None if unknown/expired."""
+    if not job_id:
+        return None
+    return frappe.cache().get_value(f"{PRINT_JOB_KEY_PREFIX}{job_id}")
+
+
+def enqueue_lan_print_job(host, port, payload_bytes, copies=1, meta=None):
+    """Queue raw bytes for a LAN printer and return immediately.
+
+    Args:
+        host (str): Printer IP address or hostname
+        port (int): Printer port
+        payload_bytes (bytes): Data to print
+        copies (int): Number of copies
+        meta (dict, optional): Extra info stored with the job status
+
+    Returns:
+        dict: ``{"success", "queued", "job_id", "queue_depth"}`` or an error
+    """
+    port = int(port or 9100)
+    cache = frappe.cache()
+    queue_key = _queue_key(host, port)
+
+    queue_depth = cache.llen(queue_key) or 0
+    if queue_depth >= MAX_QUEUE_LENGTH:
+        return {
+            "success": False,
+            "queued": False,
+            "error": "Print queue for {0} is full".format(_endpoint(host, port)),
+            "host": host,
+            "port": port,
+        }
+
+    job_id = frappe.generate_hash(length=12)
+    _set_job_status(
+        job_id,
+        {
+            "job_id": job_id,
+            "status": "Queued",
+            "host": host,
+            "port": port,
+            "copies": copies,
+            "owner": frappe.session.user,
+            "queued_at": now(),
+            "meta": meta or {},
+        },
+    )
+
+    cache.rpush(
+        queue_key,
+        json.dumps(
+            {
+                "job_id": job_id,
+                "copies": copies,
+                "data": base64.b64encode(payload_bytes).decode("ascii"),
+            }
+        ),
+    )
+    cache.sadd(PRINT_ENDPOINTS_KEY, _endpoint(host, port))
+    _enqueue_drain(host, port)
+
+    return {
+        "success": True,
+        "queued": True,
+        "job_id": job_id,
+        "queue_depth": queue_depth + 1,
+        "host": host,
+        "port": port,
+    }
+
+
+def _enqueue_drain(host, port):
+    frappe.enqueue(
+        "imogi_pos.utils.print_spooler.drain_printer_queue",
+        queue="short",
+        job_id=f"imogi_pos_print_spool::{_endpoint(host, port)}",
+        deduplicate=True,
+        enqueue_after_commit=False,
+        host=host,
+        port=port,
+    )
+
+
+def drain_printer_queue(host, port, idle_wait=DRAIN_IDLE_WAIT):
+    """Send every queued job for one printer endpoint over a reused socket.
+
+    Waits ``idle_wait`` seconds for new work before exiting so bursts are served
+    by the same worker and connection.
+
+    Returns:
+        int: Number of jobs processed.
+    """
+    cache = frappe.cache()
+    queue_key = _queue_key(host, port)
+    processed = 0
+    idle_since = None
+
+    while True:
+        raw = cache.lpop(queue_key)
+        if raw is None:
+            if idle_since is None:
+                idle_since = time.monotonic()
+            if time.monotonic() - idle_since >= idle_wait:
+                break
+            time.sleep(DRAIN_POLL_INTERVAL)
+            continue
+
+        idle_since = None
+        try:
+            job = json.loads(raw)
+            payload = base64.b64decode(job["data"])
+        except (TypeError, ValueError, KeyError):
+            continue
+
+        _process_job(host, port, job, payload)
+        processed += 1
+
+    return processed
+
+
+def _process_job(host, port, job, payload):
+    job_id = job.get("job_id")
+    status = get_print_job_status(job_id) or {"job_id": job_id, "host": host, "port": port}
+    status.update({"status": "Printing", "started_at": now()})
+    _set_job_status(job_id, status)
+
+    results = []
+    for _copy in range(max(int(job.get("copies") or 1), 1)):
+        result = send_with_retry(host, port, payload)
+        results.append(result)
+        if not result["success"]:
+            break
+
+    success = bool(results) and all(result["success"] for result in results)
+    status.update(
+        {
+            "status": "Printed" if success else "Failed",
+            "finished_at": now(),
+            "details": results,
+            "error": None if success else results[-1].get("error"),
+        }
+    )
+    _set_job_status(job_id, status)
+
+    if not success:
+        frappe.logger("imogi_pos.print_spooler").warning(
+            "Print job %s to %s failed: %s", job_id, _endpoint(host, port), status["error"]
+        )
+
+
+def kick_print_spoolers():
+    """Scheduler job: restart draining for endpoints that still have queued work."""
+    cache = frappe.cache()
+    for endpoint in cache.smembers(PRINT_ENDPOINTS_KEY) or []:
+        if isinstance(endpoint, bytes):
+            endpoint = endpoint.decode()
+        host, _sep, port = endpoint.rpartition(":")
+        if not host:
+            continue
+        if cache.llen(_queue_key(host, port)):
+            _enqueue_drain(host, int(port))
+        else:
+            cache.srem(PRINT_ENDPOINTS_KEY, endpoint)
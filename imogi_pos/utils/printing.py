@@ -17,8 +17,8 @@ import importlib.util
 import json
 import os
 import re
-import socket
 import tempfile
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union
 
 if importlib.util.find_spec("bs4") is not None:
@@ -38,6 +38,10 @@ else:
         pass
 
 
+# Number of rendered HTML -> ESC/POS conversions kept per worker process.
+THERMAL_RENDER_CACHE_SIZE = 128
+
+
 def format_kot_options(options: Union[str, Dict[str, Any], List[Any], None]) -> str:
     """Format item options for display on KOT tickets.
 
@@ -157,7 +161,13 @@ def dispatch_print(interface: str, context: Dict[str, Any]) -> Dict[str, Any]:
             print_data = context["print_data"]
             copies = context.get("copies", 1)
             
-            # Print multiple copies if requested
+            if not config.get("test_mode"):
+                # Hand the job to the per-printer spooler and return its id
+                from imogi_pos.utils.print_spooler import enqueue_lan_print_job
+                
+                return enqueue_lan_print_job(host, port, print_data, copies=copies)
+            
+            # Test prints stay synchronous so the caller sees connectivity errors
             results = []
             for i in range(copies):
                 result = print_via_lan(host, port, print_data)
@@ -252,39 +262,23 @@ def print_via_lan(host: str, port: int = 9100, payload_bytes: bytes = None) -> D
             "error": _("No data to print")
         }
     
+    from imogi_pos.utils.print_spooler import send_with_retry
+    
     try:
-        # Create a socket connection to the printer
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)  # 5 second timeout
-        
-        # Connect to the printer
-        sock.connect((host, port))
-        
-        # Send the data
-        sock.sendall(payload_bytes)
-        
-        # Close the connection
-        sock.close()
-        
-        return {
-            "success": True,
-            "host": host,
-            "port": port,
-            "bytes_sent": len(payload_bytes)
-        }
+        # One-off connection: the spooler worker owns the printer's pooled socket
+        result = send_with_retry(host, port, payload_bytes, attempts=1, pooled=False)
         
-    except socket.timeout:
-        return {
-            "success": False,
-            "error": _("Connection to printer timed out"),
-            "host": host,
-            "port": port
-        }
+        if result["success"]:
+            return {
+                "success": True,
+                "host": host,
+                "port": port,
+                "bytes_sent": result["bytes_sent"]
+            }
         
-    except socket.error as e:
         return {
             "success": False,
-            "error": _("Socket error: {0}").format(str(e)),
+            "error": result["error"],
             "host": host,
             "port": port
         }
@@ -414,6 +408,9 @@ def render_html_to_bytes_for_thermal(html: str, paper_width_mm: int = 80) -> byt
     """
     Converts HTML content to ESC/POS byte commands suitable for thermal printers.
     
+    Results are memoised per (html, paper width), so reprints and identical
+    tickets do not re-parse the HTML.
+    
     Args:
         html (str): HTML content to convert
         paper_width_mm (int, optional): Paper width in mm. Defaults to 80.
@@ -421,6 +418,11 @@ def render_html_to_bytes_for_thermal(html: str, paper_width_mm: int = 80) -> byt
     Returns:
         bytes: ESC/POS formatted binary data
     """
+    return _render_html_to_bytes_cached(html, paper_width_mm)
+
+
+@lru_cache(maxsize=THERMAL_RENDER_CACHE_SIZE)
+def _render_html_to_bytes_cached(html: str, paper_width_mm: int) -> bytes:
     try:
         if BeautifulSoup is None:
             raise RuntimeError("BeautifulSoup is required for HTML rendering")
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Per-request outbox for realtime (socket.io) messages.
+
+Publishing straight from ``frappe.publish_realtime`` sends one message per
+call, serialized on its own, and may reach clients before the transaction
+that produced it is committed. ``publish`` instead queues the message on
+``frappe.local`` and the outbox:
+
+- merges messages for the same event and room that describe the same entity
+  (``merge_key``): the latest fields win and ``changed_items`` lists are
+  unioned by name, so a bulk action sends one message per entity and room
+  instead of one per change;
+- keeps messages about different entities separate, so every client reads a
+  plain payload;
+- flushes after the database commit, so clients never see uncommitted state,
+  and drops everything on rollback.
+
+There is no delta shape. Messages are broadcast to a room, so every client in
+it gets the same payload and a per-client opt-in cannot be honoured. Frappe
+only lets clients join its own permission-checked rooms, so there is no
+separate room for delta subscribers either. Publishers keep payloads small
+instead, and merging already collapses repeated changes to one entity.
+
+Messages queued when nothing is committed afterwards (read-only requests) are
+sent by the ``flush_pending`` after_request hook. Without a database
+connection (scripts, tests) messages are published immediately.
+"""
+
+from collections import OrderedDict
+
+import frappe
+
+OUTBOX_ATTR = "imogi_realtime_outbox"
+MERGED_LIST_FIELDS = ("changed_items",)
+
+
+class RealtimeOutbox:
+    """Queued realtime messages of the current request or job."""
+
+    def __init__(self):
+        # (event, room) -> OrderedDict(merge_key -> payload)
+        self.rooms = OrderedDict()
+        self.scheduled = False
+        self.queued = 0
+
+    def add(self, event, payload, room=None, merge_key=None):
+        """Queue a message, merging it with a pending one for the same entity."""
+        self.queued += 1
+        entries = self.rooms.setdefault((event, room), OrderedDict())
+        if merge_key is None:
+            merge_key = ("_message", self.queued)
+
+        pending = entries.pop(merge_key, None)
+        # Re-inserted so messages go out in last-change order
+        entries[merge_key] = _merge(pending, payload) if pending else dict(payload)
+
+    def build_messages(self):
+        """Return ``[(event, room, message)]``, one message per entity, event and room."""
+        return [
+            (event, room, payload)
+            for (event, room), entries in self.rooms.items()
+            for payload in entries.values()
+        ]
+
+    def flush(self):
+        """Publish every queued message and empty the outbox."""
+        messages = self.build_messages()
+        self.discard()
+        for event, room, message in messages:
+            try:
+                frappe.publish_realtime(event, message, room=room, after_commit=False)
+            except Exception:
+                frappe.log_error(
+                    title="Realtime publish failed",
+                    message=frappe.get_traceback(),
+                )
+
+    def discard(self):
+        self.rooms = OrderedDict()
+        self.scheduled = False
+        self.queued = 0
+
+
+def get_outbox():
+    """Return the outbox of the current request, or None without a database."""
+    local = getattr(frappe, "local", None)
+    db = getattr(frappe, "db", None)
+    if local is None or getattr(db, "after_commit", None) is None:
+        return None
+
+    outbox = getattr(local, OUTBOX_ATTR, None)
+    if outbox is None:
+        outbox = RealtimeOutbox()
+        setattr(local, OUTBOX_ATTR, outbox)
+    return outbox
+
+
+def publish(event, payload, room=None, merge_key=None):
+    """Queue a realtime message to be sent once the transaction commits.
+
+    Args:
+        event: Realtime event name, e.g. ``kitchen:station:Grill``
+        payload: JSON-serializable dict
+        room: socket.io room, e.g. ``frappe.realtime.get_doc_room(...)``
+            (defaults to the site room)
+        merge_key: Identifies the entity the payload describes; queued
+            messages with the same event, room and key are merged
+    """
+    outbox = get_outbox()
+    if outbox is None:
+        frappe.publish_realtime(event, payload, room=room)
+        return
+
+    outbox.add(event, payload, room=room, merge_key=merge_key)
+    if not outbox.scheduled:
+        outbox.scheduled = True
+        frappe.db.after_commit.add(outbox.flush)
+        after_rollback = getattr(frappe.db, "after_rollback", None)
+        if after_rollback is not None:
+            after_rollback.add(outbox.discard)
+
+
+def flush_pending(response=None, request=None):
+    """after_request hook: send messages of requests that never committed."""
+    local = getattr(frappe, "local", None)
+    outbox = getattr(local, OUTBOX_ATTR, None) if local is not None else None
+    if outbox is not None and outbox.rooms:
+        outbox.flush()
+    return response
+
+
+def _merge(pending, payload):
+    merged = dict(pending)
+    merged.update(payload)
+    for field in MERGED_LIST_FIELDS:
+        if pending.get(field) and payload.get(field):
+            rows = OrderedDict((row.get("name"), row) for row in pending[field])
+            rows.update((row.get("name"), row) for row in payload[field])
+            merged[field] = list(rows.values())
+    return merged
+
@@ -13,25 +13,63 @@ from frappe import _
 from functools import wraps
 from datetime import datetime, timedelta
 import hashlib
+import time
 
 
 # Rate limiting cache key prefix
 RATE_LIMIT_PREFIX = "imogi_rate_limit:"
 
+# Hourly hash of rejected requests per policy
+RATE_LIMIT_REJECTIONS_PREFIX = "imogi_rate_limit_rejections:"
+RATE_LIMIT_REJECTIONS_TTL = 7 * 24 * 60 * 60
+
+# Per-endpoint policies: name -> (max_requests, window_seconds).
+# Site config ``imogi_rate_limits`` overrides them, e.g.
+# {"self_order_verify": {"limit": 120, "window": 60}}
+RATE_LIMIT_POLICIES = {
+    "default": (10, 60),
+    "catalog": (300, 60),
+    "catalog_ip": (3000, 60),
+    "self_order_verify": (60, 60),
+    "self_order_session": (20, 60),
+    "self_order_submit": (10, 60),
+    "self_order_payment_qr": (10, 60),
+}
+
 # Failed login tracking
 FAILED_LOGIN_PREFIX = "imogi_failed_login:"
 
 
-def rate_limit(max_requests=10, window_seconds=60, key_func=None):
+# Request headers identifying a guest client behind a shared IP
+SELF_ORDER_TOKEN_HEADER = "X-Self-Order-Token"
+DEVICE_ID_HEADER = "X-Device-Id"
+
+
+def rate_limit(max_requests=None, window_seconds=None, key_func=None, policy=None, ip_policy=None):
     """
     Rate limiting decorator for API endpoints.
     
-    Limits the number of requests from the same source within a time window.
+    Limits the number of requests from the same source within a sliding
+    window. Counting is one Redis round trip: an atomic INCR on the current
+    fixed window plus a read of the previous one, weighted by how much of it
+    still overlaps the sliding window. Concurrent requests cannot race past
+    the limit and the window never extends itself.
+    
+    Rejected requests are not counted against the window, so a client that
+    keeps retrying while blocked is let back in once its earlier requests age
+    out. Rejections are counted per policy and hour (see
+    ``get_rate_limit_rejections``) instead of writing an Error Log row per hit.
+    The limiter fails open when Redis is unavailable.
     
     Args:
-        max_requests: Maximum number of requests allowed in the window
-        window_seconds: Time window in seconds
-        key_func: Optional function to generate rate limit key (default: IP + user)
+        max_requests: Maximum number of requests allowed in the window, or a
+            callable receiving the endpoint's arguments (default: policy)
+        window_seconds: Time window in seconds (default: policy)
+        key_func: Optional function receiving the endpoint's arguments that
+            returns the rate limit key (default: IP + user)
+        policy: Name in ``RATE_LIMIT_POLICIES`` (default: "default")
+        ip_policy: Optional policy also counted per IP, a ceiling for
+            ``key_func`` values the client chooses (e.g. a device id)
     
     Example:
         @rate_limit(max_requests=5, window_seconds=60)
@@ -41,38 +79,159 @@ def rate_limit(max_requests=10, window_seconds=60, key_func=None):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate rate limit key
-            if key_func:
-                key = key_func()
-            else:
-                ip = frappe.local.request_ip or "unknown"
-                user = frappe.session.user or "Guest"
-                key = f"{ip}:{user}:{func.__name__}"
+            policy_name = policy or "default"
+            rejected_by = None
+            try:
+                limit, window = _get_rate_limit_policy(policy_name, max_requests, window_seconds, args, kwargs)
+                if key_func:
+                    key = key_func(*args, **kwargs)
+                else:
+                    ip = frappe.local.request_ip or "unknown"
+                    user = frappe.session.user or "Guest"
+                    key = f"{ip}:{user}"
+                key = f"{policy_name}:{func.__name__}:{key}"
+                if not _hit_rate_limit(key, limit, window):
+                    rejected_by = policy_name
+                elif ip_policy:
+                    ip_limit, ip_window = _get_rate_limit_policy(ip_policy, None, None, args, kwargs)
+                    ip_key = f"{ip_policy}:{func.__name__}:{frappe.local.request_ip or 'unknown'}"
+                    if not _hit_rate_limit(ip_key, ip_limit, ip_window):
+                        _release_rate_limit(key, window)
+                        rejected_by = ip_policy
+            except Exception:
+                rejected_by = None
             
-            cache_key = f"{RATE_LIMIT_PREFIX}{key}"
-            
-            # Get current count
-            current = frappe.cache().get(cache_key) or 0
-            
-            if current >= max_requests:
-                # Log rate limit hit
-                frappe.log_error(
-                    f"Rate limit exceeded: {key}",
-                    "IMOGI Security: Rate Limit"
-                )
+            if rejected_by:
+                _count_rate_limit_rejection(rejected_by)
                 frappe.throw(
                     _("Too many requests. Please try again later."),
                     frappe.RateLimitExceededError
                 )
             
-            # Increment counter
-            frappe.cache().set(cache_key, current + 1, expires_in_sec=window_seconds)
-            
             return func(*args, **kwargs)
         return wrapper
     return decorator
 
 
+def client_rate_limit_key(*args, **kwargs):
+    """
+    Rate limit key for guest-facing read endpoints.
+    
+    Guests at one venue usually share a public IP, so a guest request is keyed
+    on its self-order session (``X-Self-Order-Token`` header or
+    ``self_order_token`` form value, checked against the session cache) or on
+    its ``X-Device-Id`` header. Logged-in users and guests sending neither
+    fall back to IP + user. Pair it with an ``ip_policy`` so device ids cannot
+    be rotated to get around the limit.
+    """
+    ip = frappe.local.request_ip or "unknown"
+    user = frappe.session.user or "Guest"
+    if user != "Guest":
+        return f"{ip}:{user}"
+
+    token = _request_value(SELF_ORDER_TOKEN_HEADER, "self_order_token")
+    if token:
+        from imogi_pos.utils.self_order_sessions import get_session
+
+        session = get_session(token=token)
+        if session:
+            return f"session:{session.name}"
+
+    device_id = _request_value(DEVICE_ID_HEADER, "device_id")
+    if device_id:
+        return f"{ip}:device:{sanitize_input(device_id, max_length=64)}"
+
+    return f"{ip}:{user}"
+
+
+def get_rate_limit_rejections(hours=24):
+    """
+    Return rejected request counts per policy for the last ``hours`` hours.
+    
+    Returns:
+        dict: {policy: count}
+    """
+    cache = frappe.cache()
+    now = datetime.now()
+    pipe = cache.pipeline()
+    for offset in range(int(hours)):
+        bucket = (now - timedelta(hours=offset)).strftime("%Y%m%d%H")
+        pipe.hgetall(cache.make_key(f"{RATE_LIMIT_REJECTIONS_PREFIX}{bucket}"))
+    
+    totals = {}
+    for counts in pipe.execute():
+        for policy_name, count in (counts or {}).items():
+            if isinstance(policy_name, bytes):
+                policy_name = policy_name.decode()
+            totals[policy_name] = totals.get(policy_name, 0) + int(count)
+    return totals
+
+
+def _get_rate_limit_policy(policy_name, max_requests, window_seconds, args, kwargs):
+    """Resolve (limit, window) from explicit values, site config and the policy table."""
+    default_limit, default_window = RATE_LIMIT_POLICIES.get(policy_name, RATE_LIMIT_POLICIES["default"])
+    if callable(max_requests):
+        max_requests = max_requests(*args, **kwargs)
+    limit = max_requests or default_limit
+    window = window_seconds or default_window
+
+    override = (frappe.conf.get("imogi_rate_limits") or {}).get(policy_name) or {}
+    return int(override.get("limit") or limit), int(override.get("window") or window)
+
+
+def _hit_rate_limit(key, limit, window):
+    """
+    Count one request against ``key`` and return whether it is within ``limit``.
+    
+    The estimate is ``previous * (1 - elapsed / window) + current`` where
+    ``current`` is the atomic INCR result for this fixed window.
+    """
+    now = time.time()
+    index, elapsed = divmod(now, window)
+    cache = frappe.cache()
+    current_key = cache.make_key(f"{RATE_LIMIT_PREFIX}{key}:{int(index)}")
+    previous_key = cache.make_key(f"{RATE_LIMIT_PREFIX}{key}:{int(index) - 1}")
+
+    pipe = cache.pipeline()
+    pipe.incr(current_key)
+    pipe.expire(current_key, window * 2)
+    pipe.get(previous_key)
+    current, _expired, previous = pipe.execute()
+
+    estimate = int(previous or 0) * (window - elapsed) / window + int(current)
+    if estimate <= limit:
+        return True
+
+    cache.decr(current_key)
+    return False
+
+
+def _release_rate_limit(key, window):
+    """Take back a request counted by ``_hit_rate_limit`` that was rejected elsewhere."""
+    cache = frappe.cache()
+    cache.decr(cache.make_key(f"{RATE_LIMIT_PREFIX}{key}:{int(time.time() // window)}"))
+
+
+def _request_value(header, field):
+    """Value of a request header, falling back to a form field."""
+    request = getattr(frappe, "request", None)
+    value = request.headers.get(header) if request is not None else None
+    return value or (getattr(frappe, "form_dict", None) or {}).get(field)
+
+
+def _count_rate_limit_rejection(policy_name):
+    """Increment the hourly rejection counter for a policy."""
+    try:
+        cache = frappe.cache()
+        bucket = cache.make_key(f"{RATE_LIMIT_REJECTIONS_PREFIX}{datetime.now().strftime('%Y%m%d%H')}")
+        pipe = cache.pipeline()
+        pipe.hincrby(bucket, policy_name, 1)
+        pipe.expire(bucket, RATE_LIMIT_REJECTIONS_TTL)
+        pipe.execute()
+    except Exception:
+        pass
+
+
 def log_security_event(event_type, details=None, severity="INFO"):
     """
     Log security-related events for monitoring.
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Redis cache for Self Order Session verification.
+
+``verify_session`` runs on every QR scan and page load from guest phones.
+Each session is cached as a compact JSON list under both its token and its
+slug, so a scan is one Redis GET. The TTL is the time left until the
+session expires, capped at ``SESSION_CACHE_MAX_TTL`` so edits that skip
+document hooks still show up. The hooks below drop both keys after every
+save or delete.
+
+Last-seen telemetry (IP and user agent) is not written on the request.
+It goes into a Redis hash keyed by session name, so repeated scans from one
+phone overwrite each other. ``flush_session_last_seen`` runs from the
+scheduler and writes at most one UPDATE per session per run.
+"""
+
+import json
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+SESSION_DOCTYPE = "Self Order Session"
+
+SESSION_KEY_PREFIX = "imogi_pos:self_order_session:"
+LAST_SEEN_KEY = "imogi_pos:self_order_last_seen"
+LAST_SEEN_FLUSH_KEY = "imogi_pos:self_order_last_seen:flushing"
+
+SESSION_CACHE_MAX_TTL = 15 * 60
+
+# Order of the cached tuple; ``name`` must stay first
+SESSION_FIELDS = (
+    "name",
+    "branch",
+    "table",
+    "pos_profile",
+    "order_linkage",
+    "expires_on",
+    "is_guest",
+    "last_ip",
+    "user_agent",
+)
+
+
+def get_session(token=None, slug=None):
+    """Return a session as a dict, looked up by token or slug.
+
+    Args:
+        token: Session token
+        slug: Short session slug (used when no token is given)
+
+    Returns:
+        frappe._dict: Session fields, or None when no session matches
+    """
+    lookup = ("token", token) if token else ("slug", slug)
+    if not lookup[1]:
+        return None
+
+    try:
+        cache = frappe.cache()
+        cached = cache.get(_session_key(cache, *lookup))
+    except Exception:
+        cache, cached = None, None
+
+    if cached:
+        values = _decode(cached)
+        if values:
+            return values
+
+    session = frappe.db.get_value(
+        SESSION_DOCTYPE, {lookup[0]: lookup[1]}, ["token", "slug", *SESSION_FIELDS], as_dict=True
+    )
+    if not session:
+        return None
+
+    if cache is not None:
+        try:
+            _store_session(cache, session)
+        except Exception:
+            pass
+
+    return frappe._dict({field: session.get(field) for field in SESSION_FIELDS})
+
+
+def record_last_seen(session, ip=None, user_agent=None):
+    """Queue a session's last-seen IP and user agent for the next flush.
+
+    Nothing is queued when both values already match the session.
+    """
+    ip = ip or None
+    user_agent = user_agent or None
+    if session.get("last_ip") == ip and session.get("user_agent") == user_agent:
+        return
+
+    try:
+        frappe.cache().hset(
+            LAST_SEEN_KEY,
+            session.get("name"),
+            {"last_ip": ip, "user_agent": user_agent},
+        )
+    except Exception:
+        pass
+
+
+def flush_session_last_seen():
+    """Write queued last-seen telemetry to Self Order Session.
+
+    The pending hash is renamed before it is read, so scans recorded during a
+    flush are kept for the next run. A batch left behind by a flush that
+    failed after the rename is written first, before the next rename would
+    replace it; newer values are written after it and win.
+
+    Returns:
+        int: Number of sessions updated
+    """
+    cache = frappe.cache()
+    updated = _write_last_seen(cache)
+    try:
+        cache.rename(cache.make_key(LAST_SEEN_KEY), cache.make_key(LAST_SEEN_FLUSH_KEY))
+    except Exception:
+        # Nothing queued since the last flush
+        return len(updated)
+
+    updated |= _write_last_seen(cache)
+    return len(updated)
+
+
+def invalidate_session(doc, method=None):
+    """Self Order Session hook: drop the cached session now and after commit."""
+    keys = [("token", doc.get("token")), ("slug", doc.get("slug"))]
+    before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+    if before is not None and before.get("slug") != doc.get("slug"):
+        keys.append(("slug", before.get("slug")))
+
+    def drop():
+        try:
+            cache = frappe.cache()
+            for field, value in keys:
+                if value:
+                    cache.delete(_session_key(cache, field, value))
+        except Exception:
+            pass
+
+    drop()
+    after_commit = getattr(frappe.db, "after_commit", None)
+    if after_commit is not None:
+        after_commit.add(drop)
+
+
+def _write_last_seen(cache):
+    pending = cache.hgetall(LAST_SEEN_FLUSH_KEY) or {}
+    if not pending:
+        return set()
+
+    updated = set()
+    for session_name, values in pending.items():
+        if isinstance(session_name, bytes):
+            session_name = session_name.decode()
+        frappe.db.set_value(SESSION_DOCTYPE, session_name, values, update_modified=False)
+        updated.add(session_name)
+
+    frappe.db.commit()
+    cache.delete_key(LAST_SEEN_FLUSH_KEY)
+    return updated
+
+
+def _store_session(cache, session):
+    ttl = int((get_datetime(session.expires_on) - now_datetime()).total_seconds())
+    if ttl <= 0:
+        return
+
+    ttl = min(ttl, SESSION_CACHE_MAX_TTL)
+    value = _encode(session)
+    for field in ("token", "slug"):
+        if session.get(field):
+            cache.set(_session_key(cache, field, session.get(field)), value, ex=ttl)
+
+
+def _session_key(cache, field, value):
+    return cache.make_key(f"{SESSION_KEY_PREFIX}{field}:{value}")
+
+
+def _encode(session):
+    return json.dumps([session.get(field) for field in SESSION_FIELDS], default=str)
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        value = value.decode()
+    try:
+        values = json.loads(value)
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(SESSION_FIELDS):
+        return None
+    return frappe._dict(zip(SESSION_FIELDS, values))
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Precompiled variant matrix per template item.
+
+The matrix holds everything the variant picker and ``get_item_variants`` need
+for one template: attribute definitions and values, the variants with their
+attribute values and kitchen routing, a lookup from attribute combination to
+variant, and item prices per price list. It is built with a fixed number
+of bulk queries and cached through ``VersionedCache``; Item, Item Price and
+Item Attribute hooks invalidate it.
+
+``resolve_variant`` turns an attribute selection into a variant item code
+with a dictionary lookup on the same matrix, for the order APIs.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+from imogi_pos.utils.modifier_index import invalidate_modifier_index
+from imogi_pos.utils.versioned_cache import VersionedCache
+
+VARIANT_FIELDS = [
+    "name",
+    "item_name",
+    "image",
+    "item_code",
+    "description",
+    "standard_rate",
+    "stock_uom",
+]
+
+ROUTING_FIELDS = ["menu_category", "default_kitchen", "default_kitchen_station"]
+
+variant_matrix_cache = VersionedCache("variant_matrix", maxsize=512)
+
+
+def make_attribute_key(attributes):
+    """Order-independent key for an ``{attribute: value}`` selection."""
+    return tuple(sorted((str(attr), str(value)) for attr, value in (attributes or {}).items()))
+
+
+def get_variant_matrix(item_template):
+    """Return the cached variant matrix for a template item.
+
+    Raises:
+        frappe.ValidationError: If the item is not a template
+    """
+    return variant_matrix_cache.get(item_template, lambda: build_variant_matrix(item_template))
+
+
+def build_variant_matrix(item_template):
+    """Build the variant matrix for a template with bulk queries."""
+    template = frappe.db.get_value(
+        "Item",
+        item_template,
+        ["has_variants", "item_name", "image", "description"],
+        as_dict=True,
+    )
+    if not template or not template.has_variants:
+        frappe.throw(_("Item {0} is not a template").format(item_template), frappe.ValidationError)
+
+    attributes = _build_attributes(item_template)
+
+    variants = frappe.get_all(
+        "Item",
+        filters={"variant_of": item_template, "disabled": 0},
+        fields=VARIANT_FIELDS + ROUTING_FIELDS,
+    )
+    variant_names = [variant.name for variant in variants]
+
+    variant_attributes = {}
+    prices = {}
+    if variant_names:
+        for row in frappe.get_all(
+            "Item Variant Attribute",
+            filters={"parent": ["in", variant_names]},
+            fields=["parent", "attribute", "attribute_value"],
+        ):
+            variant_attributes.setdefault(row.parent, {})[row.attribute] = row.attribute_value
+
+        for row in frappe.get_all(
+            "Item Price",
+            filters={"item_code": ["in", variant_names]},
+            fields=["item_code", "price_list", "price_list_rate", "currency"],
+        ):
+            prices.setdefault(row.price_list, {})[row.item_code] = (
+                row.price_list_rate,
+                row.currency,
+            )
+
+    variant_rows = []
+    variant_lookup = {}
+    for variant in variants:
+        row = dict(variant)
+        row["attributes"] = variant_attributes.get(variant.name, {})
+        variant_rows.append(row)
+        variant_lookup.setdefault(make_attribute_key(row["attributes"]), variant.name)
+
+    return {
+        "template": item_template,
+        "template_name": template.item_name,
+        "thumbnail": template.image or None,
+        "description": template.description,
+        "attributes": attributes,
+        "variants": variant_rows,
+        "variant_lookup": variant_lookup,
+        "prices": prices,
+    }
+
+
+def get_variant_index(item_template):
+    """Return ``{attribute key: variant item code}`` for a template."""
+    return get_variant_matrix(item_template)["variant_lookup"]
+
+
+def get_missing_attributes(item_template, selected_attributes):
+    """Return the template attributes that ``selected_attributes`` does not cover."""
+    selected_attributes = selected_attributes or {}
+    return [
+        attribute["name"]
+        for attribute in get_variant_matrix(item_template)["attributes"]
+        if attribute["name"] not in selected_attributes
+    ]
+
+
+def resolve_variant(item_template, selected_attributes):
+    """Return the enabled variant of a template matching the selected attributes.
+
+    Only the template's own attributes are considered; extra keys are ignored.
+
+    Args:
+        item_template (str): Template item code
+        selected_attributes (dict): ``{attribute: value}``
+
+    Returns:
+        str: Variant item code, or None if an attribute is missing or no
+        variant matches
+    """
+    matrix = get_variant_matrix(item_template)
+    selected_attributes = selected_attributes or {}
+
+    selection = {}
+    for attribute in matrix["attributes"]:
+        name = attribute["name"]
+        if name not in selected_attributes:
+            return None
+        selection[name] = selected_attributes[name]
+
+    if not selection:
+        return None
+
+    return matrix["variant_lookup"].get(make_attribute_key(selection))
+
+
+def resolve_variant_from_options(item_template, item_options):
+    """Resolve a variant from POS item options grouped by attribute.
+
+    ``item_options`` uses the shape produced by ``get_item_options``: one key
+    per attribute (its ``field_name`` or name) whose selection carries the
+    attribute value as ``label``. Returns None unless every attribute of the
+    template is selected.
+    """
+    if not isinstance(item_options, dict):
+        return None
+
+    selected = {}
+    for attribute in get_variant_matrix(item_template)["attributes"]:
+        selection = item_options.get(attribute["field_name"])
+        if selection is None:
+            selection = item_options.get(attribute["name"])
+        value = _selection_value(selection)
+        if value in (None, ""):
+            return None
+        selected[attribute["name"]] = value
+
+    return resolve_variant(item_template, selected)
+
+
+def _selection_value(selection):
+    if isinstance(selection, (list, tuple)):
+        selection = selection[0] if len(selection) == 1 else None
+    if isinstance(selection, dict):
+        return selection.get("attribute_value") or selection.get("label")
+    if isinstance(selection, (str, int, float)):
+        return selection
+    return None
+
+
+def _build_attributes(item_template):
+    template_attributes = frappe.get_all(
+        "Item Variant Attribute",
+        filters={"parent": item_template, "parenttype": "Item"},
+        fields=["attribute", "from_range", "to_range", "increment"],
+        order_by="idx asc",
+    )
+    attribute_names = [row.attribute for row in template_attributes]
+    if not attribute_names:
+        return []
+
+    attribute_fields = ["name", "attribute_name", "numeric_values"]
+    has_suffix = frappe.db.has_column("Item Attribute", "numeric_values_suffix")
+    if has_suffix:
+        attribute_fields.append("numeric_values_suffix")
+
+    attribute_meta = {
+        row.name: row
+        for row in frappe.get_all(
+            "Item Attribute",
+            filters={"name": ["in", attribute_names]},
+            fields=attribute_fields,
+        )
+    }
+
+    attribute_values = {}
+    for row in frappe.get_all(
+        "Item Attribute Value",
+        filters={"parent": ["in", attribute_names]},
+        fields=["parent", "attribute_value", "abbr"],
+        order_by="idx asc",
+    ):
+        attribute_values.setdefault(row.parent, []).append(row)
+
+    attributes = []
+    for attr in template_attributes:
+        meta = attribute_meta.get(attr.attribute) or frappe._dict()
+        values = []
+        if meta.get("numeric_values"):
+            suffix = (meta.get("numeric_values_suffix") or "") if has_suffix else ""
+            increment = cint(attr.increment)
+            if increment > 0:
+                for val in range(cint(attr.from_range), cint(attr.to_range) + 1, increment):
+                    values.append({
+                        "value": val,
+                        "abbr": str(val),
+                        "label": str(val) + " " + suffix,
+                    })
+        else:
+            for attr_value in attribute_values.get(attr.attribute, []):
+                values.append({
+                    "value": attr_value.attribute_value,
+                    "abbr": attr_value.abbr,
+                    "label": attr_value.attribute_value,
+                })
+
+        attributes.append({
+            "name": attr.attribute,
+            "label": meta.get("attribute_name") or attr.attribute,
+            "field_name": attr.attribute.lower().replace(" ", "_"),
+            "values": values,
+            "required": 1,  # All attributes are required for variant selection
+        })
+
+    return attributes
+
+
+def get_matrix_rate_maps(matrix, price_list=None, base_price_list=None):
+    """Return rate/currency maps for a matrix, shaped like ``get_price_list_rate_maps``."""
+    prices = matrix.get("prices") or {}
+
+    def split(list_name):
+        entries = prices.get(list_name) or {} if list_name else {}
+        return (
+            {code: rate for code, (rate, _currency) in entries.items()},
+            {code: currency for code, (_rate, currency) in entries.items()},
+        )
+
+    rates, currencies = split(price_list)
+    base_rates, base_currencies = split(base_price_list or price_list)
+
+    return {
+        "price_list_rates": rates,
+        "price_list_currencies": currencies,
+        "base_price_list_rates": base_rates,
+        "base_price_list_currencies": base_currencies,
+    }
+
+
+def invalidate_item_variant_matrix(doc, method=None):
+    """Item ``on_update``/``on_trash`` hook."""
+    template = doc.get("variant_of") or (doc.name if doc.get("has_variants") else None)
+    if template:
+        variant_matrix_cache.invalidate_on_commit(template)
+        invalidate_modifier_index(template)
+    if template != doc.name:
+        invalidate_modifier_index(doc.name)
+
+
+def invalidate_item_price_variant_matrix(doc, method=None):
+    """Item Price ``on_update``/``on_trash`` hook."""
+    item_codes = {doc.get("item_code")}
+    before_save = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+    if before_save:
+        item_codes.add(before_save.get("item_code"))
+
+    for item_code in filter(None, item_codes):
+        template = frappe.db.get_value("Item", item_code, "variant_of")
+        if template:
+            variant_matrix_cache.invalidate_on_commit(template)
+
+
+def invalidate_all_variant_matrices(doc=None, method=None):
+    """Item Attribute ``on_update``/``on_trash`` hook."""
+    variant_matrix_cache.invalidate_on_commit()
+    invalidate_modifier_index()
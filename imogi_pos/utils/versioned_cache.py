@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Two-level cache: per-process LRU in front of a Redis hash.
+
+Each ``VersionedCache`` owns a Redis hash (the shared copy) and a version
+counter. Invalidation removes entries from the hash and bumps the version;
+every worker compares its local copy against that version once per request,
+so reads stay in process memory while invalidations still propagate across
+workers immediately. With ``ttl`` the shared hash expires that many seconds
+after its last write.
+"""
+
+import pickle
+from collections import OrderedDict
+
+import frappe
+
+from imogi_pos.utils.api_metrics import count_cache
+
+
+class VersionedCache:
+    """Read-through cache keyed by string, shared across workers via Redis."""
+
+    def __init__(self, namespace, maxsize=1024, ttl=None):
+        self.namespace = namespace
+        self.hash_key = f"imogi_pos:{namespace}"
+        self.version_key = f"imogi_pos:{namespace}:version"
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = OrderedDict()
+        self._local_version = None
+
+    def _redis_version_key(self):
+        return frappe.cache().make_key(self.version_key)
+
+    def _current_version(self):
+        """Return the shared version, read from Redis at most once per request."""
+        versions = getattr(frappe.local, "imogi_cache_versions", None)
+        if versions is None:
+            versions = {}
+            frappe.local.imogi_cache_versions = versions
+
+        if self.namespace not in versions:
+            raw = frappe.cache().get(self._redis_version_key())
+            versions[self.namespace] = int(raw or 0)
+
+        return versions[self.namespace]
+
+    def _sync_local(self):
+        version = self._current_version()
+        if version != self._local_version:
+            self._local.clear()
+            self._local_version = version
+
+    def get(self, key, generator=None):
+        """Return the cached value, building it with ``generator`` on a miss."""
+        self._sync_local()
+
+        if key in self._local:
+            self._local.move_to_end(key)
+            count_cache(hits=1)
+            return self._local[key]
+
+        value = frappe.cache().hget(self.hash_key, key)
+        if value is None:
+            count_cache(misses=1)
+        else:
+            count_cache(hits=1)
+
+        if value is None and generator is not None:
+            value = generator()
+            if value is not None:
+                self._shared_set(key, value)
+
+        if value is not None:
+            self._remember(key, value)
+
+        return value
+
+    def get_many(self, keys, generator=None):
+        """Return ``{key: value}`` for several keys.
+
+        Missing keys are built in one call to ``generator(missing_keys)``, which
+        must return a mapping.
+        """
+        self._sync_local()
+
+        result = {}
+        missing = []
+        for key in keys:
+            if key in self._local:
+                self._local.move_to_end(key)
+                result[key] = self._local[key]
+            else:
+                missing.append(key)
+
+        if missing:
+            for key, value in self._shared_get_many(missing).items():
+                result[key] = value
+                self._remember(key, value)
+
+            missing = [key for key in missing if key not in result]
+
+        count_cache(hits=len(result), misses=len(missing))
+
+        if missing and generator is not None:
+            built = {key: value for key, value in (generator(missing) or {}).items() if value is not None}
+            self._shared_set_many(built)
+            for key, value in built.items():
+                result[key] = value
+                self._remember(key, value)
+
+        return result
+
+    def _shared_get_many(self, keys):
+        """Read several fields of the shared hash in one HMGET round trip.
+
+        Values are pickled the same way ``RedisWrapper.hset`` stores them.
+        """
+        cache = frappe.cache()
+        raw_values = cache.hmget(cache.make_key(self.hash_key), list(keys))
+
+        values = {}
+        for key, raw in zip(keys, raw_values or []):
+            if raw is not None:
+                values[key] = pickle.loads(raw)
+        return values
+
+    def _shared_set_many(self, values):
+        """Write several fields of the shared hash in one HSET round trip.
+
+        Values are pickled the same way ``RedisWrapper.hset`` stores them.
+        """
+        if not values:
+            return
+        cache = frappe.cache()
+        pipe = cache.pipeline()
+        pipe.hset(
+            cache.make_key(self.hash_key),
+            mapping={key: pickle.dumps(value) for key, value in values.items()},
+        )
+        if self.ttl:
+            pipe.expire(cache.make_key(self.hash_key), self.ttl)
+        pipe.execute()
+
+    def _shared_set(self, key, value):
+        if self.ttl:
+            self._shared_set_many({key: value})
+        else:
+            frappe.cache().hset(self.hash_key, key, value)
+
+    def set(self, key, value):
+        """Store a value in the shared hash and the local LRU."""
+        self._sync_local()
+        self._shared_set(key, value)
+        self._remember(key, value)
+
+    def invalidate(self, key=None):
+        """Drop one key (or the whole namespace) in every worker."""
+        cache = frappe.cache()
+        if key is None:
+            cache.delete_key(self.hash_key)
+        else:
+            cache.hdel(self.hash_key, key)
+
+        version = cache.incr(self._redis_version_key())
+
+        versions = getattr(frappe.local, "imogi_cache_versions", None)
+        if versions is not None:
+            versions[self.namespace] = int(version)
+
+        self._local.clear()
+        self._local_version = int(version)
+
+    def invalidate_on_commit(self, key=None):
+        """Invalidate now and again once the current transaction commits.
+
+        The second pass drops anything another worker rebuilt from the
+        pre-commit rows in between. Meant for doc_events hooks.
+        """
+        self.invalidate(key)
+
+        after_commit = getattr(frappe.db, "after_commit", None)
+        if after_commit is not None:
+            after_commit.add(lambda: self.invalidate(key))
+
+    def _remember(self, key, value):
+        self._local[key] = value
+        self._local.move_to_end(key)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
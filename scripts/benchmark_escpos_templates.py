@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026, IMOGI and contributors
+# For license information, please see license.txt
+
+"""
+Benchmark: compiled ESC/POS templates vs. the previous bytearray builders.
+
+Renders N synthetic receipts and KOTs with both implementations, checks that
+the output is byte-identical and reports timings and Company/Address reads.
+Runs without a Frappe site; ``frappe`` is replaced by a small in-memory stub.
+
+Usage:
+    python scripts/benchmark_escpos_templates.py [count] [printer_width]
+"""
+
+import sys
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class _Cache:
+	def __init__(self):
+		self.hashes = {}
+
+	def hget(self, name, key, generator=None, shared=False):
+		bucket = self.hashes.setdefault(name, {})
+		if key not in bucket and generator:
+			bucket[key] = generator()
+		return bucket.get(key)
+
+	def delete_key(self, name):
+		self.hashes.pop(name, None)
+
+
+def install_frappe_stub():
+	"""Register a minimal ``frappe`` module and return its get_doc call log."""
+	doc_reads = []
+	docs = {
+		("Company", "IMOGI Resto"): types.SimpleNamespace(
+			company_address="ADDR-1", phone_no="021-555-0101"
+		),
+		("Address", "ADDR-1"): types.SimpleNamespace(
+			address_line1="Jl. Sudirman 1", city="Jakarta"
+		),
+	}
+
+	def get_doc(doctype, name=None):
+		doc_reads.append((doctype, name))
+		return docs[(doctype, name)]
+
+	cache = _Cache()
+	frappe = types.ModuleType("frappe")
+	frappe.get_doc = get_doc
+	frappe.cache = lambda: cache
+	sys.modules.setdefault("frappe", frappe)
+	return doc_reads
+
+
+doc_reads = install_frappe_stub()
+
+from imogi_pos.utils.escpos_templates import (  # noqa: E402
+	INIT, ALIGN_LEFT, ALIGN_CENTER, BOLD_ON, BOLD_OFF,
+	FONT_NORMAL, FONT_DOUBLE_HEIGHT, FONT_DOUBLE, FONT_TRIPLE,
+	CUT_PARTIAL, FEED_LINE,
+	encode_text, format_total_line, get_company_details,
+	render_receipt, render_kot,
+)
+
+
+def legacy_build_pos_receipt_escpos(doc, printer_width=32):
+	"""Receipt builder as it was before compiled templates (reference only)."""
+	receipt = bytearray()
+	
+	# Initialize printer
+	receipt.extend(INIT)
+	
+	# Header - Company/Store Name
+	receipt.extend(ALIGN_CENTER)
+	receipt.extend(FONT_DOUBLE)
+	receipt.extend(encode_text(doc.company or "IMOGI POS"))
+	receipt.extend(FEED_LINE)
+	
+	# Company details
+	receipt.extend(FONT_NORMAL)
+	company_details = get_company_details(doc.company)
+	if company_details:
+		if company_details.get('address'):
+			receipt.extend(encode_text(company_details['address']))
+			receipt.extend(FEED_LINE)
+		if company_details.get('phone'):
+			receipt.extend(encode_text(f"Tel: {company_details['phone']}"))
+			receipt.extend(FEED_LINE)
+	
+	# Divider
+	receipt.extend(encode_text('=' * printer_width))
+	receipt.extend(FEED_LINE)
+	
+	# Invoice info
+	receipt.extend(ALIGN_LEFT)
+	receipt.extend(FONT_NORMAL)
+	receipt.extend(encode_text(f"Invoice: {doc.name}"))
+	receipt.extend(FEED_LINE)
+	
+	# Date & Time
+	posting_datetime = str(doc.posting_date)
+	if hasattr(doc, 'posting_time') and doc.posting_time:
+		posting_datetime = f"{doc.posting_date} {doc.posting_time}"
+	receipt.extend(encode_text(f"Date: {posting_datetime}"))
+	receipt.extend(FEED_LINE)
+	
+	# Cashier
+	receipt.extend(encode_text(f"Cashier: {doc.owner}"))
+	receipt.extend(FEED_LINE)
+	
+	# Customer
+	if doc.customer and doc.customer != "Guest":
+		receipt.extend(encode_text(f"Customer: {doc.customer}"))
+		receipt.extend(FEED_LINE)
+	
+	# Table number (if restaurant)
+	if hasattr(doc, 'table_number') and doc.table_number:
+		receipt.extend(encode_text(f"Table: {doc.table_number}"))
+		receipt.extend(FEED_LINE)
+	
+	receipt.extend(encode_text('=' * printer_width))
+	receipt.extend(FEED_LINE)
+	
+	# Items header
+	receipt.extend(BOLD_ON)
+	receipt.extend(encode_text("Item                 Qty   Amount"))
+	receipt.extend(FEED_LINE)
+	receipt.extend(BOLD_OFF)
+	receipt.extend(encode_text('-' * printer_width))
+	receipt.extend(FEED_LINE)
+	
+	# Items
+	for item in doc.items:
+		# Item name (truncate if too long)
+		item_name = (item.item_name or item.item_code)[:printer_width]
+		receipt.extend(encode_text(item_name))
+		receipt.extend(FEED_LINE)
+		
+		# Quantity and price
+		qty_str = f"{item.qty:.0f}x"
+		price_str = f"{item.rate:,.0f}"
+		amount_str = f"{item.amount:,.0f}"
+		
+		# Format: "  2x @ 25,000        50,000"
+		detail_line = f"  {qty_str} @ {price_str}".ljust(printer_width - len(amount_str)) + amount_str
+		receipt.extend(encode_text(detail_line))
+		receipt.extend(FEED_LINE)
+		
+		# Item discount if any
+		if hasattr(item, 'discount_amount') and item.discount_amount and item.discount_amount > 0:
+			discount_line = f"  Discount".ljust(printer_width - len(f"{item.discount_amount:,.0f}")) + f"-{item.discount_amount:,.0f}"
+			receipt.extend(encode_text(discount_line))
+			receipt.extend(FEED_LINE)
+	
+	receipt.extend(encode_text('=' * printer_width))
+	receipt.extend(FEED_LINE)
+	
+	# Subtotal
+	subtotal_line = format_total_line("Subtotal:", doc.net_total, printer_width)
+	receipt.extend(encode_text(subtotal_line))
+	receipt.extend(FEED_LINE)
+	
+	# Discount
+	if hasattr(doc, 'discount_amount') and doc.discount_amount and doc.discount_amount > 0:
+		discount_line = format_total_line("Discount:", -doc.discount_amount, printer_width)
+		receipt.extend(encode_text(discount_line))
+		receipt.extend(FEED_LINE)
+	
+	# Tax
+	if hasattr(doc, 'total_taxes_and_charges') and doc.total_taxes_and_charges and doc.total_taxes_and_charges > 0:
+		tax_line = format_total_line("Tax:", doc.total_taxes_and_charges, printer_width)
+		receipt.extend(encode_text(tax_line))
+		receipt.extend(FEED_LINE)
+	
+	receipt.extend(encode_text('=' * printer_width))
+	receipt.extend(FEED_LINE)
+	
+	# Grand total
+	receipt.extend(BOLD_ON)
+	receipt.extend(FONT_DOUBLE_HEIGHT)
+	total_line = format_total_line("TOTAL:", doc.grand_total, printer_width)
+	receipt.extend(encode_text(total_line))
+	receipt.extend(FEED_LINE)
+	receipt.extend(BOLD_OFF)
+	receipt.extend(FONT_NORMAL)
+	
+	receipt.extend(encode_text('=' * printer_width))
+	receipt.extend(FEED_LINE)
+	
+	# Payment details
+	if hasattr(doc, 'payments') and doc.payments:
+		receipt.extend(BOLD_ON)
+		receipt.extend(encode_text("PAYMENT"))
+		receipt.extend(FEED_LINE)
+		receipt.extend(BOLD_OFF)
+		
+		for payment in doc.payments:
+			payment_line = format_total_line(f"{payment.mode_of_payment}:", payment.amount, printer_width)
+			receipt.extend(encode_text(payment_line))
+			receipt.extend(FEED_LINE)
+		
+		# Change
+		if hasattr(doc, 'change_amount') and doc.change_amount and doc.change_amount > 0:
+			receipt.extend(BOLD_ON)
+			change_line = format_total_line("CHANGE:", doc.change_amount, printer_width)
+			receipt.extend(encode_text(change_line))
+			receipt.extend(FEED_LINE)
+			receipt.extend(BOLD_OFF)
+	
+	receipt.extend(FEED_LINE)
+	
+	# Footer
+	receipt.extend(ALIGN_CENTER)
+	receipt.extend(encode_text("Thank You!"))
+	receipt.extend(FEED_LINE)
+	receipt.extend(encode_text("Please Come Again"))
+	receipt.extend(FEED_LINE)
+	receipt.extend(FEED_LINE)
+	
+	# Extra line feeds before cut
+	receipt.extend(FEED_LINE)
+	receipt.extend(FEED_LINE)
+	receipt.extend(FEED_LINE)
+	
+	# Cut paper
+	receipt.extend(CUT_PARTIAL)
+	
+	return bytes(receipt)
+
+
+
+def legacy_build_kot_escpos(doc, printer_width=32):
+	"""KOT builder as it was before compiled templates (reference only)."""
+	kot = bytearray()
+	
+	# Initialize
+	kot.extend(INIT)
+	
+	# Header
+	kot.extend(ALIGN_CENTER)
+	kot.extend(FONT_TRIPLE)
+	kot.extend(BOLD_ON)
+	kot.extend(encode_text("KITCHEN ORDER"))
+	kot.extend(FEED_LINE)
+	kot.extend(BOLD_OFF)
+	kot.extend(FONT_NORMAL)
+	
+	kot.extend(encode_text('=' * printer_width))
+	kot.extend(FEED_LINE)
+	
+	# Order info
+	kot.extend(ALIGN_LEFT)
+	kot.extend(FONT_DOUBLE_HEIGHT)
+	kot.extend(BOLD_ON)
+	
+	# Order number
+	kot.extend(encode_text(f"Order: {doc.name}"))
+	kot.extend(FEED_LINE)
+	
+	# Table
+	if hasattr(doc, 'table_number') and doc.table_number:
+		kot.extend(encode_text(f"Table: {doc.table_number}"))
+		kot.extend(FEED_LINE)
+	
+	kot.extend(BOLD_OFF)
+	kot.extend(FONT_NORMAL)
+	
+	# Time
+	kot.extend(encode_text(f"Time: {datetime.now().strftime('%H:%M:%S')}"))
+	kot.extend(FEED_LINE)
+	
+	kot.extend(encode_text('=' * printer_width))
+	kot.extend(FEED_LINE)
+	kot.extend(FEED_LINE)
+	
+	# Items
+	for item in doc.items:
+		# Quantity with large font
+		kot.extend(FONT_TRIPLE)
+		kot.extend(BOLD_ON)
+		kot.extend(encode_text(f"{item.qty:.0f}x"))
+		kot.extend(FEED_LINE)
+		kot.extend(BOLD_OFF)
+		
+		# Item name
+		kot.extend(FONT_DOUBLE)
+		item_name = item.item_name or item.item_code
+		kot.extend(encode_text(item_name))
+		kot.extend(FEED_LINE)
+		kot.extend(FONT_NORMAL)
+		
+		# Notes/customizations
+		if hasattr(item, 'notes') and item.notes:
+			kot.extend(encode_text(f"  ** {item.notes} **"))
+			kot.extend(FEED_LINE)
+		
+		kot.extend(FEED_LINE)
+	
+	kot.extend(encode_text('=' * printer_width))
+	kot.extend(FEED_LINE)
+	
+	# Footer
+	kot.extend(ALIGN_CENTER)
+	kot.extend(FONT_NORMAL)
+	kot.extend(encode_text(f"Printed: {datetime.now().strftime('%H:%M:%S')}"))
+	kot.extend(FEED_LINE)
+	kot.extend(FEED_LINE)
+	kot.extend(FEED_LINE)
+	
+	# Cut
+	kot.extend(CUT_PARTIAL)
+
+	
+	return bytes(kot)
+
+
+def make_invoice(idx, lines=8):
+	"""Synthetic POS Invoice with ``lines`` items, a discount, tax and payments."""
+	items = [
+		types.SimpleNamespace(
+			item_code=f"ITEM-{n}",
+			item_name=f"Nasi Goreng Spesial {n}",
+			qty=n % 3 + 1,
+			rate=25000 + n * 1000,
+			amount=(n % 3 + 1) * (25000 + n * 1000),
+			discount_amount=1500 if n % 4 == 0 else 0,
+			notes="no chili" if n % 2 else None,
+		)
+		for n in range(lines)
+	]
+	net_total = sum(item.amount for item in items)
+	return types.SimpleNamespace(
+		name=f"POS-INV-{idx:05d}",
+		company="IMOGI Resto",
+		posting_date="2026-10-18",
+		posting_time="12:30:00",
+		owner="cashier@example.com",
+		customer="CUST-0001",
+		table_number="T-12",
+		items=items,
+		net_total=net_total,
+		discount_amount=5000,
+		total_taxes_and_charges=net_total * 0.11,
+		grand_total=net_total * 1.11 - 5000,
+		payments=[types.SimpleNamespace(mode_of_payment="Cash", amount=net_total * 1.2)],
+		change_amount=net_total * 0.09 + 5000,
+	)
+
+
+class _FrozenDatetime(datetime):
+	@classmethod
+	def now(cls, tz=None):
+		return cls(2026, 10, 18, 12, 30, 0)
+
+
+def run(count=1000, printer_width=32):
+	global datetime
+	datetime = _FrozenDatetime
+	invoices = [make_invoice(idx) for idx in range(count)]
+	results = {}
+
+	del doc_reads[:]
+	start = time.perf_counter()
+	legacy_receipts = [legacy_build_pos_receipt_escpos(doc, printer_width) for doc in invoices]
+	results["legacy_receipt"] = (time.perf_counter() - start, len(doc_reads))
+
+	del doc_reads[:]
+	start = time.perf_counter()
+	compiled_receipts = [render_receipt(doc, printer_width) for doc in invoices]
+	results["compiled_receipt"] = (time.perf_counter() - start, len(doc_reads))
+
+	start = time.perf_counter()
+	legacy_kots = [legacy_build_kot_escpos(doc, printer_width) for doc in invoices]
+	results["legacy_kot"] = (time.perf_counter() - start, 0)
+
+	start = time.perf_counter()
+	frozen = _FrozenDatetime.now()
+	compiled_kots = [render_kot(doc, printer_width, timestamp=frozen) for doc in invoices]
+	results["compiled_kot"] = (time.perf_counter() - start, 0)
+
+	assert legacy_receipts == compiled_receipts, "receipt output differs"
+	assert legacy_kots == compiled_kots, "KOT output differs"
+
+	return results
+
+
+if __name__ == "__main__":
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+	width = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+	results = run(count, width)
+	print(f"{count} documents, printer width {width} (output byte-identical)")
+	for name, (elapsed, reads) in results.items():
+		print(f"  {name:<18} {elapsed * 1000:8.1f} ms  {elapsed / count * 1e6:7.1f} us/doc  doc reads: {reads}")
@@ -33,26 +33,33 @@ export function useKOTRealtime(kitchen, station, onEvent) {
       return
     }
 
-    // Subscribe to kitchen channel
+    const realtime = window.frappe.realtime
+
+    // KOT events are sent to the Kitchen / Kitchen Station document rooms,
+    // so join those rooms before listening for the events
     const kitchenChannel = `kitchen:${kitchen}`
-    const stationChannel = station ? `station:${station}` : null
+    const stationChannel = station ? `kitchen:station:${station}` : null
 
     console.log(`Subscribing to kitchen updates: ${kitchenChannel}`)
-    window.frappe.realtime.on(kitchenChannel, handleEvent)
+    realtime.doc_subscribe?.('Kitchen', kitchen)
+    realtime.on(kitchenChannel, handleEvent)
 
     if (stationChannel) {
       console.log(`Subscribing to station updates: ${stationChannel}`)
-      window.frappe.realtime.on(stationChannel, handleEvent)
+      realtime.doc_subscribe?.('Kitchen Station', station)
+      realtime.on(stationChannel, handleEvent)
     }
 
     // Cleanup on unmount
     return () => {
       console.log(`Unsubscribing from kitchen updates: ${kitchenChannel}`)
-      window.frappe.realtime.off(kitchenChannel, handleEvent)
+      realtime.off(kitchenChannel, handleEvent)
+      realtime.doc_unsubscribe?.('Kitchen', kitchen)
 
       if (stationChannel) {
         console.log(`Unsubscribing from station updates: ${stationChannel}`)
-        window.frappe.realtime.off(stationChannel, handleEvent)
+        realtime.off(stationChannel, handleEvent)
+        realtime.doc_unsubscribe?.('Kitchen Station', station)
       }
     }
   }, [kitchen, station, handleEvent])
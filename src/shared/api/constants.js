@@ -57,8 +57,10 @@ export const API = {
   ADD_ITEM: 'imogi_pos.api.orders.add_item_to_order',
   UPDATE_ITEM_QTY: 'imogi_pos.api.orders.update_item_qty',
   REMOVE_ITEM: 'imogi_pos.api.orders.remove_item',
+  PATCH_ORDER_ITEMS: 'imogi_pos.api.orders.patch_order_items',
   REQUEST_BILL: 'imogi_pos.api.orders.request_bill',
   CLAIM_ORDER: 'imogi_pos.api.orders.claim_order',
+  GET_CLAIM_STATUS_BULK: 'imogi_pos.api.order_concurrency.get_claim_status_bulk',
   
   // Billing Operations
   LIST_ORDERS_FOR_CASHIER: 'imogi_pos.api.billing.list_orders_for_cashier',
@@ -107,6 +109,7 @@ export const API = {
   SHOW_THANK_YOU: 'imogi_pos.api.customer_display.show_thank_you',
   
   // Module Select Operations
+  BOOTSTRAP: 'imogi_pos.api.module_select.bootstrap',
   GET_AVAILABLE_MODULES: 'imogi_pos.api.module_select.get_available_modules',
   VALIDATE_OPENING_SESSION: 'imogi_pos.api.module_select.validate_opening_session',
   GET_ACTIVE_POS_OPENING: 'imogi_pos.api.module_select.get_active_pos_opening',
@@ -0,0 +1,901 @@
+"""Query-counting benchmark harness for IMOGI POS hot paths.
+
+Builds on the ``types.ModuleType`` frappe stubs used throughout ``tests/``,
+backed by an in-memory ``CountingDB`` instead of ad-hoc lambdas:
+
+* ``CountingDB`` answers ``get_all``/``get_list``/``get_value``/``exists``/
+  ``sql`` from in-memory tables. Each call counts as one query, with a
+  simulated per-query latency, and is logged per doctype so N+1 patterns
+  are easy to spot.
+* ``seed_catalog`` fills it with a synthetic site: items, 5-component BOMs,
+  bins, prices, open POS Orders, KOT Tickets, floors and tables.
+* ``SCENARIOS`` run the real ``imogi_pos`` code for each hot path against that
+  site. ``run_scenario`` returns the query count, the per-doctype breakdown,
+  wall time and simulated DB time.
+
+``tests/test_query_budgets.py`` asserts the counts against ``QUERY_BUDGETS``.
+For a full report at larger scales run::
+
+    python -m tests.benchmark_harness --items 20000
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import re
+import sys
+import time
+import types
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BENCH_NOW = datetime.datetime(2026, 1, 5, 12, 0, 0)
+
+# Child tables loaded with their parent by ``get_doc``
+CHILD_TABLES = {
+    "POS Order": {"items": "POS Order Item"},
+    "KOT Ticket": {"items": "KOT Item"},
+    "BOM": {"items": "BOM Item"},
+}
+
+# Maximum queries per scenario at the CI scale (``CI_SCALE``). Lower them when
+# a hot path gets cheaper; a failing budget means a new query per row crept in.
+CI_SCALE = {"items": 1000, "open_orders": 200, "kots": 500, "tables": 40}
+QUERY_BUDGETS = {
+    "get_pos_items": 4,
+    "get_items_stock_batch": 3501,
+    "list_orders_for_cashier": 443,
+    "get_kots_for_kitchen": 501,
+    "get_table_status": 163,
+    "generate_invoice": 224,
+}
+
+
+class ValidationError(Exception):
+    pass
+
+
+class PermissionError(Exception):
+    pass
+
+
+class DoesNotExistError(ValidationError):
+    pass
+
+
+class Row(dict):
+    """``frappe._dict`` stand-in: a dict with attribute access."""
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+class FakeDoc(types.SimpleNamespace):
+    """Minimal Document: attribute access plus the methods hot paths call."""
+
+    def __init__(self, db=None, **values):
+        super().__init__(**values)
+        self.__dict__["_db"] = db
+        self.flags = types.SimpleNamespace()
+
+    def __getattr__(self, item):
+        # Documents expose every DocType field; unset ones read as None
+        if item.startswith("__"):
+            raise AttributeError(item)
+        return None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, default)
+        return default if value is None else value
+
+    def set(self, key, value):
+        setattr(self, key, value)
+
+    def update(self, values):
+        for key, value in (values or {}).items():
+            setattr(self, key, value)
+        return self
+
+    def append(self, field, value):
+        rows = getattr(self, field, None)
+        if rows is None:
+            rows = []
+            setattr(self, field, rows)
+        row = value if isinstance(value, FakeDoc) else FakeDoc(**dict(value or {}))
+        rows.append(row)
+        return row
+
+    def as_dict(self):
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+    def insert(self, *args, **kwargs):
+        if self._db is not None:
+            self._db.write("insert", getattr(self, "doctype", None))
+        if not getattr(self, "name", None):
+            self.name = f"{getattr(self, 'doctype', 'DOC')}-BENCH"
+        return self
+
+    def save(self, *args, **kwargs):
+        if self._db is not None:
+            self._db.write("save", getattr(self, "doctype", None))
+        return self
+
+    def submit(self):
+        if self._db is not None:
+            self._db.write("submit", getattr(self, "doctype", None))
+        self.docstatus = 1
+        return self
+
+    def db_set(self, *args, **kwargs):
+        if self._db is not None:
+            self._db.write("db_set", getattr(self, "doctype", None))
+
+    def set_missing_values(self, *args, **kwargs):
+        return None
+
+    def calculate_taxes_and_totals(self, *args, **kwargs):
+        return None
+
+    def run_method(self, *args, **kwargs):
+        return None
+
+    def is_new(self):
+        return not getattr(self, "name", None)
+
+
+class FakeMeta:
+    def __init__(self, doctype, missing_fields=()):
+        self.doctype = doctype
+        self.missing_fields = set(missing_fields)
+
+    def has_field(self, fieldname):
+        return fieldname not in self.missing_fields
+
+    def get_field(self, fieldname):
+        if not self.has_field(fieldname):
+            return None
+        return types.SimpleNamespace(fieldname=fieldname, options=None, fieldtype="Data")
+
+
+class CountingDB:
+    """In-memory tables that count every query.
+
+    Args:
+        latency_ms: Simulated round trip added to ``simulated_ms`` per query
+        sleep: Actually sleep for the simulated latency (off by default so
+            the CI run stays fast)
+    """
+
+    def __init__(self, latency_ms=0.5, sleep=False):
+        self.latency_ms = latency_ms
+        self.sleep = sleep
+        self.tables = defaultdict(list)
+        self.singles = defaultdict(dict)
+        self.missing_fields = defaultdict(set)
+        self.sql_handlers = []
+        self._indexes = {}
+        self._cached_docs = set()
+        self.reset_counters()
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def reset_counters(self):
+        self.queries = 0
+        self.writes = 0
+        self.simulated_ms = 0.0
+        self.by_doctype = Counter()
+        self._cached_docs = set()
+
+    def _hit(self, kind, doctype):
+        self.queries += 1
+        self.by_doctype[f"{kind} {doctype}"] += 1
+        self.simulated_ms += self.latency_ms
+        if self.sleep and self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def write(self, kind, doctype):
+        self.writes += 1
+        self._hit(kind, doctype)
+
+    def insert(self, doctype, **values):
+        row = Row(values)
+        row.setdefault("name", f"{doctype}-{len(self.tables[doctype]) + 1}")
+        self.tables[doctype].append(row)
+        self._indexes = {key: index for key, index in self._indexes.items() if key[0] != doctype}
+        return row
+
+    def add_sql_handler(self, pattern, handler):
+        """Answer raw SQL matching ``pattern`` with ``handler(values, as_dict)``."""
+        self.sql_handlers.append((re.compile(pattern, re.S | re.I), handler))
+
+    # -- row matching ------------------------------------------------------
+
+    def _index(self, doctype, field):
+        key = (doctype, field)
+        if key not in self._indexes:
+            index = defaultdict(list)
+            for row in self.tables[doctype]:
+                value = row.get(field)
+                if isinstance(value, (str, int, float)) or value is None:
+                    index[value].append(row)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def _conditions(self, doctype, filters):
+        if not filters:
+            return []
+        if isinstance(filters, str):
+            return [("name", "=", filters)]
+        if isinstance(filters, dict):
+            conditions = []
+            for field, value in filters.items():
+                if isinstance(value, (list, tuple)) and value and isinstance(value[0], str) and len(value) == 2:
+                    conditions.append((field, value[0].lower(), value[1]))
+                else:
+                    conditions.append((field, "=", value))
+            return conditions
+
+        conditions = []
+        for entry in filters:
+            entry = list(entry)
+            if len(entry) >= 4:
+                entry = entry[1:4]
+            if len(entry) == 2:
+                entry = [entry[0], "=", entry[1]]
+            field, operator, value = entry
+            conditions.append((field, str(operator).lower(), value))
+        return conditions
+
+    @staticmethod
+    def _match(row, field, operator, value):
+        actual = row.get(field)
+        if isinstance(actual, datetime.datetime) and isinstance(value, str):
+            actual = actual.strftime("%Y-%m-%d %H:%M:%S")
+        elif isinstance(actual, datetime.date) and isinstance(value, str):
+            actual = actual.isoformat()
+
+        if operator in ("=", "=="):
+            return actual == value
+        if operator == "!=":
+            return actual != value
+        if operator == "in":
+            return actual in (value or [])
+        if operator == "not in":
+            return actual not in (value or [])
+        if operator == "is":
+            is_set = actual not in (None, "")
+            return is_set if value == "set" else not is_set
+        if operator in ("like", "not like"):
+            pattern = "^" + re.escape(str(value)).replace("%", ".*") + "$"
+            matched = bool(re.match(pattern, str(actual or ""), re.I))
+            return matched if operator == "like" else not matched
+        if operator == "between":
+            return actual is not None and value[0] <= actual <= value[1]
+        if actual is None:
+            return False
+        if operator == ">":
+            return actual > value
+        if operator == "<":
+            return actual < value
+        if operator == ">=":
+            return actual >= value
+        if operator == "<=":
+            return actual <= value
+        raise ValueError(f"Unsupported operator {operator}")
+
+    def _rows(self, doctype, filters=None, or_filters=None):
+        conditions = self._conditions(doctype, filters)
+        candidates = self.tables[doctype]
+        for field, operator, value in conditions:
+            if operator == "=" and (isinstance(value, (str, int, float)) or value is None):
+                candidates = self._index(doctype, field).get(value, [])
+                break
+
+        rows = [
+            row for row in candidates
+            if all(self._match(row, *condition) for condition in conditions)
+        ]
+        if or_filters:
+            alternatives = self._conditions(doctype, or_filters)
+            rows = [row for row in rows if any(self._match(row, *condition) for condition in alternatives)]
+        return rows
+
+    @staticmethod
+    def _project(row, fields):
+        if not fields or fields == ["*"] or fields == "*":
+            return Row(row)
+        if isinstance(fields, str):
+            fields = [field.strip() for field in fields.split(",")]
+        projected = Row()
+        for field in fields:
+            parts = re.split(r"\s+as\s+", field, maxsplit=1, flags=re.I)
+            source = parts[0].strip()
+            alias = parts[1].strip() if len(parts) > 1 else source
+            source = source.split(".")[-1].strip("`")
+            alias = alias.split(".")[-1].strip("`")
+            projected[alias] = row.get(source)
+        return projected
+
+    @staticmethod
+    def _sort(rows, order_by):
+        if not order_by:
+            return rows
+        first = order_by.split(",")[0].strip().split()
+        field = first[0].split(".")[-1].strip("`")
+        reverse = len(first) > 1 and first[1].lower() == "desc"
+        return sorted(rows, key=lambda row: (row.get(field) is None, row.get(field) or 0 if not isinstance(row.get(field), str) else row.get(field)), reverse=reverse)
+
+    # -- frappe.db API -----------------------------------------------------
+
+    def get_all(self, doctype, filters=None, fields=None, or_filters=None, order_by=None,
+                pluck=None, limit_page_length=None, limit=None, page_length=None,
+                limit_start=0, start=0, **kwargs):
+        self._hit("get_all", doctype)
+        rows = self._sort(self._rows(doctype, filters, or_filters), order_by)
+        limit = limit_page_length or limit or page_length
+        if limit:
+            offset = limit_start or start or 0
+            rows = rows[offset:offset + int(limit)]
+        if pluck:
+            return [row.get(pluck) for row in rows]
+        return [self._project(row, fields or ["name"]) for row in rows]
+
+    get_list = get_all
+
+    def get_value(self, doctype, filters=None, fieldname="name", as_dict=False, order_by=None, **kwargs):
+        self._hit("get_value", doctype)
+        if filters is None or filters == doctype:
+            row = self.singles[doctype]
+        else:
+            rows = self._rows(doctype, filters)
+            row = rows[0] if rows else None
+        if row is None:
+            return None
+        if isinstance(fieldname, (list, tuple)):
+            values = self._project(row, list(fieldname))
+            return values if as_dict else tuple(values.values())
+        if fieldname == "*":
+            return Row(row)
+        return next(iter(self._project(row, [fieldname]).values()))
+
+    def get_values(self, doctype, filters=None, fieldname="name", as_dict=False, **kwargs):
+        self._hit("get_values", doctype)
+        fields = list(fieldname) if isinstance(fieldname, (list, tuple)) else [fieldname]
+        rows = [self._project(row, fields) for row in self._rows(doctype, filters)]
+        return rows if as_dict else [tuple(row.values()) for row in rows]
+
+    def get_single_value(self, doctype, fieldname, cache=False):
+        self._hit("get_single_value", doctype)
+        return self.singles[doctype].get(fieldname)
+
+    def exists(self, doctype, name=None, cache=False):
+        self._hit("exists", doctype)
+        if doctype == "DocType":
+            return name
+        rows = self._rows(doctype, name)
+        return rows[0].get("name") if rows else None
+
+    def count(self, doctype, filters=None, **kwargs):
+        self._hit("count", doctype)
+        return len(self._rows(doctype, filters))
+
+    def has_column(self, doctype, column):
+        # Frappe caches table columns per process; no query
+        return column not in self.missing_fields[doctype]
+
+    def sql(self, query, values=None, as_dict=False, **kwargs):
+        table = re.search(r"`tab([^`]+)`", query)
+        self._hit("sql", table.group(1) if table else "?")
+        for pattern, handler in self.sql_handlers:
+            if pattern.search(query):
+                return handler(values, as_dict)
+        return []
+
+    def set_value(self, *args, **kwargs):
+        self.write("set_value", args[0] if args else None)
+
+    def commit(self):
+        pass
+
+    def rollback(self, *args, **kwargs):
+        pass
+
+    def savepoint(self, *args, **kwargs):
+        pass
+
+    # -- documents ---------------------------------------------------------
+
+    def get_doc(self, doctype, name=None, for_update=False):
+        if isinstance(doctype, dict):
+            values = dict(doctype)
+            doc = FakeDoc(db=self, **{key: value for key, value in values.items() if not isinstance(value, list)})
+            for field, rows in values.items():
+                if isinstance(rows, list):
+                    setattr(doc, field, [])
+                    for row in rows:
+                        doc.append(field, row)
+            return doc
+
+        self._hit("get_doc", doctype)
+        rows = self._index(doctype, "name").get(name) or []
+        if not rows:
+            raise DoesNotExistError(f"{doctype} {name} not found")
+        doc = FakeDoc(db=self, doctype=doctype, **rows[0])
+        for field, child_doctype in CHILD_TABLES.get(doctype, {}).items():
+            self._hit("get_doc", child_doctype)
+            children = sorted(self._index(child_doctype, "parent").get(name, []), key=lambda row: row.get("idx") or 0)
+            setattr(doc, field, [FakeDoc(**child) for child in children])
+        return doc
+
+    def get_cached_doc(self, doctype, name=None):
+        # Served from the document cache after the first read
+        key = (doctype, name)
+        if key in self._cached_docs:
+            queries, simulated = self.queries, self.simulated_ms
+            by_doctype = self.by_doctype.copy()
+            doc = self.get_doc(doctype, name)
+            self.queries, self.simulated_ms, self.by_doctype = queries, simulated, by_doctype
+            return doc
+        self._cached_docs.add(key)
+        return self.get_doc(doctype, name)
+
+
+class FakeCache:
+    """Dict-backed ``frappe.cache()`` supporting the calls the app makes."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = defaultdict(dict)
+
+    def make_key(self, key):
+        return f"bench:{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, nx=False, **kwargs):
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        return True
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def get_value(self, key, *args, **kwargs):
+        return self.values.get(self.make_key(key))
+
+    def set_value(self, key, value, *args, **kwargs):
+        self.values[self.make_key(key)] = value
+
+    def delete_value(self, key, *args, **kwargs):
+        self.values.pop(self.make_key(key), None)
+
+    def hget(self, name, key, *args, **kwargs):
+        return self.hashes[self.make_key(name)].get(key)
+
+    def hset(self, name, key, value, *args, **kwargs):
+        self.hashes[self.make_key(name)][key] = value
+
+    def hmget(self, name, keys):
+        import pickle
+
+        values = self.hashes[name]
+        return [pickle.dumps(values[key]) if key in values else None for key in keys]
+
+    def hdel(self, name, key):
+        self.hashes[self.make_key(name)].pop(key, None)
+
+    def delete_key(self, name):
+        self.hashes.pop(self.make_key(name), None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Raw pipeline over ``FakeCache``: keys arrive prefixed, values pickled."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.commands = []
+
+    def hset(self, name, mapping):
+        self.commands.append((name, mapping))
+
+    def execute(self):
+        import pickle
+
+        for name, mapping in self.commands:
+            self.cache.hashes[name].update(
+                (key, pickle.loads(value)) for key, value in mapping.items()
+            )
+        return [len(mapping) for _name, mapping in self.commands]
+
+
+def _today():
+    return BENCH_NOW.date().isoformat()
+
+
+def build_utils():
+    """Return a ``frappe.utils`` stub with the helpers the app imports."""
+    utils = types.ModuleType("frappe.utils")
+
+    def flt(value, precision=None):
+        try:
+            number = float(value or 0)
+        except (TypeError, ValueError):
+            number = 0.0
+        return round(number, precision) if precision is not None else number
+
+    def cint(value):
+        try:
+            return int(float(value or 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def get_datetime(value=None):
+        if value is None:
+            return BENCH_NOW
+        if isinstance(value, datetime.datetime):
+            return value
+        if isinstance(value, datetime.date):
+            return datetime.datetime.combine(value, datetime.time())
+        return datetime.datetime.fromisoformat(str(value))
+
+    def getdate(value=None):
+        return get_datetime(value).date()
+
+    def add_to_date(value, days=0, hours=0, minutes=0, seconds=0, as_string=False, **kwargs):
+        result = get_datetime(value) + datetime.timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
+        return str(result) if as_string else result
+
+    utils.flt = flt
+    utils.cint = cint
+    utils.cstr = lambda value=None: "" if value is None else str(value)
+    utils.today = _today
+    utils.nowdate = _today
+    utils.nowtime = lambda: BENCH_NOW.strftime("%H:%M:%S")
+    utils.now = lambda: BENCH_NOW.strftime("%Y-%m-%d %H:%M:%S.%f")
+    utils.now_datetime = lambda: BENCH_NOW
+    utils.get_datetime = get_datetime
+    utils.getdate = getdate
+    utils.add_to_date = add_to_date
+    utils.add_days = lambda value, days: getdate(value) + datetime.timedelta(days=days)
+    utils.date_diff = lambda end, start: (getdate(end) - getdate(start)).days
+    utils.time_diff_in_seconds = lambda end, start: (get_datetime(end) - get_datetime(start)).total_seconds()
+    utils.get_url = lambda path=None: f"https://bench.local{path or ''}"
+    utils.escape_html = lambda text: text
+    utils.strip_html = lambda text: text
+    utils.random_string = lambda length: "x" * length
+    return utils
+
+
+def build_frappe(db, user="cashier@bench.local", roles=("Cashier", "Waiter", "Kitchen Staff")):
+    """Return a frappe stub module backed by ``db``."""
+    frappe = types.ModuleType("frappe")
+    utils = build_utils()
+    cache = FakeCache()
+
+    frappe.utils = utils
+    frappe._ = lambda text, *args, **kwargs: text
+    frappe._dict = Row
+    frappe.ValidationError = ValidationError
+    frappe.PermissionError = PermissionError
+    frappe.DoesNotExistError = DoesNotExistError
+    frappe.DuplicateEntryError = ValidationError
+    frappe.session = types.SimpleNamespace(user=user, data=Row())
+    frappe.local = types.SimpleNamespace(request=None, request_ip="127.0.0.1", form_dict=Row(), flags=Row())
+    frappe.flags = types.SimpleNamespace()
+    frappe.conf = Row()
+    frappe.db = db
+    frappe.cache = lambda: cache
+    frappe.whitelist = lambda *args, **kwargs: (lambda fn: fn)
+    frappe.parse_json = lambda value: json.loads(value) if isinstance(value, str) else value
+    frappe.as_json = json.dumps
+
+    def throw(message, exc=ValidationError, title=None, **kwargs):
+        raise (exc or ValidationError)(message)
+
+    frappe.throw = throw
+    frappe.msgprint = lambda *args, **kwargs: None
+    frappe.log_error = lambda *args, **kwargs: None
+    frappe.get_traceback = lambda *args, **kwargs: ""
+    frappe.logger = lambda *args, **kwargs: types.SimpleNamespace(
+        debug=lambda *a, **k: None, info=lambda *a, **k: None,
+        warning=lambda *a, **k: None, error=lambda *a, **k: None,
+    )
+    frappe.get_roles = lambda user=None: list(roles)
+    frappe.has_role = lambda role, user=None: role in roles
+    frappe.only_for = lambda *args, **kwargs: None
+    frappe.has_permission = lambda *args, **kwargs: True
+    frappe.get_all = db.get_all
+    frappe.get_list = db.get_list
+    frappe.get_value = db.get_value
+    frappe.get_doc = db.get_doc
+    frappe.get_cached_doc = db.get_cached_doc
+    frappe.get_meta = lambda doctype, cached=True: FakeMeta(doctype, db.missing_fields[doctype])
+    frappe.new_doc = lambda doctype: FakeDoc(db=db, doctype=doctype)
+    frappe.defaults = types.SimpleNamespace(
+        get_user_default=lambda key, user=None: None,
+        get_global_default=lambda key: None,
+        get_defaults=lambda: {},
+    )
+    frappe.enqueue = lambda *args, **kwargs: None
+
+    realtime = types.ModuleType("frappe.realtime")
+    realtime.publish_realtime = lambda *args, **kwargs: None
+    realtime.get_doc_room = lambda doctype, docname: f"doc:{doctype}/{docname}"
+    frappe.realtime = realtime
+    frappe.publish_realtime = realtime.publish_realtime
+    return frappe
+
+
+def build_operational_context(pos_profile, branch):
+    """Stub of ``imogi_pos.utils.operational_context`` with a fixed context."""
+    module = types.ModuleType("imogi_pos.utils.operational_context")
+    context = {"pos_profile": pos_profile, "branch": branch}
+    module.get_active_operational_context = lambda user=None, auto_resolve=True: dict(context)
+    module.require_operational_context = lambda user=None, allow_optional=False: dict(context)
+    module.resolve_operational_context = lambda **kwargs: {
+        "current_pos_profile": pos_profile, "current_branch": branch,
+    }
+    module.set_active_operational_context = lambda **kwargs: dict(context)
+    return module
+
+
+def seed_catalog(db, items=1000, bom_share=0.2, bom_components=5, raw_materials=100,
+                 open_orders=200, lines_per_order=4, kots=500, lines_per_kot=3, tables=40):
+    """Fill ``db`` with a synthetic restaurant site.
+
+    Returns:
+        dict: Names the scenarios need (profile, branch, floor, kitchen, ...)
+    """
+    profile, branch, floor, warehouse = "Bench Profile", "Main", "Ground Floor", "Stores"
+    price_list, kitchen, station = "Standard Selling", "Main Kitchen", "Grill"
+
+    db.insert(
+        "POS Profile", name=profile, company="Bench Co", warehouse=warehouse,
+        selling_price_list=price_list, imogi_pos_domain="Restaurant", imogi_mode="Table",
+        imogi_branch=branch, update_stock=1, imogi_require_pos_session=0,
+        imogi_allow_non_sales_items=0, imogi_allow_out_of_stock_orders=0, customer="Walk-in",
+        pos_menu_profile=None, taxes_and_charges=None,
+    )
+    db.insert("Branch", name=branch)
+    db.singles["Stock Settings"] = {"allow_negative_stock": 1, "default_warehouse": warehouse}
+
+    for index in range(raw_materials):
+        code = f"RM-{index:04d}"
+        db.insert("Item", name=code, item_code=code, item_name=f"Raw {index}", stock_uom="Gram",
+                  disabled=0, is_sales_item=0, has_variants=0, variant_of=None, is_stock_item=1)
+        db.insert("Bin", item_code=code, warehouse=warehouse, actual_qty=5000)
+
+    item_codes = []
+    bom_count = int(items * bom_share)
+    for index in range(items):
+        code = f"ITEM-{index:05d}"
+        item_codes.append(code)
+        db.insert(
+            "Item", name=code, item_code=code, item_name=f"Dish {index}", description=f"Dish {index}",
+            image=None, stock_uom="Nos", standard_rate=10000 + index, item_group="Food",
+            has_variants=0, variant_of=None, disabled=0, is_sales_item=1, is_stock_item=1,
+            end_of_life=None, menu_category=f"Category {index % 12}", imogi_menu_channel=None,
+            pos_menu_profile=None, default_kitchen=kitchen, default_kitchen_station=station,
+        )
+        db.insert("Item Price", item_code=code, price_list=price_list, price_list_rate=10000 + index)
+        db.insert("Bin", item_code=code, warehouse=warehouse, actual_qty=100)
+
+        if index < bom_count:
+            bom = f"BOM-{code}-001"
+            db.insert("BOM", name=bom, item=code, is_default=1, is_active=1, quantity=1, docstatus=1)
+            for component in range(bom_components):
+                db.insert(
+                    "BOM Item", parent=bom, parenttype="BOM", parentfield="items", idx=component + 1,
+                    item_code=f"RM-{(index + component) % raw_materials:04d}", qty=10 + component,
+                    source_warehouse=warehouse,
+                )
+
+    for index in range(50):
+        db.insert("Customer", name=f"CUST-{index:03d}", customer_name=f"Guest {index}")
+
+    db.insert("Restaurant Floor", name=floor, branch=branch)
+    table_names = []
+    for index in range(tables):
+        name = f"T-{index + 1:03d}"
+        table_names.append(name)
+        db.insert("Restaurant Table", name=name, table_name=name, floor=floor, status="Available",
+                  no_of_seats=4, minimum_seating=1, current_pos_order=None)
+
+    orders = []
+    for index in range(open_orders):
+        name = f"POS-ORD-{index:05d}"
+        table = table_names[index] if index < len(table_names) else None
+        orders.append(name)
+        lines = [item_codes[(index * lines_per_order + line) % items] for line in range(lines_per_order)]
+        db.insert(
+            "POS Order", name=name, branch=branch, pos_profile=profile, customer=f"CUST-{index % 50:03d}",
+            order_type="Dine In" if table else "Counter", table=table, floor=floor if table else None,
+            queue_number=index + 1, workflow_state="Served" if index % 2 else "Ready",
+            totals=sum(10000 + item_codes.index(code) for code in lines), order_version=1,
+            creation=BENCH_NOW - datetime.timedelta(minutes=index), sales_invoice=None,
+            selling_price_list=price_list, docstatus=0,
+        )
+        for line, code in enumerate(lines):
+            db.insert("POS Order Item", name=f"{name}-{line + 1}", parent=name, parenttype="POS Order",
+                      parentfield="items", idx=line + 1, item=code, item_name=None, qty=1,
+                      rate=10000, amount=10000, notes="", item_options=None)
+        if table:
+            db._indexes.clear()
+            for row in db.tables["Restaurant Table"]:
+                if row["name"] == table:
+                    row.update(status="Occupied", current_pos_order=name)
+
+    for index in range(kots):
+        name = f"KOT-{index:05d}"
+        db.insert(
+            "KOT Ticket", name=name, branch=branch, kitchen=kitchen, kitchen_station=station,
+            workflow_state="Queued", pos_order=orders[index % len(orders)] if orders else None,
+            table=None, floor=None, order_type="Dine In", customer=None,
+            creation=BENCH_NOW - datetime.timedelta(minutes=index), creation_time=None,
+            created_by="waiter@bench.local", owner="waiter@bench.local",
+        )
+        for line in range(lines_per_kot):
+            code = item_codes[(index + line) % items]
+            db.insert("KOT Item", parent=name, parenttype="KOT Ticket", parentfield="items", idx=line + 1,
+                      item_code=code, item_name=f"Dish {code}", workflow_state="Queued", qty=1,
+                      notes="", item_options=None, options_display=None)
+
+    db._indexes.clear()
+    return {
+        "pos_profile": profile, "branch": branch, "floor": floor, "kitchen": kitchen,
+        "station": station, "warehouse": warehouse, "price_list": price_list,
+        "item_codes": item_codes, "orders": orders,
+    }
+
+
+@contextmanager
+def bench_site(db, site):
+    """Install the frappe stub and fixed operational context for ``db``.
+
+    Every ``imogi_pos`` module imported inside the block is dropped again on
+    exit, as are the stubs, so the rest of the suite is unaffected.
+    """
+    frappe = build_frappe(db)
+    stubs = {
+        "frappe": frappe,
+        "frappe.utils": frappe.utils,
+        "frappe.realtime": frappe.realtime,
+        "imogi_pos.utils.operational_context": build_operational_context(site["pos_profile"], site["branch"]),
+    }
+    # Modules imported earlier are bound to another frappe stub; load fresh copies
+    saved_app = {name: module for name, module in sys.modules.items() if name.startswith("imogi_pos")}
+    saved = {name: sys.modules.get(name) for name in stubs}
+    for name in saved_app:
+        sys.modules.pop(name)
+    sys.path.insert(0, str(REPO_ROOT))
+    sys.modules.update(stubs)
+    try:
+        yield frappe
+    finally:
+        for name in [name for name in sys.modules if name.startswith("imogi_pos")]:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved_app)
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        sys.path.remove(str(REPO_ROOT))
+
+
+def _get_pos_items(site):
+    items = importlib.import_module("imogi_pos.api.items")
+    return lambda: items.get_pos_items(pos_profile=site["pos_profile"], mode="sellable")
+
+
+def _get_items_stock_batch(site):
+    billing = importlib.import_module("imogi_pos.api.billing")
+    return lambda: billing.get_items_stock_batch(site["item_codes"], pos_profile=site["pos_profile"])
+
+
+def _list_orders_for_cashier(site):
+    billing = importlib.import_module("imogi_pos.api.billing")
+    return lambda: billing.list_orders_for_cashier()
+
+
+def _get_kots_for_kitchen(site):
+    kot = importlib.import_module("imogi_pos.api.kot")
+    return lambda: kot.get_kots_for_kitchen(kitchen=site["kitchen"])
+
+
+def _get_table_status(site):
+    layout = importlib.import_module("imogi_pos.api.layout")
+    return lambda: layout.get_table_status(floor=site["floor"])
+
+
+def _generate_invoice(site):
+    billing = importlib.import_module("imogi_pos.api.billing")
+    return lambda: billing.generate_invoice(site["orders"][0], mode_of_payment="Cash", amount=40000)
+
+
+SCENARIOS = {
+    "get_pos_items": _get_pos_items,
+    "get_items_stock_batch": _get_items_stock_batch,
+    "list_orders_for_cashier": _list_orders_for_cashier,
+    "get_kots_for_kitchen": _get_kots_for_kitchen,
+    "get_table_status": _get_table_status,
+    "generate_invoice": _generate_invoice,
+}
+
+
+def run_scenario(name, items=1000, open_orders=200, kots=500, tables=40, latency_ms=0.5, sleep=False):
+    """Run one scenario on a freshly seeded site.
+
+    Returns:
+        dict: ``{"scenario", "queries", "writes", "wall_ms", "db_ms",
+        "by_doctype", "result"}``
+    """
+    db = CountingDB(latency_ms=latency_ms, sleep=sleep)
+    site = seed_catalog(db, items=items, open_orders=open_orders, kots=kots, tables=tables)
+
+    with bench_site(db, site):
+        call = SCENARIOS[name](site)
+        db.reset_counters()
+        started = time.perf_counter()
+        result = call()
+        wall_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "scenario": name,
+        "queries": db.queries,
+        "writes": db.writes,
+        "wall_ms": round(wall_ms, 2),
+        "db_ms": round(db.simulated_ms, 2),
+        "by_doctype": dict(db.by_doctype.most_common()),
+        "result": result,
+    }
+
+
+def format_report(results):
+    lines = [f"{'scenario':<26}{'queries':>9}{'ci budget':>11}{'wall ms':>10}{'sim db ms':>11}  top queries"]
+    for result in results:
+        top = ", ".join(f"{key} x{count}" for key, count in list(result["by_doctype"].items())[:3])
+        budget = QUERY_BUDGETS.get(result["scenario"], "-")
+        lines.append(
+            f"{result['scenario']:<26}{result['queries']:>9}{budget:>11}"
+            f"{result['wall_ms']:>10.1f}{result['db_ms']:>11.1f}  {top}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query-count benchmark for IMOGI POS hot paths")
+    parser.add_argument("--items", type=int, default=CI_SCALE["items"])
+    parser.add_argument("--orders", type=int, default=CI_SCALE["open_orders"])
+    parser.add_argument("--kots", type=int, default=CI_SCALE["kots"])
+    parser.add_argument("--tables", type=int, default=CI_SCALE["tables"])
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    parser.add_argument("--sleep", action="store_true", help="Really sleep for the simulated latency")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS))
+    args = parser.parse_args(argv)
+
+    results = [
+        run_scenario(name, items=args.items, open_orders=args.orders, kots=args.kots,
+                     tables=args.tables, latency_ms=args.latency_ms, sleep=args.sleep)
+        for name in args.scenarios
+    ]
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
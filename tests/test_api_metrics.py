@@ -0,0 +1,166 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class FakePipeline:
+    def __init__(self, cache):
+        self.cache = cache
+        self.results = []
+
+    def sismember(self, key, value):
+        self.results.append(value in self.cache.sets.get(key, set()))
+
+    def scard(self, key):
+        self.results.append(len(self.cache.sets.get(key, set())))
+
+    def sadd(self, key, value):
+        self.cache.sets.setdefault(key, set()).add(value)
+        self.results.append(1)
+
+    def hincrby(self, key, field, amount):
+        values = self.cache.hashes.setdefault(key, {})
+        values[field] = values.get(field, 0) + amount
+        self.results.append(values[field])
+
+    hincrbyfloat = hincrby
+
+    def hgetall(self, key):
+        self.results.append({field.encode(): str(value).encode() for field, value in self.cache.hashes.get(key, {}).items()})
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class FakeCache:
+    def __init__(self):
+        self.sets = {}
+        self.hashes = {}
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def smembers(self, key):
+        return {value.encode() for value in self.sets.get(self.make_key(key), set())}
+
+
+class Response:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {}
+
+    def calculate_content_length(self):
+        return len(self.body)
+
+
+@pytest.fixture
+def api_metrics(monkeypatch):
+    sys.path.insert(0, ".")
+
+    cashier = types.ModuleType("imogi_pos.api.cashier")
+    cashier.get_pending_orders = lambda: []
+    cashier.helper = lambda: None
+    monkeypatch.setitem(sys.modules, "imogi_pos.api.cashier", cashier)
+
+    frappe = types.ModuleType("frappe")
+    frappe.conf = {"imogi_api_instrumentation": 1}
+    frappe.local = types.SimpleNamespace(
+        request=types.SimpleNamespace(path="/api/method/imogi_pos.api.cashier.get_pending_orders"),
+        form_dict={},
+    )
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+    frappe.db = types.SimpleNamespace(sql=lambda query, values=None: [])
+    frappe.whitelisted = {cashier.get_pending_orders}
+
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    sys.modules.pop("imogi_pos.utils.api_metrics", None)
+    module = importlib.import_module("imogi_pos.utils.api_metrics")
+
+    yield frappe, module
+
+    sys.modules.pop("imogi_pos.utils.api_metrics", None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_request_emits_server_timing_and_histograms(api_metrics):
+    frappe, module = api_metrics
+    original_sql = frappe.db.sql
+
+    for _request in range(3):
+        module.start_request_probe()
+        for _query in range(12):
+            frappe.db.sql("select 1")
+        module.count_cache(hits=4, misses=1)
+        module.record_section("bootstrap-context", 1.5)
+        response = module.add_server_timing(Response(b'{"message": []}'))
+
+    assert frappe.db.sql is original_sql
+    header = response.headers["Server-Timing"]
+    assert header.startswith("total;dur=")
+    assert 'desc="12 queries"' in header
+    assert 'desc="4 hit 1 miss"' in header
+    assert "bootstrap-context;dur=1.5" in header
+
+    metrics = module.get_endpoint_metrics()["cashier.get_pending_orders"]
+    assert metrics["count"] == 3
+    assert metrics["avg_queries"] == 12
+    assert metrics["avg_bytes"] == len(b'{"message": []}')
+    assert metrics["cache_hit_ratio"] == 0.8
+    assert metrics["query_histogram"]["25"] == 3
+    assert metrics["p95_queries"] == 25
+
+
+def test_disabled_or_foreign_requests_are_not_probed(api_metrics):
+    frappe, module = api_metrics
+
+    frappe.local.request.path = "/api/method/frappe.client.get_list"
+    module.start_request_probe()
+    assert module.get_probe() is None
+
+    frappe.conf["imogi_api_instrumentation"] = 0
+    frappe.local.request.path = "/api/method/imogi_pos.api.cashier.get_pending_orders"
+    module.start_request_probe()
+    response = module.add_server_timing(Response(b"{}"))
+
+    assert module.get_probe() is None
+    assert "Server-Timing" not in response.headers
+
+
+def test_only_whitelisted_endpoints_are_recorded(api_metrics):
+    frappe, module = api_metrics
+
+    paths = ("cashier.helper", "cashier.does_not_exist", "no_such_module.get", "cashier.get_pending_orders")
+    for path in paths:
+        frappe.local.request.path = f"/api/method/imogi_pos.api.{path}"
+        module.start_request_probe()
+        module.add_server_timing(Response(b"{}", status_code=404))
+
+    assert list(module.get_endpoint_metrics()) == ["cashier.get_pending_orders"]
+
+
+def test_tracked_endpoints_are_capped(api_metrics, monkeypatch):
+    frappe, module = api_metrics
+    monkeypatch.setattr(module, "MAX_ENDPOINTS", 1)
+    monkeypatch.setattr(module, "_is_whitelisted", lambda endpoint: True)
+
+    for path in ("cashier.get_pending_orders", "cashier.other", "cashier.get_pending_orders"):
+        frappe.local.request.path = f"/api/method/imogi_pos.api.{path}"
+        module.start_request_probe()
+        module.add_server_timing(Response(b"{}"))
+
+    metrics = module.get_endpoint_metrics()
+    assert list(metrics) == ["cashier.get_pending_orders"]
+    assert metrics["cashier.get_pending_orders"]["count"] == 2
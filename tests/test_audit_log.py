@@ -0,0 +1,213 @@
+import importlib
+import json
+import sys
+import types
+
+import pytest
+
+
+class RawRedis:
+    """Raw redis-py commands on already prefixed keys."""
+
+    def __init__(self):
+        self.lists = {}
+        self.values = {}
+
+    def _rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    def _lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _ltrim(self, key, start, end):
+        self.lists[key] = self._lrange(key, start, end)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        return [getattr(self.redis, f"_{name}")(*args) for name, args in self.commands]
+
+
+class FakeCache(RawRedis):
+    """Mirrors frappe's RedisWrapper: list helpers prefix the key and take one value."""
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def rpush(self, key, value):
+        self._rpush(self.make_key(key), value)
+
+    def lpush(self, key, value):
+        self.lists.setdefault(self.make_key(key), []).insert(0, value)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def set(self, name, value, ex=None, nx=False):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    def delete(self, *names):
+        for name in names:
+            self.values.pop(name, None)
+            self.lists.pop(name, None)
+
+
+class Callbacks:
+    def __init__(self):
+        self.callbacks = []
+
+    def add(self, fn):
+        self.callbacks.append(fn)
+
+    def run(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for fn in callbacks:
+            fn()
+
+
+@pytest.fixture
+def audit_module():
+    sys.path.insert(0, ".")
+
+    utils = types.ModuleType("frappe.utils")
+    utils.now = lambda: "2024-01-01 10:00:00"
+    utils.get_url = lambda path=None: path or ""
+
+    frappe = types.ModuleType("frappe")
+    frappe._ = lambda x: x
+    frappe.whitelist = lambda *a, **k: (lambda fn: fn)
+    frappe.session = types.SimpleNamespace(user="cashier@example.com")
+    frappe.local = types.SimpleNamespace()
+    frappe.defaults = types.SimpleNamespace(get_user_default=lambda key: "BR-1")
+    frappe.errors = []
+    frappe.log_error = lambda *a, **k: frappe.errors.append(a)
+    frappe.enqueued = []
+    frappe.enqueue = lambda method, **kw: frappe.enqueued.append((method, kw))
+    frappe.generate_hash = lambda length=10: "hash"
+
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+
+    class DB:
+        def __init__(self):
+            self.after_commit = Callbacks()
+            self.after_rollback = Callbacks()
+            self.commits = 0
+            self.inserted = []
+
+        def exists(self, doctype, name=None):
+            return True
+
+        def commit(self):
+            self.commits += 1
+
+        def rollback(self):
+            pass
+
+        def bulk_insert(self, doctype, fields, values):
+            self.inserted.append((doctype, fields, values))
+
+    frappe.db = DB()
+    frappe.utils = utils
+
+    sys.modules["frappe"] = frappe
+    sys.modules["frappe.utils"] = utils
+
+    mod = importlib.import_module("imogi_pos.utils.audit_log")
+    importlib.reload(mod)
+
+    yield mod, frappe, cache
+
+    sys.modules.pop("frappe", None)
+    sys.modules.pop("frappe.utils", None)
+    sys.modules.pop("imogi_pos.utils.audit_log", None)
+    sys.path.remove(".")
+
+
+def test_log_operation_buffers_until_commit(audit_module):
+    mod, frappe, cache = audit_module
+
+    mod.log_payment("SINV-1", "Cash", 100, change_amount=5)
+    mod.log_print_operation("KOT Ticket", "KOT-1", printer_interface="LAN")
+
+    assert frappe.db.commits == 0
+    assert cache.lists.get(cache.make_key(mod.AUDIT_SPOOL_KEY)) is None
+    assert len(frappe.local.imogi_audit_buffer) == 2
+
+    frappe.db.after_commit.run()
+
+    spooled = [json.loads(raw) for raw in cache.lists[cache.make_key(mod.AUDIT_SPOOL_KEY)]]
+    assert [event["action"] for event in spooled] == ["payment", "print"]
+    assert spooled[0]["branch"] == "BR-1"
+    assert json.loads(spooled[0]["details"])["change_amount"] == 5
+    assert frappe.enqueued[0][0] == "imogi_pos.utils.audit_log.flush_audit_spool"
+    assert frappe.db.commits == 0
+
+
+def test_log_operation_discards_events_on_rollback(audit_module):
+    mod, frappe, cache = audit_module
+
+    mod.log_void_transaction("POS-1", 50, reason="test")
+    frappe.db.after_rollback.run()
+    frappe.db.after_commit.run()
+
+    assert not cache.lists.get(cache.make_key(mod.AUDIT_SPOOL_KEY))
+
+
+def test_bulk_operation_spools_nothing_before_commit(audit_module):
+    mod, frappe, cache = audit_module
+
+    for idx in range(500):
+        mod.log_operation("POS Order", "update", f"POS-{idx}")
+    frappe.db.after_rollback.run()
+    frappe.db.after_commit.run()
+
+    assert not cache.lists.get(cache.make_key(mod.AUDIT_SPOOL_KEY))
+
+
+def test_flush_audit_spool_writes_batches(audit_module):
+    mod, frappe, cache = audit_module
+
+    for idx in range(5):
+        mod.log_operation("Sales Invoice", "submit", f"SINV-{idx}")
+    frappe.db.after_commit.run()
+
+    written = mod.flush_audit_spool(batch_size=2)
+
+    assert written == 5
+    assert [len(values) for _dt, _fields, values in frappe.db.inserted] == [2, 2, 1]
+    doctype, fields, values = frappe.db.inserted[0]
+    assert doctype == "Audit Log"
+    assert values[0][fields.index("document_name")] == "SINV-0"
+    assert not cache.lists[cache.make_key(mod.AUDIT_SPOOL_KEY)]
+    assert not cache.values
+
+
+def test_failed_flush_keeps_events_in_spool(audit_module):
+    mod, frappe, cache = audit_module
+
+    for idx in range(3):
+        mod.log_operation("Sales Invoice", "submit", f"SINV-{idx}")
+    frappe.db.after_commit.run()
+
+    def fail(*args):
+        raise RuntimeError("db gone")
+
+    frappe.db.bulk_insert = fail
+    assert mod.flush_audit_spool(batch_size=2) == 0
+    assert len(cache.lists[cache.make_key(mod.AUDIT_SPOOL_KEY)]) == 3
+
+    # A drainer already running holds the lock
+    cache.set(cache.make_key(mod.AUDIT_FLUSH_LOCK_KEY), 1)
+    assert mod.flush_audit_spool() == 0
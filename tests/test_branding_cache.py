@@ -0,0 +1,125 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def hdel(self, name, key):
+        self.hashes.get(name, {}).pop(key, None)
+
+    def delete_key(self, name):
+        self.hashes.pop(name, None)
+
+
+@pytest.fixture
+def branding():
+    sys.path.insert(0, ".")
+
+    docs = {
+        ("POS Profile", "Dine In"): types.SimpleNamespace(brand_profile="Kopi", imogi_brand_name=None),
+        ("Brand Profile", "Kopi"): types.SimpleNamespace(brand_name="Kopi Kenangan", primary_color="#111111", logo=None),
+        ("Company", "IMOGI"): types.SimpleNamespace(company_logo="/files/imogi.png", company_name="IMOGI"),
+    }
+
+    frappe = types.ModuleType("frappe")
+    frappe.local = types.SimpleNamespace()
+    frappe.flags = types.SimpleNamespace()
+    frappe.reads = []
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+    frappe.DoesNotExistError = LookupError
+    frappe.warnings = []
+    frappe.logger = lambda name=None: types.SimpleNamespace(
+        warning=lambda message, **kwargs: frappe.warnings.append(message)
+    )
+
+    def get_doc(doctype, name=None):
+        frappe.reads.append(doctype)
+        return docs[(doctype, name)]
+
+    frappe.get_doc = get_doc
+    frappe.get_cached_doc = get_doc
+    frappe.defaults = types.SimpleNamespace(
+        get_user_default=lambda key: "IMOGI", get_global_default=lambda key: None
+    )
+    frappe.db = types.SimpleNamespace(after_commit=types.SimpleNamespace(add=lambda fn: None))
+
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.branding"):
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.branding")
+
+    yield frappe, module, docs
+
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.branding"):
+        sys.modules.pop(name, None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_print_burst_reads_documents_once(branding):
+    frappe, module, docs = branding
+
+    for _i in range(20):
+        context = module.get_brand_context("Dine In")
+        context["name"] = "mutated by template"
+
+    context = module.get_brand_context("Dine In")
+    assert context["name"] == "Kopi Kenangan"
+    assert context["primary_color"] == "#111111"
+    assert context["logo"] == "/files/imogi.png"
+    assert frappe.reads == ["POS Profile", "Brand Profile", "Company"]
+
+
+def test_brand_profile_save_refreshes_context(branding):
+    frappe, module, docs = branding
+    module.get_brand_context("Dine In")
+
+    docs[("Brand Profile", "Kopi")].primary_color = "#222222"
+    module.invalidate_brand_context(docs[("Brand Profile", "Kopi")])
+
+    assert module.get_brand_context("Dine In")["primary_color"] == "#222222"
+
+
+def test_failed_lookup_is_not_cached(branding):
+    frappe, module, docs = branding
+    get_doc = frappe.get_cached_doc
+
+    def unavailable(doctype, name=None):
+        raise ConnectionError("database went away")
+
+    frappe.get_doc = frappe.get_cached_doc = unavailable
+
+    context = module.get_brand_context("Dine In")
+    assert context["name"] == "IMOGI POS"
+    assert context["primary_color"] == module.PRIMARY_COLOR
+    assert len(frappe.warnings) == 1
+
+    frappe.get_doc = frappe.get_cached_doc = get_doc
+    assert module.get_brand_context("Dine In")["name"] == "Kopi Kenangan"
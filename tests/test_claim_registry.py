@@ -0,0 +1,218 @@
+import importlib
+import sys
+import types
+from itertools import count
+
+import pytest
+
+
+class Row(dict):
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.round_trips = 0
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def set(self, key, value, ex=None, nx=False):
+        self.round_trips += 1
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode() if isinstance(value, str) else str(value).encode()
+        return True
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.values.get(key)
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.values.get(key) for key in keys]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [key.encode() for key in list(self.values) if key.startswith(prefix)]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, *args, **kwargs):
+        self.commands.append(lambda: self.redis.set(*args, **kwargs))
+
+    def delete(self, *keys):
+        self.commands.append(lambda: self.redis.delete(*keys))
+
+    def execute(self):
+        # The queued commands count as one round trip
+        self.redis.round_trips -= len(self.commands) - 1
+        return [command() for command in self.commands]
+
+
+@pytest.fixture
+def registry():
+    sys.path.insert(0, ".")
+
+    orders = {
+        "ORD-1": Row(name="ORD-1", claimed_by=None, claimed_at=None, order_version=0),
+        "ORD-2": Row(name="ORD-2", claimed_by="cashier2@example.com", claimed_at="2026-01-01 10:00:00", order_version=4),
+        "ORD-3": Row(name="ORD-3", claimed_by=None, claimed_at=None, order_version=1),
+    }
+
+    frappe = types.ModuleType("frappe")
+    frappe.session = types.SimpleNamespace(user="cashier1@example.com")
+    frappe.queries = []
+    redis = FakeRedis()
+    frappe.cache = lambda: redis
+
+    def sql(query, values=None):
+        frappe.queries.append("update")
+        order = orders.get(values["order_name"])
+        if "claimed_by = NULL" in query:
+            matched = order is not None and order.claimed_by == values["user"]
+            if matched:
+                order.update(claimed_by=None, claimed_at=None)
+        else:
+            matched = order is not None and not order.claimed_by
+            if matched:
+                order.update(claimed_by=values["user"], claimed_at=values["claimed_at"])
+        if matched:
+            order["order_version"] += 1
+            order["modified"] = values["modified"]
+
+    def get_all(doctype, filters=None, fields=None):
+        frappe.queries.append("load")
+        return [Row(order) for order in orders.values() if order.claimed_by]
+
+    def get_value(doctype, name, fields, as_dict=False):
+        frappe.queries.append("get_value")
+        order = orders.get(name)
+        return Row({field: order.get(field) for field in fields}) if order else None
+
+    frappe.get_all = get_all
+    frappe.rollback_hooks = []
+    frappe.db = types.SimpleNamespace(
+        sql=sql,
+        get_value=get_value,
+        after_rollback=types.SimpleNamespace(add=frappe.rollback_hooks.append),
+    )
+
+    utils = types.ModuleType("frappe.utils")
+    utils.cint = lambda value: int(value or 0)
+    ticks = count()
+    utils.now_datetime = lambda: f"2026-01-01 12:00:{next(ticks):02d}"
+
+    saved = {name: sys.modules.get(name) for name in ("frappe", "frappe.utils")}
+    sys.modules["frappe"] = frappe
+    sys.modules["frappe.utils"] = utils
+    for name in ("imogi_pos.utils.order_version", "imogi_pos.utils.claim_registry"):
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.claim_registry")
+
+    yield frappe, module, orders, redis
+
+    for name in ("imogi_pos.utils.order_version", "imogi_pos.utils.claim_registry"):
+        sys.modules.pop(name, None)
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+def test_bulk_status_is_served_from_redis_after_loading(registry):
+    frappe, module, orders, redis = registry
+
+    claims = module.get_claims(["ORD-1", "ORD-2", "ORD-3"])
+    assert claims["ORD-1"] is None
+    assert claims["ORD-2"]["claimed_by"] == "cashier2@example.com"
+    assert frappe.queries == ["load"]
+
+    redis.round_trips = 0
+    module.get_claims(["ORD-%d" % index for index in range(1, 51)])
+    assert redis.round_trips == 1
+    assert frappe.queries == ["load"]
+
+
+def test_claim_is_exclusive_and_written_through(registry):
+    frappe, module, orders, redis = registry
+    module.get_claims(["ORD-1"])
+
+    acquired, claim = module.acquire_claim("ORD-1", "cashier1@example.com", "2026-01-01 12:00:00", "OPEN-1")
+    assert acquired
+    assert orders["ORD-1"].claimed_by == "cashier1@example.com"
+    assert orders["ORD-1"].order_version == 1
+    assert orders["ORD-1"].modified
+
+    # The second cashier is turned away by SET NX without touching the database
+    queries = len(frappe.queries)
+    acquired, claim = module.acquire_claim("ORD-1", "cashier2@example.com", "2026-01-01 12:01:00")
+    assert not acquired
+    assert claim["opening_entry"] == "OPEN-1"
+    assert len(frappe.queries) == queries
+
+    assert module.release_claim("ORD-1", "cashier1@example.com")
+    assert module.get_claims(["ORD-1"]) == {"ORD-1": None}
+    assert orders["ORD-1"].claimed_by is None
+
+
+def test_database_wins_when_registry_is_missing_a_claim(registry):
+    frappe, module, orders, redis = registry
+    orders["ORD-3"].update(claimed_by="cashier2@example.com", claimed_at="2026-01-01 11:00:00")
+
+    acquired, claim = module.acquire_claim("ORD-3", "cashier1@example.com", "2026-01-01 12:00:00")
+
+    assert not acquired
+    assert claim["claimed_by"] == "cashier2@example.com"
+    assert module.get_claims(["ORD-3"])["ORD-3"]["claimed_by"] == "cashier2@example.com"
+
+
+def test_reload_overwrites_and_drops_stale_claims(registry):
+    frappe, module, orders, redis = registry
+    module.acquire_claim("ORD-1", "cashier1@example.com", "2026-01-01 12:00:00", "OPEN-1")
+    module.get_claims(["ORD-1"])
+
+    # Changed behind the registry's back, e.g. by a direct database fix
+    orders["ORD-2"].update(claimed_by="cashier3@example.com", claimed_at="2026-01-01 12:30:00")
+    orders["ORD-3"].update(claimed_by=None)
+    redis.values[redis.make_key("imogi_pos:order_claim:ORD-3")] = b'{"claimed_by": "ghost@example.com"}'
+    redis.values.pop(redis.make_key(module.LOADED_KEY))
+
+    claims = module.get_claims(["ORD-1", "ORD-2", "ORD-3"])
+
+    assert claims["ORD-1"]["opening_entry"] == "OPEN-1"
+    assert claims["ORD-2"]["claimed_by"] == "cashier3@example.com"
+    assert claims["ORD-3"] is None
+
+
+def test_rolled_back_claim_leaves_no_reservation(registry):
+    frappe, module, orders, redis = registry
+    module.get_claims(["ORD-1"])
+
+    acquired, _claim = module.acquire_claim("ORD-1", "cashier1@example.com", "2026-01-01 12:00:00")
+    assert acquired
+
+    # The transaction is rolled back: the database keeps ORD-1 unclaimed
+    orders["ORD-1"].update(claimed_by=None, claimed_at=None)
+    for hook in frappe.rollback_hooks:
+        hook()
+
+    assert module.get_claims(["ORD-1"]) == {"ORD-1": None}
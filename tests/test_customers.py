@@ -8,12 +8,18 @@ import pytest
 def customers_module():
     sys.path.insert(0, '.')
 
+    utils = types.ModuleType("frappe.utils")
+    utils.now = lambda: "2024-01-01 10:00:00"
+    utils.cstr = str
+
     frappe = types.ModuleType("frappe")
+    frappe.utils = utils
 
     class FrappeException(Exception):
         pass
 
     frappe.ValidationError = FrappeException
+    frappe.PermissionError = FrappeException
     frappe._ = lambda x: x
 
     def throw(msg, exc=None):
@@ -36,7 +42,16 @@ def customers_module():
         def get_value(self, doctype, filters, field):
             return f"Default-{field}"
 
+        def table_exists(self, doctype):
+            return True
+
+        def sql(self, query, values=None, as_dict=False):
+            self.queries.append((query, values))
+            return list(self.sql_result)
+
     frappe.db = DB()
+    frappe.db.queries = []
+    frappe.db.sql_result = []
     docs_created = []
 
     class FakeDoc(types.SimpleNamespace):
@@ -57,16 +72,20 @@ def customers_module():
     frappe.local = types.SimpleNamespace(request_ip="test-device")
 
     sys.modules['frappe'] = frappe
+    sys.modules['frappe.utils'] = utils
 
     customers = importlib.import_module('imogi_pos.api.customers')
     importlib.reload(customers)
 
+    customers._original_find_customer_by_phone = customers.find_customer_by_phone
     customers.find_customer_by_phone = lambda phone: []
 
     yield customers, docs_created, frappe
 
     sys.modules.pop('frappe', None)
+    sys.modules.pop('frappe.utils', None)
     sys.modules.pop('imogi_pos.api.customers', None)
+    sys.modules.pop('imogi_pos.utils.phone_index', None)
     sys.modules.pop('imogi_pos', None)
     sys.path.pop(0)
 
@@ -96,3 +115,51 @@ def test_quick_create_customer_with_contact_validation(kwargs, customers_module)
     customers, _, frappe = customers_module
     with pytest.raises(frappe.ValidationError):
         customers.quick_create_customer_with_contact(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "phone, condition, value",
+    [
+        ("0812-3456-7890", "idx.phone_normalized = %s", "6281234567890"),
+        ("+62 812 3456 7890", "idx.phone_normalized = %s", "6281234567890"),
+        ("67890", "idx.phone_reversed LIKE %s", "09876%"),
+    ],
+)
+def test_find_customer_by_phone_uses_phone_index(phone, condition, value, customers_module):
+    customers, _, frappe = customers_module
+    frappe.db.sql_result = [
+        {"customer": "CUST-1", "contact": None},
+        {"customer": "CUST-1", "contact": "CONT-1"},
+        {"customer": "CUST-2", "contact": "CONT-2"},
+    ]
+
+    result = customers._original_find_customer_by_phone(phone)
+
+    assert [row["customer"] for row in result] == ["CUST-1", "CUST-2"]
+    query, values = frappe.db.queries[-1]
+    assert "`tabCustomer Phone Index`" in query
+    assert condition in query
+    assert "mobile_no LIKE" not in query
+    assert values == [value]
+
+
+def test_contact_index_entries_cover_all_linked_numbers(customers_module):
+    from imogi_pos.utils import phone_index
+
+    contact = {
+        "name": "CONT-1",
+        "mobile_no": "081234567890",
+        "phone": "+6281234567890",
+        "phone_nos": [{"phone": "021-555-0101"}],
+        "links": [
+            {"link_doctype": "Customer", "link_name": "CUST-1"},
+            {"link_doctype": "Supplier", "link_name": "SUP-1"},
+        ],
+    }
+    doc = types.SimpleNamespace(name="CONT-1", get=contact.get)
+
+    entries = phone_index.get_contact_index_entries(doc)
+
+    assert [entry["phone_normalized"] for entry in entries] == ["6281234567890", "62215550101"]
+    assert entries[0]["phone_reversed"] == "09876543218"
+    assert {entry["customer"] for entry in entries} == {"CUST-1"}
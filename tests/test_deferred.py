@@ -0,0 +1,112 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class Callbacks(list):
+    def add(self, fn):
+        self.append(fn)
+
+    def run(self):
+        while self:
+            self.pop(0)()
+
+
+class FakePipeline:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def sadd(self, key, member):
+        self.cache.sets.setdefault(key, set()).add(member)
+
+    def hincrby(self, key, field, amount):
+        fields = self.cache.hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def execute(self):
+        return []
+
+
+class FakeCache:
+    def __init__(self):
+        self.sets = {}
+        self.hashes = {}
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def deferred():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe.local = types.SimpleNamespace()
+    frappe.flags = types.SimpleNamespace(in_test=False)
+    frappe.conf = {}
+    frappe.enqueued = []
+    frappe.enqueue = lambda method, **kwargs: frappe.enqueued.append(kwargs)
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+    frappe.db = types.SimpleNamespace(after_commit=Callbacks(), after_rollback=Callbacks())
+
+    modules = ("imogi_pos.utils.api_metrics", "imogi_pos.utils.deferred")
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    for name in modules:
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.deferred")
+
+    yield frappe, module, cache
+
+    for name in modules:
+        sys.modules.pop(name, None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_work_is_deduplicated_per_invoice_and_enqueued_after_commit(deferred):
+    frappe, module, cache = deferred
+
+    module.defer("imogi_pos.api.billing.publish_stock_levels", key=("stock_update", "SINV-1"),
+                 item_codes=["A"], warehouse="Stores")
+    module.defer("imogi_pos.api.billing.publish_stock_levels", key=("stock_update", "SINV-1"),
+                 item_codes=["A", "B"], warehouse="Stores")
+
+    assert frappe.enqueued == []
+    frappe.db.after_commit.run()
+
+    assert len(frappe.enqueued) == 1
+    job = frappe.enqueued[0]
+    assert job["queue"] == "short"
+    assert job["job_id"] == "imogi_pos_deferred::stock_update:SINV-1"
+    assert job["work_kwargs"] == {"item_codes": ["A", "B"], "warehouse": "Stores"}
+
+
+def test_inline_run_records_lag_and_rollback_drops_work(deferred, monkeypatch):
+    frappe, module, cache = deferred
+    calls = []
+    monkeypatch.setattr(module, "_resolve", lambda method: lambda **kwargs: calls.append(kwargs))
+
+    module.defer("imogi_pos.api.billing.publish_low_stock_alerts", enqueue=False, invoice="SINV-1")
+    frappe.db.after_rollback.run()
+    frappe.db.after_commit.clear()
+    assert calls == []
+
+    module.defer("imogi_pos.api.billing.publish_low_stock_alerts", enqueue=False, invoice="SINV-2")
+    frappe.db.after_commit.run()
+
+    assert calls == [{"invoice": "SINV-2"}]
+    fields = cache.hashes["site:imogi_pos:deferred_metrics:imogi_pos.api.billing.publish_low_stock_alerts"]
+    assert fields["count"] == 1
+    assert "lag_le_50" in fields
@@ -0,0 +1,65 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCHMARK_PATH = Path(__file__).resolve().parents[1] / "scripts" / "benchmark_escpos_templates.py"
+
+
+@pytest.fixture
+def benchmark_module():
+    sys.modules.pop("frappe", None)
+    sys.modules.pop("imogi_pos.utils.escpos_templates", None)
+
+    spec = importlib.util.spec_from_file_location("benchmark_escpos_templates", BENCHMARK_PATH)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+
+    yield mod
+
+    sys.modules.pop("frappe", None)
+    sys.modules.pop("imogi_pos.utils.escpos_templates", None)
+
+
+@pytest.mark.parametrize("printer_width", [32, 48])
+def test_compiled_templates_match_legacy_builders(benchmark_module, printer_width):
+    # run() asserts byte-identical receipts and KOTs
+    results = benchmark_module.run(count=20, printer_width=printer_width)
+
+    assert results["legacy_receipt"][1] == 40
+    assert results["compiled_receipt"][1] == 2
+
+
+def test_compile_template_merges_literals_and_tracks_slots(benchmark_module):
+    from imogi_pos.utils import escpos_templates as templates
+
+    template = templates.compile_template(
+        [b"A", b"B", templates.Slot("x"), b"C", templates.Slot("y")]
+    )
+
+    assert template.segments == (b"AB", b"", b"C", b"")
+    assert template.slots == ((1, "x"), (3, "y"))
+    assert template.render({"x": b"1", "y": b"2"}) == b"AB1C2"
+    assert template.render({}) == b"ABC"
+
+
+def test_company_header_cache_is_cleared(benchmark_module):
+    from imogi_pos.utils import escpos_templates as templates
+
+    templates.get_company_header("IMOGI Resto")
+    templates.get_company_header("IMOGI Resto")
+    assert len(benchmark_module.doc_reads) == 2
+
+    templates.clear_company_header_cache()
+    templates.get_company_header("IMOGI Resto")
+    assert len(benchmark_module.doc_reads) == 4
+
+
+def test_client_printer_width_is_clamped(benchmark_module):
+    from imogi_pos.utils import escpos_templates as templates
+
+    assert templates.clamp_printer_width("48") == 48
+    assert templates.clamp_printer_width(10 ** 6) == templates.MAX_PRINTER_WIDTH
+    assert templates.clamp_printer_width("wide") == 32
+    assert templates.get_receipt_template.cache_info().maxsize == templates.TEMPLATE_CACHE_SIZE
@@ -46,7 +46,7 @@ def modifiers_module():
 def test_apply_invoice_modifiers_updates_packed_items(modifiers_module):
     module = modifiers_module
 
-    module.get_item_options = lambda item_code: {
+    module.get_item_options_native = lambda item_code, **kwargs: {
         "size": [
             {"label": "Large", "value": "Large", "modifiers": {"qty_factor": 1.5}},
         ],
@@ -0,0 +1,130 @@
+import importlib
+import pickle
+import sys
+import types
+
+import pytest
+
+
+class FakePipeline:
+    """Raw redis-py pipeline: keys arrive prefixed and values already pickled."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.commands = []
+
+    def hset(self, name, mapping):
+        self.commands.append((name, mapping))
+
+    def execute(self):
+        for name, mapping in self.commands:
+            self.cache.hashes.setdefault(name, {}).update(mapping)
+        self.cache.round_trips += 1
+        return [len(mapping) for _name, mapping in self.commands]
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.round_trips = 0
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(self.make_key(name), {})[key] = pickle.dumps(value)
+
+    def hmget(self, name, keys):
+        return [self.hashes.get(name, {}).get(key) for key in keys]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def hdel(self, name, key):
+        self.hashes.get(self.make_key(name), {}).pop(key, None)
+
+    def delete_key(self, name):
+        self.hashes.pop(self.make_key(name), None)
+
+
+ITEMS = {
+    f"DISH-{index:02d}": {"name": f"DISH-{index:02d}", "item_name": f"Dish {index}", "stock_uom": "Nos"}
+    for index in range(40)
+}
+
+
+@pytest.fixture
+def item_master():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe.local = types.SimpleNamespace()
+    frappe.queries = []
+    frappe.items = {code: dict(row) for code, row in ITEMS.items()}
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+
+    def get_all(doctype, filters=None, fields=None):
+        frappe.queries.append(list(filters["name"][1]))
+        return [dict(frappe.items[code]) for code in filters["name"][1] if code in frappe.items]
+
+    frappe.get_all = get_all
+    frappe.db = types.SimpleNamespace(after_commit=types.SimpleNamespace(add=lambda fn: None))
+
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.item_master"):
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.item_master")
+
+    yield frappe, module
+
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.item_master"):
+        sys.modules.pop(name, None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_banquet_bill_costs_one_query(item_master):
+    frappe, module = item_master
+    lines = list(ITEMS) + ["DISH-00", "MISSING"]
+
+    details = module.get_item_details(lines)
+
+    assert len(frappe.queries) == 1
+    assert len(details) == 40
+    # All 40 misses are written back in one pipelined HSET
+    assert frappe.cache().round_trips == 1
+    assert details["DISH-07"]["item_name"] == "Dish 7"
+    assert "MISSING" not in details
+
+    # Another worker (empty local LRU) is served from the shared hash
+    module.item_master_cache._local.clear()
+    details["DISH-07"]["item_name"] = "changed by caller"
+    assert module.get_item_detail("DISH-07")["item_name"] == "Dish 7"
+    assert len(frappe.queries) == 1
+
+
+def test_item_save_invalidates_entry(item_master):
+    frappe, module = item_master
+    module.get_item_details(["DISH-01", "DISH-02"])
+
+    frappe.items["DISH-01"]["item_name"] = "Renamed"
+    module.invalidate_item_master(types.SimpleNamespace(name="DISH-01"))
+    frappe.local = types.SimpleNamespace()
+
+    details = module.get_item_details(["DISH-01", "DISH-02"])
+
+    assert details["DISH-01"]["item_name"] == "Renamed"
+    assert frappe.queries[-1] == ["DISH-01"]
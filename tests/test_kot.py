@@ -126,6 +126,8 @@ def kot_module():
             self.calls = []
         def publish_realtime(self, *args, **kwargs):
             self.calls.append((args, kwargs))
+        def get_doc_room(self, doctype, docname):
+            return f"doc:{doctype}/{docname}"
 
     realtime = Realtime()
     frappe.realtime = realtime
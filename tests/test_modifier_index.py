@@ -0,0 +1,137 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def hdel(self, name, key):
+        self.hashes.get(name, {}).pop(key, None)
+
+    def delete_key(self, name):
+        self.hashes.pop(name, None)
+
+
+OPTIONS = {
+    "Size": [
+        {"label": "Large", "value": "Large", "modifiers": {"qty_factor": 1.5}},
+        {"label": "Small", "value": "Small", "qty_factor": 0.5},
+    ],
+    "extras": [
+        {
+            "label": "Extra Shot",
+            "value": "Extra Shot",
+            "additional_price": 5000,
+            "modifiers": [
+                {"component_deltas": [{"item_code": "ESPRESSO_SHOT", "qty": 1}]},
+                {"component_deltas": {"SUGAR": 2}},
+            ],
+        },
+        {"label": "Oat Milk", "value": "OAT", "linked_item": "LATTE-OAT", "components": {"OAT_MILK": 1}},
+    ],
+}
+
+
+@pytest.fixture
+def modifier_module():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe.local = types.SimpleNamespace()
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+    frappe.db = types.SimpleNamespace(after_commit=types.SimpleNamespace(add=lambda fn: None))
+
+    utils = types.ModuleType("frappe.utils")
+    utils.flt = lambda value, precision=None: float(value or 0)
+
+    saved = {name: sys.modules.get(name) for name in ("frappe", "frappe.utils")}
+    sys.modules["frappe"] = frappe
+    sys.modules["frappe.utils"] = utils
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.modifier_index"):
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.modifier_index")
+
+    yield module
+
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.modifier_index"):
+        sys.modules.pop(name, None)
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+def test_resolve_modifiers_combines_selected_options(modifier_module):
+    index = modifier_module.compile_modifier_index(OPTIONS)
+
+    qty_factor, deltas = modifier_module.resolve_modifiers(
+        index,
+        {
+            "size": [{"value": "large"}],
+            "Extras": ["Extra Shot", "oat", "Unknown"],
+            "missing_group": ["x"],
+        },
+    )
+
+    assert qty_factor == pytest.approx(1.5)
+    assert deltas == {"ESPRESSO_SHOT": 1.0, "SUGAR": 2.0, "OAT_MILK": 1.0}
+
+    extra_shot = modifier_module.lookup_option(index, "extras", "EXTRA SHOT")
+    assert extra_shot["additional_price"] == 5000
+    assert modifier_module.lookup_option(index, "extras", {"label": "Oat Milk"})["linked_item"] == "LATTE-OAT"
+
+
+def test_index_is_compiled_once_until_invalidated(modifier_module):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return OPTIONS
+
+    first = modifier_module.get_modifier_index("LATTE", loader)
+    second = modifier_module.get_modifier_index("LATTE", loader)
+    assert first is second
+    assert len(calls) == 1
+
+    modifier_module.invalidate_modifier_index("LATTE")
+    modifier_module.get_modifier_index("LATTE", loader)
+    assert len(calls) == 2
+
+
+def test_failed_load_is_not_cached_as_empty(modifier_module):
+    outcomes = [RuntimeError("catalog rate limit"), None, OPTIONS]
+
+    def loader():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert modifier_module.get_modifier_index("LATTE", loader) == {}
+    assert modifier_module.get_modifier_index("LATTE", loader) == {}
+    assert "large" in modifier_module.get_modifier_index("LATTE", loader)["size"]
+    assert outcomes == []
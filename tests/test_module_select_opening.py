@@ -114,3 +114,64 @@ def test_get_active_pos_opening_missing_returns_empty_lists(module_select_module
     assert result["pos_opening_entry"] is None
     assert result["messages"] == []
     assert result["warnings"] == []
+
+
+def test_bootstrap_resolves_context_once(module_select_module, monkeypatch):
+    frappe = module_select_module.frappe
+    calls = []
+
+    monkeypatch.setattr(module_select_module, "get_user_role_context", lambda: {"roles": ["Cashier"]})
+
+    def get_active(user=None, auto_resolve=False):
+        calls.append("active")
+        return {"pos_profile": "Dine In", "branch": "Main"}
+
+    def resolve(**kwargs):
+        calls.append("resolve")
+        return {"current_pos_profile": "Dine In", "current_branch": "Main", "branches": ["Annex", "Main"]}
+
+    def branch_info():
+        raise AssertionError("bootstrap must reuse the resolved context")
+
+    monkeypatch.setattr(module_select_module, "get_active_operational_context", get_active)
+    monkeypatch.setattr(module_select_module, "resolve_operational_context", resolve)
+    monkeypatch.setattr(module_select_module, "get_user_branch_info", branch_info)
+    monkeypatch.setattr(
+        module_select_module,
+        "list_open_cashier_sessions",
+        lambda pos_profile=None: {"success": True, "sessions": [], "total": 0, "has_sessions": False},
+    )
+
+    frappe.get_cached_doc = lambda doctype, name: {"imogi_enable_cashier": 1}
+    frappe.get_roles = lambda user: ["Cashier"]
+    frappe.get_all = lambda doctype, **kwargs: ["Main"]
+    frappe.get_list = lambda doctype, **kwargs: []
+    frappe.db.exists = lambda doctype, name=None: True
+    frappe.defaults = types.SimpleNamespace(
+        get_user_default=lambda key: "Main", get_global_default=lambda key: None
+    )
+    frappe.DoesNotExistError = LookupError
+    frappe.local = types.SimpleNamespace(request=None)
+    frappe.utils = types.SimpleNamespace(today=lambda: "2026-01-01")
+
+    cashier = types.ModuleType("imogi_pos.api.cashier")
+    cashier._build_cashier_context = lambda pos_profile: {"success": True, "pos_profile": pos_profile}
+    cashier.get_payment_methods = lambda: {"success": True, "methods": [{"name": "Cash"}]}
+    monkeypatch.setitem(sys.modules, "imogi_pos.api.cashier", cashier)
+
+    payload = module_select_module.bootstrap()
+
+    assert calls == ["active", "resolve"]
+    assert [module["type"] for module in payload["modules"]][0] == "cashier"
+    assert payload["branch_info"] == {
+        "current_branch": "Main",
+        "available_branches": [{"name": "Annex", "branch": "Annex"}, {"name": "Main", "branch": "Main"}],
+    }
+    assert payload["active_cashiers"]["has_active_cashier"] is False
+    assert payload["cashier_context"]["pos_profile"] == "Dine In"
+    assert payload["payment_methods"] == [{"name": "Cash"}]
+    assert {"context", "modules", "branch_info", "total"} <= set(payload["server_timing"])
+
+    repeat = module_select_module.bootstrap(if_version=payload["version"])
+    assert repeat["not_modified"] is True
+    assert "modules" not in repeat
@@ -0,0 +1,244 @@
+import importlib
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+class DictNamespace(dict):
+    """Dictionary that also exposes keys as attributes."""
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+ITEMS = {
+    "COFFEE": DictNamespace(name="COFFEE", item_group="Hot Drinks", brand=None, variant_of=None),
+    "LATTE-L": DictNamespace(name="LATTE-L", item_group="Hot Drinks", brand=None, variant_of="LATTE"),
+    "CAKE": DictNamespace(name="CAKE", item_group="Pastry", brand="Sweet Co", variant_of=None),
+    "WATER": DictNamespace(name="WATER", item_group="Cold Drinks", brand=None, variant_of=None),
+}
+
+ITEM_GROUPS = {
+    "All Item Groups": DictNamespace(name="All Item Groups", lft=1, rgt=12),
+    "Drinks": DictNamespace(name="Drinks", lft=2, rgt=7),
+    "Hot Drinks": DictNamespace(name="Hot Drinks", lft=3, rgt=4),
+    "Cold Drinks": DictNamespace(name="Cold Drinks", lft=5, rgt=6),
+    "Pastry": DictNamespace(name="Pastry", lft=8, rgt=9),
+}
+
+# (name, apply_on, item_code, item_group, brand, discount_percentage, min_qty)
+RULES = [
+    ("PR-LATTE", "Item Code", "LATTE", None, None, 10, 0),
+    ("PR-HOT", "Item Group", None, "Hot Drinks", None, 5, 3),
+    ("PR-SWEET", "Brand", None, None, "Sweet Co", 20, 0),
+]
+
+
+def _rule_matches(rule, item, qty):
+    name, apply_on, item_code, item_group, brand, _discount, min_qty = rule
+    if qty < min_qty:
+        return False
+    if apply_on == "Item Code":
+        return item_code in (item.name, item.variant_of)
+    if apply_on == "Item Group":
+        return item_group == item.item_group
+    return brand == item.brand
+
+
+def fake_get_pricing_rule_for_item(args):
+    """Stand-in for ERPNext: pick the first matching rule."""
+    item = ITEMS.get(args["item_code"])
+    details = DictNamespace(discount_percentage=0.0, discount_amount=0, free_item_data=[])
+    if not item:
+        return details
+    for rule in RULES:
+        if _rule_matches(rule, item, args["qty"]):
+            details.update(
+                has_pricing_rule=1,
+                pricing_rules=json.dumps([rule[0]]),
+                discount_percentage=rule[5],
+            )
+            break
+    return details
+
+
+@pytest.fixture
+def pricing_env():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe._ = lambda x: x
+    frappe.whitelist = lambda *a, **k: (lambda fn: fn)
+    frappe.parse_json = json.loads
+    frappe.log_error = lambda *a, **k: None
+    frappe.defaults = types.SimpleNamespace(get_user_default=lambda key: "Test Co")
+    frappe.queries = []
+
+    def get_value(doctype, name, fieldname=None, **kwargs):
+        frappe.queries.append((doctype, name))
+        if doctype == "POS Profile":
+            return "Test Co"
+        if doctype == "Price List":
+            return "IDR"
+        return "IDR"
+
+    def get_all(doctype, filters=None, fields=None, **kwargs):
+        frappe.queries.append((doctype, "get_all"))
+        names = (filters or {}).get("name", ["in", []])[1]
+        source = ITEMS if doctype == "Item" else ITEM_GROUPS
+        return [source[name] for name in names if name in source]
+
+    def sql(query, values=None, as_dict=False):
+        frappe.queries.append(("Pricing Rule", "sql"))
+        rows = []
+        for name, apply_on, item_code, item_group, brand, _discount, _min_qty in RULES:
+            if item_code and item_code not in values["codes"]:
+                continue
+            if brand and brand not in values["brands"]:
+                continue
+            rows.append(DictNamespace(
+                name=name, apply_on=apply_on, apply_rule_on_other=None,
+                item_code=item_code, item_group=item_group, brand=brand,
+            ))
+        return rows
+
+    frappe.get_all = get_all
+    frappe.db = types.SimpleNamespace(get_value=get_value, sql=sql)
+
+    utils = types.ModuleType("frappe.utils")
+    utils.flt = lambda value, precision=None: float(value or 0)
+    utils.nowdate = lambda: "2026-01-01"
+
+    pricing_rule_module = types.ModuleType("erpnext.accounts.doctype.pricing_rule.pricing_rule")
+    pricing_rule_module.calls = []
+
+    def get_pricing_rule_for_item(args):
+        pricing_rule_module.calls.append(args["item_code"])
+        return fake_get_pricing_rule_for_item(args)
+
+    pricing_rule_module.get_pricing_rule_for_item = get_pricing_rule_for_item
+
+    api_pkg = types.ModuleType("imogi_pos.api")
+    api_pkg.__path__ = [str(Path(__file__).resolve().parents[1] / "imogi_pos" / "api")]
+
+    decorators = types.ModuleType("imogi_pos.utils.decorators")
+    decorators.require_role = lambda *roles: (lambda fn: fn)
+
+    stubs = {
+        "frappe": frappe,
+        "frappe.utils": utils,
+        "imogi_pos.api": api_pkg,
+        "imogi_pos.utils.decorators": decorators,
+    }
+    for name in (
+        "erpnext",
+        "erpnext.accounts",
+        "erpnext.accounts.doctype",
+        "erpnext.accounts.doctype.pricing_rule",
+    ):
+        stubs[name] = types.ModuleType(name)
+    stubs["erpnext.accounts.doctype.pricing_rule.pricing_rule"] = pricing_rule_module
+
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    sys.modules.pop("imogi_pos.api.native_pricing", None)
+
+    native_pricing = importlib.import_module("imogi_pos.api.native_pricing")
+
+    yield frappe, native_pricing, pricing_rule_module
+
+    sys.modules.pop("imogi_pos.api.native_pricing", None)
+    for name, module in saved.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+    sys.path.remove(".")
+
+
+CART = [
+    {"item_code": "COFFEE", "qty": 1, "rate": 20000},
+    {"item_code": "COFFEE", "qty": 3, "rate": 20000},
+    {"item_code": "LATTE-L", "qty": 1, "rate": 30000},
+    {"item_code": "CAKE", "qty": 2, "rate": 25000},
+    {"item_code": "WATER", "qty": 5, "rate": 5000},
+    {"item_code": "WATER", "qty": 5, "rate": 5000},
+    {"item": "COFFEE", "qty": 3, "rate": 20000},
+    {"qty": 1},
+]
+
+
+def test_cart_engine_matches_per_item_path(pricing_env):
+    frappe, native_pricing, erpnext_rules = pricing_env
+
+    expected = []
+    for item in CART:
+        code = item.get("item_code") or item.get("item")
+        if code:
+            expected.append(native_pricing.get_applicable_pricing_rules(
+                code, customer="CUST-1", price_list="Retail", qty=item["qty"], pos_profile="POS-1",
+            ))
+    per_item_queries = len(frappe.queries)
+
+    frappe.queries.clear()
+    erpnext_rules.calls.clear()
+
+    engine = native_pricing.CartPricingEngine(
+        customer="CUST-1", price_list="Retail", pos_profile="POS-1",
+    )
+    engine.preload(item.get("item_code") or item.get("item") for item in CART)
+    actual = [
+        engine.price(item.get("item_code") or item.get("item"), item["qty"])
+        for item in CART
+        if item.get("item_code") or item.get("item")
+    ]
+
+    assert actual == expected
+    assert [result["pricing_rule"] for result in actual] == [
+        None, "PR-HOT", "PR-LATTE", "PR-SWEET", None, None, "PR-HOT",
+    ]
+    # Context once, items once, rules once, item groups once
+    assert len(frappe.queries) == 5
+    assert per_item_queries == 14
+    # WATER has no candidate rule; duplicate lines are memoised
+    assert sorted(erpnext_rules.calls) == ["CAKE", "COFFEE", "COFFEE", "LATTE-L"]
+
+
+def test_apply_pricing_rules_to_items_summary(pricing_env):
+    _frappe, native_pricing, _erpnext_rules = pricing_env
+
+    result = native_pricing.apply_pricing_rules_to_items(
+        json.dumps(CART), customer="CUST-1", price_list="Retail", pos_profile="POS-1",
+    )
+
+    assert result["has_pricing_rules"] is True
+    assert result["items"][1]["discount_percentage"] == 5
+    assert "pricing_rule" not in result["items"][4]
+    # 5% of 3 x 20000 twice, 10% of 30000, 20% of 2 x 25000
+    assert result["total_discount_amount"] == pytest.approx(3000 + 3000 + 3000 + 10000)
+
+
+def test_pricing_failure_is_written_to_error_log(pricing_env):
+    frappe, native_pricing, erpnext_rules = pricing_env
+    logged = []
+    frappe.log_error = lambda message=None, title=None, **kwargs: logged.append((message, title))
+
+    def broken(args):
+        raise RuntimeError("rule table locked")
+
+    erpnext_rules.get_pricing_rule_for_item = broken
+    result = native_pricing.get_applicable_pricing_rules(
+        "COFFEE", customer="CUST-1", price_list="Retail", qty=3, pos_profile="POS-1",
+    )
+
+    assert result["success"] is False
+    assert logged == [("Error getting pricing rule: rule table locked", "Native Pricing Integration")]
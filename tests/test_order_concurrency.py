@@ -0,0 +1,105 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class Row(dict):
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+
+@pytest.fixture
+def concurrency():
+    sys.path.insert(0, ".")
+
+    orders = {
+        "ORD-1": Row(name="ORD-1", claimed_by=None, claimed_at=None, order_version=3),
+    }
+    registry = {"ORD-1": {"claimed_by": "cashier2@example.com", "claimed_at": "2026-01-01 12:00:00",
+                          "opening_entry": "OPEN-2"}}
+
+    frappe = types.ModuleType("frappe")
+    frappe._ = lambda text: text
+    frappe.whitelist = lambda *args, **kwargs: (lambda fn: fn)
+    frappe.session = types.SimpleNamespace(user="cashier1@example.com")
+    frappe.parse_json = lambda value: value
+    frappe.get_all = lambda doctype, filters=None, fields=None: [
+        orders[name] for name in filters["name"][1] if name in orders
+    ]
+    frappe.db = types.SimpleNamespace(
+        get_value=lambda doctype, name, fields, as_dict=False: (
+            Row({field: orders[name][field] for field in fields}) if name in orders else None
+        )
+    )
+
+    utils = types.ModuleType("frappe.utils")
+    utils.now = lambda: "2026-01-01 12:00:00"
+    utils.flt = float
+    utils.cint = lambda value: int(value or 0)
+    logger_module = types.ModuleType("frappe.utils.logger")
+    logger_module.get_logger = lambda name: types.SimpleNamespace(
+        info=lambda *a: None, warning=lambda *a: None, error=lambda *a: None
+    )
+    utils.logger = logger_module
+    frappe.utils = utils
+
+    claim_registry = types.ModuleType("imogi_pos.utils.claim_registry")
+    claim_registry.acquire_claim = claim_registry.release_claim = None
+    claim_registry.available = True
+
+    def get_claims(names):
+        if not claim_registry.available:
+            raise ConnectionError("redis down")
+        return {name: registry.get(name) for name in names}
+
+    claim_registry.get_claims = get_claims
+
+    api_pkg = types.ModuleType("imogi_pos.api")
+    api_pkg.__path__ = ["imogi_pos/api"]
+
+    stubs = {
+        "frappe": frappe,
+        "imogi_pos.api": api_pkg,
+        "frappe.utils": utils,
+        "frappe.utils.logger": logger_module,
+        "imogi_pos.utils.claim_registry": claim_registry,
+    }
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    sys.modules.pop("imogi_pos.api.order_concurrency", None)
+    module = importlib.import_module("imogi_pos.api.order_concurrency")
+
+    yield module, orders, claim_registry
+
+    sys.modules.pop("imogi_pos.api.order_concurrency", None)
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+def test_single_and_bulk_status_agree(concurrency):
+    module, orders, claim_registry = concurrency
+
+    single = module.get_order_claim_status("ORD-1")
+    bulk = module.get_claim_status_bulk(["ORD-1"])["statuses"]["ORD-1"]
+
+    assert single["claimed_by"] == bulk["claimed_by"] == "cashier2@example.com"
+    assert single["can_claim"] is bulk["can_claim"] is False
+    assert single["order_version"] == 3
+
+    # Registry unavailable: both fall back to the database
+    claim_registry.available = False
+    orders["ORD-1"].update(claimed_by="cashier1@example.com", claimed_at="2026-01-01 12:05:00")
+
+    single = module.get_order_claim_status("ORD-1")
+    bulk = module.get_claim_status_bulk(["ORD-1"])["statuses"]["ORD-1"]
+    assert single["is_mine"] is bulk["is_mine"] is True
+    assert module.get_order_claim_status("ORD-404") == {"success": False, "error": "Order not found"}
@@ -0,0 +1,199 @@
+import importlib
+import sys
+import types
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+
+
+class Row(dict):
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+    def as_dict(self):
+        return dict(self)
+
+
+class ValidationError(Exception):
+    pass
+
+
+@pytest.fixture
+def order_lines():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe.ValidationError = ValidationError
+    frappe.session = types.SimpleNamespace(user="waiter@example.com")
+    frappe._ = lambda text: text
+
+    def throw(message, exc=ValidationError):
+        raise exc(message)
+
+    frappe.throw = throw
+    frappe.as_json = lambda value: repr(value)
+    frappe.parse_json = lambda value: value
+
+    rows = {
+        "ROW-1": Row(name="ROW-1", idx=1, item="COFFEE", qty=1, rate=20000, amount=20000,
+                     notes="", item_options=None, counters=None),
+        "ROW-2": Row(name="ROW-2", idx=2, item="TEA", qty=2, rate=15000, amount=30000,
+                     notes="", item_options=None, counters='{"sent": "2026-01-01"}'),
+        "ROW-3": Row(name="ROW-3", idx=3, item="CAKE", qty=1, rate=25000, amount=25000,
+                     notes="", item_options=None, counters=None),
+    }
+    writes = []
+    header = {"name": "ORD-1", "subtotal": 75000, "pb1_amount": 8250, "totals": 83250, "order_version": 3}
+
+    def get_all(doctype, filters=None, fields=None, order_by=None):
+        names = filters.get("name", [None, list(rows)])[1]
+        return [Row(rows[name]) for name in names if name in rows]
+
+    def set_value(doctype, name, values, update_modified=True):
+        writes.append(("set", doctype, name, dict(values)))
+
+    def delete(doctype, filters):
+        writes.append(("delete", doctype, filters["name"]))
+
+    def sql(query, values=None):
+        if query.strip().startswith("UPDATE"):
+            expected = values.get("expected_version")
+            if expected is None or expected == header["order_version"]:
+                header["order_version"] += 1
+                header["modified"] = values["modified"]
+                writes.append(("version", "POS Order", values["order_name"], {
+                    key: values[key] for key in ("subtotal", "pb1_amount", "totals")
+                }))
+            return []
+        return [[max(row["idx"] for row in rows.values())]]
+
+    def get_value(doctype, name, fields, as_dict=False):
+        if isinstance(fields, str):
+            return header.get(fields)
+        return Row({field: header.get(field) for field in fields})
+
+    def get_doc(values):
+        row = Row(values)
+        row.db_insert = lambda: writes.append(("insert", row["doctype"], row["idx"]))
+        return row
+
+    frappe.get_all = get_all
+    frappe.get_doc = get_doc
+    frappe.db = types.SimpleNamespace(
+        set_value=set_value, delete=delete, sql=sql, get_value=get_value
+    )
+
+    utils = types.ModuleType("frappe.utils")
+    utils.flt = lambda value, precision=None: float(value or 0)
+    utils.cint = lambda value: int(value or 0)
+    ticks = count()
+    utils.now_datetime = lambda: datetime(2026, 1, 1, 12, 5, 0) + timedelta(microseconds=next(ticks))
+
+    names = ("frappe", "frappe.utils")
+    saved = {name: sys.modules.get(name) for name in names}
+    sys.modules["frappe"] = frappe
+    sys.modules["frappe.utils"] = utils
+    for name in ("imogi_pos.utils.order_version", "imogi_pos.utils.order_lines"):
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.order_lines")
+
+    yield module, rows, writes
+
+    for name in ("imogi_pos.utils.order_version", "imogi_pos.utils.order_lines"):
+        sys.modules.pop(name, None)
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+def _order(version=3):
+    return Row(name="ORD-1", subtotal=75000, order_version=version)
+
+
+def test_patch_writes_only_affected_rows_and_moves_totals(order_lines):
+    module, rows, writes = order_lines
+    ops = module.parse_line_ops([
+        {"op": "update", "name": "ROW-1", "qty": 2},
+        {"op": "remove", "name": "ROW-3"},
+        {"op": "add", "item": "WATER", "qty": 1, "rate": 5000},
+        {"op": "update", "name": "ROW-2", "notes": "no ice"},
+    ])
+
+    result = module.apply_line_ops(
+        _order(),
+        ops,
+        lambda op: {"item": op["item"], "qty": op["qty"], "rate": op["rate"]},
+        expected_version=3,
+    )
+
+    header = writes[0]
+    assert header[:3] == ("version", "POS Order", "ORD-1")
+    assert header[3]["subtotal"] == pytest.approx(75000)
+    assert header[3]["totals"] == pytest.approx(75000 * 1.11)
+    assert writes[1:] == [
+        ("delete", "POS Order Item", "ROW-3"),
+        ("set", "POS Order Item", "ROW-1", {"qty": 2.0, "amount": 40000.0}),
+        ("set", "POS Order Item", "ROW-2", {"notes": "no ice"}),
+        ("insert", "POS Order Item", 4),
+    ]
+
+    assert result["conflict"] is False
+    assert [row["name"] for row in result["updated"]] == ["ROW-1", "ROW-2"]
+    assert result["removed"] == ["ROW-3"]
+    assert result["added"][0]["amount"] == 5000
+    assert result["order"]["order_version"] == 4
+
+
+def test_sent_rows_only_accept_notes(order_lines):
+    module, rows, writes = order_lines
+
+    with pytest.raises(ValidationError, match="already sent"):
+        module.apply_line_ops(_order(), module.parse_line_ops([{"op": "update", "name": "ROW-2", "qty": 5}]), None)
+
+    assert writes == []
+
+
+def test_version_conflict_returns_server_state_without_writing(order_lines):
+    module, rows, writes = order_lines
+    ops = module.parse_line_ops([{"op": "update", "name": "ROW-1", "qty": 3}])
+
+    # Client saw version 2 but the order is already at 3
+    stale = module.apply_line_ops(_order(version=2), ops, None, expected_version=2)
+    assert stale["conflict"] is True
+    assert stale["order"]["order_version"] == 3
+    assert [row["name"] for row in stale["lines"]] == ["ROW-1", "ROW-2", "ROW-3"]
+
+    # Two terminals read version 3; the second conditional UPDATE matches nothing
+    first = module.apply_line_ops(_order(version=3), ops, None, expected_version=3)
+    assert first["conflict"] is False
+    second = module.apply_line_ops(_order(version=3), ops, None, expected_version=3)
+    assert second["conflict"] is True
+
+    assert [write[0] for write in writes] == ["version", "set"]
+
+
+def test_save_order_payload_is_diffed_into_operations(order_lines):
+    module, rows, writes = order_lines
+    lines = module.get_order_lines("ORD-1")
+
+    ops = module.diff_order_lines(lines, [
+        {"name": "ROW-1", "item": "COFFEE", "qty": 1, "rate": 20000, "notes": ""},
+        {"name": "ROW-2", "item": "TEA", "qty": 9, "notes": "hot"},
+        {"item": "WATER", "qty": 1, "rate": 5000},
+    ])
+
+    assert ops == [
+        {"op": "update", "name": "ROW-2", "notes": "hot"},
+        {"op": "add", "item": "WATER", "qty": 1, "rate": 5000},
+        {"op": "remove", "name": "ROW-3"},
+    ]
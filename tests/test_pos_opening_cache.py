@@ -0,0 +1,125 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class Row(dict):
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def hdel(self, name, key):
+        self.hashes.get(name, {}).pop(key, None)
+
+    def delete_key(self, name):
+        self.hashes.pop(name, None)
+
+
+@pytest.fixture
+def pos_opening():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe.session = types.SimpleNamespace(user="cashier@example.com")
+    frappe.local = types.SimpleNamespace()
+    frappe.lookups = []
+    frappe.openings = [
+        Row(name="OPEN-1", pos_profile="Counter", user="cashier@example.com",
+            creation="2026-01-01 08:00:00", company="IMOGI", status="Open", posting_date="2026-01-01"),
+    ]
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+    frappe.logger = lambda *args, **kwargs: types.SimpleNamespace(
+        info=lambda *a, **k: None, debug=lambda *a, **k: None, warning=lambda *a, **k: None
+    )
+
+    def exists(doctype, name=None):
+        return name == "POS Opening Entry"
+
+    def get_list(doctype, filters=None, fields=None, order_by=None, limit_page_length=None):
+        frappe.lookups.append(dict(filters))
+        return [
+            Row(row) for row in frappe.openings
+            if row.pos_profile == filters["pos_profile"] and row.user == filters.get("user", row.user)
+        ]
+
+    frappe.db = types.SimpleNamespace(
+        exists=exists,
+        get_list=get_list,
+        get_value=lambda doctype, name, field: "User" if field == "imogi_pos_session_scope" else "IMOGI",
+        has_column=lambda doctype, column: column == "posting_date",
+        after_commit=types.SimpleNamespace(add=lambda fn: None),
+    )
+
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.pos_opening"):
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.pos_opening")
+
+    yield frappe, module
+
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.pos_opening"):
+        sys.modules.pop(name, None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_active_opening_is_resolved_once_per_user_and_profile(pos_opening):
+    frappe, module = pos_opening
+
+    first = module.resolve_active_pos_opening(pos_profile="Counter", user="cashier@example.com")
+    first["balance_details"].append("mutated by caller")
+
+    frappe.local = types.SimpleNamespace()
+    second = module.resolve_active_pos_opening(pos_profile="Counter", user="cashier@example.com")
+
+    assert second["name"] == "OPEN-1"
+    assert second["balance_details"] == []
+    assert len(frappe.lookups) == 1
+
+    module.resolve_active_pos_opening(pos_profile="Counter", user="other@example.com")
+    assert len(frappe.lookups) == 2
+
+
+def test_closing_entry_invalidates_cached_opening(pos_opening):
+    frappe, module = pos_opening
+    assert module.resolve_active_pos_opening(pos_profile="Counter")["name"] == "OPEN-1"
+
+    frappe.openings.clear()
+    module.invalidate_active_openings(Row(name="CLOSE-1"))
+
+    frappe.local = types.SimpleNamespace()
+    result = module.resolve_active_pos_opening(pos_profile="Counter")
+
+    assert result["pos_opening_entry"] is None
+    assert len(frappe.lookups) == 2
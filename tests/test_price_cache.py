@@ -0,0 +1,184 @@
+import importlib
+import pickle
+import sys
+import types
+
+import pytest
+
+
+class Row(dict):
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+
+class FakePipeline:
+    """Raw redis-py pipeline: keys arrive prefixed and values already pickled."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.commands = []
+
+    def hset(self, name, mapping):
+        self.commands.append((name, mapping))
+
+    def expire(self, name, seconds):
+        self.cache.ttls[name] = seconds
+
+    def execute(self):
+        for name, mapping in self.commands:
+            self.cache.hashes.setdefault(name, {}).update(mapping)
+        self.cache.round_trips += 1
+        return [len(mapping) for _name, mapping in self.commands]
+
+
+class FakeRedis:
+    """Stores hash values pickled, like frappe's RedisWrapper."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(self.make_key(name), {})[key] = pickle.dumps(value)
+
+    def hget(self, name, key):
+        raw = self.hashes.get(self.make_key(name), {}).get(key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def hmget(self, name, keys):
+        bucket = self.hashes.get(name, {})
+        return [bucket.get(key) for key in keys]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def hdel(self, name, key):
+        self.hashes.get(self.make_key(name), {}).pop(key, None)
+
+    def delete_key(self, name):
+        self.hashes.pop(self.make_key(name), None)
+
+
+PRICES = [
+    Row(price_list="Retail", item_code="COFFEE", price_list_rate=20000, currency="IDR"),
+    Row(price_list="Retail", item_code="TEA", price_list_rate=15000, currency="IDR"),
+]
+
+ITEMS = {"COFFEE", "TEA", "CAKE"}
+PRICE_LISTS = {"Retail": 1, "Old Menu": 0}
+
+
+@pytest.fixture
+def price_cache():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe.local = types.SimpleNamespace()
+    frappe.queries = []
+    redis = FakeRedis()
+    frappe.cache = lambda: redis
+
+    def get_all(doctype, filters=None, fields=None, pluck=None, **kwargs):
+        if doctype == "Item":
+            return [name for name in filters["name"][1] if name in ITEMS]
+        frappe.queries.append(sorted(filters["item_code"][1]))
+        return [
+            Row(row) for row in PRICES
+            if row.price_list == filters["price_list"] and row.item_code in filters["item_code"][1]
+        ]
+
+    frappe.get_all = get_all
+    frappe.get_cached_value = lambda doctype, name, field: PRICE_LISTS.get(name)
+    frappe.db = types.SimpleNamespace(after_commit=types.SimpleNamespace(add=lambda fn: None))
+
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.price_cache"):
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.price_cache")
+
+    yield frappe, module
+
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.price_cache"):
+        sys.modules.pop(name, None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_rates_are_loaded_once_including_missing_items(price_cache):
+    frappe, cache = price_cache
+
+    first = cache.get_cached_rates("Retail", ["COFFEE", "TEA", "CAKE"])
+    assert first == {"COFFEE": (20000, "IDR"), "TEA": (15000, "IDR")}
+    assert frappe.queries == [["CAKE", "COFFEE", "TEA"]]
+    assert frappe.cache().round_trips == 1
+
+    # New request in another worker: served from the shared hash in one HMGET
+    cache._price_list_caches.clear()
+    frappe.local = types.SimpleNamespace()
+    second = cache.get_cached_rates("Retail", ["TEA", "CAKE", "COFFEE"])
+
+    assert second == first
+    assert len(frappe.queries) == 1
+
+
+def test_item_price_change_refreshes_only_that_entry(price_cache):
+    frappe, cache = price_cache
+    cache.get_cached_rates("Retail", ["COFFEE", "TEA"])
+
+    PRICES[0]["price_list_rate"] = 22000
+    try:
+        cache.invalidate_item_price(Row(price_list="Retail", item_code="COFFEE"))
+        frappe.local = types.SimpleNamespace()
+        rates = cache.get_cached_rates("Retail", ["COFFEE", "TEA"])
+    finally:
+        PRICES[0]["price_list_rate"] = 20000
+
+    assert rates["COFFEE"] == (22000, "IDR")
+    assert frappe.queries[-1] == ["COFFEE"]
+
+
+def test_unknown_lists_and_items_are_not_cached(price_cache):
+    frappe, cache = price_cache
+
+    assert cache.get_cached_rates("no-such-list", ["COFFEE"]) == {}
+    assert frappe.queries == []
+    assert cache.get_cached_rates("Old Menu", ["COFFEE"]) == {}
+    assert list(cache._price_list_caches) == []
+
+    cache.get_cached_rates("Retail", ["CAKE", "GUEST-JUNK"])
+    shared = frappe.cache().hashes["site:imogi_pos:price_list_rates:Retail"]
+    assert set(shared) == {"CAKE"}
+    assert frappe.cache().ttls["site:imogi_pos:price_list_rates:Retail"] == cache.PRICE_CACHE_TTL
+
+    # Unknown codes are looked up again rather than remembered
+    cache.get_cached_rates("Retail", ["GUEST-JUNK"])
+    assert frappe.queries[-1] == ["GUEST-JUNK"]
+
+
+def test_price_list_caches_are_bounded(price_cache):
+    frappe, cache = price_cache
+
+    for index in range(cache.PRICE_LIST_CACHE_COUNT + 5):
+        cache.get_price_list_cache(f"List {index}")
+
+    assert len(cache._price_list_caches) == cache.PRICE_LIST_CACHE_COUNT
+    assert "List 0" not in cache._price_list_caches
@@ -0,0 +1,109 @@
+import importlib
+import pickle
+import sys
+import types
+
+import pytest
+
+
+class FakePipeline:
+    """Raw redis-py pipeline: no key prefix, values returned as stored."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.commands = []
+
+    def hgetall(self, name):
+        self.commands.append(name)
+
+    def execute(self):
+        return [self.cache._raw_hgetall(name) for name in self.commands]
+
+
+class FakeCache:
+    """Mirrors RedisWrapper: wrapper methods prefix keys and pickle values,
+    raw redis commands (hincrby, delete, pipelines) take keys as given."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def hincrby(self, name, key, amount=1):
+        bucket = self.hashes.setdefault(name, {})
+        bucket[key] = bucket.get(key, 0) + amount
+        return bucket[key]
+
+    def _raw_hgetall(self, name):
+        return {key.encode(): str(value).encode() for key, value in self.hashes.get(name, {}).items()}
+
+    def hgetall(self, name):
+        return {key: pickle.loads(value) for key, value in self._raw_hgetall(self.make_key(name)).items()}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def delete(self, *names):
+        for name in names:
+            self.hashes.pop(name, None)
+
+    def delete_value(self, key):
+        self.hashes.pop(self.make_key(key), None)
+
+
+@pytest.fixture
+def trace_module():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe.conf = {}
+    frappe.session = types.SimpleNamespace(user="waiter@example.com")
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    sys.modules.pop("imogi_pos.utils.pricing_trace", None)
+    module = importlib.import_module("imogi_pos.utils.pricing_trace")
+
+    yield frappe, module
+
+    sys.modules.pop("imogi_pos.utils.pricing_trace", None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_applied_rules_are_counted_even_when_not_sampled(trace_module):
+    frappe, trace = trace_module
+    frappe.conf["imogi_pos_pricing_trace_sample_rate"] = 0
+
+    for _ in range(3):
+        trace.record_pricing_event("applied", item_code="COFFEE", pricing_rule="PR-HOT")
+    trace.record_pricing_event("error", item_code="CAKE", error="boom")
+
+    assert trace.get_rule_counters() == {"PR-HOT": 3}
+    events = trace.get_trace()
+    assert [event["event"] for event in events] == ["error"]
+    assert events[0]["error"] == "boom"
+    assert events[0]["user"] == "waiter@example.com"
+
+    trace.reset_trace(counters=True)
+    assert trace.get_trace() == []
+    assert trace.get_rule_counters() == {}
+
+
+def test_ring_buffer_keeps_newest_events(trace_module):
+    frappe, trace = trace_module
+    frappe.conf["imogi_pos_pricing_trace_sample_rate"] = 1
+
+    for index in range(trace.TRACE_BUFFER_SIZE + 10):
+        trace.record_pricing_event("applied", item_code=f"ITEM-{index}", pricing_rule="PR-1")
+
+    events = trace.get_trace(limit=trace.TRACE_BUFFER_SIZE * 2)
+    assert len(events) == trace.TRACE_BUFFER_SIZE
+    assert events[0]["item_code"] == f"ITEM-{trace.TRACE_BUFFER_SIZE + 9}"
+    assert trace.get_trace(limit=2)[1]["item_code"] == f"ITEM-{trace.TRACE_BUFFER_SIZE + 8}"
@@ -0,0 +1,179 @@
+import asyncio
+import base64
+import importlib
+import socket
+import sys
+import time
+import types
+
+import pytest
+
+
+class StandInPrinter:
+    """asyncio TCP server recording connections and received bytes."""
+
+    def __init__(self):
+        self.connections = 0
+        self.received = bytearray()
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                break
+            self.received.extend(chunk)
+        writer.close()
+
+    async def wait_for(self, size, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while len(self.received) < size and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@pytest.fixture
+def bridge_module():
+    sys.path.insert(0, ".")
+
+    class Flask:
+        def __init__(self, name):
+            pass
+
+        def route(self, *args, **kwargs):
+            return lambda fn: fn
+
+    flask = types.ModuleType("flask")
+    flask.Flask = Flask
+    flask.request = None
+    flask.jsonify = lambda *args, **kwargs: (args, kwargs)
+    flask_cors = types.ModuleType("flask_cors")
+    flask_cors.CORS = lambda app: None
+
+    names = ("flask", "flask_cors", "imogi_pos.utils.print_bridge")
+    saved = {name: sys.modules.get(name) for name in names}
+    sys.modules["flask"] = flask
+    sys.modules["flask_cors"] = flask_cors
+    sys.modules.pop("imogi_pos.utils.print_bridge", None)
+    module = importlib.import_module("imogi_pos.utils.print_bridge")
+
+    yield module
+
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+@pytest.fixture
+def refusing_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def _job(port, text, **extra):
+    job = {"printer_ip": "127.0.0.1", "printer_port": port, "data": base64.b64encode(text).decode()}
+    job.update(extra)
+    return job
+
+
+def test_jobs_share_one_queue_and_connection_per_printer(bridge_module):
+    async def scenario():
+        first, second = await StandInPrinter().start(), await StandInPrinter().start()
+        bridge = bridge_module.AsyncPrintBridge()
+
+        result = await bridge.print_batch([
+            _job(first.port, b"A;"), _job(second.port, b"X;"), _job(first.port, b"B;"),
+        ])
+        await first.wait_for(4)
+        await second.wait_for(2)
+
+        for device_queue in list(bridge.devices.values()):
+            await device_queue.shutdown()
+        await first.close()
+        await second.close()
+        return bridge, result, first, second
+
+    bridge, result, first, second = asyncio.run(scenario())
+
+    assert result["success"] is True
+    assert bytes(first.received) == b"A;B;"
+    assert bytes(second.received) == b"X;"
+    assert first.connections == 1
+    assert set(bridge.devices) == {
+        f"network:127.0.0.1:{first.port}", f"network:127.0.0.1:{second.port}"
+    }
+
+
+def test_batch_reports_bad_jobs_without_failing_the_rest(bridge_module, refusing_port):
+    async def scenario():
+        printer = await StandInPrinter().start()
+        bridge = bridge_module.AsyncPrintBridge()
+
+        result = await bridge.print_batch([
+            _job(printer.port, b"OK"),
+            _job("nine-one-hundred", b"BAD"),
+            "not a job",
+            _job(refusing_port, b"OFFLINE"),
+            _job(printer.port, b"", interface="fax"),
+        ])
+        await printer.wait_for(2)
+
+        for device_queue in list(bridge.devices.values()):
+            await device_queue.shutdown()
+        await printer.close()
+        return result, printer
+
+    result, printer = asyncio.run(scenario())
+
+    outcomes = [entry["success"] for entry in result["results"]]
+    assert outcomes == [True, False, False, False, False]
+    assert result["success"] is False
+    assert "printer_port" in result["results"][1]["error"]
+    assert "refused" in result["results"][3]["error"]
+    assert bytes(printer.received) == b"OK"
+
+
+def test_print_job_validates_input(bridge_module):
+    async def scenario():
+        bridge = bridge_module.AsyncPrintBridge()
+        return [
+            await bridge.print_job(["raw"]),
+            await bridge.print_job(_job(70000, b"X")),
+            await bridge.print_job({"interface": "usb", "data": "QQ=="}),
+            await bridge.print_job(_job(9100, b"X", data="***")),
+        ]
+
+    statuses = [status for _result, status in asyncio.run(scenario())]
+
+    assert statuses == [400, 400, 400, 400]
+
+
+def test_idle_device_queues_are_pruned(bridge_module):
+    async def scenario():
+        bridge = bridge_module.AsyncPrintBridge()
+        stale = bridge._get_queue({"printer_ip": "10.0.0.1"})
+        stale.last_used -= bridge_module.ASYNC_DEVICE_PRUNE_SECONDS + 1
+
+        fresh = bridge._get_queue({"printer_ip": "10.0.0.2"})
+        await asyncio.sleep(0)
+        await fresh.shutdown()
+        return bridge, stale
+
+    bridge, stale = asyncio.run(scenario())
+
+    assert list(bridge.devices) == ["network:10.0.0.2:9100"]
+    assert stale.worker.cancelled()
@@ -0,0 +1,227 @@
+import importlib
+import socket
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.sets = {}
+
+    def set_value(self, key, value, expires_in_sec=None):
+        self.values[key] = value
+
+    def get_value(self, key):
+        return self.values.get(key)
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def lpop(self, key):
+        items = self.lists.get(key) or []
+        return items.pop(0) if items else None
+
+    def llen(self, key):
+        return len(self.lists.get(key) or [])
+
+    def sadd(self, key, *values):
+        self.sets.setdefault(key, set()).update(values)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def srem(self, key, *values):
+        self.sets.get(key, set()).difference_update(values)
+
+
+class StandInPrinter:
+    """Local TCP server that records received bytes and accepted connections."""
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(5)
+        self.port = self.server.getsockname()[1]
+        self.connections = 0
+        self.received = bytearray()
+        self.accepted = []
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _addr = self.server.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.connections += 1
+                self.accepted.append(conn)
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        with conn:
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    return
+                with self.lock:
+                    self.received.extend(chunk)
+
+    def wait_for(self, size, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if len(self.received) >= size:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def hang_up(self):
+        """Close every accepted connection from the printer side."""
+        with self.lock:
+            for conn in self.accepted:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def close(self):
+        self.server.close()
+
+
+@pytest.fixture
+def spooler_module():
+    sys.path.insert(0, ".")
+
+    utils = types.ModuleType("frappe.utils")
+    utils.now = lambda: "2024-01-01 10:00:00"
+
+    frappe = types.ModuleType("frappe")
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+    frappe.session = types.SimpleNamespace(user="cashier@example.com")
+    frappe.enqueued = []
+    frappe.enqueue = lambda method, **kw: frappe.enqueued.append((method, kw))
+    counter = iter(range(1, 1000))
+    frappe.generate_hash = lambda length=10: f"job-{next(counter)}"
+    frappe.logger = lambda name=None: types.SimpleNamespace(warning=lambda *a, **k: None)
+    frappe.utils = utils
+
+    sys.modules["frappe"] = frappe
+    sys.modules["frappe.utils"] = utils
+
+    mod = importlib.import_module("imogi_pos.utils.print_spooler")
+    importlib.reload(mod)
+    mod.RETRY_BACKOFF_SECONDS = 0
+
+    printer = StandInPrinter()
+
+    yield mod, frappe, cache, printer
+
+    mod.close_printer_connections()
+    printer.close()
+    sys.modules.pop("frappe", None)
+    sys.modules.pop("frappe.utils", None)
+    sys.modules.pop("imogi_pos.utils.print_spooler", None)
+    sys.path.remove(".")
+
+
+def test_enqueue_returns_job_id_without_touching_printer(spooler_module):
+    mod, frappe, cache, printer = spooler_module
+
+    result = mod.enqueue_lan_print_job("127.0.0.1", printer.port, b"RECEIPT", copies=2)
+
+    assert result["success"] is True
+    assert result["job_id"] == "job-1"
+    assert mod.get_print_job_status("job-1")["status"] == "Queued"
+    assert printer.connections == 0
+    method, kwargs = frappe.enqueued[0]
+    assert method == "imogi_pos.utils.print_spooler.drain_printer_queue"
+    assert kwargs["job_id"] == f"imogi_pos_print_spool::127.0.0.1:{printer.port}"
+    assert kwargs["deduplicate"] is True
+
+
+def test_drain_reuses_one_connection_for_burst(spooler_module):
+    mod, frappe, cache, printer = spooler_module
+
+    for idx in range(5):
+        mod.enqueue_lan_print_job("127.0.0.1", printer.port, f"KOT-{idx};".encode())
+
+    processed = mod.drain_printer_queue("127.0.0.1", printer.port, idle_wait=0)
+
+    assert processed == 5
+    expected = b"".join(f"KOT-{idx};".encode() for idx in range(5))
+    assert printer.wait_for(len(expected))
+    assert bytes(printer.received) == expected
+    assert printer.connections == 1
+    assert all(
+        mod.get_print_job_status(f"job-{idx}")["status"] == "Printed" for idx in range(1, 6)
+    )
+
+
+def test_enqueue_rejects_when_queue_full(spooler_module):
+    mod, frappe, cache, printer = spooler_module
+    mod.MAX_QUEUE_LENGTH = 2
+
+    mod.enqueue_lan_print_job("127.0.0.1", printer.port, b"A")
+    mod.enqueue_lan_print_job("127.0.0.1", printer.port, b"B")
+    result = mod.enqueue_lan_print_job("127.0.0.1", printer.port, b"C")
+
+    assert result["success"] is False
+    assert result["queued"] is False
+
+
+@pytest.fixture
+def refusing_port():
+    """A port that is bound but not listening, so connects are refused."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def test_drain_marks_job_failed_after_retries(spooler_module, refusing_port):
+    mod, frappe, cache, printer = spooler_module
+
+    job = mod.enqueue_lan_print_job("127.0.0.1", refusing_port, b"LOST")
+    mod.drain_printer_queue("127.0.0.1", refusing_port, idle_wait=0)
+
+    status = mod.get_print_job_status(job["job_id"])
+    assert status["status"] == "Failed"
+    assert "refused" in status["error"].lower()
+    assert status["details"][0]["attempts"] == mod.MAX_SEND_ATTEMPTS
+    assert status["owner"] == "cashier@example.com"
+
+
+def test_unpooled_send_closes_its_socket(spooler_module):
+    mod, frappe, cache, printer = spooler_module
+
+    result = mod.send_with_retry("127.0.0.1", printer.port, b"TEST", attempts=1, pooled=False)
+
+    assert result["success"] is True
+    assert printer.wait_for(4)
+    assert mod._connections == {}
+
+
+def test_connection_closed_by_printer_is_reopened(spooler_module):
+    mod, frappe, cache, printer = spooler_module
+
+    assert mod.send_with_retry("127.0.0.1", printer.port, b"ONE", attempts=1)["success"]
+    assert printer.wait_for(3)
+
+    printer.hang_up()
+    time.sleep(0.05)
+    result = mod.send_with_retry("127.0.0.1", printer.port, b"TWO", attempts=1)
+
+    assert result["success"] is True
+    assert printer.wait_for(6)
+    assert bytes(printer.received) == b"ONETWO"
+    assert printer.connections == 2
@@ -0,0 +1,27 @@
+import pytest
+
+from tests.benchmark_harness import CI_SCALE, QUERY_BUDGETS, SCENARIOS, format_report, run_scenario
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_hot_path_stays_within_query_budget(scenario):
+    result = run_scenario(scenario, **CI_SCALE)
+
+    assert result["queries"] <= QUERY_BUDGETS[scenario], format_report([result])
+
+
+def test_catalog_query_count_does_not_grow_with_catalog_size():
+    small = run_scenario("get_pos_items", items=200, open_orders=10, kots=10)
+    large = run_scenario("get_pos_items", items=5000, open_orders=10, kots=10)
+
+    # get_pos_items returns one page of at most 1000 items
+    assert len(large["result"]) == 1000
+    assert large["queries"] == small["queries"]
+
+
+def test_counting_db_reports_per_doctype_breakdown():
+    result = run_scenario("get_kots_for_kitchen", items=50, open_orders=5, kots=20)
+
+    assert len(result["result"]) == 20
+    assert result["by_doctype"] == {"get_all KOT Item": 20, "get_all KOT Ticket": 1}
+    assert result["db_ms"] == pytest.approx(result["queries"] * 0.5)
@@ -0,0 +1,198 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class RateLimitExceededError(Exception):
+    pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.round_trips = 0
+
+    def make_key(self, key):
+        return f"site|{key}"
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def decr(self, key):
+        self.round_trips += 1
+        self.values[key] = self.values.get(key, 0) - 1
+        return self.values[key]
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        values = self.redis.values
+        results = []
+        for name, args in self.commands:
+            if name == "incr":
+                values[args[0]] = values.get(args[0], 0) + 1
+                results.append(values[args[0]])
+            elif name == "get":
+                results.append(values.get(args[0]))
+            elif name == "hincrby":
+                bucket = values.setdefault(args[0], {})
+                bucket[args[1].encode()] = bucket.get(args[1].encode(), 0) + args[2]
+                results.append(bucket[args[1].encode()])
+            elif name == "hgetall":
+                results.append(dict(values.get(args[0], {})))
+            else:
+                results.append(True)
+        return results
+
+
+@pytest.fixture
+def security(monkeypatch):
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe._ = lambda text: text
+    frappe.RateLimitExceededError = RateLimitExceededError
+    frappe.local = types.SimpleNamespace(request_ip="10.0.0.1")
+    frappe.session = types.SimpleNamespace(user="Guest")
+    frappe.conf = {}
+    frappe.request = None
+    frappe.form_dict = {}
+    redis = FakeRedis()
+    frappe.cache = lambda: redis
+
+    def throw(message, exc=Exception):
+        raise exc(message)
+
+    frappe.throw = throw
+
+    saved = sys.modules.get("frappe")
+    sys.modules["frappe"] = frappe
+    sys.modules.pop("imogi_pos.utils.security", None)
+    module = importlib.import_module("imogi_pos.utils.security")
+    clock = {"now": 1_000_020.0}
+    monkeypatch.setattr(module.time, "time", lambda: clock["now"])
+
+    yield frappe, module, redis, clock
+
+    sys.modules.pop("imogi_pos.utils.security", None)
+    if saved is None:
+        sys.modules.pop("frappe", None)
+    else:
+        sys.modules["frappe"] = saved
+    sys.path.remove(".")
+
+
+def test_limit_is_enforced_in_one_round_trip_per_request(security):
+    frappe, module, redis, clock = security
+
+    @module.rate_limit(max_requests=3, window_seconds=60)
+    def endpoint():
+        return "ok"
+
+    assert [endpoint() for _i in range(3)] == ["ok"] * 3
+    assert redis.round_trips == 3
+
+    with pytest.raises(RateLimitExceededError):
+        endpoint()
+    assert module.get_rate_limit_rejections(hours=1) == {"default": 1}
+
+
+def test_window_slides_instead_of_extending(security):
+    frappe, module, redis, clock = security
+
+    @module.rate_limit(policy="self_order_submit", max_requests=lambda pos_profile: 4)
+    def submit(pos_profile):
+        return pos_profile
+
+    for _i in range(4):
+        submit("Kiosk")
+    with pytest.raises(RateLimitExceededError):
+        submit("Kiosk")
+
+    # Half of the previous window still counts: 4 * 0.5 = 2 requests, the
+    # rejected fifth one is not counted
+    clock["now"] += 90
+    submit("Kiosk")
+    submit("Kiosk")
+    with pytest.raises(RateLimitExceededError):
+        submit("Kiosk")
+
+    # Hammering while blocked does not push the window forward
+    clock["now"] += 60
+    assert submit("Kiosk") == "Kiosk"
+
+
+def test_site_config_overrides_policy(security):
+    frappe, module, redis, clock = security
+    frappe.conf = {"imogi_rate_limits": {"catalog": {"limit": 1}}}
+
+    @module.rate_limit(policy="catalog")
+    def get_item_price():
+        return 1
+
+    get_item_price()
+    with pytest.raises(RateLimitExceededError):
+        get_item_price()
+
+
+def test_guests_behind_one_ip_get_their_own_catalog_budget(security):
+    frappe, module, redis, clock = security
+    frappe.conf = {"imogi_rate_limits": {"catalog": {"limit": 5}, "catalog_ip": {"limit": 60}}}
+
+    sessions = types.ModuleType("imogi_pos.utils.self_order_sessions")
+    sessions.get_session = lambda token=None, slug=None: (
+        types.SimpleNamespace(name=f"SESSION-{token}") if token.startswith("T") else None
+    )
+    saved = sys.modules.get("imogi_pos.utils.self_order_sessions")
+    sys.modules["imogi_pos.utils.self_order_sessions"] = sessions
+
+    @module.rate_limit(policy="catalog", key_func=module.client_rate_limit_key, ip_policy="catalog_ip")
+    def get_item_price():
+        return 1
+
+    def call_as(headers=None, form=None):
+        frappe.request = types.SimpleNamespace(headers=headers or {})
+        frappe.form_dict = form or {}
+        return get_item_price()
+
+    try:
+        # Ten tables on the venue Wi-Fi, five menu requests each
+        for table in range(10):
+            for _i in range(5):
+                assert call_as({"X-Self-Order-Token": f"T{table}"}) == 1
+        with pytest.raises(RateLimitExceededError):
+            call_as({"X-Self-Order-Token": "T0"})
+
+        # Kiosks identify themselves by device id
+        for _i in range(5):
+            call_as(form={"device_id": "kiosk-1"})
+        with pytest.raises(RateLimitExceededError):
+            call_as(form={"device_id": "kiosk-1"})
+
+        # Unknown tokens fall back to the shared IP key
+        for _i in range(5):
+            call_as({"X-Self-Order-Token": "forged"})
+        with pytest.raises(RateLimitExceededError):
+            call_as({"X-Self-Order-Token": "forged-too"})
+
+        # The 60 accepted requests used up the per-IP ceiling, so rotating
+        # device ids gets nowhere
+        with pytest.raises(RateLimitExceededError):
+            call_as({"X-Device-Id": "rotating-1"})
+    finally:
+        if saved is None:
+            sys.modules.pop("imogi_pos.utils.self_order_sessions", None)
+        else:
+            sys.modules["imogi_pos.utils.self_order_sessions"] = saved
+
+    assert module.get_rate_limit_rejections(hours=1) == {"catalog": 3, "catalog_ip": 1}
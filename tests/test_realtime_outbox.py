@@ -0,0 +1,105 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class Callbacks(list):
+    def add(self, fn):
+        self.append(fn)
+
+    def run(self):
+        while self:
+            self.pop(0)()
+
+
+class Row(types.SimpleNamespace):
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+@pytest.fixture
+def publisher():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe._ = lambda text: text
+    frappe.local = types.SimpleNamespace()
+    frappe.sent = []
+    frappe.publish_realtime = lambda event, message, room=None, **kwargs: frappe.sent.append(
+        (event, room, message)
+    )
+    frappe.utils = types.SimpleNamespace(now=lambda: "2026-01-01 13:00:00")
+    frappe.db = types.SimpleNamespace(after_commit=Callbacks(), after_rollback=Callbacks())
+    realtime = types.ModuleType("frappe.realtime")
+    realtime.get_doc_room = lambda doctype, docname: f"site:doc:{doctype}/{docname}"
+
+    modules = ("imogi_pos.utils.realtime_outbox", "imogi_pos.utils.kot_publisher")
+    saved = {name: sys.modules.get(name) for name in ("frappe", "frappe.realtime")}
+    sys.modules["frappe"] = frappe
+    sys.modules["frappe.realtime"] = realtime
+    for name in modules:
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.utils.kot_publisher")
+
+    yield frappe, module.KOTPublisher
+
+    for name in modules:
+        sys.modules.pop(name, None)
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+def _ticket(name, table="T1"):
+    return Row(
+        name=name, kitchen="Main", kitchen_station="Grill", branch="BR-1",
+        table=table, floor="F1", workflow_state="In Progress",
+    )
+
+
+def test_bulk_kitchen_update_sends_one_message_per_entity_after_commit(publisher):
+    frappe, KOTPublisher = publisher
+    ticket = _ticket("KOT-1")
+
+    for index in range(50):
+        item = Row(name=f"ITEM-{index}", item="NASI-GORENG", workflow_state="Ready", parent="KOT-1")
+        KOTPublisher.publish_ticket_update(ticket, changed_items=[item])
+    KOTPublisher.publish_ticket_update(_ticket("KOT-2", table="T2"))
+
+    assert frappe.sent == []
+    frappe.db.after_commit.run()
+
+    # 50 updates of KOT-1 merge into one message per channel; KOT-2 stays separate
+    by_channel = {}
+    for event, room, message in frappe.sent:
+        by_channel.setdefault((event, room), []).append(message)
+    assert sorted(by_channel) == [
+        ("kitchen:Main", "site:doc:Kitchen/Main"),
+        ("kitchen:station:Grill", "site:doc:Kitchen Station/Grill"),
+        ("table:T1", "site:doc:Restaurant Table/T1"),
+        ("table:T2", "site:doc:Restaurant Table/T2"),
+        ("table_display:floor:F1", "site:doc:Restaurant Floor/F1"),
+    ]
+
+    station = by_channel[("kitchen:station:Grill", "site:doc:Kitchen Station/Grill")]
+    assert [message["ticket"] for message in station] == ["KOT-1", "KOT-2"]
+    assert len(station[0]["changed_items"]) == 50
+    assert "updates" not in station[0]
+
+    floor = by_channel[("table_display:floor:F1", "site:doc:Restaurant Floor/F1")]
+    assert [message["table"] for message in floor] == ["T1", "T2"]
+
+
+def test_rollback_drops_queued_messages(publisher):
+    frappe, KOTPublisher = publisher
+
+    KOTPublisher.publish_ticket_update(_ticket("KOT-1"))
+    frappe.db.after_rollback.run()
+    frappe.db.after_commit.clear()
+
+    assert frappe.sent == []
@@ -0,0 +1,161 @@
+import importlib
+import pickle
+import sys
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+
+class Row(dict):
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def make_key(self, key):
+        return f"site|{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode()
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def hset(self, name, key, value):
+        self.values.setdefault(self.make_key(name), {})[key.encode()] = pickle.dumps(value)
+
+    def hgetall(self, name):
+        return {key: pickle.loads(value) for key, value in self.values.get(self.make_key(name), {}).items()}
+
+    def rename(self, src, dst):
+        if src not in self.values:
+            raise Exception("no such key")
+        self.values[dst] = self.values.pop(src)
+
+    def delete_key(self, name):
+        self.values.pop(self.make_key(name), None)
+
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def sessions():
+    sys.path.insert(0, ".")
+
+    rows = {
+        "TOKEN-1": Row(name="TOKEN-1", token="TOKEN-1", slug="aB3dE5fG", branch="Main", table="T1",
+                       pos_profile="Dine In", order_linkage=None, expires_on=NOW + timedelta(hours=1),
+                       is_guest=1, last_ip=None, user_agent=None),
+    }
+
+    frappe = types.ModuleType("frappe")
+    frappe._dict = Row
+    frappe.lookups = []
+    frappe.writes = []
+    redis = FakeRedis()
+    frappe.cache = lambda: redis
+
+    def get_value(doctype, filters, fields, as_dict=False):
+        frappe.lookups.append(dict(filters))
+        field, value = next(iter(filters.items()))
+        for row in rows.values():
+            if row[field] == value:
+                return Row({name: row.get(name) for name in fields})
+        return None
+
+    def set_value(doctype, name, values, update_modified=True):
+        frappe.writes.append((name, dict(values)))
+
+    frappe.db = types.SimpleNamespace(get_value=get_value, set_value=set_value, commit=lambda: None)
+
+    utils = types.ModuleType("frappe.utils")
+    utils.now_datetime = lambda: NOW
+    utils.get_datetime = lambda value: value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+    saved = {name: sys.modules.get(name) for name in ("frappe", "frappe.utils")}
+    sys.modules["frappe"] = frappe
+    sys.modules["frappe.utils"] = utils
+    sys.modules.pop("imogi_pos.utils.self_order_sessions", None)
+    module = importlib.import_module("imogi_pos.utils.self_order_sessions")
+
+    yield frappe, module
+
+    sys.modules.pop("imogi_pos.utils.self_order_sessions", None)
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+def test_token_and_slug_are_served_from_cache(sessions):
+    frappe, module = sessions
+
+    first = module.get_session(token="TOKEN-1")
+    by_token = module.get_session(token="TOKEN-1")
+    by_slug = module.get_session(slug="aB3dE5fG")
+
+    assert len(frappe.lookups) == 1
+    assert by_token.table == "T1"
+    assert by_slug.name == first.name == "TOKEN-1"
+    assert module.get_session(token="UNKNOWN") is None
+
+
+def test_scans_are_written_once_per_session_per_flush(sessions):
+    frappe, module = sessions
+    session = module.get_session(token="TOKEN-1")
+
+    for index in range(300):
+        module.record_last_seen(session, f"10.0.0.{index % 5}", "Mobile Safari")
+
+    assert frappe.writes == []
+    assert module.flush_session_last_seen() == 1
+    assert frappe.writes == [("TOKEN-1", {"last_ip": "10.0.0.4", "user_agent": "Mobile Safari"})]
+
+    assert module.flush_session_last_seen() == 0
+
+
+def test_batch_left_by_a_failed_flush_is_not_lost(sessions):
+    frappe, module = sessions
+    session = module.get_session(token="TOKEN-1")
+    module.record_last_seen(session, "10.0.0.1", "Mobile Safari")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    write = frappe.db.set_value
+    frappe.db.set_value = fail
+    with pytest.raises(RuntimeError):
+        module.flush_session_last_seen()
+    frappe.db.set_value = write
+
+    module.record_last_seen({"name": "TOKEN-2"}, "10.0.0.2", "Chrome")
+
+    assert module.flush_session_last_seen() == 2
+    assert frappe.writes == [
+        ("TOKEN-1", {"last_ip": "10.0.0.1", "user_agent": "Mobile Safari"}),
+        ("TOKEN-2", {"last_ip": "10.0.0.2", "user_agent": "Chrome"}),
+    ]
+    assert module.flush_session_last_seen() == 0
+
+
+def test_saving_a_session_drops_it_from_cache(sessions):
+    frappe, module = sessions
+    module.get_session(token="TOKEN-1")
+
+    module.invalidate_session(Row(token="TOKEN-1", slug="aB3dE5fG"))
+    module.get_session(slug="aB3dE5fG")
+
+    assert len(frappe.lookups) == 2
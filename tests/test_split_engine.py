@@ -0,0 +1,226 @@
+import importlib
+import sys
+import types
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+
+
+class Row(dict):
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+class Doc(types.SimpleNamespace):
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+class ValidationError(Exception):
+    pass
+
+
+class StubInvoice(Row):
+    def append(self, field, value):
+        self.setdefault(field, []).append(value)
+
+    def set_missing_values(self):
+        pass
+
+    def calculate_taxes_and_totals(self):
+        self.net_total = sum(row["qty"] * row["rate"] for row in self["items"])
+
+    def insert(self):
+        self.log.append("insert")
+        self.name = f"SINV-{len([e for e in self.log if e == 'insert'])}"
+
+    def submit(self):
+        self.log.append("submit")
+
+
+@pytest.fixture
+def split_engine():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe._ = lambda text: text
+    frappe._dict = Row
+    frappe.ValidationError = ValidationError
+    frappe.session = types.SimpleNamespace(user="cashier@example.com")
+    frappe.log = []
+    frappe.order_version = 5
+
+    def throw(message, exc=ValidationError):
+        raise exc(message)
+
+    frappe.throw = throw
+    frappe.invoices = []
+
+    def new_doc(doctype):
+        frappe.invoices.append(StubInvoice(doctype=doctype, log=frappe.log))
+        return frappe.invoices[-1]
+
+    frappe.new_doc = new_doc
+    frappe.tax_template = None
+    frappe.get_cached_doc = lambda doctype, name: Row(
+        name=name, company="IMOGI", customer="Walk-in", update_stock=0, warehouse="Stores",
+        taxes_and_charges=frappe.tax_template and "Dine In Taxes", selling_price_list="Standard Selling",
+    )
+    frappe.get_all = lambda doctype, filters=None, fields=None: [
+        Row(name=code, item_name=code.title(), stock_uom="Nos") for code in filters["name"][1]
+    ]
+    frappe.defaults = types.SimpleNamespace(get_user_default=lambda key: "IMOGI")
+
+    header = Row(order_version=5, modified=None)
+
+    def sql(query, values=None):
+        if values["expected_version"] == frappe.order_version:
+            frappe.order_version += 1
+            header.update(order_version=frappe.order_version, modified=values["modified"])
+            frappe.log.append(("link", values["sales_invoice"]))
+
+    def get_value(doctype, name=None, fields=None, as_dict=False):
+        if doctype == "POS Order" and isinstance(fields, list):
+            return Row({field: header.get(field) for field in fields})
+        return None
+
+    frappe.db = types.SimpleNamespace(
+        sql=sql,
+        get_value=get_value,
+        savepoint=lambda name: frappe.log.append("savepoint"),
+        rollback=lambda save_point=None: frappe.log.append(("rollback", save_point)),
+    )
+
+    utils = types.ModuleType("frappe.utils")
+    utils.flt = lambda value, precision=None: round(float(value or 0), precision) if precision is not None else float(value or 0)
+    utils.cint = lambda value: int(value or 0)
+    utils.nowdate = lambda: "2026-01-01"
+    ticks = count()
+    utils.now_datetime = lambda: datetime(2026, 1, 1, 13, 0, 0) + timedelta(microseconds=next(ticks))
+    utils.get_datetime = lambda value=None: datetime(2026, 1, 1, 13, 0, 0)
+
+    accounts_controller = types.ModuleType("erpnext.controllers.accounts_controller")
+    accounts_controller.get_taxes_and_charges = lambda doctype, name: frappe.tax_template
+    stubs = {
+        "frappe": frappe,
+        "frappe.utils": utils,
+        "erpnext": types.ModuleType("erpnext"),
+        "erpnext.controllers": types.ModuleType("erpnext.controllers"),
+        "erpnext.controllers.accounts_controller": accounts_controller,
+    }
+
+    modules = (
+        "imogi_pos.utils.versioned_cache",
+        "imogi_pos.utils.item_master",
+        "imogi_pos.utils.order_version",
+        "imogi_pos.billing.invoice_builder",
+        "imogi_pos.billing.split_engine",
+    )
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    for name in modules:
+        sys.modules.pop(name, None)
+    module = importlib.import_module("imogi_pos.billing.split_engine")
+
+    yield frappe, module
+
+    for name in modules:
+        sys.modules.pop(name, None)
+    for name, saved_module in saved.items():
+        if saved_module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = saved_module
+    sys.path.remove(".")
+
+
+def _order():
+    return Doc(
+        name="ORD-1", pos_profile="Dine In", customer="Walk-in", branch="Main", table=None,
+        order_type="Dine-in", workflow_state="Served", sales_invoice=None, order_version=5,
+        items=[
+            Row(name="ROW-1", item="NASI-GORENG", qty=3, rate=35000, notes=""),
+            Row(name="ROW-2", item="ES-TEH", qty=2, rate=8000, notes=""),
+        ],
+    )
+
+
+def test_plan_reports_every_problem_at_once(split_engine):
+    frappe, module = split_engine
+
+    with pytest.raises(ValidationError) as error:
+        module.plan_split(_order(), [
+            {"items": [{"item_id": "ROW-1", "qty": 2}, {"item_id": "ROW-9"}]},
+            {"items": [{"item_id": "ROW-2", "qty": 3}]},
+        ])
+
+    message = str(error.value)
+    assert "ROW-9 is not a line" in message
+    assert "NASI-GORENG has 1.0 left to allocate" in message
+    assert "ES-TEH is over-allocated by 1.0" in message
+
+
+def test_three_way_split_of_one_line_gives_the_remainder_to_the_last_part(split_engine):
+    frappe, module = split_engine
+    order = _order()
+    order.items = [Row(name="ROW-1", item="PIZZA", qty=1, rate=90000, notes="")]
+    third = {"items": [{"item_id": "ROW-1", "qty": 0.333333}]}
+
+    parts = module.plan_split(order, [third, third, third])
+
+    assert [line["qty"] for part in parts for line in part["lines"]] == [0.333333, 0.333333, 0.333334]
+    assert sum(part["net_total"] for part in parts) == pytest.approx(90000)
+
+
+def test_split_builds_all_invoices_before_writing(split_engine):
+    frappe, module = split_engine
+
+    names = module.split_order(_order(), [
+        {"customer": "Guest A", "items": [{"item_id": "ROW-1", "qty": 2}]},
+        {"customer": "Guest B", "items": [{"item_id": "ROW-1", "qty": 1}, {"item_id": "ROW-2"}]},
+    ])
+
+    assert names == ["SINV-1", "SINV-2"]
+    assert frappe.log == ["savepoint", "insert", "insert", ("link", "SINV-1")]
+
+
+def test_concurrent_order_edit_rolls_the_split_back(split_engine):
+    frappe, module = split_engine
+    frappe.order_version = 6
+
+    with pytest.raises(ValidationError, match="was changed"):
+        module.split_order(_order(), [
+            {"items": [{"item_id": "ROW-1"}]},
+            {"items": [{"item_id": "ROW-2"}]},
+        ])
+
+    assert frappe.log[-1] == ("rollback", module.SPLIT_SAVEPOINT)
+
+
+def test_fixed_tax_rows_are_shared_across_parts(split_engine):
+    frappe, module = split_engine
+    frappe.tax_template = [
+        {"charge_type": "On Net Total", "account_head": "VAT", "rate": 11},
+        {"charge_type": "Actual", "account_head": "Service Charge", "tax_amount": 10000},
+    ]
+
+    # Net totals 70000, 35000 and 16000 out of 121000
+    module.split_order(_order(), [
+        {"items": [{"item_id": "ROW-1", "qty": 2}]},
+        {"items": [{"item_id": "ROW-1", "qty": 1}]},
+        {"items": [{"item_id": "ROW-2"}]},
+    ])
+
+    vat = [invoice["taxes"][0] for invoice in frappe.invoices]
+    service = [invoice["taxes"][1]["tax_amount"] for invoice in frappe.invoices]
+    assert vat == [frappe.tax_template[0]] * 3
+    assert service == [5785.12, 2892.56, 1322.32]
+    assert sum(service) == pytest.approx(10000)
+    assert frappe.tax_template[1]["tax_amount"] == 10000
@@ -0,0 +1,267 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+class DictNamespace(dict):
+    """Dictionary that also exposes keys as attributes."""
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as exc:
+            raise AttributeError(item) from exc
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def make_key(self, key):
+        return f"site:{key}"
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def hdel(self, name, key):
+        self.hashes.get(name, {}).pop(key, None)
+
+    def delete_key(self, name):
+        self.hashes.pop(name, None)
+
+
+ROWS = {
+    "Item Variant Attribute": [
+        DictNamespace(parent="PIZZA", parenttype="Item", attribute="Size", attribute_value=None,
+                      from_range=0, to_range=0, increment=0),
+        DictNamespace(parent="PIZZA", parenttype="Item", attribute="Crust", attribute_value=None,
+                      from_range=0, to_range=0, increment=0),
+        DictNamespace(parent="PIZZA-S-THIN", attribute="Size", attribute_value="Small"),
+        DictNamespace(parent="PIZZA-S-THIN", attribute="Crust", attribute_value="Thin"),
+        DictNamespace(parent="PIZZA-L-THICK", attribute="Size", attribute_value="Large"),
+        DictNamespace(parent="PIZZA-L-THICK", attribute="Crust", attribute_value="Thick"),
+    ],
+    "Item Attribute": [
+        DictNamespace(name="Size", attribute_name="Size", numeric_values=0),
+        DictNamespace(name="Crust", attribute_name="Crust Type", numeric_values=0),
+    ],
+    "Item Attribute Value": [
+        DictNamespace(parent="Size", attribute_value="Small", abbr="S"),
+        DictNamespace(parent="Size", attribute_value="Large", abbr="L"),
+        DictNamespace(parent="Crust", attribute_value="Thin", abbr="TN"),
+        DictNamespace(parent="Crust", attribute_value="Thick", abbr="TK"),
+    ],
+    "Item": [
+        DictNamespace(name="PIZZA-S-THIN", item_name="Small Thin", image=None, item_code="PIZZA-S-THIN",
+                      description=None, standard_rate=50000, stock_uom="Nos", menu_category="Pizza",
+                      default_kitchen="Main", default_kitchen_station="Oven"),
+        DictNamespace(name="PIZZA-L-THICK", item_name="Large Thick", image=None, item_code="PIZZA-L-THICK",
+                      description=None, standard_rate=0, stock_uom="Nos", menu_category="Pizza",
+                      default_kitchen="Main", default_kitchen_station="Oven"),
+    ],
+    "Item Price": [
+        DictNamespace(item_code="PIZZA-L-THICK", price_list="Standard", price_list_rate=90000, currency="IDR"),
+        DictNamespace(item_code="PIZZA-S-THIN", price_list="Delivery", price_list_rate=55000, currency="IDR"),
+    ],
+}
+
+
+def _matches(row, filters):
+    for field, condition in (filters or {}).items():
+        if field not in row:
+            continue
+        if isinstance(condition, list) and condition[0] == "in":
+            if row[field] not in condition[1]:
+                return False
+        elif row[field] != condition:
+            return False
+    return True
+
+
+@pytest.fixture
+def variant_env():
+    sys.path.insert(0, ".")
+
+    frappe = types.ModuleType("frappe")
+    frappe._ = lambda x: x
+    frappe._dict = DictNamespace
+    frappe.whitelist = lambda *a, **k: (lambda fn: fn)
+    frappe.ValidationError = type("ValidationError", (Exception,), {})
+    frappe.DoesNotExistError = type("DoesNotExistError", (Exception,), {})
+
+    def throw(msg, exc=None):
+        raise (exc or Exception)(msg)
+
+    frappe.throw = throw
+    frappe.local = types.SimpleNamespace()
+    frappe.form_dict = {}
+    frappe.queries = []
+    cache = FakeCache()
+    frappe.cache = lambda: cache
+
+    def get_all(doctype, filters=None, fields=None, order_by=None, **kwargs):
+        frappe.queries.append(doctype)
+        return [DictNamespace(row) for row in ROWS.get(doctype, []) if _matches(row, filters)]
+
+    def get_value(doctype, name, fieldname=None, as_dict=False):
+        frappe.queries.append(doctype)
+        if doctype == "Item" and name == "PIZZA":
+            return DictNamespace(has_variants=1, item_name="Pizza", image="/pizza.png", description="Pie")
+        if doctype == "Item" and fieldname == "variant_of":
+            return "PIZZA" if name.startswith("PIZZA-") else None
+        return None
+
+    frappe.get_all = get_all
+    frappe.db = types.SimpleNamespace(
+        get_value=get_value,
+        has_column=lambda *a: False,
+        after_commit=types.SimpleNamespace(add=lambda fn: None),
+    )
+
+    utils = types.ModuleType("frappe.utils")
+    utils.cint = lambda x: int(x or 0)
+    utils.flt = lambda x: float(x or 0)
+
+    api_pkg = types.ModuleType("imogi_pos.api")
+    api_pkg.__path__ = [str(Path(__file__).resolve().parents[1] / "imogi_pos" / "api")]
+
+    stubs = {
+        "frappe": frappe,
+        "imogi_pos.api": api_pkg,
+        "frappe.utils": utils,
+        "imogi_pos.api.billing": types.SimpleNamespace(get_bom_capacity_summary=lambda *a, **k: {}),
+        "imogi_pos.api.items": types.SimpleNamespace(_channel_matches=lambda *a, **k: True),
+        "imogi_pos.utils.permission_manager": types.SimpleNamespace(check_branch_access=lambda *a: None),
+    }
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.variant_matrix", "imogi_pos.api.variants"):
+        sys.modules.pop(name, None)
+    matrix = importlib.import_module("imogi_pos.utils.variant_matrix")
+    variants = importlib.import_module("imogi_pos.api.variants")
+
+    yield frappe, matrix, variants
+
+    for name in ("imogi_pos.utils.versioned_cache", "imogi_pos.utils.variant_matrix", "imogi_pos.api.variants"):
+        sys.modules.pop(name, None)
+    for name, module in saved.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+    sys.path.remove(".")
+
+
+def test_matrix_is_built_with_fixed_query_count(variant_env):
+    frappe, matrix, _variants = variant_env
+
+    data = matrix.build_variant_matrix("PIZZA")
+
+    assert len(frappe.queries) == 7
+    assert [attr["name"] for attr in data["attributes"]] == ["Size", "Crust"]
+    assert data["attributes"][1]["label"] == "Crust Type"
+    assert [value["abbr"] for value in data["attributes"][0]["values"]] == ["S", "L"]
+    key = matrix.make_attribute_key({"Crust": "Thick", "Size": "Large"})
+    assert data["variant_lookup"][key] == "PIZZA-L-THICK"
+    assert data["prices"]["Standard"]["PIZZA-L-THICK"] == (90000, "IDR")
+
+
+def test_get_item_variants_served_from_cache(variant_env):
+    frappe, _matrix, variants = variant_env
+
+    first = variants.get_item_variants("PIZZA", price_list="Delivery", base_price_list="Standard")
+    queries_after_first = len(frappe.queries)
+
+    frappe.local = types.SimpleNamespace()
+    second = variants.get_item_variants("PIZZA", price_list="Delivery", base_price_list="Standard")
+
+    assert len(frappe.queries) == queries_after_first
+    assert first == second
+
+    by_name = {variant["name"]: variant for variant in second["variants"]}
+    assert by_name["PIZZA-S-THIN"]["standard_rate"] == 55000
+    assert by_name["PIZZA-S-THIN"]["has_explicit_price_list_rate"] == 1
+    assert by_name["PIZZA-L-THICK"]["standard_rate"] == 90000
+    assert by_name["PIZZA-L-THICK"]["has_explicit_price_list_rate"] == 0
+    assert by_name["PIZZA-L-THICK"]["default_kitchen_station"] == "Oven"
+    assert by_name["PIZZA-L-THICK"]["attributes"] == {"Size": "Large", "Crust": "Thick"}
+
+
+def test_item_price_hook_invalidates_template(variant_env):
+    frappe, matrix, variants = variant_env
+
+    variants.get_item_variants("PIZZA", price_list="Standard")
+    ROWS["Item Price"].append(
+        DictNamespace(item_code="PIZZA-S-THIN", price_list="Standard", price_list_rate=45000, currency="IDR")
+    )
+    try:
+        matrix.invalidate_item_price_variant_matrix(DictNamespace(item_code="PIZZA-S-THIN"))
+        frappe.local = types.SimpleNamespace()
+        response = variants.get_item_variants("PIZZA", price_list="Standard")
+    finally:
+        ROWS["Item Price"].pop()
+
+    by_name = {variant["name"]: variant for variant in response["variants"]}
+    assert by_name["PIZZA-S-THIN"]["standard_rate"] == 45000
+
+
+def test_resolve_variant_is_a_lookup(variant_env):
+    frappe, matrix, _variants = variant_env
+
+    assert matrix.resolve_variant("PIZZA", {"Size": "Large", "Crust": "Thick", "Extra": "x"}) == "PIZZA-L-THICK"
+    queries_after_build = len(frappe.queries)
+
+    assert matrix.resolve_variant("PIZZA", {"Crust": "Thin", "Size": "Small"}) == "PIZZA-S-THIN"
+    assert matrix.resolve_variant("PIZZA", {"Size": "Small", "Crust": "Thick"}) is None
+    assert matrix.resolve_variant("PIZZA", {"Size": "Small"}) is None
+    assert matrix.get_missing_attributes("PIZZA", {"Size": "Small"}) == ["Crust"]
+    assert len(frappe.queries) == queries_after_build
+
+
+def test_resolve_variant_from_item_options(variant_env):
+    _frappe, matrix, _variants = variant_env
+
+    options = {
+        # linked_item on each group points at the first variant with that value
+        "size": [{"label": "Large", "value": "PIZZA-L-THICK", "linked_item": "PIZZA-L-THICK"}],
+        "crust": {"label": "Thick", "value": "PIZZA-L-THICK", "linked_item": "PIZZA-L-THICK"},
+        "price": 0,
+    }
+    assert matrix.resolve_variant_from_options("PIZZA", options) == "PIZZA-L-THICK"
+    assert matrix.resolve_variant_from_options("PIZZA", {"variant": {"linked_item": "X"}}) is None
+
+
+def test_catalog_rate_limit_only_applies_to_the_endpoint(variant_env, monkeypatch):
+    frappe, _matrix, variants = variant_env
+    security = sys.modules["imogi_pos.utils.security"]
+    frappe.RateLimitExceededError = type("RateLimitExceededError", (Exception,), {})
+    frappe.session = types.SimpleNamespace(user="Guest")
+    frappe.local.request_ip = "10.0.0.1"
+    monkeypatch.setattr(security, "frappe", frappe)
+    monkeypatch.setattr(security, "_get_rate_limit_policy", lambda *args: (1, 60))
+    monkeypatch.setattr(security, "_hit_rate_limit", lambda *args: False)
+    monkeypatch.setattr(security, "_count_rate_limit_rejection", lambda *args: None)
+
+    with pytest.raises(frappe.RateLimitExceededError):
+        variants.get_item_variants("PIZZA", price_list="Standard")
+
+    # Order, invoice and modifier code load variants without the limiter
+    assert variants.load_item_variants("PIZZA", price_list="Standard")["template"] == "PIZZA"